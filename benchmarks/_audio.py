@@ -0,0 +1,49 @@
+"""Synthetic audio shared by the benchmarks."""
+
+import numpy as np
+
+
+def synthetic_speech(seconds: float, sample_rate: int = 16000, seed: int = 0) -> np.ndarray:
+    """Return a voiced, amplitude-modulated signal with room noise as int16.
+
+    It only approximates the spectral shape of speech, so compression ratios
+    measured on it are indicative rather than representative.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    t = np.arange(n) / sample_rate
+    pitch = 140 + 20 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t) ** 2
+    samples = 5000 * envelope * voiced + rng.normal(0, 30, n)
+    return np.clip(samples, -32768, 32767).astype(np.int16)
+
+
+def silence(seconds: float, sample_rate: int = 16000, seed: int = 1) -> np.ndarray:
+    """Return low-level room noise as int16."""
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, 30, int(seconds * sample_rate)).astype(np.int16)
+
+
+def synthetic_word(
+    formants, stretch: float = 1.0, pitch: float = 120, amplitude: float = 4000,
+    sample_rate: int = 16000,
+) -> np.ndarray:
+    """Return a pseudo-word with one harmonic "syllable" per formant frequency."""
+    harmonics = np.arange(1, 40)
+    syllables = []
+    for formant in formants:
+        duration = 0.18 * stretch
+        t = np.arange(int(duration * sample_rate)) / sample_rate
+        weights = np.exp(-(((harmonics * pitch - formant) / 250.0) ** 2)) + 0.05 / harmonics
+        tone = (weights[:, None] * np.sin(2 * np.pi * pitch * harmonics[:, None] * t)).sum(0)
+        fade = np.minimum(1, np.minimum(t / 0.02, (duration - t) / 0.02))
+        syllables.append(tone * fade)
+    word = np.concatenate(syllables)
+    return word / np.abs(word).max() * amplitude
+
+
+def to_int16(*parts: np.ndarray) -> np.ndarray:
+    """Concatenate float parts into one clipped int16 signal."""
+    return np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16)
@@ -0,0 +1,268 @@
+"""Deterministic stand-ins for speech-to-text, the chat model and text-to-speech.
+
+Each stand-in waits for a latency drawn from a :class:`Latency`
+distribution and returns scripted output, so the whole graph can be run
+and timed without network access, API keys or an audio device. Every
+stand-in has its own seeded random generator, so a run with the same
+arguments draws the same latencies and makes the same tool calls.
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from benchmarks._audio import synthetic_speech
+from maltai_agent.audio import AudioProcessor
+
+TOOL_ARGS = {
+    "AddTodo": lambda i: {"task": f"task {i}"},
+    "upsert_memory": lambda i: {"content": f"fact {i}", "context": "benchmark"},
+    "UpdateProfile": lambda i: {"add_interests": [f"topic {i % 7}"]},
+    "UpdateInstructions": lambda i: {"instruction": f"rule {i}", "category": f"c{i % 3}"},
+}
+
+
+@dataclass(frozen=True)
+class Latency:
+    """A latency distribution, in milliseconds.
+
+    Written on the command line as ``kind:parameters``:
+
+    * ``fixed:300``: always 300 ms
+    * ``uniform:200,400``: uniform between 200 and 400 ms
+    * ``normal:300,50``: mean 300 ms, standard deviation 50 ms
+    * ``lognormal:300,0.3``: median 300 ms, sigma 0.3 of the underlying normal,
+      the usual shape of network and inference latencies
+    """
+
+    kind: str = "fixed"
+    """One of "fixed", "uniform", "normal" and "lognormal"."""
+    a: float = 0.0
+    """Fixed value, lower bound, mean or median, in ms."""
+    b: float = 0.0
+    """Upper bound, standard deviation in ms, or sigma."""
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        """Parse ``kind:a[,b]``; a bare number is a fixed latency."""
+        kind, _, params = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+        values = [float(value) for value in params.split(",")] if params else []
+        if kind not in ("fixed", "uniform", "normal", "lognormal") or not 1 <= len(values) <= 2:
+            raise ValueError(f"Invalid latency: {spec!r}")
+        return cls(kind, values[0], values[1] if len(values) > 1 else 0.0)
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw a latency in seconds; never negative."""
+        if self.kind == "uniform":
+            ms = rng.uniform(self.a, self.b)
+        elif self.kind == "normal":
+            ms = rng.gauss(self.a, self.b)
+        elif self.kind == "lognormal":
+            ms = self.a * rng.lognormvariate(0.0, self.b)
+        else:
+            ms = self.a
+        return max(ms, 0.0) / 1000
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{self.a:g}" + (f",{self.b:g}" if self.kind != "fixed" else "")
+
+
+class FakeWhisper:
+    """Speech-to-text stand-in that returns scripted utterances.
+
+    ``transcribe`` blocks for its latency like the synchronous Whisper API
+    client, ``atranscribe`` waits like the asyncio one.
+    """
+
+    def __init__(self, latency: Latency, seed: int = 0):
+        """Initialize the transcriber.
+
+        Args:
+            latency: Time one transcription takes
+            seed: Seed of the latency draws
+        """
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def transcribe(self, audio: Any, sample_rate: int) -> str:
+        """Wait and return the next scripted utterance."""
+        time.sleep(self.latency.sample(self.rng))
+        return self._text()
+
+    async def atranscribe(self, audio: Any, sample_rate: int) -> str:
+        """Wait without blocking, like the asyncio Whisper API client."""
+        await asyncio.sleep(self.latency.sample(self.rng))
+        return self._text()
+
+    def _text(self) -> str:
+        self.calls += 1
+        return f"Please remember item number {self.calls} for me."
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model stand-in that replies or calls tools after a drawn latency.
+
+    When tools are bound, a share of the turns (``tool_rate``) is answered
+    with one to ``max_tool_calls`` tool calls of mixed types; a turn ending
+    in tool results, and every call without tools (e.g. summaries), gets a
+    text reply.
+    """
+
+    latency: Latency = Latency()
+    """Time from the request to the complete response."""
+    tool_rate: float = 0.5
+    """Share of the user turns answered with tool calls."""
+    max_tool_calls: int = 3
+    """Most tool calls in one response."""
+    reply: str = "Sure. I have noted that down for you, and I will remind you later."
+    """Text of every reply."""
+    seed: int = 0
+    """Seed of the latency and tool call draws."""
+    tools_bound: bool = False
+    """Whether this instance was returned by :meth:`bind_tools`."""
+    _rng: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-chat-model"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ScriptedChatModel":
+        bound = self.model_copy(update={"tools_bound": True})
+        # Share the draws with the unbound model, so runs stay reproducible
+        bound._rng = self.rng
+        return bound
+
+    @property
+    def rng(self) -> random.Random:
+        if self._rng is None:
+            self._rng = random.Random(self.seed)
+        return self._rng
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        last = messages[-1] if messages else None
+        if self.tools_bound and isinstance(last, HumanMessage) and self.rng.random() < self.tool_rate:
+            names = list(TOOL_ARGS)
+            calls = []
+            for _ in range(self.rng.randint(1, self.max_tool_calls)):
+                i = self.rng.randrange(1_000_000)
+                name = names[i % len(names)]
+                calls.append({"name": name, "args": TOOL_ARGS[name](i), "id": f"call_{i}", "type": "tool_call"})
+            return AIMessage(content="", tool_calls=calls)
+        if isinstance(last, ToolMessage):
+            return AIMessage(content="Done, " + self.reply[0].lower() + self.reply[1:])
+        return AIMessage(content=self.reply)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency.sample(self.rng))
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency.sample(self.rng))
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+
+class FakeAudioProcessor(AudioProcessor):
+    """Audio processor with scripted capture, stand-in synthesis and simulated playback.
+
+    Capture returns a synthetic utterance right away (the time the user
+    speaks is not part of the agent's latency), which goes to the
+    transcriber. Synthesis waits for ``tts_latency`` and returns silence of
+    the length the sentence would take to speak; playback blocks its thread
+    for ``play_latency``.
+
+    With ``blocking``, the graph's coroutines call the blocking methods
+    directly, as the nodes did before they were made asynchronous, so both
+    can be compared under load.
+    """
+
+    def __init__(
+        self,
+        transcriber: FakeWhisper,
+        tts_latency: Latency,
+        seed: int = 0,
+        *,
+        play_latency: Latency = Latency(),
+        blocking: bool = False,
+        **kwargs: Any,
+    ):
+        """Initialize the processor.
+
+        Args:
+            transcriber: Speech-to-text stand-in
+            tts_latency: Time one synthesis takes
+            seed: Seed of the synthesis and playback latency draws
+            play_latency: Time one playback takes
+            blocking: Run capture, transcription, synthesis and playback on
+                the event loop's thread
+            **kwargs: Passed to :class:`AudioProcessor`
+        """
+        super().__init__(transcriber=transcriber, **kwargs)
+        self.tts_latency = tts_latency
+        self.play_latency = play_latency
+        self.blocking = blocking
+        self.rng = random.Random(seed)
+        self.utterance = synthetic_speech(1.5, self.sample_rate)
+        self.synthesized = 0
+
+    def _capture(self, endpointing: str) -> list[np.ndarray]:
+        return [self.utterance]
+
+    def _convert(self, text: str) -> bytes:
+        time.sleep(self.tts_latency.sample(self.rng))
+        return self._speech(text)
+
+    async def _aconvert(self, text: str) -> bytes:
+        await asyncio.sleep(self.tts_latency.sample(self.rng))
+        return self._speech(text)
+
+    def _speech(self, text: str) -> bytes:
+        self.synthesized += 1
+        # About 15 characters per second of 22.05 kHz 16-bit speech
+        return bytes(int(len(text) / 15 * 22050 * 2))
+
+    def _play(self, audio: bytes) -> None:
+        time.sleep(self.play_latency.sample(self.rng))
+
+    async def arecord_audio(self, *args: Any) -> HumanMessage:
+        if self.blocking:
+            return self.record_audio(*args)
+        return await super().arecord_audio(*args)
+
+    async def aspeak_response(self, text: str, *args: Any) -> None:
+        if self.blocking:
+            return self.speak_response(text, *args)
+        return await super().aspeak_response(text, *args)
+
+
+def percentiles(samples: Sequence[float]) -> dict[str, float]:
+    """Return p50, p95, p99 and the mean of ``samples``, in the samples' unit."""
+    if not len(samples):
+        return {"n": 0, "p50": float("nan"), "p95": float("nan"), "p99": float("nan"), "mean": float("nan")}
+    values = np.asarray(samples, dtype=float)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"n": len(values), "p50": float(p50), "p95": float(p95), "p99": float(p99), "mean": float(values.mean())}
+
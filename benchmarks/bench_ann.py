@@ -0,0 +1,90 @@
+"""Measure recall@10 and latency of the IVF index against exact search.
+
+Synthetic embeddings are unit vectors scattered around topic directions
+(long-lived users talk about a limited set of subjects), and queries are
+drawn from the same distribution. Recall@10 is the fraction of the exact
+top 10 that the index returns. Latencies are per query and include scoring
+the candidates; training time is reported separately.
+
+Run with ``python -m benchmarks.bench_ann``.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from maltai_agent.ann import ANNConfig, IVFIndex, exact_search
+
+
+def clustered(n: int, dims: int, topics: int, spread: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = np.random.default_rng(0).standard_normal((topics, dims))
+    vectors = centers[rng.integers(0, topics, n)] + spread * rng.standard_normal((n, dims))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def timed(search, queries: np.ndarray) -> tuple[list, float]:
+    results, times = [], []
+    for query in queries:
+        start = time.perf_counter()
+        rows, _ = search(query)
+        times.append(time.perf_counter() - start)
+        results.append(set(rows.tolist()))
+    return results, 1000 * float(np.median(times))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 200_000])
+    parser.add_argument("--dims", type=int, default=256)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--spread", type=float, default=1.5, help="Noise around each topic")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        matrix = clustered(n, args.dims, args.topics, args.spread, seed=1)
+        queries = clustered(args.queries, args.dims, args.topics, args.spread, seed=2)
+        rows = np.arange(n)
+        truth, exact_ms = timed(lambda q: exact_search(matrix, rows, q, 10), queries)
+        results.append({"items": n, "search": "exact", "recall_at_10": 1.0, "ms_p50": round(exact_ms, 3)})
+
+        index = IVFIndex(ANNConfig())
+        start = time.perf_counter()
+        index.train(matrix, rows)
+        train_s = time.perf_counter() - start
+        for n_probe in args.probes:
+            found, ms = timed(lambda q: index.search(matrix, q, 10, n_probe), queries)
+            recall = np.mean([len(f & t) / 10 for f, t in zip(found, truth)])
+            results.append(
+                {
+                    "items": n,
+                    "search": f"ivf n_probe={n_probe}",
+                    "recall_at_10": round(float(recall), 3),
+                    "ms_p50": round(ms, 3),
+                    "speedup": round(exact_ms / ms, 1),
+                    "train_s": round(train_s, 2),
+                }
+            )
+
+    header = f"{'items':>8} {'search':<18} {'recall@10':>10} {'ms p50':>8} {'speedup':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['items']:>8} {row['search']:<18} {row['recall_at_10']:>10} "
+            f"{row['ms_p50']:>8} {row.get('speedup', '-'):>8}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Compare recording capture and upload encoding paths.
+
+The legacy path mirrors the original ``record_audio``: every blocking
+``stream.read`` allocates a new chunk, chunks are kept in a list, joined with
+``np.concatenate`` and written as an uncompressed WAV. The new path copies
+each device block once into a :class:`CaptureBuffer` and encodes the upload
+as WAV, FLAC or Opus-in-Ogg.
+
+Run with ``python -m benchmarks.bench_capture``.
+"""
+
+import argparse
+import io
+import json
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.io.wavfile import write
+
+from benchmarks._audio import synthetic_speech
+from maltai_agent.capture import CaptureBuffer, encode_upload
+
+SAMPLE_RATE = 16000
+BLOCK = 1024
+
+
+def legacy_path(source: np.ndarray) -> tuple[io.BytesIO, int]:
+    """Capture and encode like the original implementation."""
+    copied = 0
+    audio_data = []
+    for start in range(0, len(source), BLOCK):
+        # stream.read() returns a freshly allocated (frames, 1) array
+        chunk = source[start : start + BLOCK].reshape(-1, 1).copy()
+        copied += chunk.nbytes
+        audio_data.append(chunk)
+    audio_array = np.concatenate(audio_data, axis=0)
+    copied += audio_array.nbytes
+    audio_bytes = io.BytesIO()
+    write(audio_bytes, SAMPLE_RATE, audio_array)
+    copied += audio_array.nbytes
+    audio_bytes.seek(0)
+    return audio_bytes, copied
+
+
+def buffered_path(source: np.ndarray, upload_format: str) -> tuple[io.BytesIO, int]:
+    """Capture through a CaptureBuffer fed from the device callback."""
+    buffer = CaptureBuffer()
+    for start in range(0, len(source), BLOCK):
+        # The stream callback receives a view of the device buffer
+        buffer.append(source[start : start + BLOCK].reshape(-1, 1))
+    pieces = buffer.pieces()
+    copied = buffer.bytes_copied
+    upload = encode_upload(pieces, SAMPLE_RATE, upload_format)
+    if upload_format == "wav":
+        copied += sum(piece.nbytes for piece in pieces)
+    return upload, copied
+
+
+def measure(run, source: np.ndarray, repeat: int) -> dict:
+    """Time a capture path and record its peak memory and copies."""
+    tracemalloc.start()
+    upload, copied = run(source)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(source)
+        timings.append(time.perf_counter() - start)
+
+    seconds = len(source) / SAMPLE_RATE
+    return {
+        "peak_memory_kib": round(peak / 1024, 1),
+        "pcm_copies": round(copied / source.nbytes, 2),
+        "upload_bytes_per_s": round(len(upload.getvalue()) / seconds),
+        "time_ms": round(1000 * min(timings), 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=[5, 15, 30])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    paths = {"legacy (list + concat + wav)": legacy_path}
+    for upload_format in ("wav", "flac", "ogg"):
+        paths[f"buffer + {upload_format}"] = (
+            lambda source, upload_format=upload_format: buffered_path(source, upload_format)
+        )
+
+    results = []
+    for seconds in args.durations:
+        source = synthetic_speech(seconds, SAMPLE_RATE)
+        for name, run in paths.items():
+            try:
+                row = measure(run, source, args.repeat)
+            except ImportError as e:
+                print(f"skipping {name}: {e}")
+                continue
+            results.append({"seconds": seconds, "path": name, **row})
+
+    header = f"{'speech':>7} {'path':<28} {'peak KiB':>9} {'copies':>7} {'upload B/s':>11} {'ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['seconds']:>6.0f}s {row['path']:<28} {row['peak_memory_kib']:>9} "
+            f"{row['pcm_copies']:>7} {row['upload_bytes_per_s']:>11} {row['time_ms']:>8}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Compare bytes written per turn and resume time of long threads across checkpointers.
+
+A thread of ``--turns`` voice turns runs through a two-node graph: the
+user speaks a sentence and the agent answers, every ``--tool-every`` turns
+with a tool call and its result. Three checkpointers store it:
+
+* ``MemorySaver``: the saver the tests use. Every step serializes the whole
+  message list again. Bytes are what its serializer returns; it keeps
+  nothing across restarts, so resuming is loading the latest checkpoint
+  from the same process.
+* ``sqlite full snapshots``: :class:`SQLiteDeltaSaver` with
+  ``snapshot_every=0``, so every step writes the whole list, compressed.
+* ``sqlite deltas``: :class:`SQLiteDeltaSaver` with its defaults, writing
+  only the appended messages and a snapshot every 50 deltas.
+
+Bytes per turn count the checkpoint, metadata, channel values and pending
+writes; ``last turn`` shows how the cost grows with the thread. Resume
+time is loading the latest checkpoint of the thread, for the SQLite
+savers from a newly opened database as after a restart.
+
+Run with ``python -m benchmarks.bench_checkpoint``.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.graph import MessagesState, StateGraph
+
+from benchmarks._fakes import percentiles
+from maltai_agent.checkpoint import SQLiteDeltaSaver
+
+CONFIG = {"configurable": {"thread_id": "bench-thread"}}
+REQUESTS = [
+    "Add oat milk and two lemons to my shopping list.",
+    "What is on my calendar for Friday afternoon?",
+    "Remind me to call the dentist tomorrow at nine.",
+    "I prefer green tea in the morning, remember that.",
+]
+
+
+class CountingSerializer(JsonPlusSerializer):
+    """Serializer that adds up the bytes it produces."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.bytes = 0
+
+    def dumps_typed(self, obj):
+        kind, data = super().dumps_typed(obj)
+        self.bytes += len(data)
+        return kind, data
+
+
+def build(saver, tool_every: int):
+    def listen(state: MessagesState) -> dict:
+        turn = len([m for m in state["messages"] if isinstance(m, HumanMessage)])
+        return {"messages": [HumanMessage(REQUESTS[turn % len(REQUESTS)])]}
+
+    def answer(state: MessagesState) -> dict:
+        turn = len([m for m in state["messages"] if isinstance(m, HumanMessage)])
+        messages = []
+        if tool_every and turn % tool_every == 0:
+            call = {"name": "todo", "args": {"item": state["messages"][-1].content}, "id": f"call-{turn}"}
+            messages += [AIMessage("", tool_calls=[call]), ToolMessage("Added.", tool_call_id=call["id"])]
+        messages.append(AIMessage(f"Done, that is taken care of. Anything else for turn {turn}?"))
+        return {"messages": messages}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("listen", listen)
+    builder.add_node("answer", answer)
+    builder.add_edge("__start__", "listen")
+    builder.add_edge("listen", "answer")
+    return builder.compile(checkpointer=saver)
+
+
+def stored_bytes(saver: SQLiteDeltaSaver) -> int:
+    return sum(
+        saver.conn.execute(sql).fetchone()[0] or 0
+        for sql in (
+            "SELECT SUM(LENGTH(checkpoint) + LENGTH(metadata)) FROM checkpoints",
+            "SELECT SUM(LENGTH(value)) FROM blobs",
+            "SELECT SUM(LENGTH(value)) FROM writes",
+        )
+    )
+
+
+def run(name: str, saver, written, reopen, args: argparse.Namespace) -> dict:
+    """Run the thread, then time loading its latest checkpoint."""
+    graph = build(saver, args.tool_every)
+    turn_ms = []
+    before = 0
+    for _ in range(args.turns):
+        before = written()
+        start = time.perf_counter()
+        state = graph.invoke({"messages": []}, CONFIG)
+        turn_ms.append(1000 * (time.perf_counter() - start))
+    total, last = written(), written() - before
+
+    resume_ms = []
+    for _ in range(args.resumes):
+        loader = reopen()
+        start = time.perf_counter()
+        checkpoint = loader.get_tuple(CONFIG).checkpoint
+        resume_ms.append(1000 * (time.perf_counter() - start))
+        assert len(checkpoint["channel_values"]["messages"]) == len(state["messages"])
+        if loader is not saver:
+            loader.close()
+    return {
+        "saver": name,
+        "bytes_per_turn": round(total / args.turns),
+        "last_turn_bytes": last,
+        "turn_ms_p50": round(percentiles(turn_ms)["p50"], 2),
+        "resume_ms_p50": round(percentiles(resume_ms)["p50"], 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=1000, help="Turns in the thread")
+    parser.add_argument("--tool-every", type=int, default=3, help="Every n-th answer calls a tool (0: never)")
+    parser.add_argument("--resumes", type=int, default=5, help="Times the thread is resumed")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = []
+    serde = CountingSerializer()
+    memory = MemorySaver(serde=serde)
+    rows.append(run("MemorySaver", memory, lambda: serde.bytes, lambda: memory, args))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, snapshot_every in (("sqlite full snapshots", 0), ("sqlite deltas", 50)):
+            path = os.path.join(tmp, f"{snapshot_every}.db")
+            with SQLiteDeltaSaver(path, snapshot_every=snapshot_every) as saver:
+                rows.append(run(name, saver, lambda: stored_bytes(saver), lambda: SQLiteDeltaSaver(path), args))
+
+    print(f"{args.turns} turns")
+    print(f"{'saver':<24} {'bytes/turn':>11} {'last turn':>11} {'turn p50 ms':>12} {'resume p50 ms':>14}")
+    for row in rows:
+        print(
+            f"{row['saver']:<24} {row['bytes_per_turn']:>11} {row['last_turn_bytes']:>11} "
+            f"{row['turn_ms_p50']:>12} {row['resume_ms_p50']:>14}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": vars(args), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
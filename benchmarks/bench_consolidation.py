@@ -0,0 +1,174 @@
+"""Measure the effect of memory consolidation on a synthetic corpus.
+
+The corpus mimics a model that rarely passes ``memory_id``: every fact
+about the user is stored several times with small wording changes and a
+different context. The store uses a bag-of-words embedding so that
+rephrasings of one fact are near-duplicates while different facts are not.
+
+Before and after consolidation the benchmark reports the number of
+memories, the prompt tokens of the memories block that ``call_model``
+injects (top 10 by similarity), how many distinct facts that block
+covers, and the search latency. A second run after a few new writes shows
+that only changed memories are re-checked.
+
+Run with ``python -m benchmarks.bench_consolidation``.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+from langgraph.store.base import PutOp
+
+from maltai_agent.consolidation import consolidate_memories, note_changes
+from maltai_agent.context import load_context
+from maltai_agent.sqlite_store import SQLiteVectorStore
+
+USER = "bench-user"
+DIMS = 256
+SUBJECTS = ["coffee", "tea", "running", "piano", "python", "hiking", "chess", "cooking", "jazz", "sushi"]
+FRAMES = [
+    "user {verb} {subject} {detail}",
+    "the user {verb} {subject} {detail}",
+    "user mentioned they {verb} {subject} {detail}",
+]
+VERBS = ["likes", "enjoys", "loves"]
+
+
+def embed_words(texts: list[str]) -> list[list[float]]:
+    vectors = np.zeros((len(texts), DIMS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().split():
+            bucket = int.from_bytes(hashlib.sha256(word.encode()).digest()[:4], "little")
+            vectors[row, bucket % DIMS] += 1.0
+    return vectors.tolist()
+
+
+def corpus(facts: int, copies: int, seed: int = 0) -> list[tuple[int, dict]]:
+    """Return (fact id, memory value) pairs, ``copies`` rephrasings per fact."""
+    rng = random.Random(seed)
+    memories = []
+    for fact in range(facts):
+        subject = SUBJECTS[fact % len(SUBJECTS)]
+        detail = f"detail{fact} place{fact % 37} time{fact % 11}"
+        for copy in range(copies):
+            content = rng.choice(FRAMES).format(verb=rng.choice(VERBS), subject=subject, detail=detail)
+            memories.append((fact, {"content": content, "context": f"conversation {fact}-{copy}"}))
+    rng.shuffle(memories)
+    return memories
+
+
+def token_counter():
+    """Count tokens with tiktoken, or estimate 4 characters per token offline."""
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text))
+    except Exception:
+        print("tiktoken encoding unavailable; estimating tokens as characters / 4")
+        return lambda text: len(text) // 4
+
+
+async def measure(store, queries: list[str], count_tokens, fact_of: dict) -> dict:
+    items = await store.asearch(("memories", USER), limit=1_000_000)
+    tokens, distinct, times = [], [], []
+    for query in queries:
+        start = time.perf_counter()
+        context = await load_context(store, USER, query=query)
+        times.append(time.perf_counter() - start)
+        tokens.append(count_tokens(context.format_memories()))
+        distinct.append(len({fact_of[m.value["content"]] for m in context.memories}))
+    return {
+        "memories": len(items),
+        "prompt_tokens": round(float(np.mean(tokens)), 1),
+        "distinct_facts_in_top10": round(float(np.mean(distinct)), 2),
+        "search_ms_p50": round(1000 * float(np.median(times)), 3),
+    }
+
+
+async def run(facts: int, copies: int, n_queries: int) -> list[dict]:
+    count_tokens = token_counter()
+    memories = corpus(facts, copies)
+    fact_of = {value["content"]: fact for fact, value in memories}
+    queries = [f"what do I think about {subject}" for subject in SUBJECTS][:n_queries]
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        index = {"dims": DIMS, "embed": embed_words, "fields": ["content"]}
+        with SQLiteVectorStore(os.path.join(directory, "store.db"), index=index) as store:
+            for start in range(0, len(memories), 500):
+                await asyncio.gather(
+                    *(
+                        store.aput(("memories", USER), f"m{start + i}", value)
+                        for i, (_, value) in enumerate(memories[start : start + 500])
+                    )
+                )
+            results.append({"stage": "before", **await measure(store, queries, count_tokens, fact_of)})
+
+            start = time.perf_counter()
+            report = await consolidate_memories(store, USER, threshold=0.85)
+            elapsed = time.perf_counter() - start
+            results.append(
+                {
+                    "stage": "after",
+                    **await measure(store, queries, count_tokens, fact_of),
+                    "checked": report.changed,
+                    "removed": report.removed,
+                    "run_s": round(elapsed, 2),
+                }
+            )
+
+            # A few new rephrasings arrive; only they are checked on the next run
+            for i, (fact, value) in enumerate(corpus(facts, 1, seed=1)[:20]):
+                fact_of[value["content"]] = fact
+                # Noted as changed, as upsert_memory does
+                await store.abatch([PutOp(("memories", USER), f"new{i}", value), *note_changes(USER, [f"new{i}"])])
+            start = time.perf_counter()
+            report = await consolidate_memories(store, USER, threshold=0.85)
+            elapsed = time.perf_counter() - start
+            results.append(
+                {
+                    "stage": "incremental",
+                    **await measure(store, queries, count_tokens, fact_of),
+                    "checked": report.changed,
+                    "removed": report.removed,
+                    "run_s": round(elapsed, 2),
+                }
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--facts", type=int, default=1000)
+    parser.add_argument("--copies", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.facts, args.copies, args.queries))
+    header = (
+        f"{'stage':<12} {'memories':>9} {'prompt tok':>11} {'distinct/10':>12} "
+        f"{'search ms':>10} {'checked':>8} {'removed':>8} {'run s':>6}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['stage']:<12} {row['memories']:>9} {row['prompt_tokens']:>11} "
+            f"{row['distinct_facts_in_top10']:>12} {row['search_ms_p50']:>10} "
+            f"{row.get('checked', '-'):>8} {row.get('removed', '-'):>8} {row.get('run_s', '-'):>6}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Measure model input tokens and latency over a long synthetic conversation.
+
+Every turn renders the system prompt from a growing store context (one
+new memory and one new todo per turn) and sends it with the conversation
+history to a fake chat model. The model's latency is a fixed overhead
+plus a prefill cost per input token, so it grows exactly as the prompt
+does. Two prompt assemblies are compared:
+
+* ``full``: every section and every past message, as before token budgets
+* ``budgeted``: sections cut to a :class:`~maltai_agent.budget.TokenBudget`,
+  recent turns verbatim and older turns folded into a running summary
+
+Summary updates run after the reply, as the ``summarize_history`` node
+does, so they are reported separately and not counted in turn latency.
+
+Run with ``python -m benchmarks.bench_context_budget``.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.store.base import SearchItem
+
+from maltai_agent import prompts
+from maltai_agent.budget import (
+    TokenBudget,
+    count_tokens,
+    message_tokens,
+    split_history,
+    summarize,
+    unsummarized,
+)
+from maltai_agent.context import TurnContext
+
+WORDS = (
+    "meeting garden invoice python guitar dentist flight budget recipe marathon "
+    "birthday report deadline library coffee museum project weekend grocery sister"
+).split()
+
+
+class PrefillModel(BaseChatModel):
+    """Fake chat model whose latency grows linearly with its input tokens."""
+
+    overhead_ms: float = 150.0
+    per_token_ms: float = 0.05
+    reply_words: int = 40
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "prefill"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any) -> ChatResult:
+        raise NotImplementedError
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any
+    ) -> ChatResult:
+        tokens = sum(message_tokens(m) for m in messages)
+        await asyncio.sleep((self.overhead_ms + self.per_token_ms * tokens) / 1000)
+        rng = random.Random(self.calls)
+        self.calls += 1
+        text = " ".join(rng.choice(WORDS) for _ in range(self.reply_words))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+def store_context(turn: int) -> TurnContext:
+    """Return the store context after ``turn`` turns: one memory and one todo per turn."""
+    now = datetime.now(timezone.utc)
+
+    def item(namespace: str, key: str, value: dict, score: Optional[float] = None) -> SearchItem:
+        return SearchItem((namespace, "bench"), key, value, now, now, score)
+
+    rng = random.Random(turn)
+    memories = [
+        item("memories", f"m{i}", {"content": f"user mentioned {WORDS[i % 20]} {i}", "context": f"turn {i}"}, 0.8)
+        for i in rng.sample(range(turn + 1), min(10, turn + 1))
+    ]
+    todos = [item("todos", f"t{i}", {"task": f"{WORDS[i % 20]} task {i}", "deadline": "friday"}) for i in range(turn + 1)]
+    profile = [item("profile", "profile", {"name": "Ana", "interests": WORDS[: min(20, 2 + turn // 10)]})]
+    instructions = [item("instructions", "instructions", {"instruction": "keep answers short"})]
+    return TurnContext(memories=memories, profile=profile, todos=todos, instructions=instructions)
+
+
+def user_message(turn: int) -> HumanMessage:
+    rng = random.Random(-turn)
+    return HumanMessage(content=" ".join(rng.choice(WORDS) for _ in range(25)), id=f"h{turn}")
+
+
+async def run(turns: int, limits: TokenBudget, model_kwargs: dict) -> dict[str, list[dict]]:
+    results: dict[str, list[dict]] = {}
+    for mode in ("full", "budgeted"):
+        model = PrefillModel(**model_kwargs)
+        messages: list[BaseMessage] = []
+        summary, summarized_through = "", None
+        rows = []
+        for turn in range(turns):
+            messages.append(user_message(turn))
+            context = store_context(turn)
+            budgeted = mode == "budgeted"
+            system = prompts.SYSTEM_PROMPT.format(
+                user_info=context.format_memories(limits.memories if budgeted else None),
+                time=datetime.now().isoformat(),
+                profile_info=context.format_profile(limits.profile if budgeted else None),
+                todo_list=context.format_todos(limits.todos if budgeted else None),
+                instructions=context.format_instructions(limits.instructions if budgeted else None),
+                summary=summary,
+            )
+            history = messages
+            prompt: list = [{"role": "system", "content": system}]
+            if budgeted:
+                _, history = split_history(unsummarized(messages, summarized_through), limits.history)
+            prompt += history
+            input_tokens = count_tokens(system) + sum(message_tokens(m) for m in history)
+
+            start = time.perf_counter()
+            reply = await model.ainvoke(prompt)
+            latency = time.perf_counter() - start
+            reply.id = f"a{turn}"
+            messages.append(reply)
+            if turn % 4 == 3:
+                # Every fourth turn the model also saved a todo
+                call = {"name": "AddTodo", "args": {"task": f"task {turn}"}, "id": f"c{turn}"}
+                messages[-1] = AIMessage(content=reply.content, tool_calls=[call], id=f"a{turn}")
+                messages.append(ToolMessage(content="Todo saved", tool_call_id=f"c{turn}", id=f"r{turn}"))
+
+            summarize_ms = 0.0
+            if budgeted:
+                pending = unsummarized(messages, summarized_through)
+                if sum(message_tokens(m) for m in pending) > limits.history:
+                    older, _ = split_history(pending, limits.history // 2)
+                    if older:
+                        start = time.perf_counter()
+                        summary = await summarize(model, summary, older, limits.summary)
+                        summarize_ms = 1000 * (time.perf_counter() - start)
+                        summarized_through = older[-1].id
+            rows.append(
+                {
+                    "turn": turn + 1,
+                    "input_tokens": input_tokens,
+                    "latency_ms": round(1000 * latency, 1),
+                    "summarize_ms": round(summarize_ms, 1),
+                }
+            )
+        results[mode] = rows
+    return results
+
+
+def slope(rows: list[dict], key: str) -> float:
+    """Least-squares growth of ``key`` per turn over the second half of the run."""
+    half = rows[len(rows) // 2 :]
+    return float(np.polyfit([r["turn"] for r in half], [r[key] for r in half], 1)[0])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--history-tokens", type=int, default=TokenBudget().history)
+    parser.add_argument("--overhead-ms", type=float, default=150.0)
+    parser.add_argument("--per-token-ms", type=float, default=0.05)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    limits = TokenBudget(history=args.history_tokens)
+    model_kwargs = {"overhead_ms": args.overhead_ms, "per_token_ms": args.per_token_ms}
+    results = asyncio.run(run(args.turns, limits, model_kwargs))
+
+    checkpoints = sorted({1, *range(25, args.turns + 1, 25), args.turns})
+    header = f"{'turn':>5} {'full tok':>9} {'full ms':>8} {'budget tok':>11} {'budget ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for turn in checkpoints:
+        full, budgeted = results["full"][turn - 1], results["budgeted"][turn - 1]
+        print(
+            f"{turn:>5} {full['input_tokens']:>9} {full['latency_ms']:>8} "
+            f"{budgeted['input_tokens']:>11} {budgeted['latency_ms']:>10}"
+        )
+    updates = [r["summarize_ms"] for r in results["budgeted"] if r["summarize_ms"]]
+    print()
+    for mode, rows in results.items():
+        print(
+            f"{mode:<9} tokens/turn growth {slope(rows, 'input_tokens'):8.2f}   "
+            f"max input tokens {max(r['input_tokens'] for r in rows):7}"
+        )
+    if updates:
+        print(f"summary updates: {len(updates)}, mean {np.mean(updates):.1f} ms (after the reply)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Run whole voice turns through the graph against deterministic stand-ins.
+
+The compiled ``builder`` graph is run end to end: ``audio_input``
+transcribes a synthetic utterance with a Whisper stand-in, the model is a
+scripted chat model that answers a share of the turns with tool calls
+(executed for real against an in-memory store), and ``audio_output``
+synthesizes the reply with a text-to-speech stand-in and plays it for
+``--play``. Each stand-in waits for a latency drawn from its own seeded
+distribution, see :class:`benchmarks._fakes.Latency`, so runs are
+repeatable.
+
+Reported are p50/p95/p99 of every node and of whole turns, and turns per
+second over all sessions. Sessions run concurrently, each with its own
+conversation; turns within a session run one after the other. Save the
+results with ``--json`` and pass them to ``--compare`` on another commit
+to see the difference.
+
+Run with ``python -m benchmarks.bench_e2e``.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from langgraph.store.memory import InMemoryStore
+
+import maltai_agent  # noqa: F401
+from benchmarks._fakes import (
+    FakeAudioProcessor,
+    FakeWhisper,
+    Latency,
+    ScriptedChatModel,
+    percentiles,
+)
+from maltai_agent.models import ModelRegistry
+from maltai_agent.prompt_layout import VersionedStore
+
+NODES = ["audio_input", "process_input", "tools", "audio_output", "summarize_history"]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run_session(graph, session: int, args: argparse.Namespace, samples: dict[str, list[float]]) -> None:
+    processor = FakeAudioProcessor(
+        FakeWhisper(args.stt, seed=args.seed + session),
+        args.tts,
+        seed=args.seed + session,
+        play_latency=args.play,
+        blocking=args.blocking,
+    )
+    config = {
+        "configurable": {
+            "user_id": f"bench-user-{session}",
+            "audio_processor": processor,
+            "tool_followup": args.tool_followup,
+            "stream_speech": args.stream_speech,
+        }
+    }
+    messages: list = []
+    for _ in range(args.turns):
+        started: dict[str, datetime] = {}
+        start = time.perf_counter()
+        async for mode, event in graph.astream({"messages": messages}, config, stream_mode=["debug", "values"]):
+            if mode == "values":
+                messages = event["messages"]
+            elif event["type"] == "task":
+                started[event["payload"]["id"]] = datetime.fromisoformat(event["timestamp"])
+            elif event["type"] == "task_result":
+                elapsed = datetime.fromisoformat(event["timestamp"]) - started.pop(event["payload"]["id"])
+                samples[event["payload"]["name"]].append(1000 * elapsed.total_seconds())
+        samples["turn"].append(1000 * (time.perf_counter() - start))
+    processor.close()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    graph_module = sys.modules["maltai_agent.graph"]
+    model = ScriptedChatModel(latency=args.llm, tool_rate=args.tool_rate, seed=args.seed)
+    previous_models = graph_module.models
+    graph_module.models = ModelRegistry(lambda name, provider: model)
+    try:
+        graph = graph_module.builder.compile(store=VersionedStore(InMemoryStore()))
+        samples: dict[str, list[float]] = {name: [] for name in [*NODES, "turn"]}
+        start = time.perf_counter()
+        # The audio processor prints every transcript
+        with contextlib.redirect_stdout(io.StringIO()):
+            await asyncio.gather(*(run_session(graph, s, args, samples) for s in range(args.sessions)))
+        wall = time.perf_counter() - start
+    finally:
+        graph_module.models = previous_models
+
+    return {
+        "commit": git_commit(),
+        "settings": {
+            "turns": args.turns,
+            "sessions": args.sessions,
+            "stt": str(args.stt),
+            "llm": str(args.llm),
+            "tts": str(args.tts),
+            "play": str(args.play),
+            "blocking": args.blocking,
+            "tool_rate": args.tool_rate,
+            "tool_followup": args.tool_followup,
+            "stream_speech": args.stream_speech,
+            "seed": args.seed,
+        },
+        "stages_ms": {name: percentiles(values) for name, values in samples.items()},
+        "turns_per_s": len(samples["turn"]) / wall,
+        "wall_s": wall,
+    }
+
+
+def print_results(results: dict, baseline: dict | None = None) -> None:
+    columns = ["n", "p50", "p95", "p99", "mean"]
+    header = f"{'stage (ms)':>18} " + " ".join(f"{column:>9}" for column in columns)
+    if baseline:
+        header += f" {'Δp50':>9} {'Δp95':>9} {'Δp99':>9}"
+    print(header)
+    for name, stats in results["stages_ms"].items():
+        if not stats["n"]:
+            continue
+        line = f"{name:>18} {stats['n']:>9} " + " ".join(f"{stats[column]:>9.1f}" for column in columns[1:])
+        old = (baseline or {}).get("stages_ms", {}).get(name)
+        if old and old["n"]:
+            line += " " + " ".join(f"{stats[p] - old[p]:>+9.1f}" for p in ("p50", "p95", "p99"))
+        print(line)
+    throughput = f"turns/s: {results['turns_per_s']:.2f}"
+    if baseline:
+        throughput += f" (was {baseline['turns_per_s']:.2f} at {baseline['commit']})"
+    print(throughput)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=30, help="Turns per session")
+    parser.add_argument("--sessions", type=int, default=1, help="Conversations run concurrently")
+    parser.add_argument("--stt", type=Latency.parse, default=Latency.parse("lognormal:350,0.25"))
+    parser.add_argument("--llm", type=Latency.parse, default=Latency.parse("lognormal:600,0.35"))
+    parser.add_argument("--tts", type=Latency.parse, default=Latency.parse("lognormal:250,0.3"))
+    parser.add_argument("--play", type=Latency.parse, default=Latency.parse("fixed:0"))
+    parser.add_argument("--blocking", action="store_true", help="Call speech and audio I/O on the event loop")
+    parser.add_argument("--tool-rate", type=float, default=0.5, help="Share of turns with tool calls")
+    parser.add_argument("--tool-followup", action="store_true")
+    parser.add_argument("--stream-speech", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Measure the cold import time of the agent with ``python -X importtime``.
+
+Each run imports the module in a fresh interpreter and parses the
+``-X importtime`` report on stderr. The benchmark prints the median
+cumulative import time, the slowest top-level packages by self time, and
+whether heavy optional modules (API clients, audio, scipy) were loaded.
+
+Run with ``python -m benchmarks.bench_import``.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("openai", "elevenlabs", "sounddevice", "scipy", "numpy", "dotenv", "langchain_openai")
+"""Modules that should only be loaded on first use, not by importing the agent."""
+
+
+def parse_importtime(report: str) -> dict[str, tuple[int, int]]:
+    """Return ``{module: (self_us, cumulative_us)}`` from an ``-X importtime`` report."""
+    times: dict[str, tuple[int, int]] = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        if self_us.isdigit():
+            times[name] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def import_once(module: str) -> tuple[dict[str, tuple[int, int]], list[str]]:
+    """Import ``module`` in a fresh interpreter; return its import times and the heavy modules loaded."""
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return parse_importtime(result.stderr), [m for m in result.stdout.strip().split(",") if m]
+
+
+def run(module: str, runs: int, top: int) -> dict:
+    totals = []
+    self_times: dict[str, list[int]] = {}
+    heavy: list[str] = []
+    for _ in range(runs):
+        times, heavy = import_once(module)
+        totals.append(times[module][1])
+        by_package: dict[str, int] = {}
+        for name, (self_us, _) in times.items():
+            package = name.split(".")[0]
+            by_package[package] = by_package.get(package, 0) + self_us
+        for package, us in by_package.items():
+            self_times.setdefault(package, []).append(us)
+    slowest = sorted(self_times.items(), key=lambda item: -statistics.median(item[1]))[:top]
+    return {
+        "module": module,
+        "import_ms_p50": round(statistics.median(totals) / 1000, 1),
+        "import_ms_min": round(min(totals) / 1000, 1),
+        "heavy_modules_loaded": heavy,
+        "slowest_packages_ms": {package: round(statistics.median(us) / 1000, 1) for package, us in slowest},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="maltai_agent")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    result = run(args.module, args.runs, args.top)
+    print(f"import {result['module']}: p50 {result['import_ms_p50']} ms, min {result['import_ms_min']} ms")
+    print(f"heavy modules loaded: {', '.join(result['heavy_modules_loaded']) or 'none'}")
+    print()
+    print(f"{'package':<28} {'self ms':>8}")
+    print("-" * 37)
+    for package, ms in result["slowest_packages_ms"].items():
+        print(f"{package:<28} {ms:>8}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Measure how turn throughput scales with concurrent voice sessions.
+
+Runs :mod:`benchmarks.bench_e2e` with a growing number of concurrent
+sessions, each with its own audio processor, once with the asynchronous
+speech and audio I/O the graph uses and once with ``--blocking``, where
+transcription, synthesis and playback run on the event loop's thread as
+they did before. With non-blocking I/O the turns of different sessions
+overlap, so throughput grows with the number of sessions until the CPU
+or the providers become the limit; with blocking I/O it stays flat.
+
+Run with ``python -m benchmarks.bench_load``.
+"""
+
+import argparse
+import asyncio
+import json
+
+from benchmarks import bench_e2e
+from benchmarks._fakes import Latency
+
+
+async def main_async(args: argparse.Namespace) -> list[dict]:
+    rows = []
+    for blocking in (True, False):
+        for sessions in args.sessions:
+            settings = argparse.Namespace(
+                turns=args.turns,
+                sessions=sessions,
+                stt=args.stt,
+                llm=args.llm,
+                tts=args.tts,
+                play=args.play,
+                blocking=blocking,
+                tool_rate=0.5,
+                tool_followup=False,
+                stream_speech=False,
+                seed=0,
+            )
+            results = await bench_e2e.run(settings)
+            turn = results["stages_ms"]["turn"]
+            rows.append(
+                {
+                    "io": "blocking" if blocking else "async",
+                    "sessions": sessions,
+                    "turns_per_s": round(results["turns_per_s"], 2),
+                    "turn_p50_ms": round(turn["p50"], 1),
+                    "turn_p95_ms": round(turn["p95"], 1),
+                }
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--turns", type=int, default=3, help="Turns per session")
+    parser.add_argument("--stt", type=Latency.parse, default=Latency.parse("lognormal:350,0.25"))
+    parser.add_argument("--llm", type=Latency.parse, default=Latency.parse("lognormal:600,0.35"))
+    parser.add_argument("--tts", type=Latency.parse, default=Latency.parse("lognormal:250,0.3"))
+    parser.add_argument("--play", type=Latency.parse, default=Latency.parse("fixed:1500"))
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    columns = ["io", "sessions", "turns_per_s", "turn_p50_ms", "turn_p95_ms"]
+    print(" ".join(f"{column:>12}" for column in columns))
+    for row in results:
+        print(" ".join(f"{row[column]:>12}" for column in columns))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
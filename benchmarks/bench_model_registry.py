@@ -0,0 +1,126 @@
+"""Measure per-turn model overhead before the request reaches the network.
+
+Two ways of calling the chat model are compared:
+
+* ``per-turn``: the previous path, a configurable ``init_chat_model()``
+  whose tools are bound on every turn and whose underlying model is
+  created from the call's configuration
+* ``registry``: :class:`~maltai_agent.models.ModelRegistry`, which returns a
+  model created and bound to the tools once
+
+The OpenAI client is given an HTTP transport that records when the request
+is handed to it and answers immediately, so the measured time covers
+everything from the start of the turn up to the first network byte: model
+creation, tool schema conversion and request serialization.
+
+Run with ``python -m benchmarks.bench_model_registry``.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+import numpy as np
+from langchain.chat_models import init_chat_model
+
+from maltai_agent.graph import TOOLS
+from maltai_agent.models import ModelRegistry
+
+MODEL = "openai/gpt-4o-mini"
+
+COMPLETION = {
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [
+        {"index": 0, "message": {"role": "assistant", "content": "Sure."}, "finish_reason": "stop"}
+    ],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Transport that records when each request is sent and answers at once."""
+
+    def __init__(self) -> None:
+        self.sent_at = 0.0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.sent_at = time.perf_counter()
+        return httpx.Response(200, json=COMPLETION)
+
+
+def messages(turn: int) -> list[dict]:
+    history = [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} about the garden"}
+        for i in range(10)
+    ]
+    return [{"role": "system", "content": "You are MaltAI. " * 100}, *history, {"role": "user", "content": f"turn {turn}"}]
+
+
+async def run(turns: int, warmup: int) -> list[dict]:
+    transport = RecordingTransport()
+    client = httpx.AsyncClient(transport=transport)
+    provider, model_name = MODEL.split("/", 1)
+
+    # Previous path: a configurable model, tools bound on every turn
+    llm = init_chat_model(api_key="bench", http_async_client=client)
+    model_config = {"configurable": {"model": model_name, "model_provider": provider}}
+
+    async def per_turn(turn: int) -> None:
+        model = llm.bind_tools(TOOLS)
+        await model.ainvoke(messages(turn), model_config)
+
+    registry = ModelRegistry(
+        lambda model, provider: init_chat_model(
+            model, model_provider=provider, api_key="bench", http_async_client=client
+        )
+    )
+
+    async def pooled(turn: int) -> None:
+        model = registry.get(MODEL, TOOLS)
+        await model.ainvoke(messages(turn))
+
+    results = []
+    for name, call in (("per-turn", per_turn), ("registry", pooled)):
+        overheads = []
+        for turn in range(warmup + turns):
+            start = time.perf_counter()
+            await call(turn)
+            if turn >= warmup:
+                overheads.append(1e6 * (transport.sent_at - start))
+        results.append(
+            {
+                "path": name,
+                "p50_us": round(float(np.percentile(overheads, 50)), 1),
+                "p95_us": round(float(np.percentile(overheads, 95)), 1),
+                "mean_us": round(float(np.mean(overheads)), 1),
+            }
+        )
+    await client.aclose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.turns, args.warmup))
+    header = f"{'path':<10} {'p50 us':>9} {'p95 us':>9} {'mean us':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(f"{row['path']:<10} {row['p50_us']:>9} {row['p95_us']:>9} {row['mean_us']:>9}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
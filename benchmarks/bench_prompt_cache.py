@@ -0,0 +1,160 @@
+"""Measure how much of the system prompt stays byte-stable between turns.
+
+A synthetic session renders the system prompt every turn while the user
+occasionally adds a todo, changes their profile or instructions, and the
+conversation summary is updated every few turns. The previous layout, with
+the time and memories near the top, is compared with the current one,
+which orders sections from most to least stable. For each the benchmark
+reports the mean stable prefix (the part a provider-side prompt cache can
+reuse, in tokens and as a fraction of the prompt), the section cache hit
+rate and the store reads per turn.
+
+Run with ``python -m benchmarks.bench_prompt_cache``.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from langgraph.store.base import SearchOp
+from langgraph.store.memory import InMemoryStore
+
+from maltai_agent import prompts
+from maltai_agent.prompt_layout import PromptRenderer, VersionedStore
+
+USER = "bench-user"
+
+# The layout used before sections were ordered by stability
+PREVIOUS_PROMPT = """You are MaltAI, a helpful and intelligent voice assistant. You can:
+1. Remember information about the user
+2. Manage todos and tasks
+3. Update your behavior based on user preferences
+
+Current User Information:
+{user_info}
+
+Current Time: {time}
+
+You have access to the following tools:
+1. Memory Tool: Store important information about the user
+2. Todo Tool: Manage user's tasks and todos
+3. Profile Tool: Update user profile information
+4. Instructions Tool: Update how you should behave
+
+Guidelines:
+1. Be conversational and friendly
+2. Remember important information about the user
+3. Proactively offer to help with tasks
+4. Use the appropriate tool when needed
+5. Speak naturally - your responses will be converted to speech
+
+Current User Profile:
+<profile>
+{profile_info}
+</profile>
+
+Current Todo List:
+<todos>
+{todo_list}
+</todos>
+
+Current Instructions:
+<instructions>
+{instructions}
+</instructions>
+
+Summary of the earlier conversation:
+<summary>
+{summary}
+</summary>
+"""
+
+
+class CountingStore(InMemoryStore):
+    """In-memory store that counts namespace reads."""
+
+    reads = 0
+
+    async def abatch(self, ops):
+        ops = list(ops)
+        self.reads += sum(isinstance(op, SearchOp) for op in ops)
+        return self.batch(ops)
+
+
+async def session(template: str, turns: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    inner = CountingStore()
+    store = VersionedStore(inner)
+    await store.aput(("profile", USER), "profile", {"name": "Ana", "city": "Lisbon"})
+    await store.aput(("instructions", USER), "instructions", {"instruction": "keep answers short"})
+    for i in range(30):
+        await store.aput(("memories", USER), f"m{i}", {"content": f"user mentioned topic {i}"})
+    for i in range(5):
+        await store.aput(("todos", USER), f"t{i}", {"task": f"task {i}"})
+    inner.reads = 0
+
+    renderer = PromptRenderer()
+    now = datetime(2024, 5, 1, 9, 0)
+    summary = ""
+    render_ms = []
+    for turn in range(turns):
+        if rng.random() < 0.15:
+            await store.aput(("todos", USER), f"t{turn}", {"task": f"new task {turn}"})
+        if rng.random() < 0.03:
+            await store.aput(("profile", USER), "profile", {"name": "Ana", "city": f"city {turn}"})
+        if turn % 6 == 5:
+            summary = f"{summary} turn {turn} discussed topic {turn % 30}.".strip()
+        now += timedelta(seconds=rng.randint(10, 90))
+        start = time.perf_counter()
+        await renderer.render(
+            store, template, USER, query=f"topic {rng.randrange(30)}", summary=summary, now=now
+        )
+        render_ms.append(1000 * (time.perf_counter() - start))
+
+    metrics = list(renderer.metrics)[1:]
+    return {
+        "stable_prefix_tokens": round(float(np.mean([m.stable_prefix_tokens for m in metrics])), 1),
+        "prefix_stability": round(float(np.mean([m.prefix_stability for m in metrics])), 3),
+        "cache_hit_rate": round(float(np.mean([m.cache_hit_rate for m in metrics])), 3),
+        "store_reads_per_turn": round(inner.reads / turns, 2),
+        "render_ms_p50": round(float(np.median(render_ms)), 3),
+    }
+
+
+async def run(turns: int) -> list[dict]:
+    return [
+        {"layout": "previous", **await session(PREVIOUS_PROMPT, turns, seed=0)},
+        {"layout": "stable-first", **await session(prompts.SYSTEM_PROMPT, turns, seed=0)},
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.turns))
+    header = (
+        f"{'layout':<13} {'stable tok':>10} {'stable %':>9} {'hit rate':>9} "
+        f"{'reads/turn':>11} {'render ms':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['layout']:<13} {row['stable_prefix_tokens']:>10} "
+            f"{100 * row['prefix_stability']:>8.1f}% {row['cache_hit_rate']:>9} "
+            f"{row['store_reads_per_turn']:>11} {row['render_ms_p50']:>10}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
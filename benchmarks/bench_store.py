@@ -0,0 +1,117 @@
+"""Compare put and search throughput of SQLiteVectorStore and InMemoryStore.
+
+Each store is filled with ``n`` memories in one namespace, written in
+batches of PutOps, then queried with semantic searches (``limit=10``) and
+key lookups. Embeddings are random unit vectors looked up from a
+precomputed matrix, so the embedding cost is negligible and equal for both
+stores. Vectors default to 64 dimensions so that a million items fit in
+memory; pass ``--dims 1536`` to match ``text-embedding-3-small``.
+
+``InMemoryStore`` keeps every vector as a Python list and is skipped above
+``--baseline-max`` items.
+
+Run with ``python -m benchmarks.bench_store``.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+from langgraph.store.base import GetOp, PutOp, SearchOp
+from langgraph.store.memory import InMemoryStore
+
+from maltai_agent.sqlite_store import SQLiteVectorStore
+
+NAMESPACE = ("memories", "bench-user")
+BATCH = 1000
+
+
+class Embedder:
+    """Map "memory <i>" and "query <i>" texts to fixed random vectors."""
+
+    def __init__(self, n_items: int, n_queries: int, dims: int, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.items = rng.standard_normal((n_items, dims), dtype=np.float32)
+        self.queries = rng.standard_normal((n_queries, dims), dtype=np.float32)
+
+    def __call__(self, texts: list[str]) -> list[list[float]]:
+        vectors = []
+        for text in texts:
+            kind, index = text.split(" ")
+            vectors.append((self.items if kind == "memory" else self.queries)[int(index)].tolist())
+        return vectors
+
+
+def run(store, n: int, n_queries: int, seed: int = 1) -> dict:
+    """Fill a store and time puts, semantic searches and gets."""
+    start = time.perf_counter()
+    for first in range(0, n, BATCH):
+        store.batch(
+            [
+                PutOp(NAMESPACE, f"m{i}", {"content": f"memory {i}"})
+                for i in range(first, min(first + BATCH, n))
+            ]
+        )
+    put_seconds = time.perf_counter() - start
+
+    search_times = []
+    for q in range(n_queries):
+        start = time.perf_counter()
+        (results,) = store.batch([SearchOp(NAMESPACE, query=f"query {q}", limit=10)])
+        search_times.append(time.perf_counter() - start)
+        assert len(results) == 10
+
+    keys = np.random.default_rng(seed).integers(0, n, 1000)
+    start = time.perf_counter()
+    for key in keys:
+        store.batch([GetOp(NAMESPACE, f"m{key}")])
+    get_seconds = time.perf_counter() - start
+
+    return {
+        "puts_per_s": round(n / put_seconds),
+        "search_ms_p50": round(1000 * float(np.median(search_times)), 2),
+        "searches_per_s": round(len(search_times) / sum(search_times), 1),
+        "get_us": round(1e6 * get_seconds / len(keys), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dims", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--baseline-max", type=int, default=100_000)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        embed = Embedder(n, args.queries, args.dims)
+        index = {"dims": args.dims, "embed": embed, "fields": ["content"]}
+        if n <= args.baseline_max:
+            results.append({"items": n, "store": "InMemoryStore", **run(InMemoryStore(index=index), n, args.queries)})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "store.db")
+            with SQLiteVectorStore(path, index=index) as store:
+                row = run(store, n, args.queries)
+            size = os.path.getsize(path) + os.path.getsize(f"{path}.vectors")
+            results.append({"items": n, "store": "SQLiteVectorStore", **row, "disk_mib": round(size / 2**20, 1)})
+
+    header = f"{'items':>9} {'store':<18} {'puts/s':>9} {'search ms':>10} {'search/s':>9} {'get us':>8} {'disk MiB':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['items']:>9} {row['store']:<18} {row['puts_per_s']:>9} {row['search_ms_p50']:>10} "
+            f"{row['searches_per_s']:>9} {row['get_us']:>8} {row.get('disk_mib', '-'):>9}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Compare transcription latency of the Whisper API and the local CPU engine.
+
+Utterances of several lengths are transcribed with each backend:
+
+* ``whisper-api``: :class:`WhisperAPITranscriber` with a stand-in client.
+  The recording is encoded for upload for real; the network and the
+  service are simulated as a round trip, the upload at ``--uplink`` and
+  server-side decoding at ``--server-rtf`` times the audio duration.
+* ``local``: :class:`LocalWhisperTranscriber` with faster-whisper, warmed up
+  first. The cold load (model files read and the first decode) is
+  reported separately. Skipped when faster-whisper is not installed.
+* ``local-prep``: only the local engine's preparation of the int16 pieces,
+  which is what remains in this process besides the model itself.
+
+Reported per backend and utterance length are p50/p95 latency and the
+real-time factor (latency divided by the audio duration; below 1 is faster
+than real time).
+
+Run with ``python -m benchmarks.bench_stt``.
+"""
+
+import argparse
+import json
+import time
+from types import SimpleNamespace
+
+from benchmarks._audio import synthetic_speech
+from benchmarks._fakes import percentiles
+from maltai_agent.stt import (
+    LocalWhisperTranscriber,
+    WhisperAPITranscriber,
+    load_local_model,
+    to_float32,
+)
+
+SAMPLE_RATE = 16000
+
+
+class NetworkWhisper:
+    """Stand-in for the OpenAI transcription endpoint."""
+
+    def __init__(self, rtt_ms: float, uplink_mbps: float, server_rtf: float):
+        self.rtt_s = rtt_ms / 1000
+        self.uplink_bytes_per_s = uplink_mbps * 1e6 / 8
+        self.server_rtf = server_rtf
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self.create))
+
+    def create(self, *, model, file):
+        data = file.getvalue()
+        # WAV at 16 kHz int16 is 32000 bytes per second after the header
+        seconds = (len(data) - 44) / (2 * SAMPLE_RATE)
+        time.sleep(self.rtt_s + len(data) / self.uplink_bytes_per_s + self.server_rtf * seconds)
+        return SimpleNamespace(text="")
+
+
+def pieces(seconds: float) -> list:
+    """Split an utterance into device-sized blocks, as the capture returns it."""
+    samples = synthetic_speech(seconds, SAMPLE_RATE)
+    return [samples[i : i + 1024] for i in range(0, len(samples), 1024)]
+
+
+def measure(transcribe, seconds: float, runs: int) -> dict:
+    audio = pieces(seconds)
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        transcribe(audio, SAMPLE_RATE)
+        latencies.append(1000 * (time.perf_counter() - start))
+    stats = percentiles(latencies)
+    return {
+        "audio_s": seconds,
+        "p50_ms": round(stats["p50"], 2),
+        "p95_ms": round(stats["p95"], 2),
+        "rtf": round(stats["p50"] / 1000 / seconds, 4),
+    }
+
+
+def local_transcriber(args: argparse.Namespace) -> tuple[LocalWhisperTranscriber, float] | None:
+    transcriber = LocalWhisperTranscriber(args.model, cpu_threads=args.threads)
+    start = time.perf_counter()
+    try:
+        transcriber.warm_up()
+    except ImportError:
+        return None
+    return transcriber, time.perf_counter() - start
+
+
+def run(args: argparse.Namespace) -> dict:
+    backends = {
+        "whisper-api": WhisperAPITranscriber(NetworkWhisper(args.rtt, args.uplink, args.server_rtf)).transcribe,
+        "local-prep": to_float32,
+    }
+    results: dict = {"settings": vars(args), "cold_load_s": None, "rows": []}
+    local = local_transcriber(args)
+    if local is not None:
+        transcriber, results["cold_load_s"] = local
+        backends["local"] = transcriber.transcribe
+    for name, transcribe in backends.items():
+        for seconds in args.seconds:
+            results["rows"].append({"backend": name, **measure(transcribe, seconds, args.runs)})
+    if local is None:
+        results["rows"].append({"backend": "local", "skipped": "faster-whisper not installed"})
+    load_local_model.cache_clear()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, nargs="+", default=[1.5, 4.0, 10.0], help="Utterance lengths")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--rtt", type=float, default=120, help="Round trip to the API in ms")
+    parser.add_argument("--uplink", type=float, default=5.0, help="Upload bandwidth in Mbit/s")
+    parser.add_argument("--server-rtf", type=float, default=0.05, help="Server decoding time per audio second")
+    parser.add_argument("--model", default="base.en", help="Local model size")
+    parser.add_argument("--threads", type=int, default=0, help="Local inference threads, 0 for the default")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = run(args)
+    if results["cold_load_s"] is not None:
+        print(f"local cold load: {results['cold_load_s']:.2f} s")
+    print(f"{'backend':<12} {'audio s':>8} {'p50 ms':>9} {'p95 ms':>9} {'RTF':>8}")
+    for row in results["rows"]:
+        if "skipped" in row:
+            print(f"{row['backend']:<12} skipped: {row['skipped']}")
+            continue
+        print(f"{row['backend']:<12} {row['audio_s']:>8} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['rtf']:>8}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
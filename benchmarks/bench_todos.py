@@ -0,0 +1,121 @@
+"""Measure todo listing latency with and without the status/deadline indexes.
+
+Each store is filled with ``n`` todos for one user, a third of them done,
+most with a deadline. The baseline is what an unindexed listing has to do:
+search the whole namespace, filter by status and sort by deadline in
+Python. The indexed listing reads the status index and then only the todos
+on the page. Also timed are the top open todos injected into the prompt,
+a deep page, and marking 100 todos done in one write.
+
+Run with ``python -m benchmarks.bench_todos``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from langgraph.store.memory import InMemoryStore
+
+from maltai_agent.sqlite_store import SQLiteVectorStore
+from maltai_agent.todos import OPEN_STATUSES, ToDo, TodoList, deadline_key
+
+USER = "bench-user"
+PAGE = 20
+
+
+def make_todos(n: int, seed: int = 0) -> list[ToDo]:
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    return [
+        ToDo(
+            task=f"task {i}",
+            time_to_complete=rng.randint(5, 120),
+            deadline=start + timedelta(hours=rng.randint(0, 24 * 365)) if rng.random() < 0.8 else None,
+            status=rng.choice(["not started", "not started", "in progress", "done"]),
+        )
+        for i in range(n)
+    ]
+
+
+async def scan_listing(store, statuses, limit: int) -> list:
+    """Unindexed listing: read every todo, filter and sort."""
+    items = await store.asearch(("todos", USER), limit=10**9)
+    wanted = [item for item in items if item.value["status"] in statuses]
+    wanted.sort(key=lambda item: (deadline_key(item.value.get("deadline")), item.key))
+    return wanted[:limit]
+
+
+async def timed(fn, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await fn()
+        times.append(1000 * (time.perf_counter() - start))
+    return float(np.median(times))
+
+
+async def run(name: str, store, n: int, repeats: int) -> dict:
+    todos = TodoList(store, USER)
+    for first in range(0, n, 1000):
+        await todos.add_many(make_todos(min(1000, n - first), seed=first))
+
+    deep_cursor = None
+    for _ in range(10):
+        deep_cursor = (await todos.list(OPEN_STATUSES, limit=PAGE, cursor=deep_cursor)).next_cursor
+    done_candidates = [item.key for item in (await todos.list("not started", limit=100)).items]
+
+    row = {
+        "store": name,
+        "todos": n,
+        "scan_page_ms": await timed(lambda: scan_listing(store, OPEN_STATUSES, PAGE), repeats),
+        "index_page_ms": await timed(lambda: todos.list(OPEN_STATUSES, limit=PAGE), repeats),
+        "index_page_10_ms": await timed(
+            lambda: todos.list(OPEN_STATUSES, limit=PAGE, cursor=deep_cursor), repeats
+        ),
+        "index_done_ms": await timed(lambda: todos.list("done", limit=PAGE), repeats),
+        "prompt_top10_ms": await timed(lambda: todos.top_open(10), repeats),
+    }
+    start = time.perf_counter()
+    await todos.set_status(done_candidates, "done")
+    row["bulk_done_100_ms"] = 1000 * (time.perf_counter() - start)
+    return {key: round(value, 2) if isinstance(value, float) else value for key, value in row.items()}
+
+
+async def main_async(sizes: list[int], repeats: int) -> list[dict]:
+    results = []
+    for n in sizes:
+        results.append(await run("memory", InMemoryStore(), n, repeats))
+        with tempfile.TemporaryDirectory() as directory:
+            with SQLiteVectorStore(os.path.join(directory, "todos.db")) as store:
+                results.append(await run("sqlite", store, n, repeats))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args.sizes, args.repeats))
+    columns = [
+        "store", "todos", "scan_page_ms", "index_page_ms", "index_page_10_ms",
+        "index_done_ms", "prompt_top10_ms", "bulk_done_100_ms",
+    ]
+    print(" ".join(f"{column:>16}" for column in columns))
+    for row in results:
+        print(" ".join(f"{row[column]:>16}" for column in columns))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
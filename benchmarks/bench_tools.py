@@ -0,0 +1,121 @@
+"""Measure wall-clock time for turns in which the model calls several tools.
+
+The store answers each batch after a simulated network latency, and the
+model after a simulated generation latency. For messages mixing several
+tool types, three flows are compared from the moment the model has
+returned its tool calls until every call has been executed:
+
+* ``per-type``: the previous graph, which routed a message to the handler
+  of its first tool only; every other tool type needs another model turn
+  to be issued again
+* ``dispatch``: the ``tools`` node, which runs every call concurrently
+* ``dispatch+followup``: the same, plus the optional follow-up model call
+  that replies to the tool results
+
+Run with ``python -m benchmarks.bench_tools``.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+from langgraph.store.memory import InMemoryStore
+
+from maltai_agent.tools.dispatch import dispatch_tool_calls
+
+CONFIG = {"configurable": {"user_id": "bench-user"}}
+
+CALLS = {
+    "AddTodo": lambda i: {"task": f"task {i}"},
+    "upsert_memory": lambda i: {"content": f"fact {i}", "context": "benchmark"},
+    "UpdateProfile": lambda i: {"location": f"city {i}"},
+    "UpdateInstructions": lambda i: {"instruction": f"rule {i}", "category": f"c{i}"},
+}
+
+
+class SlowStore(InMemoryStore):
+    """In-memory store that adds a round-trip latency to every batch."""
+
+    def __init__(self, latency_s: float) -> None:
+        super().__init__()
+        self.latency_s = latency_s
+
+    async def abatch(self, ops):
+        await asyncio.sleep(self.latency_s)
+        return self.batch(ops)
+
+
+def tool_calls(n_calls: int, n_types: int) -> list[dict]:
+    names = list(CALLS)[:n_types]
+    return [
+        {"name": names[i % n_types], "args": CALLS[names[i % n_types]](i), "id": f"call{i}", "type": "tool_call"}
+        for i in range(n_calls)
+    ]
+
+
+async def per_type(calls: list[dict], store: SlowStore, model_s: float) -> None:
+    groups: dict[str, list[dict]] = {}
+    for call in calls:
+        groups.setdefault(call["name"], []).append(call)
+    for turn, group in enumerate(groups.values()):
+        if turn:
+            # The model has to be asked again for the calls that were dropped
+            await asyncio.sleep(model_s)
+        await dispatch_tool_calls(group, config=CONFIG, store=store)
+
+
+async def dispatch(calls: list[dict], store: SlowStore, model_s: float, followup: bool) -> None:
+    await dispatch_tool_calls(calls, config=CONFIG, store=store)
+    if followup:
+        await asyncio.sleep(model_s)
+
+
+async def run(mixes: list[tuple[int, int]], repeats: int, store_ms: float, model_ms: float) -> list[dict]:
+    store = SlowStore(store_ms / 1000)
+    flows = {
+        "per-type": lambda calls: per_type(calls, store, model_ms / 1000),
+        "dispatch": lambda calls: dispatch(calls, store, model_ms / 1000, followup=False),
+        "dispatch+followup": lambda calls: dispatch(calls, store, model_ms / 1000, followup=True),
+    }
+    results = []
+    for n_calls, n_types in mixes:
+        calls = tool_calls(n_calls, n_types)
+        row: dict = {"calls": n_calls, "types": n_types}
+        for name, flow in flows.items():
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                await flow(calls)
+                times.append(1000 * (time.perf_counter() - start))
+            row[f"{name}_ms"] = round(float(np.median(times)), 1)
+        results.append(row)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--store-ms", type=float, default=30.0, help="Store round-trip latency")
+    parser.add_argument("--model-ms", type=float, default=600.0, help="Model turn latency")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    mixes = [(1, 1), (2, 2), (4, 2), (4, 3), (6, 4)]
+    results = asyncio.run(run(mixes, args.repeats, args.store_ms, args.model_ms))
+    header = f"{'calls':>5} {'types':>5} {'per-type ms':>12} {'dispatch ms':>12} {'+followup ms':>13}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['calls']:>5} {row['types']:>5} {row['per-type_ms']:>12} "
+            f"{row['dispatch_ms']:>12} {row['dispatch+followup_ms']:>13}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
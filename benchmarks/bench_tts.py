@@ -0,0 +1,198 @@
+"""Measure time from reply text to its first sample reaching the output device.
+
+Three paths speak the same replies through :class:`AudioProcessor`:
+
+* ``elevenlabs mp3 + player``: the previous path. The whole reply is
+  synthesized as MP3, then a player process is started that decodes it.
+  The player is a stand-in that reads the MP3 from stdin and decodes the
+  first block with soundfile; the time until it has done so is measured
+  for real. It is a Python process, which starts slower than ffplay, but
+  opening the device, which ffplay also does, is not included.
+* ``elevenlabs pcm + stream``: ElevenLabs returns raw PCM, which is
+  written to the output stream that stays open across replies.
+* ``local + stream``: a local voice synthesizes sentence by sentence and
+  the first sentence is written to the open stream while the rest is
+  synthesized. Uses Piper with ``--voice`` when piper-tts is installed,
+  otherwise a stand-in that takes ``--local-rtf`` times each sentence's
+  duration.
+
+ElevenLabs is simulated like in :mod:`benchmarks.bench_tts_cache`, with a
+fixed round trip plus a per-character generation time; PCM also pays for
+its larger download at ``--downlink``. The output stream writes into a
+stand-in device that records when the first sample arrives. The speech
+cache is not used, so every reply is synthesized.
+
+Run with ``python -m benchmarks.bench_tts``.
+"""
+
+import argparse
+import functools
+import io
+import json
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+import numpy as np
+
+from benchmarks._audio import synthetic_speech
+from benchmarks._fakes import percentiles
+from maltai_agent import audio, tts
+from maltai_agent.audio import AudioProcessor
+from maltai_agent.speech import clean_for_speech
+
+REPLIES = [
+    "Sure, I added milk to your shopping list. I will remind you tomorrow at nine.",
+    "Okay.",
+    "You have three open todos. The soonest is calling the dentist on Friday. Want me to read the others?",
+    "Got it, you like green tea. I updated your profile.",
+]
+SAMPLE_RATE = 22050
+CHARS_PER_S = 15
+"""Speaking rate used to size the synthesized audio."""
+
+# Reads an MP3 from stdin and reports once the first block is decoded
+PLAYER = (
+    "import io, sys, soundfile\n"
+    "with soundfile.SoundFile(io.BytesIO(sys.stdin.buffer.read())) as f:\n"
+    "    f.read(1024, dtype='int16')\n"
+    "sys.stdout.write('first sample')\n"
+)
+
+
+class FirstSample:
+    """Stand-in output device that records when the first sample of a reply arrives."""
+
+    def __init__(self) -> None:
+        self.at: Optional[float] = None
+
+    def RawOutputStream(self, **kwargs) -> SimpleNamespace:
+        def write(data) -> None:
+            if self.at is None:
+                self.at = time.perf_counter()
+
+        def noop() -> None:
+            pass
+
+        return SimpleNamespace(active=True, start=noop, stop=noop, abort=noop, close=noop, write=write)
+
+
+@functools.lru_cache(maxsize=None)
+def speech(text: str) -> np.ndarray:
+    return synthetic_speech(max(len(text) / CHARS_PER_S, 0.2), SAMPLE_RATE)
+
+
+@functools.lru_cache(maxsize=None)
+def encoded(text: str, output_format: str) -> bytes:
+    """Return the reply as ElevenLabs would send it; cached, since encoding is the server's work."""
+    samples = speech(text)
+    if output_format.startswith("pcm"):
+        return samples.tobytes()
+    import soundfile
+
+    data = io.BytesIO()
+    soundfile.write(data, samples, SAMPLE_RATE, format="MP3")
+    return data.getvalue()
+
+
+class SimulatedElevenLabs(AudioProcessor):
+    """Processor whose ElevenLabs synthesis sleeps instead of calling the API."""
+
+    def __init__(self, args: argparse.Namespace, output_format: str, device: FirstSample) -> None:
+        super().__init__(output_format=output_format)
+        self.args = args
+        self.device = device
+
+    def _convert(self, text: str) -> bytes:
+        data = encoded(text, self.output_format)
+        download_s = len(data) * 8 / (self.args.downlink * 1e6)
+        time.sleep((self.args.latency_ms + self.args.ms_per_char * len(text)) / 1000 + download_s)
+        return data
+
+    def _play(self, audio_data: bytes) -> None:
+        player = subprocess.run(
+            [sys.executable, "-c", PLAYER], input=bytes(audio_data), capture_output=True, check=True
+        )
+        assert player.stdout == b"first sample"
+        self.device.at = time.perf_counter()
+
+
+class StandInVoice:
+    """Piper stand-in: synthesizes each sentence in ``rtf`` times its duration."""
+
+    config = SimpleNamespace(sample_rate=SAMPLE_RATE)
+
+    def __init__(self, rtf: float) -> None:
+        self.rtf = rtf
+
+    def synthesize_stream_raw(self, text: str):
+        for sentence in text.replace("? ", ". ").split(". "):
+            samples = speech(sentence)
+            time.sleep(self.rtf * len(samples) / SAMPLE_RATE)
+            yield samples.tobytes()
+
+
+def time_to_first_sample(processor: AudioProcessor, device: FirstSample, text: str, tts_backend: str) -> float:
+    device.at = None
+    start = time.perf_counter()
+    processor.speak_response(text, tts_backend)
+    return device.at - start
+
+
+def run(args: argparse.Namespace) -> dict:
+    device = FirstSample()
+    audio.get_sounddevice = lambda: device
+    voice = "stand-in"
+    try:
+        tts.load_local_voice(args.voice).config
+        voice = args.voice
+    except (ImportError, OSError, ValueError):
+        tts.load_local_voice = lambda path: StandInVoice(args.local_rtf)
+
+    paths = {
+        "elevenlabs mp3 + player": (SimulatedElevenLabs(args, "mp3_22050_32", device), "elevenlabs"),
+        "elevenlabs pcm + stream": (SimulatedElevenLabs(args, f"pcm_{SAMPLE_RATE}", device), "elevenlabs"),
+        "local + stream": (AudioProcessor(), f"local:{args.voice}"),
+    }
+    rows = []
+    for name, (processor, tts_backend) in paths.items():
+        # Opens the stream and loads the voice, as happens once per process
+        processor.speak_response("Hello.", tts_backend)
+        for text in REPLIES:
+            encoded(clean_for_speech(text), processor.output_format)
+        samples = [
+            1000 * time_to_first_sample(processor, device, clean_for_speech(text), tts_backend)
+            for _ in range(args.runs)
+            for text in REPLIES
+        ]
+        stats = percentiles(samples)
+        rows.append({"path": name, **{key: round(stats[key], 1) for key in ("p50", "p95", "mean")}})
+        processor.close()
+    return {"settings": {**vars(args), "voice": voice}, "ttfs_ms": rows}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Times each reply is spoken")
+    parser.add_argument("--latency-ms", type=float, default=250.0, help="Synthesis round trip before audio arrives")
+    parser.add_argument("--ms-per-char", type=float, default=1.0, help="Synthesis time per character")
+    parser.add_argument("--downlink", type=float, default=20.0, help="Download bandwidth in Mbit/s")
+    parser.add_argument("--voice", default=tts.DEFAULT_LOCAL_VOICE, help="Piper voice model")
+    parser.add_argument("--local-rtf", type=float, default=0.1, help="Real-time factor of the stand-in voice")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = run(args)
+    print(f"local voice: {results['settings']['voice']}")
+    print(f"{'time to first sample (ms)':<26} {'p50':>8} {'p95':>8} {'mean':>8}")
+    for row in results["ttfs_ms"]:
+        print(f"{row['path']:<26} {row['p50']:>8} {row['p95']:>8} {row['mean']:>8}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Measure time to first audio with and without the on-disk speech cache.
+
+Responses are drawn from a workload in which a few short phrases
+(confirmations, greetings, "Added todo: ..." replies) make up most of the
+turns, as in a typical voice session. Synthesis is simulated with a fixed
+network latency plus a per-character generation time. The time to first
+audio is measured until the first 4 KB of the encoded audio, enough for
+the player to start, have been read.
+
+Run with ``python -m benchmarks.bench_tts_cache``.
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+
+from maltai_agent.audio import AudioProcessor
+from maltai_agent.tts_cache import DEFAULT_PREWARM_PHRASES, SpeechCache
+
+FREQUENT = list(DEFAULT_PREWARM_PHRASES) + [
+    "Added todo: buy milk",
+    "Added todo: call mom",
+    "Updated profile location to: Lisbon",
+]
+FIRST_AUDIO_BYTES = 4096
+
+
+class SimulatedSynthesis(AudioProcessor):
+    """Audio processor whose synthesis sleeps instead of calling the API."""
+
+    def __init__(self, latency_s: float, s_per_char: float, cache: Optional[SpeechCache]) -> None:
+        super().__init__(speech_cache=cache)
+        self.latency_s = latency_s
+        self.s_per_char = s_per_char
+        self.calls = 0
+
+    def _convert(self, text: str) -> bytes:
+        self.calls += 1
+        time.sleep(self.latency_s + self.s_per_char * len(text))
+        # About 4 KB per second of speech at 32 kbit/s, 15 characters per second
+        return np.random.default_rng(len(text)).bytes(max(FIRST_AUDIO_BYTES, 270 * len(text)))
+
+
+def workload(turns: int, repeat_share: float, seed: int = 0) -> list[str]:
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, len(FREQUENT) + 1)
+    weights /= weights.sum()
+    return [
+        FREQUENT[rng.choice(len(FREQUENT), p=weights)]
+        if rng.random() < repeat_share
+        else f"Your appointment number {i} is confirmed for {rng.integers(1, 12)} o'clock."
+        for i in range(turns)
+    ]
+
+
+def run_mode(mode: str, texts: list[str], latency_ms: float, ms_per_char: float) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        cache = None if mode == "no cache" else SpeechCache(directory)
+        processor = SimulatedSynthesis(latency_ms / 1000, ms_per_char / 1000, cache)
+        if mode == "prewarmed":
+            processor.prewarm(DEFAULT_PREWARM_PHRASES)
+            processor.calls = 0
+        times = []
+        for text in texts:
+            start = time.perf_counter()
+            audio = processor.synthesize(text)
+            bytes(audio[:FIRST_AUDIO_BYTES])
+            times.append(1000 * (time.perf_counter() - start))
+        return {
+            "mode": mode,
+            "p50_ms": round(float(np.percentile(times, 50)), 2),
+            "p95_ms": round(float(np.percentile(times, 95)), 2),
+            "mean_ms": round(float(np.mean(times)), 2),
+            "api_calls": processor.calls,
+            "hit_rate": round(cache.hit_rate, 3) if cache else 0.0,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--repeat-share", type=float, default=0.6, help="Share of turns that say a frequent phrase")
+    parser.add_argument("--latency-ms", type=float, default=250.0, help="Synthesis round trip before audio arrives")
+    parser.add_argument("--ms-per-char", type=float, default=1.0, help="Synthesis time per character")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    texts = workload(args.turns, args.repeat_share)
+    results = [
+        run_mode(mode, texts, args.latency_ms, args.ms_per_char)
+        for mode in ("no cache", "cold cache", "prewarmed")
+    ]
+    header = f"{'mode':<11} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'API calls':>10} {'hit rate':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['mode']:<11} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['mean_ms']:>8} "
+            f"{row['api_calls']:>10} {row['hit_rate']:>9}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
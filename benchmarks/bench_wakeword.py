@@ -0,0 +1,131 @@
+"""Measure idle CPU and detection latency of the wake word front end.
+
+Fixture audio is replayed block by block, as the microphone would deliver
+it, through :class:`WakeWordDetector`:
+
+* ``idle``: a minute of room noise, the state the device is in most of the time.
+* ``babble``: continuous speech-like sound that is not the wake word.
+* ``wake``: the wake word spoken at varying speed, pitch and loudness.
+
+CPU is process time spent in ``feed`` divided by the duration of the audio.
+Latency is measured from the end of the wake word to the end of the block
+that produced the detection, plus the time spent processing that block.
+
+Run with ``python -m benchmarks.bench_wakeword``.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks._audio import silence, synthetic_word, to_int16
+from maltai_agent.wakeword import WakeWordDetector
+
+SAMPLE_RATE = 16000
+BLOCK = 1024
+WAKE_WORD = [500, 1600, 900]
+
+
+def with_noise(word: np.ndarray, seed: int) -> np.ndarray:
+    """Add room noise on top of a word."""
+    return word + silence(len(word) / SAMPLE_RATE, SAMPLE_RATE, seed=seed)[: len(word)]
+
+
+def enroll() -> WakeWordDetector:
+    recordings = [
+        to_int16(with_noise(synthetic_word(WAKE_WORD, stretch, pitch), seed), silence(0.1, seed=seed))
+        for seed, (stretch, pitch) in enumerate([(1.0, 120), (0.9, 130), (1.1, 110)])
+    ]
+    return WakeWordDetector.enroll(recordings, SAMPLE_RATE)
+
+
+def replay(detector: WakeWordDetector, samples: np.ndarray) -> tuple[float, list]:
+    """Feed samples in blocks; return CPU seconds and (detection, block cpu) pairs."""
+    cpu = 0.0
+    detections = []
+    for start in range(0, len(samples), BLOCK):
+        block = samples[start : start + BLOCK]
+        before = time.process_time()
+        detection = detector.feed(block)
+        spent = time.process_time() - before
+        cpu += spent
+        if detection is not None:
+            detections.append((detection, spent))
+    return cpu, detections
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--idle-seconds", type=float, default=60)
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    detector = enroll()
+    results: dict = {}
+
+    idle = silence(args.idle_seconds, SAMPLE_RATE, seed=100)
+    cpu, detections = replay(detector, idle)
+    results["idle"] = {
+        "cpu_percent": round(100 * cpu / args.idle_seconds, 3),
+        "false_alarms": len(detections),
+        "template_matches": detector.checks,
+    }
+
+    detector = enroll()
+    distractors = [list(rng.permutation([300, 1200, 2200, 2800])[:3]) for _ in range(40)]
+    babble = to_int16(
+        *(
+            with_noise(synthetic_word(formants, pitch=rng.uniform(100, 160)), 400 + i)
+            for i, formants in enumerate(distractors)
+        )
+    )
+    cpu, detections = replay(detector, babble)
+    seconds = len(babble) / SAMPLE_RATE
+    results["babble"] = {
+        "cpu_percent": round(100 * cpu / seconds, 3),
+        "false_alarms": len(detections),
+        "template_matches": detector.checks,
+    }
+
+    latencies = []
+    detected = 0
+    cpu_total = 0.0
+    seconds_total = 0.0
+    for trial in range(args.trials):
+        detector = enroll()
+        word = synthetic_word(
+            WAKE_WORD,
+            stretch=rng.uniform(0.85, 1.15),
+            pitch=rng.uniform(105, 145),
+            amplitude=rng.uniform(2000, 9000),
+        )
+        lead = silence(1.0, SAMPLE_RATE, seed=200 + trial)
+        samples = to_int16(lead, with_noise(word, 500 + trial), silence(1.0, SAMPLE_RATE, seed=300 + trial))
+        cpu, detections = replay(detector, samples)
+        cpu_total += cpu
+        seconds_total += len(samples) / SAMPLE_RATE
+        if detections:
+            detected += 1
+            detection, spent = detections[0]
+            word_end = len(lead) + len(word)
+            latencies.append((detection.sample_index - word_end) / SAMPLE_RATE + spent)
+    results["wake"] = {
+        "recall": detected / args.trials,
+        "cpu_percent": round(100 * cpu_total / seconds_total, 3),
+        "latency_ms_p50": round(1000 * float(np.percentile(latencies, 50)), 1) if latencies else None,
+        "latency_ms_max": round(1000 * max(latencies), 1) if latencies else None,
+    }
+
+    for name, row in results.items():
+        print(f"{name:<7} " + "  ".join(f"{key}={value}" for key, value in row.items()))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,94 @@
 """Simple script to test the agent with voice interaction."""
 
+import argparse
 import asyncio
-from maltai_agent import graph
+import logging
+
 from langchain_core.messages import HumanMessage
 
+from maltai_agent import configuration, graph, tracing, utils
+from maltai_agent.consolidation import start_consolidation
+from maltai_agent.wakeword import WakeWordDetector
+
+
+async def run_turn(app, config: dict) -> None:
+    """Run the agent for a single voice turn."""
+    messages = [HumanMessage(content="Hello, I'm ready to help!")]
+    if app.checkpointer is not None and (await app.aget_state(config)).values.get("messages"):
+        # The thread was resumed from its checkpoint: only the new turn is added
+        messages = []
+    async for response in app.astream({"messages": messages}, config=config):
+        if "messages" in response:
+            # Print the actual response content
+            messages = response["messages"]
+            if messages:
+                print("\nAgent Response:", messages[-1].content)
+
+async def converse(app, config: dict, args: argparse.Namespace, synthesizer) -> None:
+    """Run voice turns in the mode chosen on the command line."""
+    from maltai_agent.graph import get_audio_processor
+
+    configurable = configuration.Configuration.from_runnable_config(config)
+    stt_backend, tts_backend = configurable.stt_backend, configurable.tts_backend
+    if args.duplex:
+        from maltai_agent.audio import PCMOutput
+        from maltai_agent.duplex import DuplexSession, FFPlayPlayer, microphone_blocks
+        from maltai_agent.tts import pcm_sample_rate
+
+        processor = get_audio_processor()
+        output_format = processor.output_format if synthesizer is None else synthesizer.output_format
+        sample_rate = pcm_sample_rate(output_format)
+        # Raw PCM plays on one stream that stays open; encoded audio needs a player process
+        player = FFPlayPlayer() if sample_rate is None else PCMOutput(sample_rate)
+        session = DuplexSession(
+            processor,
+            microphone_blocks(processor.sample_rate),
+            player,
+            stt_backend=stt_backend,
+            tts_backend=tts_backend,
+        )
+        config["configurable"]["audio_processor"] = session
+        print("The agent is listening. Speak at any time, also while it answers.")
+        with session:
+            while not session.closed:
+                await run_turn(app, config)
+        return
+
+    if not args.wake_word:
+        print("The agent will listen for your voice input.")
+        print("Press Enter to stop recording when you're done speaking.")
+        await run_turn(app, config)
+        return
+
+    # Only wake the graph (and upload audio) after the wake word was heard
+    detector = WakeWordDetector.from_wav_files(args.wake_word)
+    config["configurable"]["endpointing"] = "vad"
+    while True:
+        await asyncio.to_thread(get_audio_processor().wait_for_wake_word, detector)
+        await run_turn(app, config)
+
 async def main():
+    """Set up the agent from the command line and the environment, then run it."""
+    parser = argparse.ArgumentParser(description="Run the MaltAI voice agent.")
+    parser.add_argument(
+        "--wake-word",
+        nargs="+",
+        metavar="WAV",
+        help="Mono 16 kHz recordings of the wake word. When given, the agent "
+        "listens locally for it before every turn.",
+    )
+    parser.add_argument(
+        "--duplex",
+        action="store_true",
+        help="Keep listening while the agent speaks, so the next turn starts "
+        "without waiting for playback and talking interrupts the reply. Use a "
+        "headset so the agent does not hear itself.",
+    )
+    args = parser.parse_args()
+    # Recording prompts and transcriptions are logged by the agent's modules
+    logging.basicConfig(format="%(message)s")
+    logging.getLogger("maltai_agent").setLevel(logging.INFO)
+
     # Configuration for the agent
     config = {
         "configurable": {
@@ -14,19 +98,49 @@ async def main():
     }
 
     print("Starting MaltAI Agent...")
-    print("The agent will listen for your voice input.")
-    print("Press Enter to stop recording when you're done speaking.")
-
-    # Run the agent
-    async for response in graph.astream(
-        {"messages": [HumanMessage(content="Hello, I'm ready to help!")]}, 
-        config=config
-    ):
-        if "messages" in response:
-            # Print the actual response content
-            messages = response["messages"]
-            if messages:
-                print("\nAgent Response:", messages[-1].content)
+
+    # TRACE_* settings may come from .env, which is only loaded now
+    utils.load_env()
+    tracing.configure_from_env()
+
+    # With CHECKPOINT_PATH set, the conversation is kept across turns and restarts
+    from maltai_agent.graph import builder, create_checkpointer, memory_store
+
+    app = graph
+    checkpointer = create_checkpointer()
+    if checkpointer is not None:
+        app = builder.compile(store=memory_store, checkpointer=checkpointer)
+        config["configurable"]["thread_id"] = "test-user"
+
+    from maltai_agent.graph import get_audio_processor
+    from maltai_agent.tts_cache import prewarm_phrases
+
+    configurable = configuration.Configuration.from_runnable_config(config)
+    stt_backend, tts_backend = configurable.stt_backend, configurable.tts_backend
+    processor = get_audio_processor()
+    synthesizer = processor.get_synthesizer(tts_backend)
+
+    async def prepare_voice() -> None:
+        if synthesizer is not None:
+            # A local voice answers quickly once loaded; load it now rather than on the first reply
+            await asyncio.to_thread(synthesizer.warm_up)
+        # Synthesize frequent phrases, so they play from the cache
+        await processor.aprewarm(prewarm_phrases(), tts_backend)
+
+    # Kept until exit, so the event loop does not drop them while they run
+    background = [asyncio.create_task(prepare_voice())]
+    # Load the local speech model while the user starts talking, not after
+    if stt_backend.startswith("local"):
+        warm_up = processor.get_transcriber(stt_backend=stt_backend).warm_up
+        background.append(asyncio.create_task(asyncio.to_thread(warm_up)))
+    # Merge duplicate memories in the background while the agent listens
+    background.append(start_consolidation(memory_store, [config["configurable"]["user_id"]]))
+    try:
+        await converse(app, config, args, synthesizer)
+    finally:
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,224 @@
+"""Approximate nearest-neighbour search over normalized embeddings."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+@dataclass(kw_only=True)
+class ANNConfig:
+    """Tuning parameters for the inverted-file (IVF) vector index."""
+
+    namespace_prefix: tuple[str, ...] = ("memories",)
+    """Namespaces under this prefix get an index, one per namespace."""
+    min_items: int = 2048
+    """Namespaces with fewer vectors are searched exactly."""
+    n_lists: Optional[int] = None
+    """Number of clusters; defaults to the square root of the indexed vectors."""
+    n_probe: int = 8
+    """Clusters scanned per query. Higher means better recall and slower search."""
+    train_iterations: int = 10
+    """k-means iterations when (re)training the clusters."""
+    max_train_samples: int = 50_000
+    """Vectors sampled for k-means training."""
+    retrain_growth: float = 2.0
+    """Retrain once the index has grown by this factor since the last training."""
+
+
+class IVFIndex:
+    """Inverted-file index over rows of an external, unit-normalized matrix.
+
+    Vectors are clustered with spherical k-means. A query scores the
+    cluster centroids, then only the rows of the ``n_probe`` closest
+    clusters. Rows are kept sorted by cluster so a probe is a slice; rows
+    added since the last rebuild are kept in a small pending list and are
+    folded in when it grows. The index stores row numbers only and reads
+    vectors from the matrix passed to each call, so it costs a few bytes
+    per vector on top of the matrix itself.
+    """
+
+    def __init__(self, config: Optional[ANNConfig] = None, seed: int = 0):
+        """Initialize an empty, untrained index.
+
+        Args:
+            config: Index parameters
+            seed: Seed for sampling training vectors and initial centroids
+        """
+        self.config = config or ANNConfig()
+        self._rng = np.random.default_rng(seed)
+        self.centroids: Optional[np.ndarray] = None
+        self._list_of = np.full(0, -1, dtype=np.int32)
+        self._in_order = np.zeros(0, dtype=bool)
+        self._order = np.empty(0, dtype=np.int64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._pending: list[int] = []
+        self._stale = 0
+        self._trained_size = 0
+        self.size = 0
+        """Number of indexed rows."""
+
+    @property
+    def trained(self) -> bool:
+        """Whether clusters exist and queries can be answered approximately."""
+        return self.centroids is not None
+
+    def _ensure_capacity(self, rows: np.ndarray) -> None:
+        if rows.size and rows.max() >= len(self._list_of):
+            capacity = max(int(rows.max()) + 1, 2 * len(self._list_of))
+            extra = capacity - len(self._list_of)
+            self._list_of = np.concatenate(
+                (self._list_of, np.full(extra, -1, dtype=np.int32))
+            )
+            self._in_order = np.concatenate(
+                (self._in_order, np.zeros(extra, dtype=bool))
+            )
+
+    def _assign(self, vectors: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        """Return the nearest centroid of each vector."""
+        assert self.centroids is not None
+        return np.concatenate(
+            [
+                np.argmax(vectors[start : start + chunk] @ self.centroids.T, axis=1)
+                for start in range(0, len(vectors), chunk)
+            ]
+            or [np.empty(0, dtype=np.int64)]
+        ).astype(np.int32)
+
+    def train(self, matrix: np.ndarray, rows: np.ndarray) -> None:
+        """Cluster the given rows of ``matrix`` and index them, replacing any previous state."""
+        config = self.config
+        rows = np.asarray(rows, dtype=np.int64)
+        n_lists = config.n_lists or max(1, int(np.sqrt(len(rows))))
+        n_lists = min(n_lists, len(rows))
+        sample = rows
+        if len(rows) > config.max_train_samples:
+            sample = self._rng.choice(rows, config.max_train_samples, replace=False)
+        data = np.asarray(matrix[np.sort(sample)], dtype=np.float32)
+
+        centroids = data[self._rng.choice(len(data), n_lists, replace=False)]
+        for _ in range(config.train_iterations):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, data)
+            counts = np.bincount(labels, minlength=n_lists)
+            empty = counts == 0
+            # Restart empty clusters on random points
+            sums[empty] = data[self._rng.choice(len(data), int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.where(norms == 0, 1, norms)
+        self.centroids = centroids.astype(np.float32)
+
+        self._list_of[:] = -1
+        self._ensure_capacity(rows)
+        self._list_of[rows] = self._assign(np.asarray(matrix[rows], dtype=np.float32))
+        self.size = len(rows)
+        self._trained_size = len(rows)
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Sort all indexed rows by cluster and clear the pending list."""
+        assert self.centroids is not None
+        rows = np.flatnonzero(self._list_of >= 0)
+        lists = self._list_of[rows]
+        order = np.argsort(lists, kind="stable")
+        self._order = rows[order]
+        self._offsets = np.searchsorted(
+            lists[order], np.arange(len(self.centroids) + 1)
+        )
+        self._in_order[:] = False
+        self._in_order[self._order] = True
+        self._pending = []
+        self._stale = 0
+
+    def add(self, matrix: np.ndarray, rows: np.ndarray) -> None:
+        """Index new rows of ``matrix`` (rows already indexed are updated)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if not rows.size:
+            return
+        self.remove(rows)
+        self._ensure_capacity(rows)
+        self.size += len(rows)
+        if not self.trained:
+            self._list_of[rows] = 0  # Placeholder until the first training
+            return
+        self._list_of[rows] = self._assign(np.asarray(matrix[rows], dtype=np.float32))
+        self._pending.extend(rows.tolist())
+        if len(self._pending) + self._stale > max(256, self.size // 10):
+            self._rebuild()
+
+    def remove(self, rows: np.ndarray) -> None:
+        """Stop returning the given rows."""
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = rows[rows < len(self._list_of)]
+        rows = rows[self._list_of[rows] >= 0]
+        if not rows.size:
+            return
+        self._list_of[rows] = -1
+        self._stale += int(self._in_order[rows].sum())
+        self._in_order[rows] = False
+        if self._pending:
+            gone = set(rows.tolist())
+            self._pending = [row for row in self._pending if row not in gone]
+        self.size -= len(rows)
+
+    def needs_training(self) -> bool:
+        """Whether the index should be (re)trained before answering queries."""
+        config = self.config
+        if self.size < config.min_items:
+            return False
+        return (
+            not self.trained or self.size > config.retrain_growth * self._trained_size
+        )
+
+    def indexed_rows(self) -> np.ndarray:
+        """Return all indexed rows."""
+        return np.flatnonzero(self._list_of >= 0)
+
+    def candidates(
+        self, query: np.ndarray, n_probe: Optional[int] = None
+    ) -> np.ndarray:
+        """Return the rows in the clusters closest to a normalized query."""
+        assert self.centroids is not None
+        n_probe = min(n_probe or self.config.n_probe, len(self.centroids))
+        similarity = self.centroids @ query
+        probe = np.argpartition(-similarity, n_probe - 1)[:n_probe]
+        slices = [self._order[self._offsets[i] : self._offsets[i + 1]] for i in probe]
+        rows = np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+        if self._stale:
+            rows = rows[self._in_order[rows]]
+        if self._pending:
+            pending = np.asarray(self._pending, dtype=np.int64)
+            rows = np.concatenate(
+                (rows, pending[np.isin(self._list_of[pending], probe)])
+            )
+        return rows
+
+    def search(
+        self,
+        matrix: np.ndarray,
+        query: np.ndarray,
+        k: int,
+        n_probe: Optional[int] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return up to ``k`` rows most similar to a normalized query and their scores."""
+        return exact_search(matrix, self.candidates(query, n_probe), query, k)
+
+
+def exact_search(
+    matrix: np.ndarray, rows: np.ndarray, query: np.ndarray, k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the ``k`` rows most similar to a normalized query by brute force."""
+    if not rows.size:
+        return rows, np.empty(0, dtype=np.float32)
+    scores = matrix[rows] @ query
+    if k < len(rows):
+        top = np.argpartition(-scores, k - 1)[:k]
+        rows, scores = rows[top], scores[top]
+    order = np.argsort(-scores, kind="stable")
+    return rows[order], scores[order]
+
+
+__all__ = ["ANNConfig", "IVFIndex", "exact_search"]
@@ -1,110 +1,772 @@
 """Audio input and output functionality for the agent."""
 
-import io
-import threading
-from typing import List
+import asyncio
+import contextvars
+import functools
+import logging
+import mmap
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    Callable,
+    Iterable,
+    Optional,
+    Sequence,
+    TypeVar,
+    Union,
+)
 
 import numpy as np
-import sounddevice as sd
-from elevenlabs import play, VoiceSettings
-from elevenlabs.client import ElevenLabs
 from langchain_core.messages import HumanMessage
-from scipy.io.wavfile import write
-from openai import OpenAI
-from dotenv import load_dotenv
 
-load_dotenv()
+from maltai_agent import tracing, utils
+from maltai_agent.capture import CaptureBuffer
+from maltai_agent.speech import clean_for_speech, speak_stream, split_sentences
+from maltai_agent.stt import (
+    IncrementalTranscriber,
+    LocalWhisperTranscriber,
+    Transcriber,
+    WhisperAPITranscriber,
+    parse_backend,
+)
+from maltai_agent.tts import DEFAULT_LOCAL_VOICE, LocalPiperSynthesizer, pcm_sample_rate
+from maltai_agent.tts import parse_backend as parse_tts_backend
+from maltai_agent.tts_cache import SpeechCache
+from maltai_agent.vad import Endpointer, VADConfig, speech_bounds
+from maltai_agent.wakeword import Detection, WakeWordDetector
+
+if TYPE_CHECKING:
+    from elevenlabs import VoiceSettings
+    from elevenlabs.client import AsyncElevenLabs, ElevenLabs
+    from openai import AsyncOpenAI, OpenAI
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+# Clients and audio modules are created on first use, so importing the agent
+# needs neither network credentials nor an audio device.
+@functools.lru_cache(maxsize=1)
+def get_openai_client() -> "OpenAI":
+    """Return the shared OpenAI client, used for transcription."""
+    from openai import OpenAI
+
+    utils.load_env()
+    return OpenAI()
+
+
+@functools.lru_cache(maxsize=1)
+def get_elevenlabs_client() -> "ElevenLabs":
+    """Return the shared ElevenLabs client, used for speech synthesis."""
+    from elevenlabs.client import ElevenLabs
+
+    utils.load_env()
+    return ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
+
+
+@functools.lru_cache(maxsize=1)
+def get_async_openai_client() -> "AsyncOpenAI":
+    """Return the shared asyncio OpenAI client, used for transcription inside the graph."""
+    from openai import AsyncOpenAI
+
+    utils.load_env()
+    return AsyncOpenAI()
+
+
+@functools.lru_cache(maxsize=1)
+def get_async_elevenlabs_client() -> "AsyncElevenLabs":
+    """Return the shared asyncio ElevenLabs client, used for speech synthesis inside the graph."""
+    from elevenlabs.client import AsyncElevenLabs
+
+    utils.load_env()
+    return AsyncElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
+
+
+def get_sounddevice() -> Any:
+    """Import ``sounddevice``, which needs PortAudio and an audio device."""
+    import sounddevice
+
+    return sounddevice
+
+
+def play(audio: Union[bytes, mmap.mmap]) -> None:
+    """Play encoded audio, in memory or memory-mapped, through ElevenLabs' player."""
+    from elevenlabs import play as elevenlabs_play
+
+    elevenlabs_play(audio)
+
+
+class PCMOutput:
+    """Play raw mono int16 PCM through one output stream that stays open across replies.
+
+    :func:`play` starts a player process that decodes the reply and opens
+    the device every time; here the stream is opened on the first write
+    and afterwards a write only waits for room in the device buffer. The
+    stream is reopened when the sample rate changes. Also usable as a
+    :class:`~maltai_agent.duplex.Player`.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 22050,
+        *,
+        latency: Union[str, float] = "low",
+        block_frames: int = 1024,
+    ):
+        """Initialize the output; the device is opened on the first write.
+
+        Args:
+            sample_rate: Rate of audio passed to :meth:`play`
+            latency: Output latency of the stream, as accepted by sounddevice
+            block_frames: Frames written at a time; :meth:`stop` takes
+                effect between blocks
+        """
+        self.sample_rate = sample_rate
+        self.latency = latency
+        self.block_frames = block_frames
+        self._stream: Any = None
+        self._stream_rate: Optional[int] = None
+        # A sample may be split between two chunks of a streamed reply
+        self._remainder = b""
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def write(
+        self, pcm: Union[bytes, mmap.mmap], sample_rate: Optional[int] = None
+    ) -> None:
+        """Queue PCM for playback, returning once the last block is in the device buffer."""
+        with self._lock:
+            if self._stopped.is_set():
+                # Stopped before this write started: drop it until resumed
+                self._remainder = b""
+                return
+            stream = self._open(sample_rate or self.sample_rate)
+            data = memoryview(
+                self._remainder + bytes(pcm) if self._remainder else pcm
+            ).cast("B")
+            end = len(data) - len(data) % 2
+            self._remainder = bytes(data[end:])
+            step = 2 * self.block_frames
+            for start in range(0, end, step):
+                if self._stopped.is_set():
+                    # Drop what is still buffered; the next write after resume restarts the stream
+                    stream.abort()
+                    self._remainder = b""
+                    break
+                stream.write(data[start : min(start + step, end)])
+
+    def play(self, audio: Union[bytes, mmap.mmap]) -> None:
+        """Play audio at :attr:`sample_rate`, for :class:`~maltai_agent.duplex.DuplexSession`."""
+        self.write(audio)
+
+    def stop(self) -> None:
+        """Interrupt the current write and drop later ones until :meth:`resume`.
+
+        Called from another thread.
+        """
+        self._stopped.set()
+
+    def resume(self) -> None:
+        """Play writes again after :meth:`stop`; called when a new reply starts."""
+        self._stopped.clear()
+
+    def close(self) -> None:
+        """Let buffered audio finish and close the stream."""
+        with self._lock:
+            if self._stream is not None:
+                self._stream.stop()
+                self._stream.close()
+                self._stream = None
+
+    def _open(self, sample_rate: int) -> Any:
+        if self._stream is not None and self._stream_rate != sample_rate:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        if self._stream is None:
+            self._stream = get_sounddevice().RawOutputStream(
+                samplerate=sample_rate, channels=1, dtype="int16", latency=self.latency
+            )
+            self._stream_rate = sample_rate
+            self._remainder = b""
+        if not self._stream.active:
+            self._stream.start()
+        return self._stream
 
-# Initialize clients
-openai_client = OpenAI()
-elevenlabs_client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
 
 class AudioProcessor:
-    """Handles audio input and output for the agent."""
-    
-    def __init__(self, sample_rate: int = 16000):
+    """Handles audio input and output for the agent.
+
+    The blocking methods (``record_audio``, ``transcribe``, ``synthesize``,
+    ``speak_response``) suit scripts. Graph nodes use the ``a``-prefixed
+    coroutines instead: transcription and synthesis go through asyncio
+    clients, and device capture and playback run on this processor's own
+    threads, so one process can serve many sessions, each with its own
+    processor, without any of them stalling the event loop.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        vad_config: Optional[VADConfig] = None,
+        transcriber: Optional[Transcriber] = None,
+        speech_cache: Optional[SpeechCache] = None,
+        voice_id: str = "pNInz6obpgDQGcFmaJgB",  # Adam voice
+        model_id: str = "eleven_turbo_v2_5",
+        output_format: str = "mp3_22050_32",
+        pcm_output: Optional[PCMOutput] = None,
+    ):
         """Initialize audio processor.
-        
+
         Args:
             sample_rate: Sample rate for audio recording
+            vad_config: Voice activity detection settings used for endpointing
+            transcriber: Speech-to-text client, Whisper through the OpenAI API
+                by default
+            speech_cache: On-disk cache of synthesized phrases; every response
+                is synthesized when not given
+            voice_id: ElevenLabs voice
+            model_id: ElevenLabs speech model
+            output_format: Encoding of the synthesized audio. Raw PCM
+                formats such as "pcm_22050" play on ``pcm_output`` instead of
+                through a player process.
+            pcm_output: Output stream for raw PCM, opened on first use when
+                not given
         """
         self.sample_rate = sample_rate
-        self._recording = False
-        self.voice_settings = VoiceSettings(
-            stability=0.0,
-            similarity_boost=1.0,
-            style=0.0,
-            use_speaker_boost=True
+        self.vad_config = vad_config or VADConfig()
+        self.transcriber = transcriber
+        self.speech_cache = speech_cache
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self.output_format = output_format
+        self._pcm_output = pcm_output
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.spoken_message_ids: set[str] = set()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Threads for this processor's blocking device I/O, created on first use.
+
+        Capture and playback get a thread each, so a long playback in one
+        session never waits for another session's, as it would in the
+        event loop's small shared default executor.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="audio"
+            )
+        return self._executor
+
+    async def _offload(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run a blocking call on this processor's threads, keeping the current trace span."""
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(context.run, fn, *args)
+        )
+
+    @property
+    def pcm_output(self) -> PCMOutput:
+        """Output stream for raw PCM speech, kept open across replies."""
+        if self._pcm_output is None:
+            self._pcm_output = PCMOutput()
+        return self._pcm_output
+
+    def close(self) -> None:
+        """Stop this processor's threads once their current work has finished."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._pcm_output is not None:
+            self._pcm_output.close()
+
+    @functools.cached_property
+    def voice_settings(self) -> "VoiceSettings":
+        """ElevenLabs voice settings used for every response."""
+        from elevenlabs import VoiceSettings
+
+        return VoiceSettings(
+            stability=0.0, similarity_boost=1.0, style=0.0, use_speaker_boost=True
         )
-        
-    def record_audio(self) -> HumanMessage:
-        """Record audio from microphone until user presses Enter.
-        
+
+    def record_audio(
+        self,
+        endpointing: str = "manual",
+        upload_format: str = "wav",
+        incremental: bool = False,
+        stt_backend: str = "whisper-api",
+    ) -> HumanMessage:
+        """Record audio from the microphone and transcribe it.
+
+        Args:
+            endpointing: "manual" records until the user presses Enter, "vad"
+                stops automatically once the user stops speaking
+            upload_format: Encoding used to upload the recording, see
+                :func:`maltai_agent.capture.encode_upload`
+            incremental: Transcribe the utterance in windows while the user is
+                still speaking. Only used with "vad" endpointing.
+            stt_backend: Speech-to-text backend, see :meth:`get_transcriber`
+
         Returns:
             HumanMessage containing transcribed text
         """
-        print("Recording your instruction! ... Press Enter to stop recording.")
-        
-        audio_data: List[np.ndarray] = []
-        self._recording = True
-
-        def record_callback():
-            """Record audio in chunks."""
-            with sd.InputStream(samplerate=self.sample_rate, channels=1, dtype='int16') as stream:
-                while self._recording:
-                    audio_chunk, _ = stream.read(1024)
-                    audio_data.append(audio_chunk)
-
-        def stop_recording():
-            """Wait for Enter key to stop recording."""
+        if endpointing == "vad" and incremental:
+            return self._record_and_transcribe_incrementally(upload_format, stt_backend)
+        pieces = self._capture(endpointing)
+        if not pieces:
+            logger.info("No speech detected.")
+            return HumanMessage(content="")
+        return self.transcribe(pieces, upload_format, stt_backend)
+
+    async def arecord_audio(
+        self,
+        endpointing: str = "manual",
+        upload_format: str = "wav",
+        incremental: bool = False,
+        stt_backend: str = "whisper-api",
+    ) -> HumanMessage:
+        """Record and transcribe like :meth:`record_audio`, without blocking the event loop.
+
+        Capture runs on this processor's capture thread and the recording is
+        transcribed with :meth:`atranscribe`.
+        """
+        if endpointing == "vad" and incremental:
+            # Windows are transcribed by the incremental transcriber's own threads
+            return await self._offload(
+                self._record_and_transcribe_incrementally, upload_format, stt_backend
+            )
+        pieces = await self._offload(self._capture, endpointing)
+        if not pieces:
+            logger.info("No speech detected.")
+            return HumanMessage(content="")
+        return await self.atranscribe(pieces, upload_format, stt_backend)
+
+    def _capture(self, endpointing: str) -> list[np.ndarray]:
+        """Record one utterance from the microphone, as consecutive pieces."""
+        with tracing.span("audio.capture", endpointing=endpointing):
+            if endpointing == "vad":
+                return self._record_until_silence()
+            if endpointing == "manual":
+                # Drop leading and trailing silence, unless nothing sounded like speech
+                buffer = self._record_until_enter()
+                bounds = speech_bounds(
+                    buffer.pieces(), self.vad_config, self.sample_rate
+                )
+                return buffer.pieces(*bounds) if bounds else buffer.pieces()
+            raise ValueError(f"Unknown endpointing mode: {endpointing}")
+
+    def _record_and_transcribe_incrementally(
+        self, upload_format: str, stt_backend: str = "whisper-api"
+    ) -> HumanMessage:
+        # Windows are transcribed during capture, so both are one stage
+        with tracing.span("audio.capture", incremental=True):
+            text = self._record_incrementally(upload_format, stt_backend)
+        logger.info("Transcribed: %s", text)
+        return HumanMessage(content=text)
+
+    def _record_until_enter(self) -> CaptureBuffer:
+        """Record audio from microphone until user presses Enter."""
+        logger.info("Recording your instruction! ... Press Enter to stop recording.")
+
+        buffer = CaptureBuffer()
+
+        def record_callback(indata, frames, time, status):
+            """Copy each block straight from the device buffer into the capture buffer."""
+            buffer.append(indata)
+
+        # Record until Enter is pressed
+        with get_sounddevice().InputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype="int16",
+            blocksize=1024,
+            callback=record_callback,
+        ):
             input()
-            self._recording = False
-
-        # Start recording threads
-        recording_thread = threading.Thread(target=record_callback)
-        stop_thread = threading.Thread(target=stop_recording)
-        
-        recording_thread.start()
-        stop_thread.start()
-        
-        # Wait for completion
-        stop_thread.join()
-        recording_thread.join()
-
-        # Process recorded audio
-        audio_array = np.concatenate(audio_data, axis=0)
-        audio_bytes = io.BytesIO()
-        write(audio_bytes, self.sample_rate, audio_array)
-        audio_bytes.seek(0)
-        audio_bytes.name = "audio.wav"
-
-        # Transcribe with Whisper
-        transcription = openai_client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_bytes
+
+        return buffer
+
+    def _record_until_silence(self) -> list[np.ndarray]:
+        """Record audio from microphone until the user stops speaking."""
+        logger.info("Listening for your instruction...")
+
+        endpointer = Endpointer(self.vad_config, self.sample_rate)
+        with get_sounddevice().InputStream(
+            samplerate=self.sample_rate, channels=1, dtype="int16"
+        ) as stream:
+            while not endpointer.done:
+                audio_chunk, _ = stream.read(1024)
+                endpointer.feed(audio_chunk)
+        return endpointer.utterance_pieces()
+
+    def _record_incrementally(
+        self, upload_format: str, stt_backend: str = "whisper-api"
+    ) -> str:
+        """Record until the user stops speaking, transcribing at each pause."""
+        logger.info("Listening for your instruction...")
+
+        incremental = IncrementalTranscriber(
+            self.get_transcriber(upload_format, stt_backend),
+            sample_rate=self.sample_rate,
+            vad_config=self.vad_config,
+        )
+        with get_sounddevice().InputStream(
+            samplerate=self.sample_rate, channels=1, dtype="int16"
+        ) as stream:
+            while not incremental.done:
+                audio_chunk, _ = stream.read(1024)
+                incremental.feed(audio_chunk)
+        return incremental.finish()
+
+    def wait_for_wake_word(self, detector: WakeWordDetector) -> Detection:
+        """Listen until the wake word is heard.
+
+        Nothing is uploaded while listening; audio is only analysed locally.
+
+        Args:
+            detector: Detector enrolled with the wake word
+
+        Returns:
+            The detection that ended the wait
+        """
+        logger.info("Waiting for the wake word...")
+
+        detector.reset()
+        with (
+            tracing.span("audio.wake_word"),
+            get_sounddevice().InputStream(
+                samplerate=self.sample_rate, channels=1, dtype="int16"
+            ) as stream,
+        ):
+            while True:
+                audio_chunk, _ = stream.read(1024)
+                detection = detector.feed(audio_chunk)
+                if detection is not None:
+                    return detection
+
+    def transcribe(
+        self,
+        audio_array: Union[np.ndarray, Sequence[np.ndarray]],
+        upload_format: str = "wav",
+        stt_backend: str = "whisper-api",
+    ) -> HumanMessage:
+        """Transcribe recorded audio.
+
+        Args:
+            audio_array: Mono int16 samples, as one array or consecutive pieces
+            upload_format: Encoding used to upload the recording
+            stt_backend: Speech-to-text backend, see :meth:`get_transcriber`
+
+        Returns:
+            HumanMessage containing transcribed text
+        """
+        with tracing.span("audio.transcribe", audio_s=self._duration(audio_array)):
+            text = self.get_transcriber(upload_format, stt_backend).transcribe(
+                audio_array, self.sample_rate
+            )
+
+        logger.info("Transcribed: %s", text)
+        return HumanMessage(content=text)
+
+    async def atranscribe(
+        self,
+        audio_array: Union[np.ndarray, Sequence[np.ndarray]],
+        upload_format: str = "wav",
+        stt_backend: str = "whisper-api",
+    ) -> HumanMessage:
+        """Transcribe like :meth:`transcribe`, without blocking the event loop.
+
+        Transcribers with an ``atranscribe`` coroutine, such as the Whisper
+        API client, are awaited; any other transcriber, such as the local
+        engine, runs in a thread.
+        """
+        transcriber = self.get_transcriber(upload_format, stt_backend)
+        with tracing.span("audio.transcribe", audio_s=self._duration(audio_array)):
+            if hasattr(transcriber, "atranscribe"):
+                text = await transcriber.atranscribe(audio_array, self.sample_rate)
+            else:
+                text = await asyncio.to_thread(
+                    transcriber.transcribe, audio_array, self.sample_rate
+                )
+
+        logger.info("Transcribed: %s", text)
+        return HumanMessage(content=text)
+
+    def _duration(self, audio_array: Union[np.ndarray, Sequence[np.ndarray]]) -> float:
+        pieces = [audio_array] if isinstance(audio_array, np.ndarray) else audio_array
+        return sum(len(piece) for piece in pieces) / self.sample_rate
+
+    def get_transcriber(
+        self, upload_format: str = "wav", stt_backend: str = "whisper-api"
+    ) -> Transcriber:
+        """Return the configured transcriber, or one for ``stt_backend``.
+
+        Args:
+            upload_format: Encoding used to upload recordings to the API
+            stt_backend: ``"whisper-api"`` for Whisper through the OpenAI API,
+                or ``"local"`` for a quantized Whisper model on the CPU,
+                optionally with the model size, as in ``"local:small.en"``
+
+        Raises:
+            ValueError: If the backend is unknown
+        """
+        if self.transcriber is not None:
+            return self.transcriber
+        backend, model = parse_backend(stt_backend)
+        if backend == "local":
+            # Cheap to create; the model itself is loaded once per process
+            return LocalWhisperTranscriber(model or "base.en")
+        return WhisperAPITranscriber(
+            get_openai_client(),
+            async_client=get_async_openai_client(),
+            upload_format=upload_format,
+        )
+
+    def get_synthesizer(
+        self, tts_backend: str = "elevenlabs"
+    ) -> Optional[LocalPiperSynthesizer]:
+        """Return the local synthesizer of ``tts_backend``, or None for ElevenLabs.
+
+        Args:
+            tts_backend: ``"elevenlabs"`` to synthesize through the ElevenLabs
+                API in this processor's ``output_format``, or ``"local"`` for
+                a Piper voice on the CPU, optionally with the voice model's
+                path, as in ``"local:voices/en_US-amy-medium.onnx"``
+
+        Raises:
+            ValueError: If the backend is unknown
+        """
+        backend, voice = parse_tts_backend(tts_backend)
+        if backend == "local":
+            # Cheap to create; the voice itself is loaded once per process
+            return LocalPiperSynthesizer(voice or DEFAULT_LOCAL_VOICE)
+        return None
+
+    def synthesize(
+        self, text: str, tts_backend: str = "elevenlabs"
+    ) -> Union[bytes, mmap.mmap]:
+        """Convert text to speech, reusing cached audio when possible.
+
+        Args:
+            text: Text to convert to speech
+            tts_backend: Text-to-speech backend, see :meth:`get_synthesizer`
+
+        Returns:
+            The audio, memory-mapped when it comes from the cache
+        """
+        local = self.get_synthesizer(tts_backend)
+        convert = self._convert if local is None else local.synthesize
+        with tracing.span("audio.synthesize", chars=len(text)):
+            if self.speech_cache is None:
+                return convert(text)
+            key = self._cache_key(text, local)
+            return self.speech_cache.get_or_synthesize(key, lambda: convert(text))
+
+    async def asynthesize(
+        self, text: str, tts_backend: str = "elevenlabs"
+    ) -> Union[bytes, mmap.mmap]:
+        """Synthesize like :meth:`synthesize`, through the asyncio ElevenLabs client or in a thread."""
+        local = self.get_synthesizer(tts_backend)
+        if local is None:
+            convert = self._aconvert
+        else:
+            convert = functools.partial(asyncio.to_thread, local.synthesize)
+        with tracing.span("audio.synthesize", chars=len(text)):
+            if self.speech_cache is None:
+                return await convert(text)
+            key = self._cache_key(text, local)
+            return await self.speech_cache.aget_or_synthesize(
+                key, lambda: convert(text), offload=self._offload
+            )
+
+    def _cache_key(
+        self, text: str, local: Optional[LocalPiperSynthesizer] = None
+    ) -> str:
+        """Return the speech cache key of text spoken with this processor's or the local voice."""
+        if local is not None:
+            return self.speech_cache.key(
+                text,
+                voice_id=local.voice,
+                model_id="piper",
+                output_format=local.output_format,
+                voice_settings=None,
+            )
+        return self.speech_cache.key(
+            text,
+            voice_id=self.voice_id,
+            model_id=self.model_id,
+            output_format=self.output_format,
+            voice_settings=self.voice_settings,
         )
 
-        print(f"Transcribed: {transcription.text}")
-        return HumanMessage(content=transcription.text)
+    def _convert(self, text: str) -> bytes:
+        """Synthesize text through ElevenLabs."""
+        audio = get_elevenlabs_client().text_to_speech.convert(
+            voice_id=self.voice_id,
+            output_format=self.output_format,
+            text=text,
+            model_id=self.model_id,
+            voice_settings=self.voice_settings,
+        )
+        data = b"".join(audio)
+        tracing.annotate(bytes_down=len(data))
+        return data
+
+    async def _aconvert(self, text: str) -> bytes:
+        """Synthesize text through ElevenLabs' asyncio client."""
+        chunks = [
+            chunk
+            async for chunk in get_async_elevenlabs_client().text_to_speech.convert(
+                voice_id=self.voice_id,
+                output_format=self.output_format,
+                text=text,
+                model_id=self.model_id,
+                voice_settings=self.voice_settings,
+            )
+        ]
+        data = b"".join(chunks)
+        tracing.annotate(bytes_down=len(data))
+        return data
+
+    def prewarm(self, phrases: Iterable[str], tts_backend: str = "elevenlabs") -> int:
+        """Synthesize phrases that are not cached yet, so they later play without synthesis.
+
+        Args:
+            phrases: Phrases the agent is expected to say often
+            tts_backend: Text-to-speech backend the phrases will be spoken
+                with, see :meth:`get_synthesizer`
+
+        Returns:
+            Number of phrases that were synthesized
+        """
+        if self.speech_cache is None:
+            return 0
+        local = self.get_synthesizer(tts_backend)
+        convert = self._convert if local is None else local.synthesize
+        synthesized = 0
+        for phrase in phrases:
+            key = self._cache_key(phrase, local)
+            if key not in self.speech_cache:
+                self.speech_cache.put(key, convert(clean_for_speech(phrase)))
+                synthesized += 1
+        return synthesized
+
+    async def aprewarm(
+        self, phrases: Iterable[str], tts_backend: str = "elevenlabs"
+    ) -> int:
+        """Prewarm like :meth:`prewarm`, with cache files written on this processor's threads."""
+        if self.speech_cache is None:
+            return 0
+        local = self.get_synthesizer(tts_backend)
+        synthesized = 0
+        for phrase in phrases:
+            key = self._cache_key(phrase, local)
+            if key in self.speech_cache:
+                continue
+            text = clean_for_speech(phrase)
+            if local is None:
+                audio = await self._aconvert(text)
+            else:
+                audio = await self._offload(local.synthesize, text)
+            await self._offload(self.speech_cache.put, key, audio)
+            synthesized += 1
+        return synthesized
 
-    def speak_response(self, text: str):
+    def speak_response(self, text: str, tts_backend: str = "elevenlabs"):
         """Convert text to speech and play it.
-        
+
         Args:
             text: Text to convert to speech
+            tts_backend: Text-to-speech backend, see :meth:`get_synthesizer`
         """
         # Clean text of markdown formatting
-        cleaned_text = text.replace("**", "")
-        
-        # Generate speech using ElevenLabs client
-        audio = elevenlabs_client.text_to_speech.convert(
-            voice_id="pNInz6obpgDQGcFmaJgB",  # Adam voice
-            output_format="mp3_22050_32",
-            text=cleaned_text,
-            model_id="eleven_turbo_v2_5",
-            voice_settings=self.voice_settings
-        )
-        
+        cleaned_text = clean_for_speech(text)
+        self._start_reply()
+
+        local = self.get_synthesizer(tts_backend)
+        if local is not None:
+            self._speak_local(local, cleaned_text)
+            return
+
         # Play audio response
-        play(audio) 
\ No newline at end of file
+        audio = self.synthesize(cleaned_text)
+        with tracing.span("audio.play", bytes=len(audio)):
+            self._output(audio, self.output_format)
+
+    async def aspeak_response(self, text: str, tts_backend: str = "elevenlabs") -> None:
+        """Speak like :meth:`speak_response`, playing on this processor's playback thread."""
+        cleaned_text = clean_for_speech(text)
+        self._start_reply()
+        local = self.get_synthesizer(tts_backend)
+        if local is not None:
+            await self._offload(self._speak_local, local, cleaned_text)
+            return
+        audio = await self.asynthesize(cleaned_text)
+        with tracing.span("audio.play", bytes=len(audio)):
+            await self._offload(self._output, audio, self.output_format)
+
+    def _start_reply(self) -> None:
+        """Let the PCM output play again if the previous reply was stopped."""
+        if self._pcm_output is not None:
+            self._pcm_output.resume()
+
+    def _speak_local(self, local: LocalPiperSynthesizer, text: str) -> None:
+        """Play each sentence as soon as the local voice has synthesized it."""
+        key = self._cache_key(text, local) if self.speech_cache is not None else None
+        audio = self.speech_cache.get(key) if key is not None else None
+        if audio is not None:
+            with tracing.span("audio.play", bytes=len(audio)):
+                self.pcm_output.write(audio, local.sample_rate)
+            return
+        # Later sentences are synthesized while earlier ones play, so both are one stage
+        chunks = []
+        start = time.perf_counter()
+        with tracing.span("audio.play", chars=len(text), streamed=True):
+            for chunk in local.stream(text):
+                if not chunks:
+                    tracing.annotate(first_sample_s=time.perf_counter() - start)
+                self.pcm_output.write(chunk, local.sample_rate)
+                chunks.append(chunk)
+            tracing.annotate(bytes=sum(map(len, chunks)))
+        if key is not None:
+            self.speech_cache.put(key, b"".join(chunks))
+
+    def _output(self, audio: Union[bytes, mmap.mmap], output_format: str) -> None:
+        """Play audio on the PCM stream if it is raw PCM, through a player otherwise."""
+        sample_rate = pcm_sample_rate(output_format)
+        if sample_rate is None:
+            self._play(audio)
+        else:
+            self.pcm_output.write(audio, sample_rate)
+
+    def _play(self, audio: Union[bytes, mmap.mmap]) -> None:
+        """Play encoded audio on the output device until it has finished."""
+        play(audio)
+
+    async def speak_stream(
+        self, tokens: AsyncIterable[str], tts_backend: str = "elevenlabs"
+    ) -> list[str]:
+        """Speak model output sentence by sentence while it is being generated.
+
+        Args:
+            tokens: Text fragments as they arrive from the model
+            tts_backend: Text-to-speech backend, see :meth:`get_synthesizer`
+
+        Returns:
+            The sentences that were spoken, in order
+        """
+        local = self.get_synthesizer(tts_backend)
+        output_format = self.output_format if local is None else local.output_format
+        # A stop between two sentences holds for the rest of the reply
+        self._start_reply()
+        return await speak_stream(
+            split_sentences(tokens),
+            synthesize=functools.partial(self.asynthesize, tts_backend=tts_backend),
+            play=lambda audio: self._offload(self._output, audio, output_format),
+        )
@@ -0,0 +1,203 @@
+"""Token budgets for the prompt and rolling summarization of old turns."""
+
+from __future__ import annotations
+
+import functools
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Sequence, TypeVar
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, ToolMessage
+
+from maltai_agent import prompts
+
+T = TypeVar("T")
+
+
+@dataclass(kw_only=True)
+class TokenBudget:
+    """Maximum tokens spent on each section of the model input."""
+
+    memories: int = 800
+    """Retrieved memories; the least relevant are dropped first."""
+    profile: int = 300
+    """The user's profile."""
+    todos: int = 400
+    """The todo list; later todos are dropped first."""
+    instructions: int = 300
+    """The user's instructions."""
+    history: int = 3000
+    """Recent turns sent verbatim. Older turns are folded into the summary."""
+    summary: int = 500
+    """The running summary of folded turns."""
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding() -> Any:
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # No tiktoken, or its encoding file cannot be downloaded
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken's ``cl100k_base``, or estimate 4 characters per token."""
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, limit: int) -> str:
+    """Cut text to at most ``limit`` tokens, marking the cut with an ellipsis."""
+    if count_tokens(text) <= limit:
+        return text
+    encoding = _encoding()
+    if encoding is None:
+        return text[: max(0, 4 * limit - 1)] + "…"
+    return (
+        encoding.decode(
+            encoding.encode(text, disallowed_special=())[: max(0, limit - 1)]
+        )
+        + "…"
+    )
+
+
+def fit_items(items: Sequence[T], render: Callable[[T], str], limit: int) -> list[T]:
+    """Return the longest prefix of ``items`` whose rendered lines fit in ``limit`` tokens."""
+    kept: list[T] = []
+    used = 0
+    for item in items:
+        used += count_tokens(render(item)) + 1
+        if used > limit:
+            break
+        kept.append(item)
+    return kept
+
+
+def message_tokens(message: AnyMessage) -> int:
+    """Estimate the input tokens of one chat message, including tool calls."""
+    content = (
+        message.content
+        if isinstance(message.content, str)
+        else json.dumps(message.content)
+    )
+    tokens = 4 + count_tokens(content)
+    if isinstance(message, AIMessage) and message.tool_calls:
+        tokens += count_tokens(
+            json.dumps([call["args"] for call in message.tool_calls])
+        )
+    return tokens
+
+
+def _turn_starts(messages: Sequence[AnyMessage]) -> list[int]:
+    """Return the indexes where a user turn starts."""
+    return [
+        i for i, message in enumerate(messages) if isinstance(message, HumanMessage)
+    ] or [0]
+
+
+def split_history(
+    messages: Sequence[AnyMessage], limit: int
+) -> tuple[list[AnyMessage], list[AnyMessage]]:
+    """Split messages into older turns and the most recent turns that fit in ``limit``.
+
+    Messages are only split where a user turn starts, so a tool call is never
+    separated from its result. The latest turn is always kept, even when it
+    alone exceeds the budget.
+
+    Returns:
+        ``(older, recent)``, where ``older + recent == messages``.
+    """
+    messages = list(messages)
+    starts = _turn_starts(messages)
+    cut = starts[-1]
+    used = sum(message_tokens(m) for m in messages[cut:])
+    for start, end in zip(reversed(starts[:-1]), reversed(starts[1:])):
+        used += sum(message_tokens(m) for m in messages[start:end])
+        if used > limit:
+            break
+        cut = start
+    return messages[:cut], messages[cut:]
+
+
+def unsummarized(
+    messages: Sequence[AnyMessage], summarized_through: Optional[str]
+) -> list[AnyMessage]:
+    """Return the messages after the last one folded into the summary."""
+    messages = list(messages)
+    if summarized_through is None:
+        return messages
+    for index, message in enumerate(messages):
+        if message.id == summarized_through:
+            return messages[index + 1 :]
+    return messages
+
+
+def format_transcript(messages: Sequence[AnyMessage]) -> str:
+    """Render messages as a plain transcript for the summarizer."""
+    lines = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            lines.append(f"User: {message.content}")
+        elif isinstance(message, AIMessage):
+            if message.content:
+                lines.append(f"Assistant: {message.content}")
+            for call in message.tool_calls:
+                lines.append(
+                    f"Assistant used {call['name']}: {json.dumps(call['args'])}"
+                )
+        elif isinstance(message, ToolMessage):
+            lines.append(f"Tool result: {message.content}")
+    return "\n".join(lines)
+
+
+async def summarize(
+    model: BaseChatModel,
+    summary: str,
+    messages: Sequence[AnyMessage],
+    limit: int,
+    *,
+    prompt: str = prompts.SUMMARY_PROMPT,
+    config: Optional[dict[str, Any]] = None,
+) -> str:
+    """Fold ``messages`` into the running ``summary``.
+
+    Only the new messages and the previous summary are sent, so the cost of
+    each update does not depend on the length of the conversation.
+
+    Args:
+        model: The chat model that writes the summary
+        summary: The current summary, empty at first
+        messages: Messages to fold into it, oldest first
+        limit: Maximum tokens of the new summary
+        prompt: Template with ``summary``, ``transcript`` and ``max_tokens`` fields
+        config: Passed to the model call
+    """
+    prompt = prompt.format(
+        summary=summary or "(none yet)",
+        transcript=format_transcript(messages),
+        max_tokens=limit,
+    )
+    response = await model.ainvoke([{"role": "user", "content": prompt}], config)
+    text = (
+        response.content if isinstance(response.content, str) else str(response.content)
+    )
+    return truncate_to_tokens(text.strip(), limit)
+
+
+__all__ = [
+    "TokenBudget",
+    "count_tokens",
+    "fit_items",
+    "format_transcript",
+    "message_tokens",
+    "split_history",
+    "summarize",
+    "truncate_to_tokens",
+    "unsummarized",
+]
@@ -0,0 +1,160 @@
+"""Capture buffers and upload encoding for recorded audio."""
+
+from __future__ import annotations
+
+import io
+import wave
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+UPLOAD_FORMATS = ("wav", "flac", "ogg")
+"""Encodings accepted by :func:`encode_upload`."""
+
+
+class CaptureBuffer:
+    """Append-only int16 sample buffer backed by preallocated blocks.
+
+    Incoming chunks are copied once into fixed-size blocks, so recording
+    never reallocates or re-copies earlier audio. Reading a range that lies
+    inside a single block returns a view; only ranges spanning several
+    blocks are copied. Samples are addressed by their absolute index since
+    the start of the capture, and old samples can be released with
+    :meth:`discard_before` to use the buffer as a ring.
+    """
+
+    def __init__(self, block_samples: int = 16000):
+        """Initialize an empty buffer.
+
+        Args:
+            block_samples: Number of samples allocated at a time
+        """
+        self.block_samples = block_samples
+        self._blocks: list[np.ndarray] = []
+        self._first_block = 0
+        self.start = 0
+        """Absolute index of the oldest retained sample."""
+        self.end = 0
+        """Absolute index just after the newest sample."""
+        self.bytes_copied = 0
+        """Total bytes copied by :meth:`append` and :meth:`get`."""
+
+    def __len__(self) -> int:
+        """Return the number of retained samples."""
+        return self.end - self.start
+
+    def append(self, samples: np.ndarray) -> None:
+        """Copy a chunk of mono samples into the buffer."""
+        samples = np.ravel(samples)
+        written = 0
+        while written < len(samples):
+            allocated = (self._first_block + len(self._blocks)) * self.block_samples
+            if self.end >= allocated:
+                self._blocks.append(np.empty(self.block_samples, dtype=np.int16))
+                allocated += self.block_samples
+            position = self.end - (allocated - self.block_samples)
+            count = min(self.block_samples - position, len(samples) - written)
+            self._blocks[-1][position : position + count] = samples[
+                written : written + count
+            ]
+            written += count
+            self.end += count
+        self.bytes_copied += samples.nbytes
+
+    def discard_before(self, index: int) -> None:
+        """Release samples before an absolute index."""
+        self.start = max(self.start, min(index, self.end))
+        drop = self.start // self.block_samples - self._first_block
+        if drop > 0:
+            del self._blocks[:drop]
+            self._first_block += drop
+
+    def pieces(
+        self, start: Optional[int] = None, end: Optional[int] = None
+    ) -> list[np.ndarray]:
+        """Return views of the samples in ``[start, end)``, one per block.
+
+        The range uses absolute indices and is clipped to the retained samples.
+        """
+        start = self.start if start is None else max(start, self.start)
+        end = self.end if end is None else min(end, self.end)
+        if end <= start:
+            return []
+        first = start // self.block_samples
+        last = (end - 1) // self.block_samples
+        return [
+            self._blocks[number - self._first_block][
+                max(start - number * self.block_samples, 0) : min(
+                    end - number * self.block_samples, self.block_samples
+                )
+            ]
+            for number in range(first, last + 1)
+        ]
+
+    def get(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """Return the samples in ``[start, end)`` as a single array.
+
+        A view is returned when the range lies within one block, otherwise the
+        pieces are copied into a new array.
+        """
+        pieces = self.pieces(start, end)
+        if not pieces:
+            return np.empty(0, dtype=np.int16)
+        if len(pieces) == 1:
+            return pieces[0]
+        joined = np.concatenate(pieces)
+        self.bytes_copied += joined.nbytes
+        return joined
+
+
+def encode_upload(
+    samples: Union[np.ndarray, Sequence[np.ndarray]],
+    sample_rate: int,
+    upload_format: str = "wav",
+) -> io.BytesIO:
+    """Encode mono int16 samples as a named in-memory file for upload.
+
+    ``"wav"`` is uncompressed 16-bit PCM. ``"flac"`` is lossless and
+    ``"ogg"`` is Opus in an Ogg container; both need the optional
+    ``soundfile`` package.
+
+    Args:
+        samples: Mono int16 samples, either as one array or as consecutive
+            pieces (such as :meth:`CaptureBuffer.pieces`) that are encoded
+            without being joined first
+        sample_rate: Sample rate of the samples
+        upload_format: One of :data:`UPLOAD_FORMATS`
+    """
+    pieces = [samples] if isinstance(samples, np.ndarray) else samples
+    audio_bytes = io.BytesIO()
+    if upload_format == "wav":
+        with wave.open(audio_bytes, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            for piece in pieces:
+                wav.writeframes(np.ascontiguousarray(piece, dtype="<i2"))
+    elif upload_format in ("flac", "ogg"):
+        try:
+            import soundfile
+        except ImportError as e:
+            raise ImportError(
+                f"Encoding uploads as {upload_format} requires the soundfile "
+                "package: pip install soundfile"
+            ) from e
+        audio_format, subtype = (
+            ("FLAC", "PCM_16") if upload_format == "flac" else ("OGG", "OPUS")
+        )
+        with soundfile.SoundFile(
+            audio_bytes, "w", sample_rate, 1, subtype, format=audio_format
+        ) as encoded:
+            for piece in pieces:
+                encoded.write(np.ravel(piece))
+    else:
+        raise ValueError(f"Unknown upload format: {upload_format}")
+    audio_bytes.seek(0)
+    audio_bytes.name = f"audio.{upload_format}"
+    return audio_bytes
+
+
+__all__ = ["CaptureBuffer", "UPLOAD_FORMATS", "encode_upload"]
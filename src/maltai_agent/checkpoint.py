@@ -0,0 +1,575 @@
+"""Durable checkpointer that stores message lists as the deltas appended at each step."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+import ormsgpack
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    ChatMessage,
+    FunctionMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    checkpoint_type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    base_version TEXT,
+    depth INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+# A delta row and the rows it is based on, newest first, down to the snapshot
+_CHAIN = """
+WITH RECURSIVE chain (type, value, base_version) AS (
+    SELECT type, value, base_version FROM blobs
+    WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?
+    UNION ALL
+    SELECT b.type, b.value, b.base_version FROM blobs AS b JOIN chain AS c
+    ON b.thread_id = ? AND b.checkpoint_ns = ? AND b.channel = ? AND b.version = c.base_version
+)
+SELECT type, value FROM chain
+"""
+
+EMPTY = "empty"
+MESSAGES = "messages"
+"""Row type of a message list packed with :func:`dump_messages`."""
+MESSAGES_ZLIB = "messages.zlib"
+"""Row type of a compressed snapshot of a message list."""
+MESSAGES_DELTA = "messages.delta"
+"""Row type of the messages appended to the list of ``base_version``."""
+
+_MESSAGE_TYPES: dict[str, type[BaseMessage]] = {
+    cls.model_fields["type"].default: cls
+    for cls in (
+        HumanMessage,
+        AIMessage,
+        SystemMessage,
+        ToolMessage,
+        FunctionMessage,
+        ChatMessage,
+    )
+}
+
+
+def is_message_list(value: Any) -> bool:
+    """Whether :func:`dump_messages` can pack ``value`` without losing anything."""
+    return isinstance(value, list) and all(
+        _MESSAGE_TYPES.get(getattr(message, "type", None)) is type(message)
+        for message in value
+    )
+
+
+def dump_messages(messages: Sequence[BaseMessage]) -> bytes:
+    """Pack messages as MessagePack ``[type, fields]`` pairs, leaving out fields at their defaults.
+
+    Raises:
+        TypeError: If a field holds a value MessagePack cannot encode
+    """
+    return ormsgpack.packb(
+        [
+            [message.type, message.model_dump(exclude_defaults=True, exclude={"type"})]
+            for message in messages
+        ]
+    )
+
+
+def load_messages(data: bytes) -> list[BaseMessage]:
+    """Unpack messages packed by :func:`dump_messages`."""
+    return [_MESSAGE_TYPES[kind](**fields) for kind, fields in ormsgpack.unpackb(data)]
+
+
+class SQLiteDeltaSaver(BaseCheckpointSaver[str]):
+    """A checkpointer that keeps threads in a SQLite file and message lists as deltas.
+
+    ``MemorySaver`` and the other savers store every new version of a
+    channel in full, so a thread that runs for days writes its whole,
+    growing ``messages`` list again at every step. Here a new version of a
+    message list whose previous version is a prefix of it only stores the
+    appended messages and the version it extends. Every ``snapshot_every``
+    deltas, and whenever messages were removed or replaced, the whole list
+    is written again, compressed, so loading a version never reads more
+    than one snapshot and ``snapshot_every`` deltas.
+
+    Messages are packed as MessagePack with only the fields that differ
+    from their defaults; other channel values and metadata go through the
+    configured serializer, as in the other savers. The latest list of each
+    thread is kept in memory to find the appended messages without reading
+    it back, so resuming a thread reads the database once.
+
+    The saver is safe to share between threads and event loops; blocking
+    work runs in a worker thread from the async API.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        snapshot_every: int = 50,
+        cached_lists: int = 256,
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        """Open or create a checkpoint database.
+
+        Args:
+            path: SQLite database file; ``":memory:"`` keeps everything in RAM
+            snapshot_every: Deltas written after a snapshot before the whole
+                list is written again; 0 writes every version in full
+            cached_lists: Latest message lists kept in memory, one per
+                thread and channel
+            serde: Serializer of checkpoints, metadata and other channels
+        """
+        super().__init__(serde=serde)
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.cached_lists = cached_lists
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        # (thread, namespace, channel) -> (version, messages, deltas since the snapshot)
+        self._latest: OrderedDict[
+            tuple[str, str, str], tuple[str, list[BaseMessage], int]
+        ] = OrderedDict()
+
+    def _write(self, statements: list[tuple[str, list[tuple]]]) -> None:
+        """Run ``executemany`` statements in one transaction. The lock must be held."""
+        cursor = self.conn.cursor()
+        cursor.execute("BEGIN")
+        try:
+            for sql, rows in statements:
+                if rows:
+                    cursor.executemany(sql, rows)
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+
+    # Channel values
+
+    def _remember(
+        self,
+        key: tuple[str, str, str],
+        version: str,
+        messages: list[BaseMessage],
+        depth: int,
+    ) -> None:
+        self._latest[key] = (version, list(messages), depth)
+        self._latest.move_to_end(key)
+        while len(self._latest) > self.cached_lists:
+            self._latest.popitem(last=False)
+
+    def _dump_value(
+        self, key: tuple[str, str, str], version: str, value: Any
+    ) -> tuple[str, bytes, Optional[str], int]:
+        """Return the type, data, base version and delta depth of a new channel version."""
+        if is_message_list(value):
+            latest = self._latest.get(key)
+            try:
+                if (
+                    latest is not None
+                    and latest[2] < self.snapshot_every
+                    and _extends(value, latest[1])
+                ):
+                    base_version, base, depth = latest
+                    data = dump_messages(value[len(base) :])
+                    self._remember(key, version, value, depth + 1)
+                    return MESSAGES_DELTA, data, base_version, depth + 1
+                data = zlib.compress(dump_messages(value))
+                self._remember(key, version, value, 0)
+                return MESSAGES_ZLIB, data, None, 0
+            except TypeError:
+                # A field MessagePack cannot encode; the serializer handles it
+                self._latest.pop(key, None)
+        type_, data = self.serde.dumps_typed(value)
+        return type_, data, None, 0
+
+    def _load_value(self, key: tuple[str, str, str], version: str) -> Any:
+        """Return the value of a channel version, or ``EMPTY`` if it has none."""
+        latest = self._latest.get(key)
+        if latest is not None and latest[0] == version:
+            return list(latest[1])
+        rows = self.conn.execute(_CHAIN, (*key, version, *key)).fetchall()
+        if not rows or rows[0][0] == EMPTY:
+            return EMPTY
+        if rows[0][0] not in (MESSAGES, MESSAGES_ZLIB, MESSAGES_DELTA):
+            return self.serde.loads_typed(rows[0])
+        type_, data = rows[-1]
+        messages = load_messages(
+            zlib.decompress(data) if type_ == MESSAGES_ZLIB else data
+        )
+        for _, delta in reversed(rows[:-1]):
+            messages.extend(load_messages(delta))
+        self._remember(key, version, messages, len(rows) - 1)
+        return messages
+
+    def _dump_write(self, value: Any) -> tuple[str, bytes]:
+        if is_message_list(value):
+            try:
+                return MESSAGES, dump_messages(value)
+            except TypeError:
+                pass
+        return self.serde.dumps_typed(value)
+
+    def _load_write(self, type_: str, data: bytes) -> Any:
+        return (
+            load_messages(data)
+            if type_ == MESSAGES
+            else self.serde.loads_typed((type_, data))
+        )
+
+    # Checkpoints
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, row: tuple) -> CheckpointTuple:
+        (
+            checkpoint_id,
+            parent_checkpoint_id,
+            checkpoint_type,
+            checkpoint_data,
+            metadata_type,
+            metadata,
+        ) = row
+        checkpoint: Checkpoint = self.serde.loads_typed(
+            (checkpoint_type, checkpoint_data)
+        )
+        values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            value = self._load_value((thread_id, checkpoint_ns, channel), str(version))
+            if value is not EMPTY:
+                values[channel] = value
+        writes = self.conn.execute(
+            "SELECT task_id, channel, type, value FROM writes"
+            " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config=_config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint={**checkpoint, "channel_values": values},
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=_config(thread_id, checkpoint_ns, parent_checkpoint_id)
+            if parent_checkpoint_id
+            else None,
+            pending_writes=[
+                (task_id, channel, self._load_write(type_, value))
+                for task_id, channel, type_, value in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Return the checkpoint of ``config``, or the thread's latest if it names none."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata"
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints"
+                    " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+                    " ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            return self._tuple(thread_id, checkpoint_ns, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first, matching the config, metadata filter and ``before``."""
+        where, params = [], []
+        if config:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (
+                checkpoint_ns := config["configurable"].get("checkpoint_ns")
+            ) is not None:
+                where.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_id)
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint,"
+            " metadata_type, metadata FROM checkpoints"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+        )
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        for thread_id, checkpoint_ns, *row in rows:
+            if filter:
+                metadata = self.serde.loads_typed((row[4], row[5]))
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None and limit <= 0:
+                break
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                checkpoint_tuple = self._tuple(thread_id, checkpoint_ns, tuple(row))
+            yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint and the channel versions that are new in it."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        checkpoint_type, checkpoint_data = self.serde.dumps_typed(stored)
+        metadata_type, metadata_data = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+        row = (
+            thread_id,
+            checkpoint_ns,
+            checkpoint["id"],
+            config["configurable"].get("checkpoint_id"),
+            checkpoint_type,
+            checkpoint_data,
+            metadata_type,
+            metadata_data,
+        )
+        with self._lock:
+            blobs = []
+            for channel, version in new_versions.items():
+                key = (thread_id, checkpoint_ns, channel)
+                if channel in values:
+                    blobs.append(
+                        (
+                            *key,
+                            str(version),
+                            *self._dump_value(key, str(version), values[channel]),
+                        )
+                    )
+                else:
+                    blobs.append((*key, str(version), EMPTY, b"", None, 0))
+            try:
+                self._write(
+                    [
+                        (
+                            "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            blobs,
+                        ),
+                        (
+                            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            [row],
+                        ),
+                    ]
+                )
+            except BaseException:
+                # Later deltas must not be based on versions that were not stored
+                for channel in new_versions:
+                    self._latest.pop((thread_id, checkpoint_ns, channel), None)
+                raise
+        return _config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store the writes of a task; writes to special channels replace earlier ones."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = [
+            (
+                thread_id,
+                checkpoint_ns,
+                checkpoint_id,
+                task_id,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self._dump_write(value),
+                task_path,
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        # Regular writes are kept when a task is retried, like the other savers do
+        with self._lock:
+            self._write(
+                [
+                    (
+                        "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [r for r in rows if r[4] >= 0],
+                    ),
+                    (
+                        "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [r for r in rows if r[4] < 0],
+                    ),
+                ]
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint, channel version and write of a thread."""
+        with self._lock:
+            self._write(
+                [
+                    (f"DELETE FROM {table} WHERE thread_id = ?", [(thread_id,)])
+                    for table in ("checkpoints", "blobs", "writes")
+                ]
+            )
+            for key in [key for key in self._latest if key[0] == thread_id]:
+                del self._latest[key]
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Get a checkpoint tuple like :meth:`get_tuple`, in a worker thread."""
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """List checkpoints like :meth:`list`, reading them in a worker thread."""
+        tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint like :meth:`put`, in a worker thread."""
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store pending writes like :meth:`put_writes`, in a worker thread."""
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Delete a thread like :meth:`delete_thread`, in a worker thread."""
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: Any) -> str:
+        """Return a version that sorts after ``current`` and differs between forks of a thread."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self) -> SQLiteDeltaSaver:
+        """Return the saver, closed again when the block exits."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the database."""
+        self.close()
+
+
+def _extends(messages: list[BaseMessage], base: list[BaseMessage]) -> bool:
+    """Whether ``base`` is a prefix of ``messages``; unchanged messages are usually the same objects."""
+    return len(messages) >= len(base) and all(
+        a is b or a == b for a, b in zip(messages, base)
+    )
+
+
+def _config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+    return {
+        "configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint_id,
+        }
+    }
+
+
+__all__ = ["SQLiteDeltaSaver", "dump_messages", "is_message_list", "load_messages"]
@@ -1,5 +1,6 @@
 """Define the configurable parameters for the agent."""
 
+import json
 import os
 from dataclasses import dataclass, field, fields
 from typing import Any, Optional
@@ -8,6 +9,7 @@ from langchain_core.runnables import RunnableConfig
 from typing_extensions import Annotated
 
 from maltai_agent import prompts
+from maltai_agent.budget import TokenBudget
 
 
 @dataclass(kw_only=True)
@@ -23,10 +25,36 @@ class Configuration:
             "Should be in the form: provider/model-name."
         },
     )
+    endpointing: str = "manual"
+    """How recording stops: "manual" waits for Enter, "vad" stops when the user stops speaking."""
+    incremental_transcription: bool = False
+    """Transcribe at pauses while the user is still speaking (needs "vad" endpointing)."""
+    upload_format: str = "wav"
+    """Encoding of recordings sent for transcription: "wav", "flac" or "ogg" (Opus)."""
+    stt_backend: str = "whisper-api"
+    """Speech-to-text: "whisper-api", or "local" for Whisper on the CPU, optionally as "local:small.en"."""
+    tts_backend: str = "elevenlabs"
+    """Text-to-speech: "elevenlabs", or "local" for a Piper voice on the CPU, optionally as "local:<voice.onnx>"."""
+    stream_speech: bool = False
+    """Speak the response sentence by sentence while the model is generating it."""
+    prompt_todos: int = 10
+    """Number of open todos shown in the system prompt, soonest deadline first."""
+    tool_followup: bool = False
+    """After running tools, call the model once more so it can reply to their results."""
     system_prompt: str = prompts.SYSTEM_PROMPT
     instruction_prompt: str = prompts.INSTRUCTION_UPDATE_PROMPT
     todo_prompt: str = prompts.TODO_PROMPT
     profile_prompt: str = prompts.PROFILE_UPDATE_PROMPT
+    summary_prompt: str = prompts.SUMMARY_PROMPT
+    token_budget: TokenBudget = field(default_factory=TokenBudget)
+    """Tokens per prompt section; a dict or a JSON object such as {"history": 2000}."""
+
+    def __post_init__(self) -> None:
+        """Accept the token budget as a dict or JSON, as it comes from config or env."""
+        if isinstance(self.token_budget, str):
+            self.token_budget = json.loads(self.token_budget)
+        if isinstance(self.token_budget, dict):
+            self.token_budget = TokenBudget(**self.token_budget)
 
     @classmethod
     def from_runnable_config(
@@ -42,4 +70,31 @@ class Configuration:
             if f.init
         }
 
-        return cls(**{k: v for k, v in values.items() if v})
+        return cls(
+            **{
+                f.name: _coerce(f.type, values[f.name])
+                for f in fields(cls)
+                if f.init and values[f.name] not in (None, "")
+            }
+        )
+
+
+def _coerce(kind: Any, value: Any) -> Any:
+    """Convert a string from the environment or config to the field's type."""
+    if not isinstance(value, str):
+        return value
+    if kind is bool:
+        return _parse_bool(value)
+    if kind in (int, float):
+        return kind(value)
+    return value
+
+
+def _parse_bool(value: str) -> bool:
+    """Read a flag such as "1", "true" or "yes", and "0", "false" or "no"."""
+    flag = value.strip().lower()
+    if flag in ("1", "true", "yes"):
+        return True
+    if flag in ("0", "false", "no"):
+        return False
+    raise ValueError(f"Expected true/false, 1/0 or yes/no, got {value!r}")
@@ -0,0 +1,285 @@
+"""Background consolidation of near-duplicate memories."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Sequence
+
+from langgraph.store.base import BaseStore, GetOp, Item, PutOp, SearchItem, SearchOp
+from langgraph.store.base.embed import get_text_at_path, tokenize_path
+
+from maltai_agent.locks import namespace_lock
+
+logger = logging.getLogger(__name__)
+
+STATE_NAMESPACE = "consolidation"
+"""First label of the namespace holding each user's consolidation watermark."""
+
+CHANGES_NAMESPACE = "memory_changes"
+"""First label of the namespace noting which memories of a user changed since the last run."""
+
+MAX_CONTEXTS = 3
+"""Distinct contexts kept when memories are merged, so repeated merges stay short."""
+
+
+@dataclass(kw_only=True)
+class ConsolidationReport:
+    """What a consolidation run looked at and changed."""
+
+    changed: int = 0
+    """Memories written since the previous run, which were checked for duplicates."""
+    clusters: int = 0
+    """Groups of duplicates that were merged into a single memory."""
+    removed: int = 0
+    """Duplicate memories deleted."""
+
+
+def note_changes(user_id: str, keys: Iterable[str]) -> list[PutOp]:
+    """Return the ops that mark memories as changed for the next consolidation run.
+
+    Send them in the batch that writes the memories, while holding
+    :func:`~maltai_agent.locks.namespace_lock` of the user's memories.
+    """
+    return [PutOp((CHANGES_NAMESPACE, user_id), key, {}, index=False) for key in keys]
+
+
+def merge_memories(items: Sequence[Item]) -> dict[str, Any]:
+    """Merge duplicate memories into one value.
+
+    The content of the most recently updated memory wins, since it reflects
+    the latest thing the user said; the most recent distinct contexts are
+    kept, up to :data:`MAX_CONTEXTS`.
+    """
+    newest = max(items, key=lambda item: item.updated_at)
+    contexts: dict[str, None] = {}
+    for item in sorted(items, key=lambda item: item.updated_at, reverse=True):
+        for context in str(item.value.get("context") or "").split("; "):
+            if context:
+                contexts[context] = None
+    return {**newest.value, "context": "; ".join(list(contexts)[:MAX_CONTEXTS])}
+
+
+def _query_text(store: BaseStore, value: dict[str, Any]) -> str:
+    """Return the text the store embeds for a value, to search for its neighbours."""
+    index_config = getattr(store, "index_config", None) or {}
+    texts: list[str] = []
+    for field in index_config.get("fields") or ["$"]:
+        texts += get_text_at_path(
+            value, field if field == "$" else tokenize_path(field)
+        )
+    return " ".join(texts) or json.dumps(value)
+
+
+async def _list_all(
+    store: BaseStore, namespace: tuple[str, ...], page: int
+) -> list[SearchItem]:
+    items: list[SearchItem] = []
+    while True:
+        batch = await store.asearch(namespace, limit=page, offset=len(items))
+        items += batch
+        if len(batch) < page:
+            return items
+
+
+async def _get_all(
+    store: BaseStore, namespace: tuple[str, ...], keys: Sequence[str], page: int
+) -> dict[str, Item]:
+    items: dict[str, Item] = {}
+    for start in range(0, len(keys), page):
+        results = await store.abatch(
+            [GetOp(namespace, key) for key in keys[start : start + page]]
+        )
+        items.update((item.key, item) for item in results if item is not None)
+    return items
+
+
+async def consolidate_memories(
+    store: BaseStore,
+    user_id: str,
+    *,
+    threshold: float = 0.9,
+    neighbours: int = 5,
+    batch_size: int = 100,
+    merge: Callable[[Sequence[Item]], dict[str, Any]] = merge_memories,
+) -> ConsolidationReport:
+    """Merge near-duplicate memories of a user under stable keys.
+
+    Only memories noted by :func:`note_changes` since the previous run are
+    checked; the first run checks them all. Each one is used as a semantic
+    query against the user's memories, and results scoring at least
+    ``threshold`` are treated as duplicates. Duplicates are grouped
+    transitively, merged with ``merge`` and written under the key of the
+    oldest memory in the group, so keys the model has already seen stay
+    valid; the other keys are deleted. Searches and writes are sent in
+    batches of ``batch_size`` operations.
+
+    The merge holds :func:`~maltai_agent.locks.namespace_lock` of the
+    user's memories and reads the group members again first; a memory
+    rewritten since it was searched is left for the next run.
+
+    The store must have a semantic index; without one, search results carry
+    no score and nothing is merged.
+
+    Args:
+        store: The store holding the memories
+        user_id: The user whose ``("memories", user_id)`` namespace is consolidated
+        threshold: Minimum similarity for two memories to count as duplicates
+        neighbours: Number of nearest memories compared with each changed memory
+        batch_size: Maximum operations per store batch
+        merge: Combines a group of duplicates into the value that is kept
+    """
+    namespace = ("memories", user_id)
+    changes_namespace = (CHANGES_NAMESPACE, user_id)
+    state_namespace = (STATE_NAMESPACE, user_id)
+    started = datetime.now(timezone.utc)
+    state = await store.aget(state_namespace, "memories")
+    notes = {
+        item.key: item.updated_at
+        for item in await _list_all(store, changes_namespace, batch_size)
+    }
+    if state is None:
+        # Memories written before changes were noted are only found by listing them all
+        changed: list[Item] = list(await _list_all(store, namespace, batch_size))
+    else:
+        changed = list(
+            (await _get_all(store, namespace, list(notes), batch_size)).values()
+        )
+    report = ConsolidationReport(changed=len(changed))
+
+    # Group duplicates with a union-find over (changed memory, neighbour) pairs
+    seen: dict[str, Item] = {item.key: item for item in changed}
+    parent = {key: key for key in seen}
+
+    def root(key: str) -> str:
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    for start in range(0, len(changed), batch_size):
+        chunk = changed[start : start + batch_size]
+        results = await store.abatch(
+            [
+                SearchOp(
+                    namespace,
+                    query=_query_text(store, item.value),
+                    limit=neighbours + 1,
+                )
+                for item in chunk
+            ]
+        )
+        for item, found in zip(chunk, results):
+            for neighbour in found:
+                if (
+                    neighbour.key != item.key
+                    and neighbour.score is not None
+                    and neighbour.score >= threshold
+                ):
+                    seen.setdefault(neighbour.key, neighbour)
+                    parent.setdefault(neighbour.key, neighbour.key)
+                    parent[root(neighbour.key)] = root(item.key)
+
+    groups: dict[str, list[str]] = {}
+    for key in parent:
+        groups.setdefault(root(key), []).append(key)
+    groups = {group_root: keys for group_root, keys in groups.items() if len(keys) > 1}
+
+    async with namespace_lock(store, namespace):
+        current = await _get_all(
+            store,
+            namespace,
+            [key for keys in groups.values() for key in keys],
+            batch_size,
+        )
+        ops: list[PutOp] = []
+        for keys in groups.values():
+            # Memories rewritten or deleted since they were searched are checked next time
+            group = [
+                current[key]
+                for key in keys
+                if key in current and current[key].updated_at == seen[key].updated_at
+            ]
+            if len(group) < 2:
+                continue
+            keep = min(group, key=lambda item: (item.created_at, item.key))
+            ops.append(PutOp(namespace, keep.key, merge(group)))
+            ops += [
+                PutOp(namespace, item.key, None) for item in group if item is not keep
+            ]
+            report.clusters += 1
+            report.removed += len(group) - 1
+        # Notes written again while this run was in progress are kept for the next one
+        unchanged = await _get_all(store, changes_namespace, list(notes), batch_size)
+        ops += [
+            PutOp(changes_namespace, key, None)
+            for key, note in unchanged.items()
+            if note.updated_at == notes[key]
+        ]
+        ops.append(
+            PutOp(
+                state_namespace,
+                "memories",
+                {"last_run": started.isoformat()},
+                index=False,
+            )
+        )
+        for start in range(0, len(ops), batch_size):
+            await store.abatch(ops[start : start + batch_size])
+    return report
+
+
+async def consolidation_loop(
+    store: BaseStore,
+    user_ids: Iterable[str],
+    *,
+    interval_s: float = 300.0,
+    **kwargs: Any,
+) -> None:
+    """Consolidate the memories of the given users every ``interval_s`` seconds.
+
+    Meant to run as a background task next to the agent; errors are logged
+    and the loop keeps going.
+
+    Args:
+        store: The store holding the memories
+        user_ids: Users to consolidate
+        interval_s: Pause between runs
+        **kwargs: Passed to :func:`consolidate_memories`
+    """
+    user_ids = list(user_ids)
+    while True:
+        for user_id in user_ids:
+            try:
+                report = await consolidate_memories(store, user_id, **kwargs)
+            except Exception:
+                logger.exception("Memory consolidation failed for %s", user_id)
+                continue
+            if report.removed:
+                logger.info(
+                    "Merged %d duplicate memories of %s into %d",
+                    report.removed,
+                    user_id,
+                    report.clusters,
+                )
+        await asyncio.sleep(interval_s)
+
+
+def start_consolidation(
+    store: BaseStore, user_ids: Iterable[str], **kwargs: Any
+) -> asyncio.Task[None]:
+    """Start :func:`consolidation_loop` as a background task on the running loop."""
+    return asyncio.create_task(consolidation_loop(store, user_ids, **kwargs))
+
+
+__all__ = [
+    "ConsolidationReport",
+    "consolidate_memories",
+    "consolidation_loop",
+    "merge_memories",
+    "note_changes",
+    "start_consolidation",
+]
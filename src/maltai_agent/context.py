@@ -0,0 +1,140 @@
+"""Load the store-backed context that is injected into every model call."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Collection, Optional
+
+from langgraph.store.base import BaseStore, Item, SearchItem, SearchOp
+
+from maltai_agent.budget import fit_items, truncate_to_tokens
+from maltai_agent.todos import TodoList
+
+
+@dataclass(kw_only=True)
+class TurnContext:
+    """Everything read from the store before a single model call."""
+
+    memories: list[SearchItem] = field(default_factory=list)
+    """Memories most relevant to the recent messages."""
+
+    profile: list[SearchItem] = field(default_factory=list)
+    """The user's profile item, if any."""
+
+    todos: list[Item] = field(default_factory=list)
+    """The user's most pressing open todo items, soonest deadline first."""
+
+    instructions: list[SearchItem] = field(default_factory=list)
+    """The user's instructions, if any."""
+
+    def format_memories(self, max_tokens: Optional[int] = None) -> str:
+        """Render the memories block of the system prompt.
+
+        Args:
+            max_tokens: Drop the least relevant memories beyond this many tokens.
+        """
+
+        def render(mem: SearchItem) -> str:
+            return f"[{mem.key}]: {mem.value} (similarity: {mem.score})"
+
+        memories = self.memories
+        if max_tokens is not None:
+            memories = fit_items(memories, render, max_tokens)
+        formatted = "\n".join(render(mem) for mem in memories)
+        if formatted:
+            formatted = f"""
+<memories>
+{formatted}
+</memories>"""
+        return formatted
+
+    def format_profile(self, max_tokens: Optional[int] = None) -> Any:
+        """Render the profile block of the system prompt.
+
+        Args:
+            max_tokens: Truncate the rendered profile to this many tokens.
+        """
+        return _truncated(self.profile[0].value if self.profile else "", max_tokens)
+
+    def format_todos(self, max_tokens: Optional[int] = None) -> str:
+        """Render the todo block of the system prompt.
+
+        Args:
+            max_tokens: Drop the todos beyond this many tokens.
+        """
+
+        def render(todo: Item) -> str:
+            return f"- [{todo.key}]: {todo.value}"
+
+        todos = self.todos
+        if max_tokens is not None:
+            todos = fit_items(todos, render, max_tokens)
+        return "\n".join(render(todo) for todo in todos)
+
+    def format_instructions(self, max_tokens: Optional[int] = None) -> Any:
+        """Render the instructions block of the system prompt.
+
+        Args:
+            max_tokens: Truncate the rendered instructions to this many tokens.
+        """
+        return _truncated(
+            self.instructions[0].value if self.instructions else "", max_tokens
+        )
+
+
+def _truncated(value: Any, max_tokens: Optional[int]) -> Any:
+    """Return ``value`` unchanged if it fits in ``max_tokens``, else its truncated text."""
+    if max_tokens is None:
+        return value
+    text = str(value)
+    truncated = truncate_to_tokens(text, max_tokens)
+    return value if truncated == text else truncated
+
+
+async def load_context(
+    store: BaseStore,
+    user_id: str,
+    *,
+    query: str,
+    memory_limit: int = 10,
+    todo_limit: int = 10,
+    skip: Collection[str] = (),
+) -> TurnContext:
+    """Fetch memories, profile, todos and instructions for one model call.
+
+    Memories, profile and instructions are read through one ``abatch``
+    call so that remote stores pay a single round trip instead of one per
+    namespace. The open todos are read from their index at the same time.
+
+    Args:
+        store: The store to read from.
+        user_id: The user whose namespaces should be read.
+        query: Semantic query used to rank memories.
+        memory_limit: Maximum number of memories to return.
+        todo_limit: Maximum number of open todos to return.
+        skip: Sections not to read, e.g. because a cached copy is still valid;
+            they are left empty in the result.
+    """
+    ops = {
+        "memories": SearchOp(("memories", user_id), query=query, limit=memory_limit),
+        "profile": SearchOp(("profile", user_id), limit=1),
+        "instructions": SearchOp(("instructions", user_id), limit=1),
+    }
+    wanted = [name for name in ops if name not in skip]
+
+    async def read_batch() -> list:
+        return await store.abatch([ops[name] for name in wanted]) if wanted else []
+
+    async def read_todos() -> list[Item]:
+        return (
+            []
+            if "todos" in skip
+            else await TodoList(store, user_id).top_open(todo_limit)
+        )
+
+    results, todos = await asyncio.gather(read_batch(), read_todos())
+    return TurnContext(todos=todos, **dict(zip(wanted, results)))
+
+
+__all__ = ["TurnContext", "load_context"]
@@ -0,0 +1,412 @@
+"""Full-duplex voice sessions: capture continues while replies are spoken."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import mmap
+import queue
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterable,
+    Iterable,
+    Iterator,
+    Optional,
+    Protocol,
+    Union,
+)
+
+import numpy as np
+from langchain_core.messages import HumanMessage
+
+from maltai_agent import tracing
+from maltai_agent.speech import clean_for_speech, split_sentences
+from maltai_agent.vad import Endpointer, VADConfig
+
+if TYPE_CHECKING:
+    from maltai_agent.audio import AudioProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class Player(Protocol):
+    """Audio output whose playback can be interrupted."""
+
+    def play(self, audio: Union[bytes, mmap.mmap]) -> None:
+        """Play audio, returning once it has finished or :meth:`stop` was called."""
+        ...
+
+    def stop(self) -> None:
+        """Interrupt the current playback and skip later ones until :meth:`resume`.
+
+        Called from another thread.
+        """
+        ...
+
+    def resume(self) -> None:
+        """Play again after :meth:`stop`; called when a new reply starts."""
+        ...
+
+
+class FFPlayPlayer:
+    """Play encoded audio through an ``ffplay`` process that can be terminated."""
+
+    def __init__(self) -> None:
+        """Initialize the player; a process is started for each playback."""
+        self._process: Optional[subprocess.Popen] = None
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def play(self, audio: Union[bytes, mmap.mmap]) -> None:
+        """Play audio until it ends or :meth:`stop` terminates the player."""
+        with self._lock:
+            if self._stopped:
+                return
+            process = subprocess.Popen(
+                ["ffplay", "-autoexit", "-nodisp", "-loglevel", "quiet", "-"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            self._process = process
+        try:
+            process.communicate(input=audio)
+        except BrokenPipeError:
+            pass  # Terminated while the audio was being written
+        finally:
+            with self._lock:
+                self._process = None
+
+    def stop(self) -> None:
+        """Terminate the running player and skip later playbacks until :meth:`resume`."""
+        with self._lock:
+            self._stopped = True
+            if self._process is not None:
+                self._process.terminate()
+
+    def resume(self) -> None:
+        """Start players again for later playbacks."""
+        with self._lock:
+            self._stopped = False
+
+
+def microphone_blocks(
+    sample_rate: int = 16000, block_size: int = 1024
+) -> Iterator[np.ndarray]:
+    """Yield mono int16 blocks from the default input device until closed."""
+    from maltai_agent.audio import get_sounddevice
+
+    with get_sounddevice().InputStream(
+        samplerate=sample_rate, channels=1, dtype="int16"
+    ) as stream:
+        while True:
+            block, _ = stream.read(block_size)
+            yield block
+
+
+class DuplexSession:
+    """Keep listening while the agent speaks, and stop speaking when interrupted.
+
+    The session stands in for :class:`~maltai_agent.audio.AudioProcessor` in
+    the graph (pass it as ``audio_processor`` in the configurable). A capture
+    thread endpoints the input stream continuously, also while a reply is
+    playing, and starts transcribing each utterance as soon as it ends.
+    :meth:`record_audio` then only waits for that transcription. Replies are
+    queued sentence by sentence and played by a playback thread, so
+    :meth:`speak_response` returns at once and the next turn can start
+    listening while the reply is still being spoken.
+
+    When speech starts while a reply is queued or playing (barge-in), the
+    current playback is stopped and the rest of the queue is dropped. The
+    agent's own voice must not reach the microphone for this to work, so use
+    a headset or an input with echo cancellation.
+    """
+
+    def __init__(
+        self,
+        processor: AudioProcessor,
+        blocks: Iterable[np.ndarray],
+        player: Player,
+        *,
+        vad_config: Optional[VADConfig] = None,
+        upload_format: str = "wav",
+        stt_backend: str = "whisper-api",
+        tts_backend: str = "elevenlabs",
+        barge_in: bool = True,
+        max_pending: int = 3,
+    ):
+        """Initialize the session.
+
+        Args:
+            processor: Synthesizes speech and provides the transcriber
+            blocks: Mono int16 input blocks at the processor's sample rate,
+                for example from :func:`microphone_blocks`
+            player: Audio output that can be interrupted; a
+                :class:`~maltai_agent.audio.PCMOutput` for raw PCM speech
+            vad_config: Endpointing settings; defaults to the processor's
+            upload_format: Encoding of recordings sent for transcription
+            stt_backend: Speech-to-text backend, see
+                :meth:`AudioProcessor.get_transcriber`
+            tts_backend: Text-to-speech backend, see
+                :meth:`AudioProcessor.get_synthesizer`
+            barge_in: Stop speaking when the user starts talking
+            max_pending: Sentences synthesized ahead of playback
+        """
+        self.processor = processor
+        self.blocks = blocks
+        self.player = player
+        self.vad_config = vad_config or processor.vad_config
+        self.upload_format = upload_format
+        self.stt_backend = stt_backend
+        self.tts_backend = tts_backend
+        self.barge_in_enabled = barge_in
+        self.spoken_message_ids: set[str] = set()
+        self.barge_ins = 0
+        """Number of replies interrupted by the user."""
+        self.interrupted: list[str] = []
+        """Sentences that were stopped or dropped by a barge-in, in order."""
+
+        self._utterances: queue.Queue[Optional[Future[str]]] = queue.Queue()
+        self._speech: queue.Queue[Optional[tuple[int, str, Future[bytes], float]]] = (
+            queue.Queue()
+        )
+        self._transcribe = ThreadPoolExecutor(1, thread_name_prefix="duplex-stt")
+        self._synthesize = ThreadPoolExecutor(
+            max_pending, thread_name_prefix="duplex-tts"
+        )
+        self._lock = threading.Lock()
+        self._generation = 0
+        # Generation the player was last resumed for
+        self._player_generation = 0
+        self._pending = 0
+        self._playing: Optional[str] = None
+        self._stopped = threading.Event()
+        self._input_ended = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._capture, name="duplex-capture", daemon=True),
+            threading.Thread(
+                target=self._playback, name="duplex-playback", daemon=True
+            ),
+        ]
+
+    def __enter__(self) -> DuplexSession:
+        """Start the session, closed again when the block exits."""
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the session."""
+        self.close()
+
+    @property
+    def speaking(self) -> bool:
+        """Whether a reply is queued or playing."""
+        with self._lock:
+            return self._pending > 0
+
+    @property
+    def closed(self) -> bool:
+        """Whether the session was closed or the input stream ended."""
+        return self._stopped.is_set() or self._input_ended.is_set()
+
+    def start(self) -> None:
+        """Start capturing and playing."""
+        for thread in self._threads:
+            thread.start()
+
+    def close(self) -> None:
+        """Stop capturing and playing, dropping queued speech."""
+        self._stopped.set()
+        self._cancel_speech()
+        self._speech.put(None)
+        for thread in self._threads:
+            if thread.is_alive() and thread is not threading.current_thread():
+                thread.join(timeout=1.0)
+        self._transcribe.shutdown(wait=False, cancel_futures=True)
+        self._synthesize.shutdown(wait=False, cancel_futures=True)
+
+    def record_audio(
+        self,
+        endpointing: str = "vad",
+        upload_format: str = "wav",
+        incremental: bool = False,
+        stt_backend: str = "whisper-api",
+    ) -> HumanMessage:
+        """Return the next utterance, which may have been spoken during the last reply.
+
+        Endpointing is always voice activity based and the upload format and
+        backend are the session's, so the arguments are accepted for
+        compatibility only.
+        """
+        future = self._utterances.get()
+        if future is None:
+            # Input ended: keep returning empty turns
+            self._utterances.put(None)
+            return HumanMessage(content="")
+        text = future.result()
+        logger.info("Transcribed: %s", text)
+        return HumanMessage(content=text)
+
+    async def arecord_audio(
+        self,
+        endpointing: str = "vad",
+        upload_format: str = "wav",
+        incremental: bool = False,
+        stt_backend: str = "whisper-api",
+    ) -> HumanMessage:
+        """Wait for the next utterance like :meth:`record_audio`, in a thread."""
+        return await asyncio.to_thread(
+            self.record_audio, endpointing, upload_format, incremental, stt_backend
+        )
+
+    def speak_response(self, text: str, tts_backend: str = "elevenlabs") -> None:
+        """Queue a reply to be spoken, returning without waiting for playback.
+
+        Replies are spoken with the session's backend, so ``tts_backend`` is
+        accepted for compatibility only.
+        """
+        text = clean_for_speech(text)
+        if text:
+            self._enqueue(text)
+
+    async def aspeak_response(self, text: str, tts_backend: str = "elevenlabs") -> None:
+        """Queue a reply to be spoken; queueing never blocks."""
+        self.speak_response(text)
+
+    async def speak_stream(
+        self, tokens: AsyncIterable[str], tts_backend: str = "elevenlabs"
+    ) -> list[str]:
+        """Queue model output sentence by sentence while it is being generated."""
+        queued = []
+        async for sentence in split_sentences(tokens):
+            self._enqueue(sentence)
+            queued.append(sentence)
+        return queued
+
+    def wait_until_quiet(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued sentence was played or dropped.
+
+        Returns:
+            False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.speaking and not self._stopped.is_set():
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            self._stopped.wait(0.01)
+        return True
+
+    def barge_in(self) -> None:
+        """Stop the current reply and drop the rest of the queue."""
+        with self._lock:
+            self.barge_ins += 1
+        self._cancel_speech()
+
+    def _enqueue(self, text: str) -> None:
+        with self._lock:
+            generation = self._generation
+            self._pending += 1
+        self._speech.put(
+            (
+                generation,
+                text,
+                self._synthesize.submit(
+                    self.processor.synthesize, text, self.tts_backend
+                ),
+                time.perf_counter(),
+            )
+        )
+
+    def _cancel_speech(self) -> None:
+        with self._lock:
+            self._generation += 1
+            if self._playing is not None:
+                self.interrupted.append(self._playing)
+                self._playing = None
+            # Under the lock, so the player cannot be resumed for a sentence of the old generation
+            self.player.stop()
+        while True:
+            try:
+                item = self._speech.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[2].cancel()
+                self.interrupted.append(item[1])
+                self._done()
+
+    def _done(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _capture(self) -> None:
+        sample_rate = self.processor.sample_rate
+        transcriber = self.processor.get_transcriber(
+            self.upload_format, self.stt_backend
+        )
+        endpointer = Endpointer(self.vad_config, sample_rate)
+        interrupting = False
+        try:
+            for block in self.blocks:
+                if self._stopped.is_set():
+                    break
+                endpointer.feed(block)
+                # Only when the user starts talking over a reply, not on every block after that
+                was_interrupting, interrupting = (
+                    interrupting,
+                    endpointer.triggered and self.speaking,
+                )
+                if self.barge_in_enabled and interrupting and not was_interrupting:
+                    self.barge_in()
+                if endpointer.done:
+                    pieces = endpointer.utterance_pieces()
+                    if pieces:
+                        self._utterances.put(
+                            self._transcribe.submit(
+                                transcriber.transcribe, pieces, sample_rate
+                            )
+                        )
+                    endpointer = Endpointer(self.vad_config, sample_rate)
+        finally:
+            self._input_ended.set()
+            self._utterances.put(None)
+
+    def _playback(self) -> None:
+        while (item := self._speech.get()) is not None:
+            generation, text, audio, queued = item
+            try:
+                data = audio.result()
+            except Exception:
+                # Cancelled by a barge-in, or synthesis failed
+                if not audio.cancelled():
+                    logger.exception("Could not synthesize %r", text)
+                self._done()
+                continue
+            with self._lock:
+                current = generation == self._generation
+                if current:
+                    self._playing = text
+                    if self._player_generation != generation:
+                        # First sentence after a barge-in: the player stayed stopped until now
+                        self.player.resume()
+                        self._player_generation = generation
+                else:
+                    self.interrupted.append(text)
+            if current:
+                # Time from the sentence being queued until it starts playing
+                with tracing.span(
+                    "audio.play",
+                    bytes=len(data),
+                    queue_wait_s=time.perf_counter() - queued,
+                ):
+                    self.player.play(data)
+                with self._lock:
+                    self._playing = None
+            self._done()
+
+
+__all__ = ["DuplexSession", "FFPlayPlayer", "Player", "microphone_blocks"]
@@ -0,0 +1,249 @@
+"""Content-addressed caching of text embeddings for the store index."""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional, Union
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_RECORD_HEADER = struct.Struct("<32sI")
+
+
+class CachedEmbeddings(Embeddings):
+    """Serve repeated embeddings from an LRU cache instead of the provider.
+
+    Entries are keyed by a hash of the model name and the exact text, so the
+    same text is only embedded once per model no matter how often it is
+    searched for or upserted. Vectors are kept as float32. The wrapped model
+    must embed queries and documents the same way, which is the case for the
+    OpenAI embedding models.
+
+    When ``path`` is set, the cache is loaded from that file on start and
+    written back atomically every ``save_every`` new entries and at exit.
+    :meth:`aembed_documents` writes it in a worker thread, so a save does
+    not hold up the event loop.
+    """
+
+    def __init__(
+        self,
+        embeddings: Union[str, Embeddings],
+        *,
+        model: Optional[str] = None,
+        max_entries: int = 10_000,
+        path: Optional[str] = None,
+        save_every: int = 100,
+    ):
+        """Initialize the cache.
+
+        Args:
+            embeddings: The embedding model to wrap, or a ``"provider:model"``
+                string that is passed to ``init_embeddings`` on the first miss
+            model: Name used in cache keys; defaults to the string form of
+                ``embeddings`` or the wrapped model's ``model`` attribute
+            max_entries: Number of vectors kept before the least recently
+                used ones are evicted
+            path: File the cache is persisted to
+            save_every: Number of new entries after which the file is rewritten
+        """
+        if isinstance(embeddings, str):
+            self._embeddings: Optional[Embeddings] = None
+            self._spec = embeddings
+            model = model or embeddings
+        else:
+            self._embeddings = embeddings
+            self._spec = None
+            model = (
+                model or getattr(embeddings, "model", None) or type(embeddings).__name__
+            )
+        self.model = model
+        self.max_entries = max_entries
+        self.path = path
+        self.save_every = save_every
+        self._entries: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        # Saves run one at a time, so an older snapshot never replaces a newer one
+        self._save_lock = threading.Lock()
+        self._unsaved = 0
+        self.hits = 0
+        """Number of texts served from the cache."""
+        self.misses = 0
+        """Number of texts sent to the embedding model."""
+        if path:
+            self.load()
+            atexit.register(self.save)
+
+    @property
+    def embeddings(self) -> Embeddings:
+        """The wrapped embedding model, created on first use."""
+        if self._embeddings is None:
+            from langchain.embeddings import init_embeddings
+
+            self._embeddings = init_embeddings(self._spec)
+        return self._embeddings
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of looked-up texts that were served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict[str, Union[int, float]]:
+        """Return the cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "entries": len(self._entries),
+        }
+
+    def key(self, text: str) -> bytes:
+        """Return the cache key of a text for this model."""
+        return hashlib.sha256(f"{self.model}\0{text}".encode()).digest()
+
+    def _lookup(self, texts: list[str]) -> tuple[list[Optional[np.ndarray]], list[str]]:
+        """Return cached vectors (None where missing) and the distinct missing texts."""
+        found: list[Optional[np.ndarray]] = []
+        missing: dict[str, None] = {}
+        with self._lock:
+            for text in texts:
+                key = self.key(text)
+                vector = self._entries.get(key)
+                if vector is None:
+                    missing[text] = None
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                found.append(vector)
+        return found, list(missing)
+
+    def _store(
+        self, texts: list[str], vectors: list[list[float]]
+    ) -> tuple[dict[str, np.ndarray], bool]:
+        """Add freshly computed vectors to the cache.
+
+        Returns:
+            The vectors by text, and whether the caller should save the cache
+        """
+        computed = {
+            text: np.asarray(vector, dtype=np.float32)
+            for text, vector in zip(texts, vectors)
+        }
+        with self._lock:
+            for text, vector in computed.items():
+                self._entries[self.key(text)] = vector
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._unsaved += len(computed)
+            due = self.path is not None and self._unsaved >= self.save_every
+            if due:
+                # Claimed here, so concurrent misses do not all save
+                self._unsaved = 0
+        return computed, due
+
+    @staticmethod
+    def _merge(
+        texts: list[str],
+        found: list[Optional[np.ndarray]],
+        computed: dict[str, np.ndarray],
+    ) -> list[list[float]]:
+        return [
+            (vector if vector is not None else computed[text]).tolist()
+            for text, vector in zip(texts, found)
+        ]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts, calling the model only for texts not in the cache."""
+        found, missing = self._lookup(texts)
+        computed = {}
+        if missing:
+            computed, due = self._store(
+                missing, self.embeddings.embed_documents(missing)
+            )
+            if due:
+                self.save()
+        return self._merge(texts, found, computed)
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a search query, using the cache when possible."""
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts asynchronously, calling the model only for cache misses."""
+        found, missing = self._lookup(texts)
+        computed = {}
+        if missing:
+            vectors = await self.embeddings.aembed_documents(missing)
+            computed, due = self._store(missing, vectors)
+            if due:
+                await asyncio.to_thread(self.save)
+        return self._merge(texts, found, computed)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        """Embed a search query asynchronously, using the cache when possible."""
+        return (await self.aembed_documents([text]))[0]
+
+    def load(self) -> None:
+        """Read cached vectors from :attr:`path`, if the file exists."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            data = f.read()
+        entries: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        offset = 0
+        while offset + _RECORD_HEADER.size <= len(data):
+            key, dims = _RECORD_HEADER.unpack_from(data, offset)
+            offset += _RECORD_HEADER.size
+            if offset + 4 * dims > len(data):
+                break  # Truncated write; keep what was complete
+            entries[key] = np.frombuffer(
+                data, dtype="<f4", count=dims, offset=offset
+            ).copy()
+            offset += 4 * dims
+        with self._lock:
+            entries.update(self._entries)
+            self._entries = entries
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self) -> None:
+        """Write the cache to :attr:`path`, oldest entries first."""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                records = list(self._entries.items())
+                self._unsaved = 0
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            # A file of its own, so a save by another process never writes into it
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for key, vector in records:
+                        f.write(_RECORD_HEADER.pack(key, len(vector)))
+                        f.write(vector.astype("<f4", copy=False).tobytes())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+
+embed = CachedEmbeddings(
+    os.environ.get("EMBEDDING_MODEL", "openai:text-embedding-3-small"),
+    max_entries=int(os.environ.get("EMBEDDING_CACHE_SIZE", "10000")),
+    path=os.environ.get("EMBEDDING_CACHE_PATH") or None,
+)
+"""Cached embedder used by the store index configured in ``langgraph.json``."""
+
+
+__all__ = ["CachedEmbeddings", "embed"]
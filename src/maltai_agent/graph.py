@@ -1,228 +1,365 @@
 """Graphs that extract memories on a schedule."""
 
 import asyncio
+import functools
 import logging
-from datetime import datetime
-
-from langchain.chat_models import init_chat_model
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    HumanMessage,
+    ToolMessage,
+    message_chunk_to_message,
+)
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, StateGraph
 from langgraph.store.base import BaseStore
 from langgraph.store.memory import InMemoryStore
 
-from maltai_agent import configuration, utils
-from maltai_agent.state import State, MessagesState
-from maltai_agent.audio import AudioProcessor
-
-from dotenv import load_dotenv
-from maltai_agent.tools import memory_tool, todo_tool, profile_tool, instructions_tool
+from maltai_agent import budget, configuration, tracing, utils
+from maltai_agent.models import ModelRegistry
+from maltai_agent.prompt_layout import PromptRenderer, VersionedStore
+from maltai_agent.speech import iter_queue
+from maltai_agent.state import MessagesState, State
+from maltai_agent.tools import (
+    instructions_tool,
+    list_todos_tool,
+    memory_tool,
+    profile_tool,
+    todo_tool,
+    update_todos_tool,
+)
+from maltai_agent.tools.dispatch import dispatch_tool_calls
 
-load_dotenv()
+if TYPE_CHECKING:
+    from maltai_agent.audio import AudioProcessor
+    from maltai_agent.checkpoint import SQLiteDeltaSaver
+    from maltai_agent.tts_cache import SpeechCache
 
 logger = logging.getLogger(__name__)
 
-# Initialize the language model to be used for memory extraction
-llm = init_chat_model()
+# Chat models, created on first use and bound to the agent's tools once per model
+models = ModelRegistry()
+TOOLS = [
+    memory_tool.upsert_memory,
+    todo_tool,
+    update_todos_tool,
+    list_todos_tool,
+    profile_tool,
+    instructions_tool,
+]
 
-# Initialize audio processor
-audio_processor = AudioProcessor()
 
-# Initialize store
-memory_store = InMemoryStore()
+@functools.lru_cache(maxsize=1)
+def get_speech_cache() -> Optional["SpeechCache"]:
+    """Return the speech cache shared by every audio processor, if ``TTS_CACHE_PATH`` is set."""
+    from maltai_agent.tts_cache import create_speech_cache
 
-async def call_model(state: State, config: RunnableConfig, *, store: BaseStore = memory_store) -> dict:
-    """Extract the user's state from the conversation and update the memory."""
-    configurable = configuration.Configuration.from_runnable_config(config)
+    utils.load_env()
+    return create_speech_cache()
 
-    # Retrieve the most recent memories for context
-    memories = await store.asearch(
-        ("memories", configurable.user_id),
-        query=str([m.content for m in state.messages[-3:]]),
-        limit=10,
-    )
 
-    # Format memories for inclusion in the prompt
-    formatted = "\n".join(f"[{mem.key}]: {mem.value} (similarity: {mem.score})" for mem in memories)
-    if formatted:
-        formatted = f"""
-<memories>
-{formatted}
-</memories>"""
-
-    # Retrieve profile information from the store
-    profile_info = await store.asearch(
-        ("profile", configurable.user_id),
-        query="",
-        limit=1,
+def create_audio_processor() -> "AudioProcessor":
+    """Create an audio processor with the shared speech cache and the configured output format."""
+    from maltai_agent.audio import AudioProcessor
+
+    return AudioProcessor(
+        speech_cache=get_speech_cache(),
+        output_format=os.getenv("TTS_OUTPUT_FORMAT", "mp3_22050_32"),
     )
-    profile_info = profile_info[0].value if profile_info else ""
 
-    # Retrieve todo list from the store
-    todo_list = await store.asearch(
-        ("todos", configurable.user_id),
-        query="",
-        limit=10,
+
+@functools.lru_cache(maxsize=1)
+def get_audio_processor() -> "AudioProcessor":
+    """Return the audio processor of runs without a thread, created on first use.
+
+    Audio, speech and transcription clients are only loaded here, so the
+    graph can be imported on hosts without an audio device. Synthesized
+    speech is cached in ``TTS_CACHE_PATH`` when it is set, and ElevenLabs
+    returns ``TTS_OUTPUT_FORMAT``, by default MP3.
+    """
+    return create_audio_processor()
+
+
+MAX_SESSIONS = 256
+"""Audio processors kept for conversation threads before the least recently used is closed."""
+
+_sessions: "OrderedDict[str, AudioProcessor]" = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def session_audio_processor(thread_id: str) -> "AudioProcessor":
+    """Return the audio processor of one conversation thread, created on its first turn.
+
+    Each session gets its own capture and playback threads and its own
+    record of spoken messages; API clients and the speech cache are shared.
+    Beyond :data:`MAX_SESSIONS`, the least recently used session is closed:
+    its threads exit once their current work is done and its output stream
+    is closed.
+    """
+    evicted = []
+    with _sessions_lock:
+        processor = _sessions.pop(thread_id, None) or create_audio_processor()
+        _sessions[thread_id] = processor
+        while len(_sessions) > MAX_SESSIONS:
+            evicted.append(_sessions.popitem(last=False)[1])
+    for session in evicted:
+        session.close()
+    return processor
+
+
+def close_sessions() -> None:
+    """Close and forget the audio processors of every conversation thread."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+def audio_for(config: RunnableConfig) -> "AudioProcessor":
+    """Return the audio of this run.
+
+    That is ``audio_processor`` from the configurable if given, such as a
+    :class:`~maltai_agent.duplex.DuplexSession` that listens while replies
+    are still playing; otherwise the processor of the run's ``thread_id``,
+    or the shared one for runs without a thread.
+    """
+    configurable = config.get("configurable") or {}
+    if configurable.get("audio_processor") is not None:
+        return configurable["audio_processor"]
+    thread_id = configurable.get("thread_id")
+    return (
+        session_audio_processor(str(thread_id)) if thread_id else get_audio_processor()
     )
-    todo_list = "\n".join([f"- {todo.value}" for todo in todo_list])
 
-    # Retrieve instructions from the store
-    instructions = await store.asearch(
-        ("instructions", configurable.user_id),
-        query="",
-        limit=1,
+
+def create_store() -> BaseStore:
+    """Create the store: persisted to STORE_PATH when set, in memory otherwise."""
+    utils.load_env()
+    store_path = os.environ.get("STORE_PATH")
+    if not store_path:
+        return InMemoryStore()
+    from maltai_agent import embeddings
+    from maltai_agent.ann import ANNConfig
+    from maltai_agent.sqlite_store import SQLiteVectorStore
+
+    return SQLiteVectorStore(
+        store_path,
+        index={"dims": 1536, "embed": embeddings.embed},
+        ann=ANNConfig(namespace_prefix=("memories",)),
     )
-    instructions = instructions[0].value if instructions else ""
-
-    # Prepare the system prompt with user memories and current time
-    # This helps the model understand the context and temporal relevance
-    sys = configurable.system_prompt.format(
-        user_info=formatted,
-        time=datetime.now().isoformat(),
-        profile_info=profile_info,
-        todo_list=todo_list,
-        instructions=instructions
+
+
+def create_checkpointer() -> Optional["SQLiteDeltaSaver"]:
+    """Create a checkpointer persisting threads to CHECKPOINT_PATH, or None when it is not set."""
+    utils.load_env()
+    checkpoint_path = os.environ.get("CHECKPOINT_PATH")
+    if not checkpoint_path:
+        return None
+    from maltai_agent.checkpoint import SQLiteDeltaSaver
+
+    return SQLiteDeltaSaver(checkpoint_path)
+
+
+# Initialize store on first use. Writes are versioned per namespace so
+# unchanged prompt sections are reused.
+memory_store: BaseStore = VersionedStore(create_store)
+
+# Renders the system prompt, caching sections between turns
+prompt_renderer = PromptRenderer()
+
+# Time nodes, audio stages and store batches if TRACE_* settings are present
+tracing.configure_from_env()
+
+
+async def call_model(
+    state: State, config: RunnableConfig, *, store: BaseStore = memory_store
+) -> dict:
+    """Extract the user's state from the conversation and update the memory."""
+    configurable = configuration.Configuration.from_runnable_config(config)
+
+    # Retrieve memories, profile, todos and instructions in a single batch and
+    # render them with the current time, most stable sections first. Each
+    # section is cut to its token budget so the prompt cannot grow without bound.
+    limits = configurable.token_budget
+    sys, _ = await prompt_renderer.render(
+        store,
+        configurable.system_prompt,
+        configurable.user_id,
+        query=str([m.content for m in state.messages[-3:]]),
+        limits=limits,
+        todo_limit=configurable.prompt_todos,
+        summary=state.summary,
     )
 
     # Invoke the language model with the prepared prompt and tools
-    # "bind_tools" gives the LLM the JSON schema for all tools in the list so it knows how
+    # The registry's model has the JSON schema for all tools bound, so the LLM knows how
     # to use them.
-    msg = await llm.bind_tools([
-        memory_tool.upsert_memory,
-        todo_tool,
-        profile_tool,
-        instructions_tool
-    ]).ainvoke(
-        [{"role": "system", "content": sys}, *state.messages],
-        {"configurable": utils.split_model_and_provider(configurable.model)},
+    model = models.get(configurable.model, TOOLS)
+    # Older turns are sent as the running summary instead of verbatim
+    _, history = budget.split_history(
+        budget.unsummarized(state.messages, state.summarized_through), limits.history
     )
+    messages = [{"role": "system", "content": sys}]
+    if state.summary and "{summary}" not in configurable.system_prompt:
+        messages.append(
+            {
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{state.summary}",
+            }
+        )
+    messages += history
+
+    if not configurable.stream_speech:
+        msg = await model.ainvoke(messages)
+        _annotate_tokens(sys, history, msg)
+        return {"messages": [msg]}
+
+    # Stream the response, speaking each sentence as soon as it is complete
+    audio_processor = audio_for(config)
+    tokens: asyncio.Queue[Optional[str]] = asyncio.Queue()
+    speaking = asyncio.create_task(
+        audio_processor.speak_stream(iter_queue(tokens), configurable.tts_backend)
+    )
+    full: Optional[AIMessageChunk] = None
+    try:
+        async for chunk in model.astream(messages):
+            full = chunk if full is None else full + chunk
+            if isinstance(chunk.content, str) and chunk.content:
+                tokens.put_nowait(chunk.content)
+    finally:
+        tokens.put_nowait(None)
+        await speaking
+
+    msg = message_chunk_to_message(full) if full is not None else AIMessage(content="")
+    _annotate_tokens(sys, history, msg)
+    if msg.id:
+        audio_processor.spoken_message_ids.add(msg.id)
     return {"messages": [msg]}
 
 
-async def store_memory(state: State, config: RunnableConfig, *, store: BaseStore = memory_store):
-    # Extract tool calls from the last message
-    tool_calls = state.messages[-1].tool_calls
-
-    # Concurrently execute all upsert_memory calls
-    saved_memories = await asyncio.gather(
-        *(
-            memory_tool.upsert_memory(**tc["args"], config=config, store=store)
-            for tc in tool_calls
-        )
+def _annotate_tokens(system: str, history: list, msg: AIMessage) -> None:
+    """Record the tokens of a model call on the node's span, as reported or estimated."""
+    if not tracing.tracer.enabled:
+        return
+    usage = msg.usage_metadata or {}
+    tracing.annotate(
+        tokens_in=usage.get("input_tokens")
+        or budget.count_tokens(system) + sum(budget.message_tokens(m) for m in history),
+        tokens_out=usage.get("output_tokens") or budget.message_tokens(msg),
     )
 
-    # Format the results of memory storage operations
-    # This provides confirmation to the model that the actions it took were completed
-    results = [
-        {
-            "role": "tool",
-            "content": mem,
-            "tool_call_id": tc["id"],
-        }
-        for tc, mem in zip(tool_calls, saved_memories)
-    ]
+
+async def execute_tools(
+    state: State, config: RunnableConfig, *, store: BaseStore = memory_store
+) -> dict:
+    """Run every tool call of the last model message concurrently, whatever its tool."""
+    results = await dispatch_tool_calls(
+        state.messages[-1].tool_calls, config=config, store=store
+    )
     return {"messages": results}
 
 
 def route_message(state: State):
-    """Determine the next step based on the tool calls."""
+    """Run the tools if the model called any, otherwise speak the response."""
     msg = state.messages[-1]
-    if not msg.tool_calls:
-        return END
-        
-    # Get the tool name from the first tool call
-    tool_name = msg.tool_calls[0].name
-    
-    # Route based on tool
-    if tool_name == "AddTodo":
-        return "update_todos"
-    elif tool_name == "UpdateProfile":
-        return "update_profile"
-    elif tool_name == "UpdateInstructions":
-        return "update_instructions"
-    elif tool_name == "upsert_memory":
-        return "store_memory"
-    
-    return END
-
-
-async def audio_input(state: MessagesState) -> dict:
+    if isinstance(msg, AIMessage) and msg.tool_calls:
+        return "tools"
+    return "audio_output"
+
+
+def route_after_tools(state: State, config: RunnableConfig):
+    """Let the model respond to the tool results once, if configured to."""
+    configurable = configuration.Configuration.from_runnable_config(config)
+    if not configurable.tool_followup:
+        return "audio_output"
+    # Only the first model call of the turn gets a follow-up, so tools cannot loop
+    model_calls = 0
+    for message in reversed(state.messages):
+        if isinstance(message, HumanMessage):
+            break
+        model_calls += isinstance(message, AIMessage)
+    return "process_input" if model_calls < 2 else "audio_output"
+
+
+async def audio_input(state: MessagesState, config: RunnableConfig) -> dict:
     """Record and transcribe audio input."""
-    message = audio_processor.record_audio()
+    configurable = configuration.Configuration.from_runnable_config(config)
+    message = await audio_for(config).arecord_audio(
+        configurable.endpointing,
+        configurable.upload_format,
+        configurable.incremental_transcription,
+        configurable.stt_backend,
+    )
     return {"messages": [message]}
 
 
-async def audio_output(state: MessagesState):
+async def audio_output(state: MessagesState, config: RunnableConfig):
     """Convert response to speech and play it."""
+    configurable = configuration.Configuration.from_runnable_config(config)
     response = state.messages[-1]
-    audio_processor.speak_response(response.content)
+    audio_processor = audio_for(config)
+    if response.id in audio_processor.spoken_message_ids:
+        # Already spoken while the model was streaming it
+        audio_processor.spoken_message_ids.discard(response.id)
+        return state
+    if isinstance(response, ToolMessage):
+        # Tools ran without a follow-up from the model: confirm what each one did
+        results = []
+        for message in reversed(state.messages):
+            if not isinstance(message, ToolMessage):
+                break
+            results.append(str(message.content))
+        await audio_processor.aspeak_response(
+            " ".join(reversed(results)), configurable.tts_backend
+        )
+        return state
+    await audio_processor.aspeak_response(response.content, configurable.tts_backend)
     return state
 
 
-async def update_todos(state: State, config: RunnableConfig, *, store: BaseStore = memory_store):
-    """Handle todo updates."""
-    tool_calls = state.messages[-1].tool_calls
-    results = await asyncio.gather(
-        *(
-            todo_tool.add_todo(**tc.args, config=config, store=store)
-            for tc in tool_calls
-            if tc.name == "AddTodo"
-        )
-    )
-    return {
-        "messages": [{
-            "role": "tool",
-            "content": result,
-            "tool_call_id": tc.id
-        } for tc, result in zip(tool_calls, results)]
-    }
-
-async def update_profile(state: State, config: RunnableConfig, *, store: BaseStore = memory_store):
-    """Handle profile updates."""
-    tool_calls = state.messages[-1].tool_calls
-    results = await asyncio.gather(
-        *(
-            profile_tool.update_profile(**tc.args, config=config, store=store)
-            for tc in tool_calls
-            if tc.name == "UpdateProfile"
-        )
-    )
-    return {
-        "messages": [{
-            "role": "tool",
-            "content": result,
-            "tool_call_id": tc.id
-        } for tc, result in zip(tool_calls, results)]
-    }
-
-async def update_instructions(state: State, config: RunnableConfig, *, store: BaseStore = memory_store):
-    """Handle instruction updates."""
-    tool_calls = state.messages[-1].tool_calls
-    results = await asyncio.gather(
-        *(
-            instructions_tool.update_instructions(**tc.args, config=config, store=store)
-            for tc in tool_calls
-            if tc.name == "UpdateInstructions"
-        )
+async def summarize_history(state: State, config: RunnableConfig) -> dict:
+    """Fold older turns into the running summary once the history exceeds its budget.
+
+    Runs after the response has been spoken, so the summarization call does
+    not delay the reply. The history is cut to half its budget, so the
+    summary is updated every few turns rather than on every turn.
+    """
+    configurable = configuration.Configuration.from_runnable_config(config)
+    limits = configurable.token_budget
+    pending = budget.unsummarized(state.messages, state.summarized_through)
+    if sum(budget.message_tokens(m) for m in pending) <= limits.history:
+        return {}
+    older, _ = budget.split_history(pending, limits.history // 2)
+    if not older:
+        return {}
+    summary = await budget.summarize(
+        models.model(configurable.model),
+        state.summary,
+        older,
+        limits.summary,
+        prompt=configurable.summary_prompt,
     )
-    return {
-        "messages": [{
-            "role": "tool",
-            "content": result,
-            "tool_call_id": tc.id
-        } for tc, result in zip(tool_calls, results)]
-    }
+    return {"summary": summary, "summarized_through": older[-1].id}
+
 
 # Update the graph builder
 builder = StateGraph(State, config_schema=configuration.Configuration)
 
-# Add all nodes
-builder.add_node("audio_input", audio_input)
-builder.add_node("process_input", call_model)
-builder.add_node("store_memory", store_memory)
-builder.add_node("update_todos", update_todos)
-builder.add_node("update_profile", update_profile)
-builder.add_node("update_instructions", update_instructions)
-builder.add_node("audio_output", audio_output)
+# Add all nodes, each timed as a span named after the node when tracing is enabled
+for name, node in [
+    ("audio_input", audio_input),
+    ("process_input", call_model),
+    ("tools", execute_tools),
+    ("audio_output", audio_output),
+    ("summarize_history", summarize_history),
+]:
+    builder.add_node(name, tracing.traced(f"graph.{name}")(node))
 
 # Define the flow
 builder.add_edge("__start__", "audio_input")
@@ -230,21 +367,15 @@ builder.add_edge("audio_input", "process_input")
 builder.add_conditional_edges(
     "process_input",
     route_message,
-    {
-        "store_memory": "store_memory",
-        "update_todos": "update_todos",
-        "update_profile": "update_profile",
-        "update_instructions": "update_instructions",
-        END: "audio_output"
-    }
+    {"tools": "tools", "audio_output": "audio_output"},
 )
-
-# Add edges from tool handlers back to audio output
-builder.add_edge("store_memory", "audio_output")
-builder.add_edge("update_todos", "audio_output")
-builder.add_edge("update_profile", "audio_output")
-builder.add_edge("update_instructions", "audio_output")
-builder.add_edge("audio_output", END)
+builder.add_conditional_edges(
+    "tools",
+    route_after_tools,
+    {"process_input": "process_input", "audio_output": "audio_output"},
+)
+builder.add_edge("audio_output", "summarize_history")
+builder.add_edge("summarize_history", END)
 
 # Compile with store
 graph = builder.compile(store=memory_store)
@@ -0,0 +1,35 @@
+"""Locks that serialize read-modify-write updates of a store namespace."""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+
+from langgraph.store.base import BaseStore
+
+_Locks = weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[tuple[str, ...], asyncio.Lock]
+]
+
+_locks: weakref.WeakKeyDictionary[BaseStore, _Locks] = weakref.WeakKeyDictionary()
+
+
+def namespace_lock(store: BaseStore, namespace: tuple[str, ...]) -> asyncio.Lock:
+    """Return the lock for updates of one namespace of one store.
+
+    The store API has no conditional writes, so updates that read an item
+    and write it back are only atomic against other updates holding this
+    lock, i.e. within the process and through the same store object. An
+    asyncio lock belongs to one event loop, so each running loop gets its own
+    locks; updates from different loops are not serialized against each other.
+    """
+    by_loop = _locks.get(store)
+    if by_loop is None:
+        by_loop = _locks[store] = weakref.WeakKeyDictionary()
+    locks = by_loop.setdefault(asyncio.get_running_loop(), {})
+    if namespace not in locks:
+        locks[namespace] = asyncio.Lock()
+    return locks[namespace]
+
+
+__all__ = ["namespace_lock"]
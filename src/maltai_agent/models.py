@@ -0,0 +1,102 @@
+"""Chat models created once and shared by every turn."""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Optional, Sequence
+
+from langchain.chat_models import init_chat_model
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
+
+from maltai_agent import utils
+
+ModelKey = tuple[Optional[str], str]
+BoundKey = tuple[Optional[str], str, tuple[str, ...]]
+
+
+def tool_name(tool: Any) -> str:
+    """Return the name a tool is exposed to the model under."""
+    name = getattr(tool, "name", None) or getattr(tool, "__name__", None)
+    if not isinstance(name, str):
+        raise TypeError(f"Cannot determine the name of tool {tool!r}")
+    return name
+
+
+def _init_model(model: str, provider: Optional[str]) -> BaseChatModel:
+    utils.load_env()
+    return init_chat_model(model, model_provider=provider)
+
+
+class ModelRegistry:
+    """Chat models keyed by provider and model, bound to tools per toolset.
+
+    Each model is created on first use and kept for the life of the
+    process, so its API client and HTTP connection pool are reused by every
+    turn and every user. Tool schemas are converted once per
+    ``(provider, model, toolset)``; all toolsets of a model share its
+    client. Lookups of existing entries take no lock; creation is guarded
+    by a lock, so concurrent callers (coroutines or threads) get the same
+    instance.
+    """
+
+    def __init__(
+        self, factory: Callable[[str, Optional[str]], BaseChatModel] = _init_model
+    ):
+        """Initialize an empty registry.
+
+        Args:
+            factory: Creates the chat model for a model name and provider
+        """
+        self.factory = factory
+        self._models: dict[ModelKey, BaseChatModel] = {}
+        self._bound: dict[BoundKey, Runnable[LanguageModelInput, BaseMessage]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str) -> ModelKey:
+        spec = utils.split_model_and_provider(name)
+        return spec["provider"], spec["model"]
+
+    def model(self, name: str) -> BaseChatModel:
+        """Return the chat model for ``name``, in the form ``provider/model-name``."""
+        key = self._key(name)
+        model = self._models.get(key)
+        if model is None:
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    provider, model_name = key
+                    model = self._models[key] = self.factory(model_name, provider)
+        return model
+
+    def get(
+        self, name: str, tools: Sequence[Any] = ()
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        """Return the chat model for ``name`` with ``tools`` bound to it.
+
+        Toolsets are identified by their tool names, in order; the order is
+        kept so the schemas sent to the provider are always identical.
+        """
+        provider, model_name = self._key(name)
+        key = (provider, model_name, tuple(tool_name(tool) for tool in tools))
+        bound = self._bound.get(key)
+        if bound is None:
+            model = self.model(name)
+            with self._lock:
+                bound = self._bound.get(key)
+                if bound is None:
+                    bound = self._bound[key] = (
+                        model.bind_tools(list(tools)) if tools else model
+                    )
+        return bound
+
+    def clear(self) -> None:
+        """Drop every model, e.g. after credentials change."""
+        with self._lock:
+            self._models.clear()
+            self._bound.clear()
+
+
+__all__ = ["ModelRegistry", "tool_name"]
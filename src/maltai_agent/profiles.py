@@ -0,0 +1,199 @@
+"""Atomic, coalesced updates of the user profile.
+
+The profile is a single item, ``("profile", user_id)`` / ``"profile"``.
+Updates are described as :class:`ProfileChange` operations rather than
+whole values, so concurrent updates of different fields (for example
+several tool calls of one model message, which run concurrently) are
+merged instead of overwriting each other. Updates waiting for the same
+profile are applied together, with one read and one write.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import typing
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Literal, Optional
+
+from langgraph.store.base import BaseStore
+from pydantic import BaseModel, Field
+
+from maltai_agent.locks import namespace_lock
+
+Operation = Literal["set", "add", "remove", "update"]
+
+_pending: weakref.WeakKeyDictionary[BaseStore, dict[str, list]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class Profile(BaseModel):
+    """User profile information."""
+
+    name: Optional[str] = Field(description="User's name", default=None)
+    location: Optional[str] = Field(description="User's location", default=None)
+    interests: List[str] = Field(description="User's interests", default_factory=list)
+    preferences: Dict[str, Any] = Field(
+        description="User's preferences", default_factory=dict
+    )
+
+
+@dataclass(frozen=True)
+class ProfileChange:
+    """One change to one profile field.
+
+    ``"set"`` replaces the value of any field. List fields also accept
+    ``"add"`` (append the items not present yet) and ``"remove"`` (drop
+    items); dict fields accept ``"update"`` (merge keys) and ``"remove"``
+    (drop keys).
+    """
+
+    field: str
+    """Name of a :class:`Profile` field."""
+    value: Any
+    """New value, or the items or keys to add, merge or remove."""
+    op: Operation = "set"
+    """How ``value`` is applied."""
+
+
+def _container(name: str) -> Optional[type]:
+    """Return ``list`` or ``dict`` for collection fields, None for scalars."""
+    origin = typing.get_origin(Profile.model_fields[name].annotation)
+    return origin if origin in (list, dict) else None
+
+
+def apply_changes(profile: dict, changes: Iterable[ProfileChange]) -> dict:
+    """Return the profile with the changes applied in order.
+
+    Raises:
+        ValueError: If a change names an unknown field, uses an operation
+            the field does not support or produces an invalid profile.
+    """
+    value = Profile(**profile).model_dump()
+    for change in changes:
+        if change.field not in Profile.model_fields:
+            raise ValueError(f"Unknown profile field: {change.field}")
+        container = _container(change.field)
+        current = value[change.field]
+        if change.op == "set":
+            value[change.field] = change.value
+        elif container is list and change.op == "add":
+            items = (
+                [change.value] if isinstance(change.value, str) else list(change.value)
+            )
+            value[change.field] = current + [
+                item for item in dict.fromkeys(items) if item not in current
+            ]
+        elif container is list and change.op == "remove":
+            items = (
+                {change.value} if isinstance(change.value, str) else set(change.value)
+            )
+            value[change.field] = [item for item in current if item not in items]
+        elif container is dict and change.op == "update":
+            value[change.field] = {**current, **change.value}
+        elif container is dict and change.op == "remove":
+            keys = (
+                {change.value} if isinstance(change.value, str) else set(change.value)
+            )
+            value[change.field] = {
+                key: item for key, item in current.items() if key not in keys
+            }
+        else:
+            raise ValueError(f"Cannot {change.op} profile field {change.field}")
+    # Validates the types of the changed fields
+    return Profile(**value).model_dump()
+
+
+class ProfileStore:
+    """Read and update the profile of one user.
+
+    Updates are serialized per user within the process. An update that
+    arrives while another is being written waits and is then written
+    together with every other update that arrived meanwhile, so a burst of
+    concurrent updates costs one read and one write. Each update is
+    validated on its own; an invalid one fails without affecting the others,
+    while a failed write fails every update written with it.
+
+    Writes are not versioned: the store API has no conditional put, so a
+    version check would be a separate read that races with other processes
+    just the same. Within the process the namespace lock already orders them.
+    """
+
+    def __init__(self, store: BaseStore, user_id: str):
+        """Initialize the profile store.
+
+        Args:
+            store: Store holding the profile
+            user_id: The user whose profile is managed
+        """
+        self.store = store
+        self.user_id = user_id
+        self.namespace = ("profile", user_id)
+
+    async def get(self) -> Profile:
+        """Return the profile, empty if none was stored yet."""
+        item = await self.store.aget(self.namespace, "profile")
+        return Profile(**(item.value if item else {}))
+
+    async def update(self, changes: Iterable[ProfileChange]) -> Profile:
+        """Apply changes atomically and return the profile they were written with.
+
+        Raises:
+            ValueError: If the changes are invalid; nothing is written for them.
+        """
+        done: asyncio.Future[Profile] = asyncio.get_running_loop().create_future()
+        queue = _pending.setdefault(self.store, {}).setdefault(self.user_id, [])
+        queue.append((list(changes), done))
+        try:
+            async with namespace_lock(self.store, self.namespace):
+                if not done.done():
+                    # Let updates started in the same step (e.g. by asyncio.gather) join the batch
+                    await asyncio.sleep(0)
+                    batch = queue[:]
+                    del queue[:]
+                    try:
+                        await self._write(batch)
+                    except asyncio.CancelledError:
+                        # The others still waiting write their updates themselves
+                        queue[:0] = [entry for entry in batch if not entry[1].done()]
+                        raise
+            return await done
+        except asyncio.CancelledError:
+            # Skipped by later writes, so its update is not applied
+            done.cancel()
+            raise
+
+    async def _write(
+        self, batch: list[tuple[list[ProfileChange], asyncio.Future[Profile]]]
+    ) -> None:
+        """Apply a batch of updates with one read and one write.
+
+        Every update gets its result or error through its future, which its
+        caller awaits; only cancellation propagates from here.
+        """
+        try:
+            item = await self.store.aget(self.namespace, "profile")
+            value = item.value if item else {}
+            applied = []
+            for changes, done in batch:
+                if done.done():
+                    continue  # Cancelled while waiting
+                try:
+                    value = apply_changes(value, changes)
+                except ValueError as e:
+                    done.set_exception(e)
+                else:
+                    applied.append(done)
+            if applied:
+                await self.store.aput(self.namespace, "profile", value)
+            profile = Profile(**value)
+            for done in applied:
+                done.set_result(profile)
+        except Exception as e:
+            for _, done in batch:
+                if not done.done():
+                    done.set_exception(e)
+
+
+__all__ = ["Profile", "ProfileChange", "ProfileStore", "apply_changes"]
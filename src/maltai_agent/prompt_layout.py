@@ -0,0 +1,275 @@
+"""Render the system prompt with a stable prefix and cached sections.
+
+Providers cache the longest prompt prefix they have seen recently, so a
+prompt is cheapest when everything that rarely changes comes first. The
+default :data:`~maltai_agent.prompts.SYSTEM_PROMPT` orders its sections
+from most to least stable: the fixed preamble, then instructions, profile,
+todos, the conversation summary, the memories retrieved for the current
+query and finally the time. Tool schemas, which providers place before
+the system prompt, come first of all.
+
+Store-backed sections are rendered once per namespace version and reused
+until a write goes through :class:`VersionedStore`, which also skips
+their store reads.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Iterable, Optional, Union
+
+from langgraph.store.base import BaseStore, Op, PutOp, Result
+
+from maltai_agent import tracing
+from maltai_agent.budget import TokenBudget, count_tokens
+from maltai_agent.context import load_context
+
+logger = logging.getLogger(__name__)
+
+CACHED_SECTIONS = ("instructions", "profile", "todos")
+"""Sections that depend only on their store namespace and can be reused between turns."""
+
+
+class VersionedStore(BaseStore):
+    """Store wrapper that counts the writes made to each namespace.
+
+    Every operation is delegated to the wrapped store; after a batch that
+    contains puts or deletes, the version of each namespace written is
+    incremented. Only writes made through this wrapper are seen, so all
+    writers in the process must share it.
+    """
+
+    def __init__(self, store: Union[BaseStore, Callable[[], BaseStore]]):
+        """Wrap ``store``.
+
+        Args:
+            store: The store, or a factory called on first use to create it
+        """
+        self._store = store if isinstance(store, BaseStore) else None
+        self._factory = None if isinstance(store, BaseStore) else store
+        self._versions: dict[tuple[str, ...], int] = {}
+        self._lock = threading.Lock()
+        self._create_lock = threading.Lock()
+
+    @property
+    def store(self) -> BaseStore:
+        """The wrapped store, created by the factory if not done yet."""
+        if self._store is None:
+            with self._create_lock:
+                if self._store is None:
+                    assert self._factory is not None
+                    self._store = self._factory()
+        return self._store
+
+    @property  # type: ignore[override]
+    def supports_ttl(self) -> bool:
+        """Whether the wrapped store supports TTLs."""
+        return self.store.supports_ttl
+
+    @property  # type: ignore[override]
+    def ttl_config(self) -> Any:
+        """TTL configuration of the wrapped store."""
+        return self.store.ttl_config
+
+    def __getattr__(self, name: str) -> Any:
+        """Forward other public attributes to the wrapped store."""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.store, name)
+
+    def version(self, namespace: tuple[str, ...]) -> int:
+        """Return the number of write batches that have touched ``namespace``."""
+        return self._versions.get(tuple(namespace), 0)
+
+    def _bump(self, ops: list[Op]) -> None:
+        namespaces = {op.namespace for op in ops if isinstance(op, PutOp)}
+        if namespaces:
+            with self._lock:
+                for namespace in namespaces:
+                    self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+    def batch(self, ops: Iterable[Op]) -> list[Result]:
+        """Run ``ops`` on the wrapped store and bump the versions of namespaces written to."""
+        ops = list(ops)
+        try:
+            with tracing.span("store.batch", ops=len(ops)):
+                return self.store.batch(ops)
+        finally:
+            # Also after a failure, since part of the batch may have been written
+            self._bump(ops)
+
+    async def abatch(self, ops: Iterable[Op]) -> list[Result]:
+        """Run ``ops`` on the wrapped store asynchronously and bump the versions of namespaces written to."""
+        ops = list(ops)
+        try:
+            with tracing.span("store.batch", ops=len(ops)):
+                return await self.store.abatch(ops)
+        finally:
+            self._bump(ops)
+
+
+@dataclass(kw_only=True)
+class PromptMetrics:
+    """Cache behaviour of one rendered system prompt."""
+
+    user_id: str
+    """The user the prompt was rendered for."""
+    cache_hits: int = 0
+    """Sections reused from the cache without reading the store."""
+    cache_lookups: int = 0
+    """Sections that could have been served from the cache."""
+    prompt_chars: int = 0
+    """Length of the rendered prompt."""
+    stable_prefix_chars: int = 0
+    """Leading characters identical to the previous prompt of the same user."""
+    stable_prefix_tokens: int = 0
+    """Tokens in that stable prefix, which a provider-side prompt cache can reuse."""
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Fraction of cacheable sections served from the cache."""
+        return self.cache_hits / self.cache_lookups if self.cache_lookups else 0.0
+
+    @property
+    def prefix_stability(self) -> float:
+        """Fraction of the prompt shared with the previous turn, from the start."""
+        return (
+            self.stable_prefix_chars / self.prompt_chars if self.prompt_chars else 0.0
+        )
+
+
+class PromptRenderer:
+    """Render system prompts, caching store-backed sections by namespace version.
+
+    One renderer is shared by all users; its state is only touched between
+    awaits, so it is safe for concurrent turns on one event loop. The last
+    ``history`` turns' metrics are kept in :attr:`metrics`.
+    """
+
+    def __init__(self, *, max_entries: int = 4096, history: int = 1024):
+        """Initialize an empty renderer.
+
+        Args:
+            max_entries: Maximum cached sections and previous prompts, evicted least recently used
+            history: Number of per-turn metrics kept
+        """
+        self.max_entries = max_entries
+        self.metrics: deque[PromptMetrics] = deque(maxlen=history)
+        self._sections: OrderedDict[
+            tuple[int, str, str], tuple[tuple[int, int], str]
+        ] = OrderedDict()
+        self._previous: OrderedDict[str, str] = OrderedDict()
+
+    def _remember(self, cache: OrderedDict, key: Any, value: Any) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.max_entries:
+            cache.popitem(last=False)
+
+    async def render(
+        self,
+        store: BaseStore,
+        template: str,
+        user_id: str,
+        *,
+        query: str,
+        limits: Optional[TokenBudget] = None,
+        todo_limit: int = 10,
+        summary: str = "",
+        now: Optional[datetime] = None,
+    ) -> tuple[str, PromptMetrics]:
+        """Read the user's context and fill in the system prompt template.
+
+        Sections are only cached when ``store`` is a :class:`VersionedStore`;
+        with any other store every section is read and rendered each turn.
+
+        Args:
+            store: The store holding the user's namespaces
+            template: Format string with ``instructions``, ``profile_info``,
+                ``todo_list``, ``summary``, ``user_info`` and ``time`` fields
+            user_id: The user whose context is rendered
+            query: Semantic query used to rank memories
+            limits: Token budget per section
+            todo_limit: Number of open todos shown
+            summary: Running summary of the earlier conversation
+            now: Current time, rounded to the minute in the prompt
+
+        Returns:
+            The rendered prompt and its cache metrics.
+        """
+        limits = limits or TokenBudget()
+        metrics = PromptMetrics(user_id=user_id)
+        version = getattr(store, "version", None)
+
+        # Versions are read before the store, so a concurrent write can only
+        # make a cache entry look older than its content, never newer
+        sizes = {
+            "instructions": limits.instructions,
+            "profile": limits.profile,
+            "todos": (limits.todos, todo_limit),
+        }
+        keys: dict[str, tuple[int, Any]] = {}
+        cached: dict[str, str] = {}
+        if version is not None:
+            for name in CACHED_SECTIONS:
+                keys[name] = (version((name, user_id)), sizes[name])
+                entry = self._sections.get((id(store), user_id, name))
+                metrics.cache_lookups += 1
+                if entry is not None and entry[0] == keys[name]:
+                    cached[name] = entry[1]
+                    metrics.cache_hits += 1
+
+        context = await load_context(
+            store, user_id, query=query, todo_limit=todo_limit, skip=cached
+        )
+        sections = {
+            "instructions": lambda: str(
+                context.format_instructions(limits.instructions)
+            ),
+            "profile": lambda: str(context.format_profile(limits.profile)),
+            "todos": lambda: context.format_todos(limits.todos),
+        }
+        for name, key in keys.items():
+            if name not in cached:
+                cached[name] = sections[name]()
+                self._remember(
+                    self._sections, (id(store), user_id, name), (key, cached[name])
+                )
+
+        for name, render in sections.items():
+            if name not in cached:
+                cached[name] = render()
+        prompt = template.format(
+            instructions=cached["instructions"],
+            profile_info=cached["profile"],
+            todo_list=cached["todos"],
+            summary=summary,
+            user_info=context.format_memories(limits.memories),
+            time=(now or datetime.now()).isoformat(timespec="minutes"),
+        )
+
+        previous = self._previous.get(user_id, "")
+        metrics.prompt_chars = len(prompt)
+        metrics.stable_prefix_chars = len(os.path.commonprefix([previous, prompt]))
+        metrics.stable_prefix_tokens = count_tokens(
+            prompt[: metrics.stable_prefix_chars]
+        )
+        self._remember(self._previous, user_id, prompt)
+        self.metrics.append(metrics)
+        logger.debug(
+            "System prompt for %s: %d/%d sections cached, %.0f%% prefix stable (%d tokens)",
+            user_id,
+            metrics.cache_hits,
+            metrics.cache_lookups,
+            100 * metrics.prefix_stability,
+            metrics.stable_prefix_tokens,
+        )
+        return prompt, metrics
+
+
+__all__ = ["CACHED_SECTIONS", "PromptMetrics", "PromptRenderer", "VersionedStore"]
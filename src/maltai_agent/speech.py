@@ -0,0 +1,134 @@
+"""Sentence-level streaming of model output into speech."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Optional
+
+from maltai_agent import tracing
+
+# A sentence ends with terminal punctuation (optionally followed by closing
+# quotes or brackets) and then whitespace.
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+")
+# Clause boundaries used to break up long sentences.
+_CLAUSE_END = re.compile(r"[,;:—]\s+")
+
+
+def clean_for_speech(text: str) -> str:
+    """Strip formatting that should not be read out loud."""
+    return text.replace("**", "").strip()
+
+
+async def split_sentences(
+    tokens: AsyncIterable[str],
+    *,
+    min_chars: int = 12,
+    max_chars: int = 160,
+) -> AsyncIterator[str]:
+    """Group a stream of tokens into speakable sentences or clauses.
+
+    Args:
+        tokens: Text fragments as they arrive from the model.
+        min_chars: Shortest chunk emitted at a sentence boundary. Avoids
+            splitting on abbreviations such as "Dr." or "e.g.".
+        max_chars: Longest chunk buffered before it is split at the last
+            clause boundary (or whitespace) seen so far.
+    """
+    buffer = ""
+    async for token in tokens:
+        buffer += token
+        while True:
+            cut = _next_cut(buffer, min_chars, max_chars)
+            if cut is None:
+                break
+            chunk, buffer = clean_for_speech(buffer[:cut]), buffer[cut:]
+            if chunk:
+                yield chunk
+    chunk = clean_for_speech(buffer)
+    if chunk:
+        yield chunk
+
+
+def _next_cut(buffer: str, min_chars: int, max_chars: int) -> Optional[int]:
+    """Return the index at which the buffer should be split, if any."""
+    for match in _SENTENCE_END.finditer(buffer):
+        if match.end() >= min_chars:
+            return match.end()
+    if len(buffer) < max_chars:
+        return None
+    clauses = list(_CLAUSE_END.finditer(buffer, 0, max_chars))
+    if clauses:
+        return clauses[-1].end()
+    space = buffer.rfind(" ", 0, max_chars)
+    return space + 1 if space > 0 else max_chars
+
+
+async def speak_stream(
+    chunks: AsyncIterable[str],
+    synthesize: Callable[[str], Awaitable[bytes]],
+    play: Callable[[bytes], Awaitable[None]],
+    *,
+    max_pending: int = 3,
+) -> list[str]:
+    """Synthesize chunks as they arrive and play them back in order.
+
+    Synthesis of a chunk starts as soon as it is produced, so while one chunk
+    is playing the next ones are already being synthesized. At most
+    ``max_pending`` chunks are synthesized ahead of playback.
+
+    Args:
+        chunks: Sentences to speak, typically from :func:`split_sentences`.
+        synthesize: Coroutine turning text into playable audio.
+        play: Coroutine playing audio until it has finished.
+        max_pending: Maximum number of chunks synthesized ahead of playback.
+
+    Returns:
+        The chunks that were spoken, in order.
+    """
+    queue: asyncio.Queue[Optional[tuple[str, float, asyncio.Task[bytes]]]] = (
+        asyncio.Queue()
+    )
+    slots = asyncio.Semaphore(max_pending)
+
+    async def produce() -> None:
+        try:
+            async for chunk in chunks:
+                await slots.acquire()
+                queue.put_nowait(
+                    (chunk, time.perf_counter(), asyncio.create_task(synthesize(chunk)))
+                )
+        finally:
+            queue.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    spoken: list[str] = []
+    try:
+        while (item := await queue.get()) is not None:
+            chunk, queued, audio = item
+            data = await audio
+            # Time from the chunk being produced until it starts playing
+            with tracing.span(
+                "audio.play", bytes=len(data), queue_wait_s=time.perf_counter() - queued
+            ):
+                await play(data)
+            slots.release()
+            spoken.append(chunk)
+        await producer
+    finally:
+        producer.cancel()
+        while not queue.empty():
+            item = queue.get_nowait()
+            if item is not None:
+                item[2].cancel()
+    return spoken
+
+
+async def iter_queue(queue: asyncio.Queue[Optional[str]]) -> AsyncIterator[str]:
+    """Yield items from a queue until a ``None`` sentinel is received."""
+    while (item := await queue.get()) is not None:
+        yield item
+
+
+__all__ = ["clean_for_speech", "iter_queue", "speak_stream", "split_sentences"]
@@ -0,0 +1,674 @@
+"""Persistent store backed by SQLite with a memory-mapped vector file."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timezone
+from typing import Any, Iterable, Optional, Sequence
+
+import numpy as np
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    IndexConfig,
+    Item,
+    ListNamespacesOp,
+    MatchCondition,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+)
+from langgraph.store.base.embed import (
+    ensure_embeddings,
+    get_text_at_path,
+    tokenize_path,
+)
+
+from maltai_agent.ann import ANNConfig, IVFIndex
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS namespaces (
+    id INTEGER PRIMARY KEY,
+    namespace TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    namespace_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    UNIQUE (namespace_id, key)
+);
+CREATE INDEX IF NOT EXISTS items_by_update ON items (namespace_id, updated_at);
+CREATE TABLE IF NOT EXISTS vectors (
+    row INTEGER PRIMARY KEY,
+    item_id INTEGER NOT NULL,
+    namespace_id INTEGER NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS vectors_by_item ON vectors (item_id);
+"""
+
+_OPERATORS = {
+    "$eq": "=",
+    "$ne": "!=",
+    "$gt": ">",
+    "$gte": ">=",
+    "$lt": "<",
+    "$lte": "<=",
+}
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize values JSON does not support natively."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=_json_default, separators=(",", ":"))
+
+
+def _sql_param(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return _dumps(value)
+    return value
+
+
+def _matches(condition: MatchCondition, namespace: tuple[str, ...]) -> bool:
+    path = condition.path
+    if len(path) > len(namespace):
+        return False
+    part = (
+        namespace[: len(path)]
+        if condition.match_type == "prefix"
+        else namespace[-len(path) :]
+    )
+    return all(p == "*" or p == n for p, n in zip(path, part))
+
+
+class SQLiteVectorStore(BaseStore):
+    """A :class:`BaseStore` that persists items to a single SQLite file.
+
+    Item values are stored as JSON; datetimes are written as ISO strings and
+    read back as strings. When an index is configured, embeddings are
+    normalized and written as float32 rows of a memory-mapped matrix next to
+    the database (``<path>.vectors``), so semantic search is one NumPy
+    matrix-vector product over the rows of the matching namespaces instead of
+    a loop over Python lists. Rows freed by updates and deletes are reused.
+
+    With ``ann`` set, each namespace under ``ann.namespace_prefix`` also gets
+    an :class:`~maltai_agent.ann.IVFIndex`, kept up to date on every write.
+    Unfiltered searches of such a namespace scan only the closest clusters
+    once it holds ``ann.min_items`` vectors, and are exact below that. The
+    clusters are trained on the first search past the threshold (and again
+    as the namespace grows), not persisted.
+
+    Reads in a batch see the state from before the batch's writes, like the
+    other LangGraph stores. The store is safe to share between threads and
+    event loops; blocking work runs in a worker thread from the async API.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        index: Optional[IndexConfig] = None,
+        ann: Optional[ANNConfig] = None,
+        initial_capacity: int = 1024,
+    ):
+        """Open or create a store.
+
+        Args:
+            path: SQLite database file; ``":memory:"`` keeps everything in RAM
+            index: Semantic search configuration, as for ``InMemoryStore``
+            ann: Approximate search settings; all searches are exact when None
+            initial_capacity: Number of vector rows allocated for a new file
+        """
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        self._namespaces: dict[tuple[str, ...], int] = {
+            tuple(json.loads(namespace)): namespace_id
+            for namespace_id, namespace in self.conn.execute(
+                "SELECT id, namespace FROM namespaces"
+            )
+        }
+        self._namespace_names = {i: ns for ns, i in self._namespaces.items()}
+
+        self.index_config = index
+        self.embeddings = ensure_embeddings(index["embed"]) if index else None
+        self._fields = [
+            (field, field if field == "$" else tokenize_path(field))
+            for field in ((index or {}).get("fields") or ["$"])
+        ]
+        self.dims = index["dims"] if index else 0
+        self.vector_path: Optional[str] = None
+        self._matrix = np.zeros((0, self.dims), dtype=np.float32)
+        self._row_namespace = np.empty(0, dtype=np.int64)
+        self._row_item = np.empty(0, dtype=np.int64)
+        self._free: list[int] = []
+        self.ann = ann
+        self._ann_indexes: dict[int, IVFIndex] = {}
+        if index:
+            self._open_vectors(initial_capacity)
+
+    # Vector file
+
+    def _open_vectors(self, initial_capacity: int) -> None:
+        """Map the vector file and load the row bookkeeping from SQLite."""
+        stored = self.conn.execute(
+            "SELECT value FROM meta WHERE name = 'dims'"
+        ).fetchone()
+        if stored is None:
+            self.conn.execute("INSERT INTO meta VALUES ('dims', ?)", (str(self.dims),))
+        elif int(stored[0]) != self.dims:
+            raise ValueError(
+                f"{self.path} stores {stored[0]}-dimensional vectors, not {self.dims}"
+            )
+        rows = np.array(
+            self.conn.execute(
+                "SELECT row, item_id, namespace_id FROM vectors"
+            ).fetchall(),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        used = int(rows[:, 0].max()) + 1 if len(rows) else 0
+
+        if self.path != ":memory:":
+            self.vector_path = f"{self.path}.vectors"
+            if os.path.exists(self.vector_path):
+                row_bytes = 4 * self.dims
+                initial_capacity = max(
+                    os.path.getsize(self.vector_path) // row_bytes, used
+                )
+        self._grow(max(initial_capacity, used, 1))
+        self._row_namespace[rows[:, 0]] = rows[:, 2]
+        self._row_item[rows[:, 0]] = rows[:, 1]
+        self._free = np.flatnonzero(self._row_item < 0)[::-1].tolist()
+
+    def _grow(self, capacity: int) -> None:
+        """Resize the vector matrix to ``capacity`` rows."""
+        old = len(self._row_item)
+        if self.vector_path is None:
+            matrix = np.zeros((capacity, self.dims), dtype=np.float32)
+            matrix[:old] = self._matrix[:old]
+        else:
+            if isinstance(self._matrix, np.memmap):
+                self._matrix.flush()
+            self._matrix = np.zeros(
+                (0, self.dims), dtype=np.float32
+            )  # Drop the old map
+            with open(self.vector_path, "ab") as f:
+                f.truncate(capacity * self.dims * 4)
+            matrix = np.memmap(
+                self.vector_path,
+                dtype=np.float32,
+                mode="r+",
+                shape=(capacity, self.dims),
+            )
+        self._matrix = matrix
+        self._row_namespace = np.concatenate(
+            (self._row_namespace, np.full(capacity - old, -1, dtype=np.int64))
+        )
+        self._row_item = np.concatenate(
+            (self._row_item, np.full(capacity - old, -1, dtype=np.int64))
+        )
+        self._free = list(range(capacity - 1, old - 1, -1)) + self._free
+
+    def _allocate(self, count: int) -> list[int]:
+        """Reserve ``count`` free vector rows, growing the file if needed."""
+        if count > len(self._free):
+            needed = len(self._row_item) + count - len(self._free)
+            self._grow(max(needed, 2 * len(self._row_item)))
+        rows = self._free[-count:] if count else []
+        del self._free[len(self._free) - count :]
+        return rows
+
+    # Batch execution
+
+    def batch(self, ops: Iterable[Op]) -> list[Result]:
+        """Execute a batch of operations synchronously."""
+        ops = list(ops)
+        queries, texts = self._texts_to_embed(ops)
+        query_vectors: dict[str, list[float]] = {}
+        text_vectors: dict[str, list[float]] = {}
+        if self.embeddings is not None:
+            query_vectors = {
+                query: self.embeddings.embed_query(query) for query in queries
+            }
+            if texts:
+                text_vectors = dict(zip(texts, self.embeddings.embed_documents(texts)))
+        return self._execute(ops, query_vectors, text_vectors)
+
+    async def abatch(self, ops: Iterable[Op]) -> list[Result]:
+        """Execute a batch of operations, embedding and querying off the event loop."""
+        ops = list(ops)
+        queries, texts = self._texts_to_embed(ops)
+        query_vectors: dict[str, list[float]] = {}
+        text_vectors: dict[str, list[float]] = {}
+        if self.embeddings is not None:
+            vectors = await asyncio.gather(
+                *(self.embeddings.aembed_query(query) for query in queries)
+            )
+            query_vectors = dict(zip(queries, vectors))
+            if texts:
+                text_vectors = dict(
+                    zip(texts, await self.embeddings.aembed_documents(texts))
+                )
+        return await asyncio.to_thread(self._execute, ops, query_vectors, text_vectors)
+
+    def _texts_to_embed(self, ops: Sequence[Op]) -> tuple[list[str], list[str]]:
+        """Return the distinct search queries and document texts of a batch."""
+        if self.embeddings is None:
+            return [], []
+        queries: dict[str, None] = {}
+        texts: dict[str, None] = {}
+        for op in ops:
+            if isinstance(op, SearchOp) and op.query:
+                queries[op.query] = None
+            elif isinstance(op, PutOp):
+                for _, text in self._index_texts(op):
+                    texts[text] = None
+        return list(queries), list(texts)
+
+    def _index_texts(self, op: PutOp) -> list[tuple[str, str]]:
+        """Return ``(path, text)`` pairs to embed for a put."""
+        if self.embeddings is None or op.value is None or op.index is False:
+            return []
+        fields = (
+            self._fields
+            if op.index is None
+            else [(p, tokenize_path(p)) for p in op.index]
+        )
+        pairs = []
+        for path, field in fields:
+            texts = get_text_at_path(op.value, field)
+            if len(texts) == 1:
+                pairs.append((path, texts[0]))
+            else:
+                pairs.extend((f"{path}.{i}", text) for i, text in enumerate(texts))
+        return pairs
+
+    def _execute(
+        self,
+        ops: Sequence[Op],
+        query_vectors: dict[str, list[float]],
+        text_vectors: dict[str, list[float]],
+    ) -> list[Result]:
+        results: list[Result] = [None] * len(ops)
+        puts: dict[tuple[tuple[str, ...], str], PutOp] = {}
+        with self._lock:
+            for i, op in enumerate(ops):
+                if isinstance(op, GetOp):
+                    results[i] = self._get(op)
+                elif isinstance(op, SearchOp):
+                    results[i] = self._search(op, query_vectors.get(op.query or ""))
+                elif isinstance(op, ListNamespacesOp):
+                    results[i] = self._list_namespaces(op)
+                elif isinstance(op, PutOp):
+                    puts[(op.namespace, op.key)] = op
+                else:
+                    raise ValueError(f"Unknown operation type: {type(op)}")
+            if puts:
+                self._apply_puts(list(puts.values()), text_vectors)
+        return results
+
+    # Reads
+
+    def _row_to_item(
+        self, row: tuple, score: Optional[float] = None, search: bool = False
+    ) -> Item:
+        namespace_id, key, value, created_at, updated_at = row
+        fields = dict(
+            namespace=self._namespace_names[namespace_id],
+            key=key,
+            value=json.loads(value),
+            created_at=datetime.fromisoformat(created_at),
+            updated_at=datetime.fromisoformat(updated_at),
+        )
+        return SearchItem(**fields, score=score) if search else Item(**fields)
+
+    def _get(self, op: GetOp) -> Optional[Item]:
+        namespace_id = self._namespaces.get(op.namespace)
+        if namespace_id is None:
+            return None
+        row = self.conn.execute(
+            "SELECT namespace_id, key, value, created_at, updated_at FROM items"
+            " WHERE namespace_id = ? AND key = ?",
+            (namespace_id, op.key),
+        ).fetchone()
+        return self._row_to_item(row) if row else None
+
+    def _matching_namespaces(self, prefix: tuple[str, ...]) -> list[int]:
+        return [
+            namespace_id
+            for namespace, namespace_id in self._namespaces.items()
+            if namespace[: len(prefix)] == prefix
+        ]
+
+    def _filter_sql(self, filter: Optional[dict[str, Any]]) -> tuple[str, list[Any]]:
+        """Translate a search filter into a SQL condition on the JSON value."""
+        clauses: list[str] = []
+        params: list[Any] = []
+        for field, condition in (filter or {}).items():
+            if '"' in field:
+                raise ValueError(f"Unsupported filter field: {field!r}")
+            column = f"json_extract(value, '$.\"{field}\"')"
+            if (
+                isinstance(condition, dict)
+                and condition
+                and all(k.startswith("$") for k in condition)
+            ):
+                conditions = list(condition.items())
+            else:
+                conditions = [("$eq", condition)]
+            for operator, operand in conditions:
+                if operator not in _OPERATORS:
+                    raise ValueError(f"Unsupported filter operator: {operator}")
+                if operand is None and operator in ("$eq", "$ne"):
+                    clauses.append(
+                        f"{column} IS {'' if operator == '$eq' else 'NOT '}NULL"
+                    )
+                    continue
+                placeholder = "json(?)" if isinstance(operand, (dict, list)) else "?"
+                clauses.append(f"{column} {_OPERATORS[operator]} {placeholder}")
+                params.append(_sql_param(operand))
+        return " AND ".join(clauses), params
+
+    def _search(self, op: SearchOp, query: Optional[list[float]]) -> list[SearchItem]:
+        namespace_ids = self._matching_namespaces(op.namespace_prefix)
+        if not namespace_ids or op.limit <= 0:
+            return []
+        where = f"namespace_id IN ({','.join('?' * len(namespace_ids))})"
+        params: list[Any] = list(namespace_ids)
+        filter_sql, filter_params = self._filter_sql(op.filter)
+        if filter_sql:
+            where += f" AND {filter_sql}"
+            params += filter_params
+        columns = "namespace_id, key, value, created_at, updated_at"
+
+        if query is None:
+            rows = self.conn.execute(
+                f"SELECT {columns} FROM items WHERE {where}"
+                " ORDER BY updated_at DESC, id DESC LIMIT ? OFFSET ?",
+                (*params, op.limit, op.offset),
+            ).fetchall()
+            return [self._row_to_item(row, search=True) for row in rows]
+
+        allowed = None
+        if filter_sql:
+            allowed = np.array(
+                [
+                    r[0]
+                    for r in self.conn.execute(
+                        f"SELECT id FROM items WHERE {where}", params
+                    )
+                ],
+                dtype=np.int64,
+            )
+        wanted = op.offset + op.limit
+        ranked = self._rank(
+            namespace_ids, np.asarray(query, dtype=np.float32), allowed, wanted
+        )
+        scored = len(ranked)
+        ranked = ranked[op.offset :]
+
+        results: list[SearchItem] = []
+        if ranked:
+            ids = [item_id for item_id, _ in ranked]
+            by_id = {
+                row[0]: row[1:]
+                for row in self.conn.execute(
+                    f"SELECT id, {columns} FROM items WHERE id IN ({','.join('?' * len(ids))})",
+                    ids,
+                )
+            }
+            results = [
+                self._row_to_item(by_id[item_id], score=score, search=True)
+                for item_id, score in ranked
+            ]
+        if scored < wanted:
+            # Items without embeddings have no score; they are paged after the scored ones
+            rows = self.conn.execute(
+                f"SELECT {columns} FROM items WHERE {where}"
+                " AND id NOT IN (SELECT item_id FROM vectors) ORDER BY id LIMIT ? OFFSET ?",
+                (*params, op.limit - len(results), max(0, op.offset - scored)),
+            ).fetchall()
+            results += [self._row_to_item(row, search=True) for row in rows]
+        return results
+
+    def _rank(
+        self,
+        namespace_ids: list[int],
+        query: np.ndarray,
+        allowed: Optional[np.ndarray],
+        wanted: int,
+    ) -> list[tuple[int, float]]:
+        """Return ``(item_id, score)`` of the ``wanted`` best matches, max-pooled per item."""
+        norm = float(np.linalg.norm(query))
+        query = query / norm if norm else query
+
+        rows = None
+        if allowed is None and len(namespace_ids) == 1:
+            rows = self._ann_candidates(namespace_ids[0], query, wanted)
+        if rows is not None:
+            scores = self._matrix[rows] @ query
+        else:
+            mask = np.isin(self._row_namespace, namespace_ids)
+            if allowed is not None:
+                mask &= np.isin(self._row_item, allowed)
+            rows = np.flatnonzero(mask)
+            if not rows.size:
+                return []
+            if 4 * rows.size > len(self._matrix):
+                # Scoring every row is cheaper than gathering most of them first
+                scores = (self._matrix @ query)[rows]
+            else:
+                scores = self._matrix[rows] @ query
+        items = self._row_item[rows]
+
+        k = min(len(rows), wanted)
+        while True:
+            top = (
+                np.argpartition(-scores, k - 1)[:k]
+                if k < len(rows)
+                else np.arange(len(rows))
+            )
+            top = top[np.argsort(-scores[top], kind="stable")]
+            ranked: dict[int, float] = {}
+            for index in top:
+                ranked.setdefault(int(items[index]), float(scores[index]))
+            if len(ranked) >= wanted or k == len(rows):
+                break
+            # Several vectors of the same item made the cut; look further
+            k = min(len(rows), 2 * k)
+        return list(ranked.items())[:wanted]
+
+    def _ann_index(self, namespace_id: int) -> Optional[IVFIndex]:
+        """Return the ANN index of a namespace, or None if it should not have one."""
+        if self.ann is None:
+            return None
+        ann_index = self._ann_indexes.get(namespace_id)
+        if ann_index is None:
+            prefix = self.ann.namespace_prefix
+            if self._namespace_names[namespace_id][: len(prefix)] != prefix:
+                return None
+            ann_index = self._ann_indexes[namespace_id] = IVFIndex(self.ann)
+            ann_index.add(
+                self._matrix, np.flatnonzero(self._row_namespace == namespace_id)
+            )
+        return ann_index
+
+    def _ann_candidates(
+        self, namespace_id: int, query: np.ndarray, wanted: int
+    ) -> Optional[np.ndarray]:
+        """Return candidate rows from the namespace's ANN index, or None to search exactly."""
+        ann_index = self._ann_index(namespace_id)
+        if ann_index is None or ann_index.size < ann_index.config.min_items:
+            return None
+        if ann_index.needs_training():
+            ann_index.train(self._matrix, ann_index.indexed_rows())
+        rows = ann_index.candidates(query)
+        # Probed clusters can be too small for large limits and offsets
+        return rows if rows.size >= wanted else None
+
+    def _list_namespaces(self, op: ListNamespacesOp) -> list[tuple[str, ...]]:
+        namespaces = [
+            namespace
+            for namespace in self._namespaces
+            if all(
+                _matches(condition, namespace)
+                for condition in op.match_conditions or ()
+            )
+        ]
+        if op.max_depth is not None:
+            namespaces = list({namespace[: op.max_depth] for namespace in namespaces})
+        return sorted(namespaces)[op.offset : op.offset + op.limit]
+
+    # Writes
+
+    def _namespace_id(self, namespace: tuple[str, ...]) -> int:
+        namespace_id = self._namespaces.get(namespace)
+        if namespace_id is None:
+            namespace_id = self.conn.execute(
+                "INSERT INTO namespaces (namespace) VALUES (?)",
+                (json.dumps(list(namespace)),),
+            ).lastrowid
+            self._namespaces[namespace] = namespace_id
+            self._namespace_names[namespace_id] = namespace
+        return namespace_id
+
+    def _apply_puts(
+        self, puts: list[PutOp], text_vectors: dict[str, list[float]]
+    ) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        new_namespaces = [
+            ns for ns in {op.namespace for op in puts} if ns not in self._namespaces
+        ]
+        freed: list[int] = []
+        # Rows taken from the free list, returned to it if the transaction fails
+        allocated: list[int] = []
+        written: list[tuple[int, int, int]] = []  # (row, item_id, namespace_id)
+        cursor = self.conn.cursor()
+        cursor.execute("BEGIN")
+        try:
+            for op in puts:
+                namespace_id = self._namespace_id(op.namespace)
+                if op.value is None:
+                    item = cursor.execute(
+                        "DELETE FROM items WHERE namespace_id = ? AND key = ? RETURNING id",
+                        (namespace_id, op.key),
+                    ).fetchone()
+                else:
+                    item = cursor.execute(
+                        "INSERT INTO items (namespace_id, key, value, created_at, updated_at)"
+                        " VALUES (?, ?, ?, ?, ?) ON CONFLICT (namespace_id, key) DO UPDATE"
+                        " SET value = excluded.value, updated_at = excluded.updated_at"
+                        " RETURNING id",
+                        (namespace_id, op.key, _dumps(op.value), now, now),
+                    ).fetchone()
+                if item is None or self.embeddings is None:
+                    continue
+                item_id = item[0]
+                freed += [
+                    row
+                    for (row,) in cursor.execute(
+                        "DELETE FROM vectors WHERE item_id = ? RETURNING row",
+                        (item_id,),
+                    )
+                ]
+                pairs = self._index_texts(op)
+                if not pairs:
+                    continue
+                rows = self._allocate(len(pairs))
+                allocated += rows
+                vectors = np.array(
+                    [text_vectors[text] for _, text in pairs], dtype=np.float32
+                )
+                norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                self._matrix[rows] = vectors / np.where(norms == 0, 1, norms)
+                cursor.executemany(
+                    "INSERT INTO vectors (row, item_id, namespace_id, path) VALUES (?, ?, ?, ?)",
+                    [
+                        (row, item_id, namespace_id, path)
+                        for row, (path, _) in zip(rows, pairs)
+                    ],
+                )
+                written += [(row, item_id, namespace_id) for row in rows]
+            if isinstance(self._matrix, np.memmap) and written:
+                self._matrix.flush()
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            for namespace in new_namespaces:
+                self._namespace_names.pop(self._namespaces.pop(namespace, -1), None)
+            self._free += allocated
+            raise
+
+        if self._ann_indexes:
+            self._update_ann_indexes(freed, written)
+        # Rows are only reused once the transaction that released them is durable
+        if freed:
+            self._row_namespace[freed] = -1
+            self._row_item[freed] = -1
+            self._free += freed
+        for row, item_id, namespace_id in written:
+            self._row_namespace[row] = namespace_id
+            self._row_item[row] = item_id
+
+    def _update_ann_indexes(
+        self, freed: list[int], written: list[tuple[int, int, int]]
+    ) -> None:
+        """Apply committed vector row changes to the existing ANN indexes."""
+        if freed:
+            freed_rows = np.asarray(freed, dtype=np.int64)
+            for namespace_id in np.unique(self._row_namespace[freed_rows]).tolist():
+                if (ann_index := self._ann_indexes.get(namespace_id)) is not None:
+                    ann_index.remove(
+                        freed_rows[self._row_namespace[freed_rows] == namespace_id]
+                    )
+        by_namespace: dict[int, list[int]] = {}
+        for row, _, namespace_id in written:
+            by_namespace.setdefault(namespace_id, []).append(row)
+        for namespace_id, rows in by_namespace.items():
+            if (ann_index := self._ann_indexes.get(namespace_id)) is not None:
+                ann_index.add(self._matrix, np.asarray(rows, dtype=np.int64))
+
+    def close(self) -> None:
+        """Flush the vector file and close the database."""
+        with self._lock:
+            if isinstance(self._matrix, np.memmap):
+                self._matrix.flush()
+            self.conn.close()
+
+    def __enter__(self) -> SQLiteVectorStore:
+        """Return the store, closed again when the block exits."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the store."""
+        self.close()
+
+
+__all__ = ["SQLiteVectorStore"]
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Optional
 
 from langchain_core.messages import AnyMessage
 from langgraph.graph import add_messages
@@ -16,11 +17,17 @@ class State:
     messages: Annotated[list[AnyMessage], add_messages]
     """The messages in the conversation."""
 
+    summary: str = ""
+    """Running summary of the turns that are no longer sent verbatim."""
+
+    summarized_through: Optional[str] = None
+    """ID of the last message folded into the summary."""
+
 
 @dataclass(kw_only=True)
 class MessagesState:
     """State containing only messages."""
-    
+
     messages: Annotated[list[AnyMessage], add_messages]
     """The messages in the conversation."""
 
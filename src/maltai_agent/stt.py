@@ -0,0 +1,371 @@
+"""Speech-to-text clients and incremental transcription of live audio."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Optional, Protocol, Sequence, Union
+
+import numpy as np
+
+from maltai_agent import tracing
+from maltai_agent.capture import encode_upload
+from maltai_agent.vad import Endpointer, VADConfig
+
+Audio = Union[np.ndarray, Sequence[np.ndarray]]
+"""Mono int16 samples, as one array or as consecutive pieces."""
+
+STT_BACKENDS = ("whisper-api", "local")
+"""Speech-to-text backends, selected by ``stt_backend`` in the configuration."""
+
+LOCAL_SAMPLE_RATE = 16000
+"""Sample rate the local Whisper models expect."""
+
+
+class Transcriber(Protocol):
+    """Anything that can turn recorded audio into text."""
+
+    def transcribe(self, audio: Audio, sample_rate: int) -> str:
+        """Return the text spoken in ``audio``."""
+        ...
+
+
+class WhisperAPITranscriber:
+    """Transcribe through the OpenAI audio transcription endpoint."""
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        async_client: Any = None,
+        model: str = "whisper-1",
+        upload_format: str = "wav",
+    ):
+        """Initialize the transcriber.
+
+        Args:
+            client: An ``openai.OpenAI`` client
+            async_client: An ``openai.AsyncOpenAI`` client used by
+                :meth:`atranscribe`; without it the synchronous client is
+                called in a thread
+            model: Transcription model name
+            upload_format: Encoding of the upload, see :func:`encode_upload`
+        """
+        self.client = client
+        self.async_client = async_client
+        self.model = model
+        self.upload_format = upload_format
+
+    def transcribe(self, audio: Audio, sample_rate: int) -> str:
+        """Upload the audio and return its transcription."""
+        upload = encode_upload(audio, sample_rate, self.upload_format)
+        tracing.annotate(bytes_up=upload.getbuffer().nbytes)
+        transcription = self.client.audio.transcriptions.create(
+            model=self.model, file=upload
+        )
+        return transcription.text
+
+    async def atranscribe(self, audio: Audio, sample_rate: int) -> str:
+        """Upload the audio and return its transcription, without blocking the event loop."""
+        if self.async_client is None:
+            return await asyncio.to_thread(self.transcribe, audio, sample_rate)
+        # Compressed formats take a few milliseconds of CPU to encode
+        upload = await asyncio.to_thread(
+            encode_upload, audio, sample_rate, self.upload_format
+        )
+        tracing.annotate(bytes_up=upload.getbuffer().nbytes)
+        transcription = await self.async_client.audio.transcriptions.create(
+            model=self.model, file=upload
+        )
+        return transcription.text
+
+
+def parse_backend(spec: str) -> tuple[str, Optional[str]]:
+    """Split a backend spec such as ``"local:small.en"`` into backend and model.
+
+    Raises:
+        ValueError: If the backend is not one of :data:`STT_BACKENDS`
+    """
+    backend, _, model = spec.partition(":")
+    if backend not in STT_BACKENDS:
+        raise ValueError(f"Unknown STT backend: {backend}")
+    return backend, model or None
+
+
+def to_float32(
+    audio: Audio, sample_rate: int, target_rate: int = LOCAL_SAMPLE_RATE
+) -> np.ndarray:
+    """Join int16 pieces into one float32 array in [-1, 1], resampled to ``target_rate``."""
+    pieces = [audio] if isinstance(audio, np.ndarray) else audio
+    samples = np.empty(sum(len(piece) for piece in pieces), dtype=np.float32)
+    offset = 0
+    for piece in pieces:
+        # Convert straight into the joined buffer, without an intermediate int16 copy
+        np.multiply(
+            np.ravel(piece),
+            1 / 32768,
+            out=samples[offset : offset + len(piece)],
+            casting="unsafe",
+        )
+        offset += len(piece)
+    if sample_rate != target_rate:
+        from scipy.signal import resample_poly
+
+        divisor = np.gcd(sample_rate, target_rate)
+        samples = resample_poly(
+            samples, target_rate // divisor, sample_rate // divisor
+        ).astype(np.float32)
+    return samples
+
+
+_local_models: dict[tuple[str, str, int], Any] = {}
+_local_models_lock = threading.Lock()
+
+
+def load_local_model(
+    model: str, compute_type: str = "int8", cpu_threads: int = 0
+) -> Any:
+    """Load a faster-whisper model once per process and keep it in memory.
+
+    Loading is guarded by a lock, so a warm-up and the first transcription
+    running at the same time load the model only once.
+
+    Args:
+        model: Model size such as ``"base.en"``, a Hugging Face repository or
+            a local directory with a converted model
+        compute_type: CTranslate2 quantization; ``"int8"`` is fastest on CPU
+        cpu_threads: Inference threads, 0 for the runtime's default
+    """
+    key = (model, compute_type, cpu_threads)
+    engine = _local_models.get(key)
+    if engine is None:
+        with _local_models_lock:
+            engine = _local_models.get(key)
+            if engine is None:
+                try:
+                    from faster_whisper import WhisperModel
+                except ImportError as e:
+                    raise ImportError(
+                        "The local STT backend requires the faster-whisper package: "
+                        "pip install faster-whisper"
+                    ) from e
+                engine = _local_models[key] = WhisperModel(
+                    model,
+                    device="cpu",
+                    compute_type=compute_type,
+                    cpu_threads=cpu_threads,
+                )
+    return engine
+
+
+class LocalWhisperTranscriber:
+    """Transcribe on the CPU with a quantized Whisper model, without network access.
+
+    The model is loaded on first use and shared by every transcriber in the
+    process that uses the same settings. Audio is passed to the model as
+    samples, so nothing is encoded. Calls are blocking and CPU bound; the
+    runtime releases the GIL, so they can run on worker threads.
+    """
+
+    def __init__(
+        self,
+        model: str = "base.en",
+        *,
+        compute_type: str = "int8",
+        cpu_threads: int = 0,
+        beam_size: int = 1,
+        language: Optional[str] = None,
+    ):
+        """Initialize the transcriber.
+
+        Args:
+            model: Model size, repository or directory, see :func:`load_local_model`
+            compute_type: CTranslate2 quantization
+            cpu_threads: Inference threads, 0 for the runtime's default
+            beam_size: 1 decodes greedily, which is several times faster
+                than beam search at a small cost in accuracy
+            language: Spoken language; English for ``.en`` models and
+                detected otherwise when not given
+        """
+        self.model = model
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.beam_size = beam_size
+        self.language = language or ("en" if model.endswith(".en") else None)
+
+    @property
+    def engine(self) -> Any:
+        """The loaded ``faster_whisper.WhisperModel``."""
+        return load_local_model(self.model, self.compute_type, self.cpu_threads)
+
+    def transcribe(self, audio: Audio, sample_rate: int) -> str:
+        """Return the text spoken in ``audio``."""
+        samples = to_float32(audio, sample_rate)
+        if not len(samples):
+            return ""
+        segments, _ = self.engine.transcribe(
+            samples,
+            language=self.language,
+            beam_size=self.beam_size,
+            # Utterances are already endpointed and short
+            vad_filter=False,
+            condition_on_previous_text=False,
+            without_timestamps=True,
+        )
+        # Decoding happens while the segments are consumed
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+    def warm_up(self) -> None:
+        """Load the model and run it once, so the first utterance is not slowed down."""
+        self.transcribe(np.zeros(LOCAL_SAMPLE_RATE, dtype=np.int16), LOCAL_SAMPLE_RATE)
+
+
+_WORD = re.compile(r"[^\w']+")
+
+
+def _normalize(word: str) -> str:
+    return _WORD.sub("", word.lower())
+
+
+def stitch_transcripts(texts: Sequence[str], max_overlap: int = 8) -> str:
+    """Join transcripts of consecutive, possibly overlapping windows.
+
+    When a window starts with words that the previous window ended with
+    (because the windows overlap), the repeated words are dropped. Words are
+    compared ignoring case and punctuation.
+
+    Args:
+        texts: Transcripts in the order the windows were spoken
+        max_overlap: Longest run of repeated words that is looked for
+    """
+    words: list[str] = []
+    for text in texts:
+        new = text.split()
+        tail = [_normalize(w) for w in words[-max_overlap:]]
+        head = [_normalize(w) for w in new[:max_overlap]]
+        overlap = 0
+        for size in range(min(len(tail), len(head)), 0, -1):
+            if tail[-size:] == head[:size]:
+                overlap = size
+                break
+        words.extend(new[overlap:])
+    return " ".join(words)
+
+
+class IncrementalTranscriber:
+    """Transcribe an utterance in windows while it is still being spoken.
+
+    Blocks are fed as they are captured. Whenever the speaker pauses and
+    enough audio has accumulated, the audio since the previous cut (plus a
+    little overlap) is sent for transcription on a worker thread. When the
+    endpointer decides the utterance is over, only the last window is still
+    outstanding, so the full transcript is ready shortly after the user stops.
+    """
+
+    def __init__(
+        self,
+        transcriber: Transcriber,
+        *,
+        sample_rate: int = 16000,
+        vad_config: Optional[VADConfig] = None,
+        pause_ms: int = 300,
+        min_window_s: float = 1.5,
+        overlap_ms: int = 200,
+        executor: Optional[Executor] = None,
+    ):
+        """Initialize the incremental transcriber.
+
+        Args:
+            transcriber: Client used to transcribe each window
+            sample_rate: Sample rate of the incoming audio
+            vad_config: Voice activity and endpointing settings
+            pause_ms: Silence that counts as a pause where the stream may be cut;
+                should be shorter than the endpointing hangover
+            min_window_s: Shortest window sent before the end of the utterance
+            overlap_ms: Audio repeated at the start of each window for context
+            executor: Executor running the transcriptions, a private thread
+                pool by default
+        """
+        self.transcriber = transcriber
+        self.sample_rate = sample_rate
+        self.endpointer = Endpointer(vad_config, sample_rate)
+        self.pause_ms = pause_ms
+        self._min_window = int(min_window_s * sample_rate)
+        self._overlap = sample_rate * overlap_ms // 1000
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="transcribe"
+        )
+        self._owns_executor = executor is None
+        self._windows: list[Future[str]] = []
+        self._cut: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        """Whether the end of the utterance has been detected."""
+        return self.endpointer.done
+
+    @property
+    def windows_sent(self) -> int:
+        """Number of windows submitted for transcription so far."""
+        return len(self._windows)
+
+    def feed(self, block: np.ndarray) -> bool:
+        """Process a captured block, sending a window at a pause if one is due.
+
+        Returns:
+            True once the end of the utterance has been detected.
+        """
+        endpointer = self.endpointer
+        done = endpointer.feed(block)
+        if done or endpointer.speech_start is None or endpointer.speech_end is None:
+            return done
+        if self._cut is None:
+            self._cut = endpointer.speech_start * endpointer.frame_length
+
+        silence_ms = endpointer.trailing_silence_ms
+        if silence_ms >= self.pause_ms:
+            # Cut in the middle of the pause seen so far
+            pause_start = endpointer.speech_end * endpointer.frame_length
+            cut = pause_start + self.sample_rate * silence_ms // 2000
+            if cut - self._cut >= self._min_window:
+                self._submit(self._cut, cut)
+                self._cut = cut
+        return done
+
+    def _submit(self, start: int, end: int) -> None:
+        """Send the audio in ``[start - overlap, end)`` for transcription."""
+        start = max(start - self._overlap, self.endpointer.buffer.start)
+        pieces = self.endpointer.buffer.pieces(start, end)
+        self._windows.append(
+            self._executor.submit(self.transcriber.transcribe, pieces, self.sample_rate)
+        )
+
+    def finish(self) -> str:
+        """Send the remaining audio and return the stitched transcript."""
+        try:
+            start, end = self.endpointer.utterance_bounds()
+            if self._cut is not None:
+                start = self._cut
+            if end > start:
+                self._submit(start, end)
+            return stitch_transcripts([window.result() for window in self._windows])
+        finally:
+            if self._owns_executor:
+                self._executor.shutdown(wait=False)
+
+
+__all__ = [
+    "Audio",
+    "IncrementalTranscriber",
+    "LOCAL_SAMPLE_RATE",
+    "LocalWhisperTranscriber",
+    "STT_BACKENDS",
+    "Transcriber",
+    "WhisperAPITranscriber",
+    "load_local_model",
+    "parse_backend",
+    "stitch_transcripts",
+    "to_float32",
+]
@@ -0,0 +1,302 @@
+"""Todo storage with secondary indexes by status and deadline.
+
+Each todo is one item in the user's ``("todos", user_id)`` namespace. Next
+to it, ``("todo_index", user_id)`` holds one index item per status: the
+``[deadline, id]`` pairs of the todos with that status, sorted, so todos
+without a deadline come last and ties keep their creation order. Listing a
+page reads the index of the wanted statuses and then only the todos on the
+page, instead of searching the whole namespace. Every change writes the
+todos and the indexes they affect in a single store batch.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import heapq
+import itertools
+import secrets
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Collection, Iterable, Literal, Optional, Union
+
+from langgraph.store.base import BaseStore, GetOp, Item, PutOp
+from pydantic import BaseModel, Field
+
+from maltai_agent.locks import namespace_lock
+
+Status = Literal["not started", "in progress", "done"]
+
+STATUSES: tuple[Status, ...] = ("not started", "in progress", "done")
+OPEN_STATUSES: tuple[Status, ...] = ("not started", "in progress")
+
+_NO_DEADLINE = "~"  # Sorts after every ISO timestamp
+
+
+class ToDo(BaseModel):
+    """Schema for a todo item."""
+
+    task: str = Field(description="Task to be completed")
+    time_to_complete: Optional[int] = Field(
+        description="Estimated time in minutes", default=None
+    )
+    deadline: Optional[datetime] = Field(description="Deadline if any", default=None)
+    status: Status = Field(
+        description="Current status of the task", default="not started"
+    )
+
+
+@dataclass(kw_only=True)
+class TodoPage:
+    """One page of a todo listing."""
+
+    items: list[Item] = field(default_factory=list)
+    """Todos on this page, soonest deadline first."""
+    total: int = 0
+    """Number of todos matching the listing, on all pages."""
+    next_cursor: Optional[str] = None
+    """Pass to :meth:`TodoList.list` for the next page; None on the last page."""
+
+
+def new_todo_id() -> str:
+    """Return a unique todo key that sorts in creation order."""
+    return f"todo_{time.time_ns():016x}{secrets.token_hex(3)}"
+
+
+def deadline_key(deadline: Union[datetime, str, None]) -> str:
+    """Return the index sort key of a deadline, comparable as a string."""
+    if deadline is None:
+        return _NO_DEADLINE
+    if isinstance(deadline, str):
+        deadline = datetime.fromisoformat(deadline)
+    if deadline.tzinfo is not None:
+        deadline = deadline.astimezone(timezone.utc).replace(tzinfo=None)
+    return deadline.isoformat()
+
+
+def _entry(item_id: str, value: dict) -> list[str]:
+    return [deadline_key(value.get("deadline")), item_id]
+
+
+def _status(value: dict) -> Status:
+    # Todos written before statuses existed are not started
+    return value.get("status") or "not started"
+
+
+class TodoList:
+    """The todos of one user, indexed by status and ordered by deadline.
+
+    Index updates are serialized per user within the process, so all
+    writers of a store must go through this class and share the process.
+    """
+
+    def __init__(self, store: BaseStore, user_id: str):
+        """Initialize the list.
+
+        Args:
+            store: Store holding the todos and their indexes
+            user_id: The user whose todos are managed
+        """
+        self.store = store
+        self.user_id = user_id
+        self.namespace = ("todos", user_id)
+        self.index_namespace = ("todo_index", user_id)
+
+    async def add(self, todo: ToDo) -> str:
+        """Store a new todo and return its key."""
+        return (await self.add_many([todo]))[0]
+
+    async def add_many(self, todos: Iterable[ToDo]) -> list[str]:
+        """Store new todos in one write and return their keys."""
+        values = {new_todo_id(): todo.model_dump() for todo in todos}
+        async with self._lock():
+            index = await self._read_index(
+                {_status(value) for value in values.values()}, locked=True
+            )
+            for item_id, value in values.items():
+                bisect.insort(index[_status(value)], _entry(item_id, value))
+            await self.store.abatch(
+                [
+                    PutOp(self.namespace, item_id, value)
+                    for item_id, value in values.items()
+                ]
+                + self._index_puts(index)
+            )
+        return list(values)
+
+    async def get(self, todo_id: str) -> Optional[Item]:
+        """Return a todo by key, or None if it does not exist."""
+        return await self.store.aget(self.namespace, todo_id)
+
+    async def list(
+        self,
+        status: Union[Status, Collection[Status], None] = None,
+        *,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        due_before: Optional[datetime] = None,
+    ) -> TodoPage:
+        """Return one page of todos, soonest deadline first.
+
+        Args:
+            status: Only list todos with this status, or one of these; all
+                todos by default
+            limit: Maximum number of todos on the page
+            cursor: ``next_cursor`` of the previous page
+            due_before: Only list todos with a deadline before this time
+        """
+        statuses = (
+            STATUSES
+            if status is None
+            else (status,)
+            if isinstance(status, str)
+            else tuple(status)
+        )
+        statuses = tuple(dict.fromkeys(statuses))
+        index = await self._read_index(statuses)
+        after = None if cursor is None else cursor.split("|", 1)
+        bound = None if due_before is None else [deadline_key(due_before)]
+        total = remaining = 0
+        heads = []
+        for name in statuses:
+            entries = index[name]
+            end = len(entries) if bound is None else bisect.bisect_left(entries, bound)
+            start = 0 if after is None else bisect.bisect_right(entries, after, hi=end)
+            total += end
+            remaining += end - start
+            # Only the first ``limit`` entries of each status can be on the page
+            heads.append(entries[start : min(start + limit, end)])
+        page = list(itertools.islice(heapq.merge(*heads), limit))
+        items = await self._get_many([item_id for _, item_id in page])
+        return TodoPage(
+            items=items,
+            total=total,
+            next_cursor="|".join(page[-1]) if page and remaining > len(page) else None,
+        )
+
+    async def top_open(self, n: int) -> list[Item]:
+        """Return the ``n`` open todos with the soonest deadlines."""
+        if n <= 0:
+            return []
+        return (await self.list(OPEN_STATUSES, limit=n)).items
+
+    async def set_status(self, todo_ids: Iterable[str], status: Status) -> list[str]:
+        """Change the status of several todos in one write.
+
+        Returns:
+            The keys of the todos that exist, whether or not their status changed
+        """
+        todo_ids = list(dict.fromkeys(todo_ids))
+        async with self._lock():
+            results = await self.store.abatch(
+                [GetOp(self.namespace, item_id) for item_id in todo_ids]
+                + [GetOp(self.index_namespace, name) for name in STATUSES]
+            )
+            items: list[Optional[Item]] = results[: len(todo_ids)]
+            indexes = results[len(todo_ids) :]
+            if any(doc is None for doc in indexes):
+                index = await self._rebuild_index()
+            else:
+                index = {
+                    name: list(doc.value["entries"])
+                    for name, doc in zip(STATUSES, indexes)
+                }
+
+            changed: set[str] = set()
+            puts = []
+            for item in items:
+                if item is None or _status(item.value) == status:
+                    continue
+                old = _status(item.value)
+                entry = _entry(item.key, item.value)
+                position = bisect.bisect_left(index[old], entry)
+                if position < len(index[old]) and index[old][position] == entry:
+                    del index[old][position]
+                bisect.insort(index[status], entry)
+                changed.update((old, status))
+                puts.append(
+                    PutOp(self.namespace, item.key, {**item.value, "status": status})
+                )
+            if puts:
+                await self.store.abatch(
+                    puts + self._index_puts({name: index[name] for name in changed})
+                )
+        return [item.key for item in items if item is not None]
+
+    async def rebuild_index(self) -> None:
+        """Rebuild the indexes from the todos, e.g. after writes that bypassed this class."""
+        async with self._lock():
+            await self._rebuild_index()
+
+    async def _read_index(
+        self, statuses: Collection[Status], *, locked: bool = False
+    ) -> dict[Status, list[list[str]]]:
+        """Read the indexes of some statuses, building all indexes if missing.
+
+        Args:
+            statuses: Statuses whose indexes are read
+            locked: Whether the caller holds the user's lock; the indexes are
+                then copied, so they can be changed before being written
+        """
+        statuses = list(statuses)
+        docs = await self.store.abatch(
+            [GetOp(self.index_namespace, name) for name in statuses]
+        )
+        if all(doc is not None for doc in docs):
+            if locked:
+                return {
+                    name: list(doc.value["entries"])
+                    for name, doc in zip(statuses, docs)
+                }
+            return {name: doc.value["entries"] for name, doc in zip(statuses, docs)}
+        if locked:
+            return await self._rebuild_index()
+        async with self._lock():
+            return await self._read_index(statuses, locked=True)
+
+    async def _rebuild_index(self) -> dict[Status, list[list[str]]]:
+        """Index every todo of the user; the caller holds the user's lock."""
+        index: dict[Status, list[list[str]]] = {name: [] for name in STATUSES}
+        offset = 0
+        while True:
+            batch = await self.store.asearch(self.namespace, limit=1000, offset=offset)
+            for item in batch:
+                index[_status(item.value)].append(_entry(item.key, item.value))
+            if len(batch) < 1000:
+                break
+            offset += len(batch)
+        for entries in index.values():
+            entries.sort()
+        await self.store.abatch(self._index_puts(index))
+        return index
+
+    def _lock(self) -> asyncio.Lock:
+        """Return the lock serializing index updates of this user."""
+        return namespace_lock(self.store, self.index_namespace)
+
+    def _index_puts(self, index: dict[Status, list[list[str]]]) -> list[PutOp]:
+        return [
+            PutOp(self.index_namespace, name, {"entries": entries}, index=False)
+            for name, entries in index.items()
+        ]
+
+    async def _get_many(self, todo_ids: list[str]) -> list[Item]:
+        if not todo_ids:
+            return []
+        items = await self.store.abatch(
+            [GetOp(self.namespace, item_id) for item_id in todo_ids]
+        )
+        return [item for item in items if item is not None]
+
+
+__all__ = [
+    "OPEN_STATUSES",
+    "STATUSES",
+    "Status",
+    "ToDo",
+    "TodoList",
+    "TodoPage",
+    "deadline_key",
+    "new_todo_id",
+]
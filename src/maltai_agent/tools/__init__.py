@@ -1,13 +1,15 @@
 """Tools for the MaltAI agent."""
 
-from maltai_agent.tools.todo_tool import todo_tool
-from maltai_agent.tools.profile_tool import profile_tool
 from maltai_agent.tools.instructions_tool import instructions_tool
 from maltai_agent.tools.memory_tool import upsert_memory
+from maltai_agent.tools.profile_tool import profile_tool
+from maltai_agent.tools.todo_tool import list_todos_tool, todo_tool, update_todos_tool
 
 __all__ = [
     "todo_tool",
-    "profile_tool", 
+    "update_todos_tool",
+    "list_todos_tool",
+    "profile_tool",
     "instructions_tool",
-    "upsert_memory"
+    "upsert_memory",
 ]
@@ -0,0 +1,109 @@
+"""Execute every tool call of a model message concurrently."""
+
+import asyncio
+import logging
+from typing import Mapping, Sequence
+
+from langchain_core.messages import ToolCall, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from langgraph.store.base import BaseStore
+from pydantic import ValidationError
+
+from maltai_agent.tools.instructions_tool import instructions_tool
+from maltai_agent.tools.memory_tool import upsert_memory_tool
+from maltai_agent.tools.profile_tool import profile_tool
+from maltai_agent.tools.todo_tool import list_todos_tool, todo_tool, update_todos_tool
+
+logger = logging.getLogger(__name__)
+
+TOOLS: dict[str, BaseTool] = {
+    tool.name: tool
+    for tool in (
+        upsert_memory_tool,
+        todo_tool,
+        update_todos_tool,
+        list_todos_tool,
+        profile_tool,
+        instructions_tool,
+    )
+}
+"""Each tool the agent's model can call, by name.
+
+Tools are invoked with the model's arguments plus the injected ``store``,
+so the arguments are validated and coerced against the tool's schema
+before its coroutine runs.
+"""
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'arguments'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+async def run_tool_call(
+    call: ToolCall,
+    *,
+    config: RunnableConfig,
+    store: BaseStore,
+    tools: Mapping[str, BaseTool] = TOOLS,
+) -> ToolMessage:
+    """Run one tool call and return its result as a tool message.
+
+    Unknown tools, arguments that do not match the tool's schema and tool
+    errors are reported back to the model in an error tool message instead
+    of failing the turn.
+    """
+    tool = tools.get(call["name"])
+    if tool is None:
+        return ToolMessage(
+            content=f"Error: unknown tool {call['name']}",
+            tool_call_id=call["id"],
+            name=call["name"],
+            status="error",
+        )
+    try:
+        result = await tool.ainvoke({**call["args"], "store": store}, config)
+    except ValidationError as e:
+        return ToolMessage(
+            content=f"Error: invalid arguments for {call['name']}: {_describe(e)}",
+            tool_call_id=call["id"],
+            name=call["name"],
+            status="error",
+        )
+    except Exception as e:
+        logger.exception("Tool call %s failed", call["name"])
+        return ToolMessage(
+            content=f"Error: {e!r}",
+            tool_call_id=call["id"],
+            name=call["name"],
+            status="error",
+        )
+    return ToolMessage(content=str(result), tool_call_id=call["id"], name=call["name"])
+
+
+async def dispatch_tool_calls(
+    tool_calls: Sequence[ToolCall],
+    *,
+    config: RunnableConfig,
+    store: BaseStore,
+    tools: Mapping[str, BaseTool] = TOOLS,
+) -> list[ToolMessage]:
+    """Run all tool calls concurrently, whatever their tools.
+
+    Returns:
+        One tool message per call, in the order of ``tool_calls``.
+    """
+    return list(
+        await asyncio.gather(
+            *(
+                run_tool_call(call, config=config, store=store, tools=tools)
+                for call in tool_calls
+            )
+        )
+    )
+
+
+__all__ = ["TOOLS", "dispatch_tool_calls", "run_tool_call"]
@@ -1,33 +1,36 @@
 """Tool for managing user instructions and preferences."""
 
-from langchain_core.tools import Tool
+from typing import Annotated
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import InjectedToolArg, StructuredTool
+from langgraph.store.base import BaseStore
+
 
 async def update_instructions(
     instruction: str,
     category: str,
     *,
-    store,
-    config
+    # Hide these arguments from the model.
+    store: Annotated[BaseStore, InjectedToolArg],
+    config: Annotated[RunnableConfig, InjectedToolArg],
 ) -> str:
     """Update user instructions for a specific category.
-    
+
     Args:
         instruction: The new instruction
         category: The category of instruction (e.g., 'todo', 'reminders')
     """
     user_id = config["configurable"]["user_id"]
     namespace = ("instructions", user_id)
-    
-    await store.aput(
-        namespace,
-        key=category,
-        value={"instruction": instruction}
-    )
-    
+
+    await store.aput(namespace, key=category, value={"instruction": instruction})
+
     return f"Updated {category} instructions: {instruction}"
 
-instructions_tool = Tool.from_function(
-    func=update_instructions,
+
+instructions_tool = StructuredTool.from_function(
+    coroutine=update_instructions,
     name="UpdateInstructions",
-    description="Update user instructions for different features"
-) 
\ No newline at end of file
+    description="Update user instructions for different features",
+)
@@ -4,10 +4,12 @@ import uuid
 from typing import Annotated, Optional
 
 from langchain_core.runnables import RunnableConfig
-from langchain_core.tools import InjectedToolArg
-from langgraph.store.base import BaseStore
+from langchain_core.tools import InjectedToolArg, StructuredTool
+from langgraph.store.base import BaseStore, PutOp
 
 from maltai_agent.configuration import Configuration
+from maltai_agent.consolidation import note_changes
+from maltai_agent.locks import namespace_lock
 
 
 async def upsert_memory(
@@ -35,9 +37,16 @@ async def upsert_memory(
     """
     mem_id = memory_id or uuid.uuid4()
     user_id = Configuration.from_runnable_config(config).user_id
-    await store.aput(
-        ("memories", user_id),
-        key=str(mem_id),
-        value={"content": content, "context": context},
-    )
+    namespace = ("memories", user_id)
+    # Noted in the same batch, so consolidation only checks memories that changed
+    async with namespace_lock(store, namespace):
+        await store.abatch(
+            [
+                PutOp(namespace, str(mem_id), {"content": content, "context": context}),
+                *note_changes(user_id, [str(mem_id)]),
+            ]
+        )
     return f"Stored memory {mem_id}"
+
+
+upsert_memory_tool = StructuredTool.from_function(coroutine=upsert_memory)
@@ -1,46 +1,65 @@
 """Tool for managing user profile information."""
 
-from typing import Optional, List
-from pydantic import BaseModel, Field
-from langchain_core.tools import Tool
+from typing import Annotated, Dict, List, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import InjectedToolArg, StructuredTool
+from langgraph.store.base import BaseStore
+
+from maltai_agent.profiles import ProfileChange, ProfileStore
 
-class Profile(BaseModel):
-    """User profile information."""
-    name: Optional[str] = Field(description="User's name", default=None)
-    location: Optional[str] = Field(description="User's location", default=None)
-    interests: List[str] = Field(description="User's interests", default_factory=list)
-    preferences: dict = Field(description="User's preferences", default_factory=dict)
 
 async def update_profile(
-    field: str,
-    value: str,
+    name: Optional[str] = None,
+    location: Optional[str] = None,
+    add_interests: Optional[List[str]] = None,
+    remove_interests: Optional[List[str]] = None,
+    preferences: Optional[Dict[str, str]] = None,
+    remove_preferences: Optional[List[str]] = None,
     *,
-    store,
-    config
+    # Hide these arguments from the model.
+    store: Annotated[BaseStore, InjectedToolArg],
+    config: Annotated[RunnableConfig, InjectedToolArg],
 ) -> str:
-    """Update a field in the user's profile.
-    
+    """Update the user's profile. Only pass the fields that change.
+
     Args:
-        field: The profile field to update
-        value: The new value for the field
+        name: The user's name
+        location: Where the user lives
+        add_interests: Interests to add to the user's interests
+        remove_interests: Interests to remove
+        preferences: Preferences to set, e.g. {"units": "metric"}
+        remove_preferences: Names of preferences to remove
     """
+    changes = [
+        change
+        for change in (
+            ProfileChange("name", name) if name is not None else None,
+            ProfileChange("location", location) if location is not None else None,
+            ProfileChange("interests", add_interests, "add") if add_interests else None,
+            ProfileChange("interests", remove_interests, "remove")
+            if remove_interests
+            else None,
+            ProfileChange("preferences", preferences, "update")
+            if preferences
+            else None,
+            ProfileChange("preferences", remove_preferences, "remove")
+            if remove_preferences
+            else None,
+        )
+        if change is not None
+    ]
+    if not changes:
+        return "No profile changes given"
+
     user_id = config["configurable"]["user_id"]
-    namespace = ("profile", user_id)
-    
-    # Get existing profile or create new
-    profile_data = await store.aget(namespace, "profile")
-    profile = Profile(**(profile_data or {}))
-    
-    # Update the field
-    if hasattr(profile, field):
-        setattr(profile, field, value)
-        await store.aput(namespace, "profile", profile.model_dump())
-        return f"Updated profile {field} to: {value}"
-    else:
-        return f"Unknown profile field: {field}"
-
-profile_tool = Tool.from_function(
-    func=update_profile,
+    await ProfileStore(store, user_id).update(changes)
+
+    return f"Updated profile: {', '.join(dict.fromkeys(change.field for change in changes))}"
+
+
+profile_tool = StructuredTool.from_function(
+    coroutine=update_profile,
     name="UpdateProfile",
-    description="Update user profile information"
-) 
\ No newline at end of file
+    description="Update user profile information",
+)
@@ -1,60 +1,101 @@
 """Tool for managing user's todo items."""
 
 from datetime import datetime
-from typing import Optional, Literal
-from pydantic import BaseModel, Field
-from langchain_core.tools import Tool
-
-class ToDo(BaseModel):
-    """Schema for a todo item."""
-    task: str = Field(description="Task to be completed")
-    time_to_complete: Optional[int] = Field(
-        description="Estimated time in minutes",
-        default=None
-    )
-    deadline: Optional[datetime] = Field(
-        description="Deadline if any",
-        default=None
-    )
-    status: Literal["not started", "in progress", "done"] = Field(
-        description="Current status of the task",
-        default="not started"
-    )
+from typing import Annotated, List, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import InjectedToolArg, StructuredTool
+from langgraph.store.base import BaseStore
+
+from maltai_agent.todos import Status, ToDo, TodoList
+
 
 async def add_todo(
     task: str,
     time_to_complete: Optional[int] = None,
     deadline: Optional[datetime] = None,
     *,
-    store,
-    config
+    # Hide these arguments from the model.
+    store: Annotated[BaseStore, InjectedToolArg],
+    config: Annotated[RunnableConfig, InjectedToolArg],
 ) -> str:
     """Add a new todo item.
-    
+
     Args:
         task: The task description
         time_to_complete: Estimated completion time in minutes
         deadline: When the task needs to be done by
     """
-    todo = ToDo(
-        task=task,
-        time_to_complete=time_to_complete,
-        deadline=deadline
-    )
-    
+    todo = ToDo(task=task, time_to_complete=time_to_complete, deadline=deadline)
+
     user_id = config["configurable"]["user_id"]
-    todo_id = f"todo_{datetime.now().timestamp()}"
-    
-    await store.aput(
-        ("todos", user_id),
-        key=todo_id,
-        value=todo.model_dump()
-    )
-    
+    await TodoList(store, user_id).add(todo)
+
     return f"Added todo: {task}"
 
-todo_tool = Tool.from_function(
-    func=add_todo,
+
+async def update_todos(
+    todo_ids: List[str],
+    status: Status,
+    *,
+    # Hide these arguments from the model.
+    store: Annotated[BaseStore, InjectedToolArg],
+    config: Annotated[RunnableConfig, InjectedToolArg],
+) -> str:
+    """Change the status of one or more todo items, e.g. mark them done.
+
+    Args:
+        todo_ids: Keys of the todos, as shown in brackets in the todo list
+        status: The new status of all of them
+    """
+    user_id = config["configurable"]["user_id"]
+    found = await TodoList(store, user_id).set_status(todo_ids, status)
+
+    missing = [todo_id for todo_id in todo_ids if todo_id not in found]
+    result = f"Marked {len(found)} todos as {status}"
+    if missing:
+        result += f"; not found: {', '.join(missing)}"
+    return result
+
+
+async def list_todos(
+    status: Optional[Status] = None,
+    cursor: Optional[str] = None,
+    *,
+    # Hide these arguments from the model.
+    store: Annotated[BaseStore, InjectedToolArg],
+    config: Annotated[RunnableConfig, InjectedToolArg],
+) -> str:
+    """List the user's todo items, soonest deadline first, 20 at a time.
+
+    Args:
+        status: Only list todos with this status
+        cursor: Cursor returned by the previous call, to get the next page
+    """
+    user_id = config["configurable"]["user_id"]
+    page = await TodoList(store, user_id).list(status, cursor=cursor)
+
+    lines = [f"[{item.key}]: {item.value}" for item in page.items]
+    lines.append(f"{len(page.items)} of {page.total} todos")
+    if page.next_cursor:
+        lines.append(f"Next page cursor: {page.next_cursor}")
+    return "\n".join(lines)
+
+
+todo_tool = StructuredTool.from_function(
+    coroutine=add_todo,
     name="AddTodo",
-    description="Add a new todo item to the user's list"
-) 
\ No newline at end of file
+    description="Add a new todo item to the user's list",
+)
+
+update_todos_tool = StructuredTool.from_function(
+    coroutine=update_todos,
+    name="UpdateTodos",
+    description="Change the status of one or more of the user's todo items",
+)
+
+list_todos_tool = StructuredTool.from_function(
+    coroutine=list_todos,
+    name="ListTodos",
+    description="List the user's todo items beyond those in the system prompt",
+)
@@ -0,0 +1,410 @@
+"""Lightweight timing of graph nodes and audio stages.
+
+A :class:`Span` records the wall time of one stage (a graph node, a
+transcription, a synthesis, a playback, a store batch) together with
+numeric attributes such as bytes uploaded and downloaded, token counts and
+queue waits. Finished spans go to a bounded in-process ring buffer, are
+aggregated for a Prometheus text exporter and are passed to sinks such as
+:class:`JSONLSink`.
+
+Tracing is off by default. While it is off, :meth:`Tracer.span` returns a
+shared no-op span, so an instrumented stage costs one attribute check.
+Set ``TRACE_ENABLED=1`` to keep spans in memory, ``TRACE_JSONL_PATH`` to
+also append them to a file and ``TRACE_METRICS_PORT`` to serve the
+Prometheus metrics over HTTP.
+"""
+
+from __future__ import annotations
+
+import bisect
+import collections
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""Upper bounds, in seconds, of the duration histogram buckets."""
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "maltai_span", default=None
+)
+
+
+@dataclass
+class Span:
+    """Timing and attributes of one traced stage.
+
+    Used as a context manager: the span is timed from ``__enter__`` to
+    ``__exit__`` and is the target of :func:`annotate` in between.
+    """
+
+    name: str
+    """Stage name, e.g. ``graph.process_input`` or ``tts.synthesize``."""
+    attrs: dict[str, Any] = field(default_factory=dict)
+    """Numeric attributes are summed into counters; others are only kept in the span."""
+    start: float = 0.0
+    """Wall-clock start, seconds since the epoch."""
+    duration_s: float = 0.0
+    """Wall time of the stage."""
+    error: Optional[str] = None
+    """Type of the exception that ended the stage, if any."""
+    tracer: Optional[Tracer] = field(default=None, repr=False, compare=False)
+    _started: float = field(default=0.0, repr=False, compare=False)
+    _token: Any = field(default=None, repr=False, compare=False)
+
+    def add(self, **values: Any) -> None:
+        """Add numeric values to the attributes of the same name; set the others."""
+        for key, value in values.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.attrs[key] = self.attrs.get(key, 0) + value
+            else:
+                self.attrs[key] = value
+
+    def __enter__(self) -> Span:
+        """Start timing and make this the current span."""
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """Stop timing, note the exception type, if any, and record the span."""
+        self.duration_s = time.perf_counter() - self._started
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        if self.tracer is not None:
+            self.tracer.record(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the span as a JSON-serializable dict."""
+        return {
+            "name": self.name,
+            "start": self.start,
+            "duration_s": self.duration_s,
+            "error": self.error,
+            **{
+                key: value
+                for key, value in self.attrs.items()
+                if key not in ("name", "start")
+            },
+        }
+
+
+class _NoSpan:
+    """The span returned while tracing is disabled; it records nothing."""
+
+    def add(self, **values: Any) -> None:
+        pass
+
+    def __enter__(self) -> _NoSpan:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class _Aggregate:
+    """Running totals of the spans of one name."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.buckets = [0] * len(buckets)
+        self.sums: dict[str, float] = {}
+
+
+class JSONLSink:
+    """Append every finished span as one JSON line to a file."""
+
+    def __init__(self, path: str):
+        """Open ``path`` for appending, creating its directory if needed.
+
+        Args:
+            path: File to append to
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", buffering=1, encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __call__(self, span: Span) -> None:
+        """Append ``span`` as one JSON line."""
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        """Close the file."""
+        with self._lock:
+            self._file.close()
+
+
+class Tracer:
+    """Records spans into a ring buffer, running aggregates and sinks.
+
+    Safe to use from several threads, such as the executors that transcribe
+    and synthesize speech.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 4096,
+        *,
+        enabled: bool = False,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        """Initialize the tracer.
+
+        Args:
+            capacity: Number of most recent spans kept in memory
+            enabled: Whether spans are recorded
+            buckets: Upper bounds of the duration histogram, in seconds
+        """
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.sinks: list[Callable[[Span], None]] = []
+        self._spans: collections.deque[Span] = collections.deque(maxlen=capacity)
+        self._aggregates: dict[str, _Aggregate] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attrs: Any) -> Any:
+        """Return a context manager timing one stage, or a no-op span if disabled."""
+        if not self.enabled:
+            return NO_SPAN
+        return Span(name, attrs, tracer=self)
+
+    def record(self, span: Span) -> None:
+        """Store a finished span and pass it to the sinks."""
+        with self._lock:
+            self._spans.append(span)
+            aggregate = self._aggregates.get(span.name)
+            if aggregate is None:
+                aggregate = self._aggregates[span.name] = _Aggregate(self.buckets)
+            aggregate.count += 1
+            aggregate.errors += span.error is not None
+            aggregate.seconds += span.duration_s
+            index = bisect.bisect_left(self.buckets, span.duration_s)
+            if index < len(self.buckets):
+                aggregate.buckets[index] += 1
+            for key, value in span.attrs.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    aggregate.sums[key] = aggregate.sums.get(key, 0) + value
+        for sink in self.sinks:
+            try:
+                sink(span)
+            except Exception:
+                logger.exception("Trace sink %r failed", sink)
+
+    def spans(self, name: Optional[str] = None) -> list[Span]:
+        """Return the spans in the ring buffer, oldest first, optionally of one name."""
+        with self._lock:
+            spans = list(self._spans)
+        return spans if name is None else [span for span in spans if span.name == name]
+
+    def reset(self) -> None:
+        """Drop the buffered spans and the aggregates."""
+        with self._lock:
+            self._spans.clear()
+            self._aggregates.clear()
+
+    def prometheus_text(self, prefix: str = "maltai") -> str:
+        """Return the aggregates in the Prometheus text exposition format.
+
+        Durations are a histogram ``<prefix>_span_seconds`` labelled by span
+        name; every numeric attribute becomes a counter
+        ``<prefix>_<attribute>_total``, with a trailing ``_s`` spelled out
+        as ``_seconds``.
+        """
+        with self._lock:
+            aggregates = {
+                name: (a.count, a.errors, a.seconds, list(a.buckets), dict(a.sums))
+                for name, a in sorted(self._aggregates.items())
+            }
+        metric = f"{prefix}_span_seconds"
+        lines = [
+            f"# HELP {metric} Wall time of traced stages.",
+            f"# TYPE {metric} histogram",
+        ]
+        for name, (count, _, seconds, buckets, _) in aggregates.items():
+            label = _label(name)
+            cumulative = 0
+            for bound, n in zip(self.buckets, buckets):
+                cumulative += n
+                lines.append(
+                    f'{metric}_bucket{{span="{label}",le="{bound:g}"}} {cumulative}'
+                )
+            lines.append(f'{metric}_bucket{{span="{label}",le="+Inf"}} {count}')
+            lines.append(f'{metric}_sum{{span="{label}"}} {seconds:.6f}')
+            lines.append(f'{metric}_count{{span="{label}"}} {count}')
+
+        metric = f"{prefix}_span_errors_total"
+        lines += [
+            f"# HELP {metric} Traced stages that raised.",
+            f"# TYPE {metric} counter",
+        ]
+        lines += [
+            f'{metric}{{span="{_label(name)}"}} {a[1]}'
+            for name, a in aggregates.items()
+        ]
+
+        attributes = sorted({key for a in aggregates.values() for key in a[4]})
+        for attribute in attributes:
+            unit = (
+                attribute[:-2] + "_seconds" if attribute.endswith("_s") else attribute
+            )
+            metric = f"{prefix}_{unit}_total"
+            lines += [
+                f"# HELP {metric} Sum of {attribute} over traced stages.",
+                f"# TYPE {metric} counter",
+            ]
+            for name, a in aggregates.items():
+                if attribute in a[4]:
+                    lines.append(
+                        f'{metric}{{span="{_label(name)}"}} {a[4][attribute]:g}'
+                    )
+        return "\n".join(lines) + "\n"
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+tracer = Tracer()
+"""The tracer used by the agent."""
+
+
+def span(name: str, **attrs: Any) -> Any:
+    """Time a stage with the agent's tracer; see :meth:`Tracer.span`."""
+    return tracer.span(name, **attrs)
+
+
+def annotate(**values: Any) -> None:
+    """Add attributes to the innermost span open in this context, if any."""
+    current = _current.get()
+    if current is not None:
+        current.add(**values)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorate a function, sync or async, so each call is timed as a span.
+
+    The wrapper keeps the signature of the function, so LangGraph still
+    injects ``config`` and ``store`` into decorated nodes.
+    """
+
+    def decorate(fn: F) -> F:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not tracer.enabled:
+                    return await fn(*args, **kwargs)
+                with tracer.span(name):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with tracer.span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def serve_metrics(
+    port: int, host: str = "127.0.0.1", source: Optional[Tracer] = None
+) -> Any:
+    """Serve ``/metrics`` in the Prometheus text format from a daemon thread.
+
+    Returns:
+        The running ``http.server.ThreadingHTTPServer``; call ``shutdown()`` to stop it
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    source = source or tracer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = source.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(
+        target=server.serve_forever, name="maltai-metrics", daemon=True
+    ).start()
+    return server
+
+
+@functools.cache
+def _start_exporters(jsonl_path: Optional[str], metrics_port: Optional[int]) -> None:
+    """Attach the file sink and start the metrics server, once per setting."""
+    if jsonl_path:
+        tracer.sinks.append(JSONLSink(jsonl_path))
+    if metrics_port:
+        serve_metrics(metrics_port)
+
+
+def configure_from_env() -> Tracer:
+    """Enable the agent's tracer from ``TRACE_*`` environment variables.
+
+    Calling it again with the same settings changes nothing, so it can be
+    called both when the graph is imported and after ``.env`` was loaded.
+    """
+    jsonl_path = os.environ.get("TRACE_JSONL_PATH") or None
+    metrics_port = int(os.environ.get("TRACE_METRICS_PORT") or 0) or None
+    if (
+        os.environ.get("TRACE_ENABLED", "").lower() in ("1", "true", "yes")
+        or jsonl_path
+        or metrics_port
+    ):
+        tracer.enabled = True
+        _start_exporters(jsonl_path, metrics_port)
+    return tracer
+
+
+__all__ = [
+    "DEFAULT_BUCKETS",
+    "JSONLSink",
+    "NO_SPAN",
+    "Span",
+    "Tracer",
+    "annotate",
+    "configure_from_env",
+    "serve_metrics",
+    "span",
+    "traced",
+    "tracer",
+]
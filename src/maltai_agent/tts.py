@@ -0,0 +1,114 @@
+"""Text-to-speech backends: ElevenLabs, or a local voice synthesized on the CPU."""
+
+from __future__ import annotations
+
+import functools
+from typing import Any, Iterator, Optional, Protocol
+
+TTS_BACKENDS = ("elevenlabs", "local")
+"""Text-to-speech backends, selected by ``tts_backend`` in the configuration."""
+
+DEFAULT_LOCAL_VOICE = "en_US-lessac-medium.onnx"
+"""Piper voice used by the local backend when none is given."""
+
+
+class Synthesizer(Protocol):
+    """Anything that can turn text into audio, sentence by sentence."""
+
+    output_format: str
+    """Encoding of the audio, in ElevenLabs' notation such as ``"pcm_22050"``."""
+
+    def stream(self, text: str) -> Iterator[bytes]:
+        """Yield the audio of ``text`` as it is synthesized."""
+        ...
+
+
+def parse_backend(spec: str) -> tuple[str, Optional[str]]:
+    """Split a backend spec such as ``"local:voices/amy.onnx"`` into backend and voice.
+
+    Raises:
+        ValueError: If the backend is not one of :data:`TTS_BACKENDS`
+    """
+    backend, _, voice = spec.partition(":")
+    if backend not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS backend: {backend}")
+    return backend, voice or None
+
+
+def pcm_sample_rate(output_format: str) -> Optional[int]:
+    """Return the sample rate of a raw 16-bit PCM format like ``"pcm_22050"``, None if encoded."""
+    codec, _, rate = output_format.partition("_")
+    return int(rate) if codec == "pcm" else None
+
+
+@functools.cache
+def load_local_voice(voice: str) -> Any:
+    """Load a Piper voice once per process and keep it in memory.
+
+    Args:
+        voice: Path of the voice's ``.onnx`` model; its ``.onnx.json``
+            config is expected next to it
+    """
+    try:
+        from piper.voice import PiperVoice
+    except ImportError as e:
+        raise ImportError(
+            "The local TTS backend requires the piper-tts package: pip install piper-tts"
+        ) from e
+    return PiperVoice.load(voice)
+
+
+class LocalPiperSynthesizer:
+    """Synthesize speech on the CPU with a Piper voice, without network access.
+
+    The voice is loaded on first use and shared by every synthesizer in the
+    process that uses it. Audio is raw mono 16-bit PCM at the voice's sample
+    rate and is produced one sentence at a time, so playback can start
+    after the first sentence.
+    """
+
+    def __init__(self, voice: str = DEFAULT_LOCAL_VOICE):
+        """Initialize the synthesizer.
+
+        Args:
+            voice: Path of the Piper voice model, see :func:`load_local_voice`
+        """
+        self.voice = voice
+
+    @property
+    def engine(self) -> Any:
+        """The loaded ``piper.voice.PiperVoice``."""
+        return load_local_voice(self.voice)
+
+    @property
+    def sample_rate(self) -> int:
+        """Sample rate of the voice's 16-bit mono PCM."""
+        return self.engine.config.sample_rate
+
+    @property
+    def output_format(self) -> str:
+        """The voice's output as an ElevenLabs-style format name, e.g. ``pcm_22050``."""
+        return f"pcm_{self.sample_rate}"
+
+    def stream(self, text: str) -> Iterator[bytes]:
+        """Yield the PCM of each sentence of ``text`` once it is synthesized."""
+        yield from self.engine.synthesize_stream_raw(text)
+
+    def synthesize(self, text: str) -> bytes:
+        """Return the PCM of the whole text."""
+        return b"".join(self.stream(text))
+
+    def warm_up(self) -> None:
+        """Load the voice and run it once, so the first reply is not slowed down."""
+        self.synthesize("Hello.")
+
+
+__all__ = [
+    "DEFAULT_LOCAL_VOICE",
+    "LocalPiperSynthesizer",
+    "Synthesizer",
+    "TTS_BACKENDS",
+    "load_local_voice",
+    "parse_backend",
+    "pcm_sample_rate",
+]
@@ -0,0 +1,252 @@
+"""Content-addressed on-disk cache of synthesized speech."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from maltai_agent.speech import clean_for_speech
+
+DEFAULT_PREWARM_PHRASES = (
+    "Okay.",
+    "Done.",
+    "Got it, I'll remember that.",
+    "Sorry, I didn't catch that.",
+    "Anything else?",
+)
+"""Phrases synthesized at startup unless ``TTS_PREWARM_PHRASES`` lists others."""
+
+_SUFFIX = ".audio"
+
+
+def normalize_text(text: str) -> str:
+    """Return text as it is spoken: without formatting and with single spaces."""
+    return unicodedata.normalize("NFC", " ".join(clean_for_speech(text).split()))
+
+
+def _settings_dict(voice_settings: Any) -> Optional[dict]:
+    """Return voice settings (a pydantic model, a dict or None) as a plain dict."""
+    if voice_settings is None or isinstance(voice_settings, dict):
+        return voice_settings
+    return voice_settings.model_dump()
+
+
+class SpeechCache:
+    """Serve repeated phrases from disk instead of the speech synthesis API.
+
+    Entries are keyed by a hash of the normalized text and everything that
+    changes the audio: voice, model, output format and voice settings. Each
+    entry is one file, written atomically and memory-mapped for playback, so
+    a hit reads no more of the file than the player consumes. Once the files
+    exceed ``max_bytes`` the least recently played ones are deleted.
+    Recency is kept in the files' modification times, so it survives
+    restarts.
+    """
+
+    def __init__(self, directory: str, *, max_bytes: int = 64 * 2**20):
+        """Initialize the cache and index the files already in ``directory``.
+
+        Args:
+            directory: Directory holding the cached audio, created if missing
+            max_bytes: Total size of cached audio kept on disk
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        """Number of phrases served from disk."""
+        self.misses = 0
+        """Number of phrases that had to be synthesized."""
+        os.makedirs(directory, exist_ok=True)
+        self.load()
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of looked-up phrases that were served from disk."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def size(self) -> int:
+        """Total bytes of cached audio."""
+        return self._size
+
+    def stats(self) -> dict[str, Union[int, float]]:
+        """Return the cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "entries": len(self._entries),
+            "bytes": self._size,
+        }
+
+    def key(
+        self,
+        text: str,
+        *,
+        voice_id: str,
+        model_id: str,
+        output_format: str,
+        voice_settings: Any = None,
+    ) -> str:
+        """Return the cache key of a phrase spoken with the given voice."""
+        spec = {
+            "text": normalize_text(text),
+            "voice_id": voice_id,
+            "model_id": model_id,
+            "output_format": output_format,
+            "voice_settings": _settings_dict(voice_settings),
+        }
+        return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        """Return the file an entry is stored in."""
+        return os.path.join(self.directory, key[:2], key + _SUFFIX)
+
+    def __contains__(self, key: str) -> bool:
+        """Whether audio is cached under ``key``, without counting a hit or miss."""
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[mmap.mmap]:
+        """Return the cached audio, memory-mapped, or None on a miss."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self.path(key), "rb") as f:
+                audio = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            os.utime(self.path(key))
+        except (OSError, ValueError):
+            # Deleted or truncated behind our back
+            with self._lock:
+                self._size -= self._entries.pop(key, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return audio
+
+    def put(self, key: str, audio: bytes) -> None:
+        """Store audio under a key and evict the least recently used entries."""
+        if not audio:
+            return
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        with self._lock:
+            self._size += len(audio) - self._entries.pop(key, 0)
+            self._entries[key] = len(audio)
+            evicted = self._evict()
+        self._unlink(evicted)
+
+    def get_or_synthesize(
+        self, key: str, synthesize: Callable[[], bytes]
+    ) -> Union[bytes, mmap.mmap]:
+        """Return the cached audio, synthesizing and storing it on a miss."""
+        audio = self.get(key)
+        if audio is not None:
+            return audio
+        data = synthesize()
+        self.put(key, data)
+        return data
+
+    async def aget_or_synthesize(
+        self,
+        key: str,
+        synthesize: Callable[[], Awaitable[bytes]],
+        offload: Callable[..., Awaitable[Any]] = asyncio.to_thread,
+    ) -> Union[bytes, mmap.mmap]:
+        """Like :meth:`get_or_synthesize` for a coroutine.
+
+        The file is read and written through ``offload``, in a thread by
+        default, so the event loop never waits for the disk.
+        """
+        audio = await offload(self.get, key)
+        if audio is not None:
+            return audio
+        data = await synthesize()
+        await offload(self.put, key, data)
+        return data
+
+    def load(self) -> None:
+        """Index the cached files, least recently used first."""
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(_SUFFIX):
+                    stat = os.stat(os.path.join(root, name))
+                    files.append(
+                        (stat.st_mtime_ns, name[: -len(_SUFFIX)], stat.st_size)
+                    )
+        files.sort()
+        with self._lock:
+            self._entries = OrderedDict((key, size) for _, key, size in files)
+            self._size = sum(self._entries.values())
+            # The limit may have been lowered since the files were written
+            evicted = self._evict()
+        self._unlink(evicted)
+
+    def _evict(self) -> list[str]:
+        """Drop the least recently used entries over the size limit; call with the lock held."""
+        evicted = []
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            evicted.append(key)
+        return evicted
+
+    def _unlink(self, keys: list[str]) -> None:
+        for key in keys:
+            try:
+                os.unlink(self.path(key))
+            except OSError:
+                pass  # Still mapped on a platform that forbids it; evicted again after the next load
+
+
+def prewarm_phrases() -> list[str]:
+    """Return the phrases to synthesize at startup.
+
+    ``TTS_PREWARM_PHRASES`` may hold a JSON list of phrases; otherwise
+    :data:`DEFAULT_PREWARM_PHRASES` are used.
+    """
+    phrases = os.environ.get("TTS_PREWARM_PHRASES")
+    return json.loads(phrases) if phrases else list(DEFAULT_PREWARM_PHRASES)
+
+
+def create_speech_cache() -> Optional[SpeechCache]:
+    """Create the cache in ``TTS_CACHE_PATH``, if set, bounded by ``TTS_CACHE_MB``."""
+    directory = os.environ.get("TTS_CACHE_PATH")
+    if not directory:
+        return None
+    return SpeechCache(
+        directory, max_bytes=int(float(os.environ.get("TTS_CACHE_MB", 64)) * 2**20)
+    )
+
+
+__all__ = [
+    "DEFAULT_PREWARM_PHRASES",
+    "SpeechCache",
+    "create_speech_cache",
+    "normalize_text",
+    "prewarm_phrases",
+]
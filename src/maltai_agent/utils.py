@@ -1,5 +1,19 @@
 """Utility functions used in our graph."""
 
+import functools
+
+
+@functools.lru_cache(maxsize=1)
+def load_env() -> None:
+    """Load variables from ``.env`` into the environment, once.
+
+    Called by the factories that read settings or API keys, so importing
+    the package does not touch the filesystem.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
 
 def split_model_and_provider(fully_specified_name: str) -> dict:
     """Initialize the configured chat model."""
@@ -0,0 +1,309 @@
+"""Voice activity detection and endpointing for recorded audio."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from maltai_agent.capture import CaptureBuffer
+
+
+@dataclass(kw_only=True)
+class VADConfig:
+    """Tuning parameters for the energy/zero-crossing voice activity detector."""
+
+    frame_ms: int = 20
+    """Length of a single analysis frame."""
+    energy_threshold_db: float = -45.0
+    """Absolute frame energy (dBFS) below which a frame is never speech."""
+    noise_margin_db: float = 12.0
+    """How far above the tracked noise floor a frame must be to count as speech."""
+    noise_rise_db: float = 0.2
+    """Per-frame limit on how fast the noise floor estimate may rise."""
+    max_zcr: float = 0.45
+    """Zero-crossing rate above which a frame is treated as noise (hiss, clicks)."""
+    min_speech_ms: int = 100
+    """Consecutive speech needed before an utterance is considered started."""
+    hangover_ms: int = 700
+    """Silence after speech needed before the utterance is considered finished."""
+    pre_roll_ms: int = 200
+    """Audio kept before the detected speech onset."""
+    post_roll_ms: int = 150
+    """Audio kept after the last speech frame."""
+    start_timeout_s: Optional[float] = None
+    """Give up if no speech starts within this many seconds."""
+    max_utterance_s: float = 30.0
+    """Stop capturing once an utterance reaches this length."""
+
+
+def frame_features(
+    samples: np.ndarray, frame_length: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Compute per-frame energy (dBFS) and zero-crossing rate.
+
+    Trailing samples that do not fill a whole frame are ignored.
+
+    Args:
+        samples: Mono int16 audio.
+        frame_length: Number of samples per frame.
+
+    Returns:
+        Energy in dBFS and zero-crossing rate, one value per frame.
+    """
+    n_frames = len(samples) // frame_length
+    frames = np.asarray(samples[: n_frames * frame_length], dtype=np.float32).reshape(
+        n_frames, frame_length
+    )
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    energy_db = 20.0 * np.log10(np.maximum(rms, 1e-3) / 32768.0)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_length - 1)
+    return energy_db, zcr
+
+
+class EnergyVAD:
+    """Classify frames as speech using energy and zero-crossing rate.
+
+    The noise floor is tracked across calls so the detector adapts to the
+    room, while each call classifies a whole block of frames at once.
+    """
+
+    def __init__(self, config: Optional[VADConfig] = None, sample_rate: int = 16000):
+        """Initialize the detector.
+
+        Args:
+            config: Detector parameters
+            sample_rate: Sample rate of the audio that will be classified
+        """
+        self.config = config or VADConfig()
+        self.frame_length = sample_rate * self.config.frame_ms // 1000
+        self.noise_floor_db: Optional[float] = None
+
+    def classify(self, samples: np.ndarray) -> np.ndarray:
+        """Return a boolean speech mask with one entry per whole frame."""
+        config = self.config
+        energy_db, zcr = frame_features(samples, self.frame_length)
+        threshold = config.energy_threshold_db
+        if self.noise_floor_db is not None:
+            threshold = max(threshold, self.noise_floor_db + config.noise_margin_db)
+        speech = (energy_db > threshold) & (zcr < config.max_zcr)
+
+        quiet = energy_db[~speech]
+        if quiet.size:
+            lowest = float(quiet.min())
+            if self.noise_floor_db is None:
+                self.noise_floor_db = lowest
+            else:
+                self.noise_floor_db = min(
+                    lowest, self.noise_floor_db + config.noise_rise_db * quiet.size
+                )
+        return speech
+
+
+class Endpointer:
+    """Decide when an utterance has ended while audio blocks stream in.
+
+    Feed blocks with :meth:`feed` until :attr:`done` is set, then read the
+    trimmed utterance with :meth:`utterance`.
+    """
+
+    def __init__(self, config: Optional[VADConfig] = None, sample_rate: int = 16000):
+        """Initialize the endpointer.
+
+        Args:
+            config: Detector and endpointing parameters
+            sample_rate: Sample rate of the incoming audio
+        """
+        self.config = config or VADConfig()
+        self.sample_rate = sample_rate
+        self.vad = EnergyVAD(self.config, sample_rate)
+        frame_ms = self.config.frame_ms
+        self._min_speech = max(1, self.config.min_speech_ms // frame_ms)
+        self._hangover = max(1, self.config.hangover_ms // frame_ms)
+        self._pre_roll = self.config.pre_roll_ms // frame_ms
+        self._post_roll = self.config.post_roll_ms // frame_ms
+        self._max_frames = int(self.config.max_utterance_s * 1000) // frame_ms
+        timeout = self.config.start_timeout_s
+        self._timeout = None if timeout is None else int(timeout * 1000) // frame_ms
+
+        self.buffer = CaptureBuffer()
+        """Captured audio, with samples that cannot be part of the utterance released."""
+        self._remainder = np.empty(0, dtype=np.int16)
+        self._n_frames = 0
+        self._run = 0
+        self._silence = 0
+        self.speech_start: Optional[int] = None
+        """Frame index at which the utterance (including pre-roll) starts."""
+        self.speech_end: Optional[int] = None
+        """Frame index just after the last speech frame."""
+        self.done = False
+        """Whether the utterance has ended (or capture should stop)."""
+
+    @property
+    def triggered(self) -> bool:
+        """Whether speech has started."""
+        return self.speech_start is not None
+
+    @property
+    def trailing_silence_ms(self) -> int:
+        """How long the user has been silent since speech started, 0 before that."""
+        return self._silence * self.config.frame_ms if self.triggered else 0
+
+    @property
+    def frame_length(self) -> int:
+        """Number of samples per analysis frame."""
+        return self.vad.frame_length
+
+    def feed(self, block: np.ndarray) -> bool:
+        """Process a block of mono int16 samples.
+
+        Returns:
+            True once the end of the utterance has been detected.
+        """
+        if self.done:
+            return True
+        self.buffer.append(block)
+        samples = np.concatenate((self._remainder, np.ravel(block)))
+        mask = self.vad.classify(samples)
+        self._remainder = samples[len(mask) * self.vad.frame_length :]
+
+        for is_speech in mask:
+            index = self._n_frames
+            self._n_frames += 1
+            if not self.triggered:
+                self._run = self._run + 1 if is_speech else 0
+                if self._run >= self._min_speech:
+                    self.speech_start = max(0, index - self._run + 1 - self._pre_roll)
+                    self.speech_end = index + 1
+                else:
+                    self._drop_before(index + 1 - self._min_speech - self._pre_roll)
+                    if self._timeout is not None and self._n_frames >= self._timeout:
+                        self.done = True
+                        break
+                continue
+            if is_speech:
+                self._silence = 0
+                self.speech_end = index + 1
+            else:
+                self._silence += 1
+            if (
+                self._silence >= self._hangover
+                or self._n_frames - (self.speech_start or 0) >= self._max_frames
+            ):
+                self.done = True
+                break
+        return self.done
+
+    def _drop_before(self, frame_index: int) -> None:
+        """Forget frames that can no longer become part of the pre-roll."""
+        self.buffer.discard_before(frame_index * self.vad.frame_length)
+
+    def utterance_bounds(self) -> tuple[int, int]:
+        """Return the absolute sample range of the utterance, empty if there was no speech."""
+        if self.speech_start is None or self.speech_end is None:
+            return 0, 0
+        frame_length = self.vad.frame_length
+        end = min(self.speech_end + self._post_roll, self._n_frames)
+        return self.speech_start * frame_length, end * frame_length
+
+    def utterance(self) -> np.ndarray:
+        """Return the detected utterance with surrounding silence trimmed.
+
+        Returns an empty array if no speech was detected.
+        """
+        return self.buffer.get(*self.utterance_bounds())
+
+    def utterance_pieces(self) -> list[np.ndarray]:
+        """Return the detected utterance as views of the capture buffer."""
+        return self.buffer.pieces(*self.utterance_bounds())
+
+
+def iter_blocks(samples: np.ndarray, block_size: int = 1024) -> Iterator[np.ndarray]:
+    """Split an array into consecutive blocks, as an input stream would deliver them."""
+    for start in range(0, len(samples), block_size):
+        yield samples[start : start + block_size]
+
+
+def endpoint(
+    blocks: Iterable[np.ndarray],
+    config: Optional[VADConfig] = None,
+    sample_rate: int = 16000,
+) -> np.ndarray:
+    """Consume blocks until the utterance ends and return it trimmed."""
+    endpointer = Endpointer(config, sample_rate)
+    for block in blocks:
+        if endpointer.feed(block):
+            break
+    return endpointer.utterance()
+
+
+def speech_bounds(
+    chunks: Iterable[np.ndarray],
+    config: Optional[VADConfig] = None,
+    sample_rate: int = 16000,
+) -> Optional[tuple[int, int]]:
+    """Find where speech starts and ends in a complete recording.
+
+    The recording may be passed in consecutive chunks (for example the
+    pieces of a :class:`~maltai_agent.capture.CaptureBuffer`) so that it
+    never has to be joined into one array.
+
+    Returns:
+        Sample offsets ``(start, end)`` including pre-roll and post-roll, or
+        None if the recording has no speech.
+    """
+    config = config or VADConfig()
+    vad = EnergyVAD(config, sample_rate)
+    remainder = np.empty(0, dtype=np.int16)
+    total = 0
+    n_frames = 0
+    first: Optional[int] = None
+    last = 0
+    for chunk in chunks:
+        chunk = np.ravel(chunk)
+        total += len(chunk)
+        samples = np.concatenate((remainder, chunk)) if remainder.size else chunk
+        speech = np.flatnonzero(vad.classify(samples))
+        if speech.size:
+            first = n_frames + speech[0] if first is None else first
+            last = n_frames + speech[-1]
+        used = (len(samples) // vad.frame_length) * vad.frame_length
+        n_frames += used // vad.frame_length
+        remainder = samples[used:]
+    if first is None:
+        return None
+    frame_length = vad.frame_length
+    start = max(0, first - config.pre_roll_ms // config.frame_ms) * frame_length
+    end = (last + 1 + config.post_roll_ms // config.frame_ms) * frame_length
+    return start, min(end, total)
+
+
+def trim_silence(
+    samples: np.ndarray,
+    config: Optional[VADConfig] = None,
+    sample_rate: int = 16000,
+) -> np.ndarray:
+    """Trim leading and trailing silence from a complete recording.
+
+    Unlike :func:`endpoint`, pauses inside the recording are kept regardless
+    of their length. Returns an empty array if the recording has no speech.
+    """
+    samples = np.ravel(samples)
+    bounds = speech_bounds([samples], config, sample_rate)
+    if bounds is None:
+        return samples[:0]
+    return samples[bounds[0] : bounds[1]]
+
+
+__all__ = [
+    "EnergyVAD",
+    "Endpointer",
+    "VADConfig",
+    "endpoint",
+    "frame_features",
+    "iter_blocks",
+    "speech_bounds",
+    "trim_silence",
+]
@@ -0,0 +1,323 @@
+"""Low-CPU wake word detection by template matching of MFCC features."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from maltai_agent.vad import EnergyVAD, VADConfig, trim_silence
+
+
+def mel_filterbank(n_mels: int, n_fft: int, sample_rate: int) -> np.ndarray:
+    """Return a ``(n_mels, n_fft // 2 + 1)`` triangular mel filterbank."""
+
+    def hz_to_mel(hz: np.ndarray) -> np.ndarray:
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel: np.ndarray) -> np.ndarray:
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    edges = mel_to_hz(
+        np.linspace(
+            hz_to_mel(np.array(0.0)), hz_to_mel(np.array(sample_rate / 2)), n_mels + 2
+        )
+    )
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (bins - lower) / (center - lower)
+    falling = (upper - bins) / (upper - center)
+    return np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+
+
+def dct_matrix(n_out: int, n_in: int) -> np.ndarray:
+    """Return an orthonormal DCT-II matrix of shape ``(n_out, n_in)``."""
+    k = np.arange(n_out)[:, None]
+    n = np.arange(n_in)[None, :]
+    matrix = np.sqrt(2.0 / n_in) * np.cos(np.pi * k * (2 * n + 1) / (2 * n_in))
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+class FeatureExtractor:
+    """Compute log-mel or MFCC features with NumPy only."""
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        *,
+        window_ms: int = 25,
+        hop_ms: int = 10,
+        n_fft: int = 512,
+        n_mels: int = 40,
+        n_mfcc: int = 13,
+        log_floor: float = 1e-4,
+    ):
+        """Initialize the extractor.
+
+        Args:
+            sample_rate: Sample rate of the input audio
+            window_ms: Analysis window length
+            hop_ms: Distance between consecutive frames
+            n_fft: FFT size
+            n_mels: Number of mel bands
+            n_mfcc: Number of cepstral coefficients (including c0)
+            log_floor: Added to mel energies before the log, roughly 80 dB
+                below full scale, so near-silent bands do not dominate
+        """
+        self.sample_rate = sample_rate
+        self.window_length = sample_rate * window_ms // 1000
+        self.hop_length = sample_rate * hop_ms // 1000
+        self.n_fft = n_fft
+        self.window = np.hanning(self.window_length).astype(np.float32)
+        self.mel = mel_filterbank(n_mels, n_fft, sample_rate)
+        self.dct = dct_matrix(n_mfcc, n_mels)
+        self.log_floor = log_floor
+
+    def n_frames(self, n_samples: int) -> int:
+        """Return how many whole frames fit in ``n_samples``."""
+        if n_samples < self.window_length:
+            return 0
+        return 1 + (n_samples - self.window_length) // self.hop_length
+
+    def log_mel(self, samples: np.ndarray) -> np.ndarray:
+        """Return log-mel energies, one row per frame."""
+        samples = np.asarray(np.ravel(samples), dtype=np.float32) / 32768.0
+        n_frames = self.n_frames(len(samples))
+        if not n_frames:
+            return np.empty((0, self.mel.shape[0]), dtype=np.float32)
+        frames = np.lib.stride_tricks.sliding_window_view(samples, self.window_length)[
+            : n_frames * self.hop_length : self.hop_length
+        ]
+        power = np.square(np.abs(np.fft.rfft(frames * self.window, self.n_fft)))
+        return np.log(power @ self.mel.T + self.log_floor)
+
+    def mfcc(self, samples: np.ndarray) -> np.ndarray:
+        """Return MFCCs without c0, which only tracks loudness."""
+        return (self.log_mel(samples) @ self.dct.T)[:, 1:]
+
+
+def subsequence_dtw(template: np.ndarray, window: np.ndarray) -> np.ndarray:
+    """Match a template anywhere inside a window of features.
+
+    Uses cosine distance between frames and the step pattern (1, 1),
+    (1, 2), (2, 1), so the window may be spoken between half and twice the
+    template's speed. Every template frame contributes exactly once to the
+    cost, which keeps costs comparable across window positions.
+
+    Returns:
+        For every window frame, the length-normalized cost of the best match
+        of the whole template that ends on that frame.
+    """
+    t = template / (np.linalg.norm(template, axis=1, keepdims=True) + 1e-8)
+    w = window / (np.linalg.norm(window, axis=1, keepdims=True) + 1e-8)
+    cost = 1.0 - t @ w.T
+
+    def shift(row: np.ndarray, by: int) -> np.ndarray:
+        return np.concatenate((np.full(by, np.inf, dtype=row.dtype), row[:-by]))
+
+    before = np.full(cost.shape[1], np.inf, dtype=cost.dtype)
+    total = cost[0].copy()
+    for i in range(1, len(cost)):
+        step = np.minimum(shift(total, 1), shift(total, 2))
+        step = np.minimum(step, shift(before + cost[i - 1], 1))
+        before, total = total, cost[i] + step
+    return total / len(template)
+
+
+@dataclass(kw_only=True)
+class Detection:
+    """A wake word detection."""
+
+    sample_index: int
+    """Absolute index of the last sample fed before the detection."""
+    cost: float
+    """Normalized match cost; lower is a better match."""
+
+
+class WakeWordDetector:
+    """Detect an enrolled wake word in a stream of audio blocks.
+
+    Features are only computed while the energy VAD hears something, so an
+    idle microphone costs little more than an RMS per block. While there is
+    sound, MFCCs of the most recent audio are kept in a rolling window and
+    matched against the enrolled templates a few times per second.
+    """
+
+    def __init__(
+        self,
+        templates: Sequence[np.ndarray],
+        *,
+        sample_rate: int = 16000,
+        threshold: float = 0.2,
+        check_every_ms: int = 100,
+        hold_ms: int = 50,
+        refractory_ms: int = 1000,
+        vad_config: Optional[VADConfig] = None,
+    ):
+        """Initialize the detector.
+
+        Args:
+            templates: MFCC templates of the wake word, see :meth:`enroll`
+            sample_rate: Sample rate of the incoming audio
+            threshold: Maximum match cost that counts as a detection
+            check_every_ms: How often the templates are matched while there is sound
+            hold_ms: How long a match must stay the best before it is reported
+            refractory_ms: Minimum time between two detections
+            vad_config: Voice activity settings used to gate feature extraction
+        """
+        if not templates:
+            raise ValueError("At least one wake word template is required")
+        self.features = FeatureExtractor(sample_rate)
+        # Centre features on the enrollment mean so that cosine distance
+        # compares spectral shape rather than the shared spectral tilt.
+        templates = [np.asarray(t, dtype=np.float32) for t in templates]
+        self.mean = np.concatenate(templates).mean(axis=0)
+        self.templates = [t - self.mean for t in templates]
+        self.threshold = threshold
+        self.vad = EnergyVAD(vad_config, sample_rate)
+        hop = self.features.hop_length
+        self._window_frames = 2 * max(len(t) for t in self.templates)
+        self._check_every = max(1, sample_rate * check_every_ms // 1000 // hop)
+        self._hold = max(1, sample_rate * hold_ms // 1000 // hop)
+        self._refractory = sample_rate * refractory_ms // 1000
+        self._hangover = sample_rate * 300 // 1000
+        self._window = np.empty((0, self.templates[0].shape[1]), dtype=np.float32)
+        self._pending = np.empty(0, dtype=np.int16)
+        self._previous = np.empty(0, dtype=np.int16)
+        self._since_check = 0
+        self._since_sound: Optional[int] = None
+        self._last_detection: Optional[int] = None
+        self.position = 0
+        """Absolute number of samples fed so far."""
+        self.checks = 0
+        """Number of template matches run, for diagnostics."""
+
+    @classmethod
+    def enroll(
+        cls,
+        recordings: Iterable[np.ndarray],
+        sample_rate: int = 16000,
+        **kwargs: object,
+    ) -> WakeWordDetector:
+        """Build a detector from a few recordings of the wake word.
+
+        Args:
+            recordings: Mono int16 recordings, one utterance of the wake word each
+            sample_rate: Sample rate of the recordings
+            **kwargs: Passed to the constructor
+        """
+        features = FeatureExtractor(sample_rate)
+        config = VADConfig(pre_roll_ms=0, post_roll_ms=0)
+        templates = [
+            features.mfcc(trim_silence(recording, config, sample_rate))
+            for recording in recordings
+        ]
+        return cls(templates, sample_rate=sample_rate, **kwargs)  # type: ignore[arg-type]
+
+    @classmethod
+    def from_wav_files(
+        cls, paths: Iterable[str], sample_rate: int = 16000, **kwargs: object
+    ) -> WakeWordDetector:
+        """Build a detector from mono 16-bit WAV recordings of the wake word."""
+        from scipy.io import wavfile
+
+        recordings = []
+        for path in paths:
+            rate, samples = wavfile.read(path)
+            if rate != sample_rate or samples.dtype != np.int16 or samples.ndim != 1:
+                raise ValueError(
+                    f"{path}: expected mono 16-bit audio at {sample_rate} Hz"
+                )
+            recordings.append(samples)
+        return cls.enroll(recordings, sample_rate, **kwargs)
+
+    def reset(self) -> None:
+        """Forget buffered audio, for example after handing the microphone over."""
+        self._window = self._window[:0]
+        self._pending = self._pending[:0]
+        self._previous = self._previous[:0]
+        self._since_check = 0
+        self._since_sound = None
+
+    def feed(self, block: np.ndarray) -> Optional[Detection]:
+        """Process a block of mono int16 samples.
+
+        Returns:
+            A detection if the wake word ended within this block.
+        """
+        block = np.ravel(block)
+        self.position += len(block)
+        if self.vad.classify(block).any():
+            if self._since_sound is None:
+                # Waking up: include the previous block so the onset isn't lost
+                self._pending = self._previous
+            self._since_sound = 0
+        elif self._since_sound is not None:
+            self._since_sound += len(block)
+            if (
+                self._since_sound
+                > self._hangover + self._window_frames * self.features.hop_length
+            ):
+                self.reset()
+        self._previous = block
+
+        if self._since_sound is None:
+            return None
+        return self._process(block)
+
+    def _process(self, block: np.ndarray) -> Optional[Detection]:
+        """Extract features for new audio and match the templates when due."""
+        samples = np.concatenate((self._pending, block))
+        n_frames = self.features.n_frames(len(samples))
+        if n_frames:
+            new = self.features.mfcc(samples) - self.mean
+            self._window = np.concatenate((self._window, new))[-self._window_frames :]
+            self._pending = samples[n_frames * self.features.hop_length :]
+            self._since_check += n_frames
+        else:
+            self._pending = samples
+
+        if self._since_check < self._check_every:
+            return None
+        recent = self._since_check
+        self._since_check = 0
+        if len(self._window) < min(len(t) for t in self.templates) // 2:
+            return None
+        if (
+            self._last_detection is not None
+            and self.position - self._last_detection < self._refractory
+        ):
+            return None
+
+        self.checks += 1
+        costs = np.min(
+            [subsequence_dtw(template, self._window) for template in self.templates],
+            axis=0,
+        )
+        # Only accept a match once the cost has stopped improving for a short
+        # hold period, so the detection lines up with the end of the word.
+        hold = self._hold
+        candidates = costs[-(recent + hold) : len(costs) - hold]
+        if not candidates.size:
+            return None
+        cost = float(candidates.min())
+        if cost > self.threshold or costs[len(costs) - hold :].min() < cost:
+            if cost <= self.threshold:
+                # Still improving: look at these ends again on the next check
+                self._since_check = recent
+            return None
+        self._last_detection = self.position
+        self._window = self._window[:0]
+        return Detection(sample_index=self.position, cost=cost)
+
+
+__all__ = [
+    "Detection",
+    "FeatureExtractor",
+    "WakeWordDetector",
+    "dct_matrix",
+    "mel_filterbank",
+    "subsequence_dtw",
+]
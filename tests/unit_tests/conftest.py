@@ -0,0 +1,16 @@
+import pytest
+from scipy.io import wavfile
+
+from .synthetic_audio import SAMPLE_RATE, synthesize_script
+
+
+@pytest.fixture
+def wav_fixture(tmp_path):
+    """Write a synthetic recording to a WAV file and return its path."""
+
+    def make(script, name: str = "fixture.wav", sample_rate: int = SAMPLE_RATE):
+        path = tmp_path / name
+        wavfile.write(path, sample_rate, synthesize_script(script, sample_rate))
+        return path
+
+    return make
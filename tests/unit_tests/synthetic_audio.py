@@ -0,0 +1,59 @@
+"""Synthetic audio used as test fixtures."""
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def synthesize_script(script, sample_rate: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    """Render a list of ``(kind, seconds)`` segments into int16 audio.
+
+    ``"speech"`` is a voiced, amplitude-modulated harmonic signal, ``"silence"``
+    is low-level room noise and ``"hiss"`` is loud broadband noise.
+    """
+    rng = np.random.default_rng(seed)
+    segments = []
+    for kind, seconds in script:
+        n = int(seconds * sample_rate)
+        t = np.arange(n) / sample_rate
+        noise = rng.normal(0, 30, n)
+        if kind == "speech":
+            pitch = 140 + 20 * np.sin(2 * np.pi * 0.7 * t)
+            phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+            voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+            envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t) ** 2
+            segments.append(5000 * envelope * voiced + noise)
+        elif kind == "silence":
+            segments.append(noise)
+        elif kind == "hiss":
+            segments.append(rng.normal(0, 3000, n))
+        else:
+            raise ValueError(kind)
+    return np.clip(np.concatenate(segments), -32768, 32767).astype(np.int16)
+
+
+def synthesize_word(
+    formants, stretch: float = 1.0, pitch: float = 120, amplitude: float = 4000,
+    sample_rate: int = SAMPLE_RATE,
+) -> np.ndarray:
+    """Render a pseudo-word: one harmonic "syllable" per formant frequency."""
+    harmonics = np.arange(1, 40)
+    syllables = []
+    for formant in formants:
+        duration = 0.18 * stretch
+        t = np.arange(int(duration * sample_rate)) / sample_rate
+        weights = np.exp(-(((harmonics * pitch - formant) / 250.0) ** 2)) + 0.05 / harmonics
+        tone = (weights[:, None] * np.sin(2 * np.pi * pitch * harmonics[:, None] * t)).sum(0)
+        fade = np.minimum(1, np.minimum(t / 0.02, (duration - t) / 0.02))
+        syllables.append(tone * fade)
+    word = np.concatenate(syllables)
+    return word / np.abs(word).max() * amplitude
+
+
+def room_noise(seconds: float, seed: int = 0, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Low-level background noise."""
+    return np.random.default_rng(seed).normal(0, 30, int(seconds * sample_rate))
+
+
+def to_int16(*parts) -> np.ndarray:
+    return np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16)
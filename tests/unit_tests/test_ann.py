@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from maltai_agent.ann import ANNConfig, IVFIndex, exact_search
+from maltai_agent.sqlite_store import SQLiteVectorStore
+
+DIMS = 32
+
+
+def clustered(n: int, seed: int = 0, topics: int = 50) -> np.ndarray:
+    """Unit vectors scattered around a few topic directions, like real embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((topics, DIMS))
+    vectors = centers[rng.integers(0, topics, n)] + 0.4 * rng.standard_normal((n, DIMS))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def recall_at_10(index: IVFIndex, matrix: np.ndarray, rows: np.ndarray, queries: np.ndarray):
+    hits = 0
+    for query in queries:
+        expected, _ = exact_search(matrix, rows, query, 10)
+        found, _ = index.search(matrix, query, 10)
+        hits += len(set(expected.tolist()) & set(found.tolist()))
+    return hits / (10 * len(queries))
+
+
+def test_recall_and_incremental_updates():
+    matrix = clustered(6000)
+    queries = clustered(50, seed=1)
+    index = IVFIndex(ANNConfig(min_items=100, n_probe=8))
+    index.train(matrix, np.arange(4000))
+    assert index.size == 4000
+
+    # Rows written after training become searchable without retraining
+    index.add(matrix, np.arange(4000, 6000))
+    index.remove(np.arange(0, 6000, 3))
+    alive = np.setdiff1d(np.arange(6000), np.arange(0, 6000, 3))
+    assert index.size == len(alive)
+    assert set(index.indexed_rows().tolist()) == set(alive.tolist())
+    for query in queries[:5]:
+        assert not np.isin(index.candidates(query), np.arange(0, 6000, 3)).any()
+
+    assert recall_at_10(index, matrix, alive, queries) >= 0.9
+
+
+def test_more_probes_trade_speed_for_recall():
+    matrix = clustered(5000)
+    queries = clustered(50, seed=2)
+    index = IVFIndex(ANNConfig(n_probe=1))
+    index.train(matrix, np.arange(5000))
+    rows = np.arange(5000)
+
+    low = recall_at_10(index, matrix, rows, queries)
+    index.config.n_probe = len(index.centroids)
+    assert recall_at_10(index, matrix, rows, queries) == 1.0
+    assert low < 1.0
+
+
+def test_needs_training_only_past_threshold():
+    matrix = clustered(300)
+    index = IVFIndex(ANNConfig(min_items=200, retrain_growth=1.25))
+    index.add(matrix, np.arange(100))
+    assert not index.needs_training()
+    index.add(matrix, np.arange(100, 200))
+    assert index.needs_training()
+    index.train(matrix, index.indexed_rows())
+    index.add(matrix, np.arange(200, 300))
+    assert index.needs_training()
+
+
+@pytest.mark.parametrize("min_items", [10_000, 500])
+def test_store_uses_index_for_large_namespaces(tmp_path, min_items):
+    vectors = clustered(1500)
+    index_config = {
+        "dims": DIMS,
+        "embed": lambda texts: [vectors[int(t.split()[1])].tolist() for t in texts],
+        "fields": ["text"],
+    }
+    ann = ANNConfig(min_items=min_items, n_probe=16)
+    with SQLiteVectorStore(str(tmp_path / "db"), index=index_config, ann=ann) as store:
+        for i in range(1000):
+            store.put(("memories", "u1"), f"m{i}", {"text": f"v {i}"})
+        store.put(("todos", "u1"), "t", {"text": "v 0"})
+
+        results = store.search(("memories", "u1"), query="v 1200", limit=10)
+        expected, _ = exact_search(vectors, np.arange(1000), vectors[1200], 10)
+        found = [int(r.key[1:]) for r in results]
+        overlap = len(set(found) & set(expected.tolist()))
+        assert overlap == 10 if min_items > 1000 else overlap >= 9
+
+        # Later writes are found without retraining
+        store.put(("memories", "u1"), "new", {"text": "v 1200"})
+        assert store.search(("memories", "u1"), query="v 1200", limit=1)[0].key == "new"
+        store.delete(("memories", "u1"), "new")
+        assert store.search(("memories", "u1"), query="v 1200", limit=1)[0].key != "new"
+
+        trained = any(index.trained for index in store._ann_indexes.values())
+        assert trained == (min_items <= 1000)
+        # Only the configured namespace prefix gets an index
+        store.search(("todos", "u1"), query="v 0", limit=1)
+        assert len(store._ann_indexes) == 1
@@ -0,0 +1,152 @@
+import asyncio
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+import pytest
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.store.memory import InMemoryStore
+
+from maltai_agent import audio
+from maltai_agent.models import ModelRegistry
+from maltai_agent.stt import WhisperAPITranscriber
+from maltai_agent.tts_cache import SpeechCache
+
+
+class FakeAsyncTextToSpeech:
+    def __init__(self) -> None:
+        self.texts: list[str] = []
+
+    async def convert(self, *, text, **kwargs):
+        self.texts.append(text)
+        await asyncio.sleep(0)
+        yield b"audio:"
+        yield text.encode()
+
+
+@pytest.mark.asyncio
+async def test_async_speech_uses_async_client_and_cache(tmp_path, monkeypatch):
+    tts = FakeAsyncTextToSpeech()
+    played = []
+    monkeypatch.setattr(audio, "get_async_elevenlabs_client", lambda: SimpleNamespace(text_to_speech=tts))
+    monkeypatch.setattr(audio, "play", lambda data: played.append(bytes(data)))
+    processor = audio.AudioProcessor(speech_cache=SpeechCache(str(tmp_path)))
+
+    await processor.aspeak_response("**Okay.**")
+    await processor.aspeak_response("Okay.")
+    processor.close()
+
+    assert tts.texts == ["Okay."]
+    assert played == [b"audio:Okay."] * 2
+    assert processor.speech_cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_whisper_atranscribe_awaits_async_client():
+    uploads = []
+
+    async def create(*, model, file):
+        uploads.append(file.name)
+        return SimpleNamespace(text="hello")
+
+    client = SimpleNamespace(audio=SimpleNamespace(transcriptions=SimpleNamespace(create=create)))
+    transcriber = WhisperAPITranscriber(None, async_client=client)
+
+    assert await transcriber.atranscribe(np.zeros(1600, dtype=np.int16), 16000) == "hello"
+    assert uploads == ["audio.wav"]
+
+
+class FakeModel(GenericFakeChatModel):
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self
+
+
+class SlowDevice(audio.AudioProcessor):
+    """Capture and playback block their thread, transcription and synthesis await."""
+
+    def _capture(self, endpointing: str) -> list:
+        time.sleep(0.2)
+        return [np.zeros(1600, dtype=np.int16)]
+
+    async def _aconvert(self, text: str) -> bytes:
+        await asyncio.sleep(0.1)
+        return text.encode()
+
+    def _play(self, audio_data: bytes) -> None:
+        time.sleep(0.2)
+
+
+class AsyncTranscriber:
+    async def atranscribe(self, audio_data, sample_rate: int) -> str:
+        await asyncio.sleep(0.1)
+        return "hello"
+
+    def transcribe(self, audio_data, sample_rate: int) -> str:
+        raise AssertionError("the graph must not block on transcription")
+
+
+@pytest.mark.asyncio
+async def test_sessions_do_not_block_each_other(monkeypatch):
+    import maltai_agent  # noqa: F401
+
+    graph_module = sys.modules["maltai_agent.graph"]
+    monkeypatch.setattr(
+        graph_module, "models", ModelRegistry(lambda model, provider: FakeModel(messages=iter([AIMessage(content="Hi.")] * 8)))
+    )
+    graph = graph_module.builder.compile(store=InMemoryStore())
+    processors = [SlowDevice(transcriber=AsyncTranscriber()) for _ in range(8)]
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            graph.ainvoke({"messages": []}, {"configurable": {"user_id": f"u{i}", "audio_processor": processor}})
+            for i, processor in enumerate(processors)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    for processor in processors:
+        processor.close()
+
+    assert all([m.content for m in result["messages"]] == ["hello", "Hi."] for result in results)
+    # One turn takes 0.6 s; eight run in sequence would take 4.8 s
+    assert elapsed < 1.5
+
+
+def test_each_thread_gets_its_own_audio_processor():
+    import maltai_agent  # noqa: F401
+
+    graph_module = sys.modules["maltai_agent.graph"]
+    try:
+        first = graph_module.audio_for({"configurable": {"thread_id": "t1"}})
+        assert graph_module.audio_for({"configurable": {"thread_id": "t1"}}) is first
+        assert graph_module.audio_for({"configurable": {"thread_id": "t2"}}) is not first
+        assert graph_module.audio_for({"configurable": {}}) is graph_module.get_audio_processor()
+        assert first.speech_cache is graph_module.get_speech_cache()
+    finally:
+        graph_module.close_sessions()
+
+
+def test_least_recently_used_sessions_are_closed(monkeypatch):
+    import maltai_agent  # noqa: F401
+
+    graph_module = sys.modules["maltai_agent.graph"]
+    closed = []
+
+    class Processor:
+        def close(self) -> None:
+            closed.append(self)
+
+    monkeypatch.setattr(graph_module, "MAX_SESSIONS", 2)
+    monkeypatch.setattr(graph_module, "create_audio_processor", Processor)
+    try:
+        first = graph_module.session_audio_processor("t1")
+        second = graph_module.session_audio_processor("t2")
+        assert graph_module.session_audio_processor("t1") is first
+        graph_module.session_audio_processor("t3")
+        assert closed == [second]
+    finally:
+        graph_module.close_sessions()
+    assert len(closed) == 3
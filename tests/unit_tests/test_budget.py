@@ -0,0 +1,139 @@
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.store.base import SearchItem
+
+from maltai_agent.budget import (
+    count_tokens,
+    fit_items,
+    message_tokens,
+    split_history,
+    summarize,
+    truncate_to_tokens,
+    unsummarized,
+)
+from maltai_agent.configuration import Configuration
+from maltai_agent.context import TurnContext
+
+
+class EchoModel(BaseChatModel):
+    """Chat model that records its prompts and replies with a fixed summary."""
+
+    prompts: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "echo"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any) -> ChatResult:
+        self.prompts.append(str(messages[-1].content))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" summary " * 50))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return self._generate(messages, stop)
+
+
+def conversation(turns: int) -> list[BaseMessage]:
+    messages: list[BaseMessage] = []
+    for i in range(turns):
+        messages.append(HumanMessage(content=f"question {i} " * 20, id=f"h{i}"))
+        if i % 2:
+            messages.append(
+                AIMessage(
+                    content="",
+                    id=f"c{i}",
+                    tool_calls=[{"name": "AddTodo", "args": {"task": f"task {i}"}, "id": f"t{i}"}],
+                )
+            )
+            messages.append(ToolMessage(content="saved", tool_call_id=f"t{i}", id=f"r{i}"))
+        else:
+            messages.append(AIMessage(content=f"answer {i} " * 20, id=f"a{i}"))
+    return messages
+
+
+def test_truncate_to_tokens():
+    text = "word " * 500
+    assert truncate_to_tokens("short", 10) == "short"
+    assert count_tokens(truncate_to_tokens(text, 50)) <= 50
+
+
+def test_fit_items_keeps_prefix():
+    items = ["a " * 10, "b " * 10, "c " * 10]
+    kept = fit_items(items, str, count_tokens(items[0]) + count_tokens(items[1]) + 2)
+    assert kept == items[:2]
+    assert fit_items(items, str, 0) == []
+
+
+def test_split_history_respects_budget_and_turns():
+    messages = conversation(20)
+    older, recent = split_history(messages, 200)
+
+    assert older + recent == messages
+    assert isinstance(recent[0], HumanMessage)
+    assert sum(message_tokens(m) for m in recent) <= 200
+    # A tool result is never sent without the call that produced it
+    call_ids = {call["id"] for m in recent if isinstance(m, AIMessage) for call in m.tool_calls}
+    assert all(m.tool_call_id in call_ids for m in recent if isinstance(m, ToolMessage))
+
+
+def test_split_history_keeps_latest_turn_over_budget():
+    messages = conversation(3)
+    older, recent = split_history(messages, 1)
+    assert recent == messages[-2:]
+    assert older == messages[:-2]
+
+
+def test_unsummarized():
+    messages = conversation(4)
+    assert unsummarized(messages, None) == messages
+    assert unsummarized(messages, "a2") == messages[-3:]
+
+
+@pytest.mark.asyncio
+async def test_summarize_sends_only_new_turns():
+    model = EchoModel(prompts=[])
+    messages = conversation(4)
+
+    summary = await summarize(model, "earlier summary", messages[:5], 20)
+
+    assert count_tokens(summary) <= 20
+    assert "earlier summary" in model.prompts[0]
+    assert "question 0" in model.prompts[0]
+    assert "AddTodo" in model.prompts[0]
+    assert "question 2" not in model.prompts[0]
+
+
+def test_turn_context_sections_are_budgeted():
+    def item(key: str, value: dict) -> SearchItem:
+        return SearchItem(("ns",), key, value, "2024-01-01T00:00:00", "2024-01-01T00:00:00", 0.5)
+
+    context = TurnContext(
+        memories=[item(f"m{i}", {"content": "fact " * 30}) for i in range(10)],
+        profile=[item("profile", {"bio": "long " * 500})],
+        todos=[item(f"t{i}", {"task": "thing " * 30}) for i in range(10)],
+        instructions=[item("i", {"instruction": "be brief"})],
+    )
+
+    assert count_tokens(context.format_memories(100)) <= 120
+    assert context.format_memories(100).count("[m") < 10
+    assert count_tokens(context.format_profile(50)) <= 50
+    assert count_tokens(context.format_todos(100)) <= 100
+    assert context.format_instructions(100) == {"instruction": "be brief"}
+
+
+def test_configuration_token_budget_from_dict():
+    config = Configuration.from_runnable_config(
+        {"configurable": {"token_budget": {"history": 1234}}}
+    )
+    assert config.token_budget.history == 1234
+    assert config.token_budget.memories == 800
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+from maltai_agent.capture import CaptureBuffer, encode_upload
+
+
+def chunks(samples, size):
+    for start in range(0, len(samples), size):
+        yield samples[start : start + size]
+
+
+def test_capture_buffer_round_trips_across_blocks():
+    samples = np.arange(2500, dtype=np.int16)
+    buffer = CaptureBuffer(block_samples=1000)
+    for chunk in chunks(samples, 300):
+        buffer.append(chunk.reshape(-1, 1))
+
+    assert len(buffer) == 2500
+    assert np.array_equal(buffer.get(), samples)
+    assert np.array_equal(buffer.get(900, 2100), samples[900:2100])
+
+
+def test_capture_buffer_returns_views_within_a_block():
+    buffer = CaptureBuffer(block_samples=1000)
+    buffer.append(np.arange(1500, dtype=np.int16))
+    copied = buffer.bytes_copied
+
+    view = buffer.get(100, 900)
+
+    assert np.shares_memory(view, buffer.get(0, 1000))
+    assert buffer.bytes_copied == copied
+
+
+def test_capture_buffer_discard_releases_old_blocks():
+    samples = np.arange(5000, dtype=np.int16)
+    buffer = CaptureBuffer(block_samples=1000)
+    for chunk in chunks(samples, 256):
+        buffer.append(chunk)
+        buffer.discard_before(buffer.end - 1200)
+
+    assert len(buffer._blocks) <= 3
+    assert np.array_equal(buffer.get(), samples[-1200:])
+    assert buffer.get(0, 100).size == 0
+
+
+def test_encode_upload_wav():
+    samples = (np.sin(np.arange(16000) / 5) * 3000).astype(np.int16)
+    upload = encode_upload(samples, 16000)
+
+    assert upload.name == "audio.wav"
+    sample_rate, decoded = wavfile.read(upload)
+    assert sample_rate == 16000
+    assert np.array_equal(decoded, samples)
+
+
+def test_encode_upload_compressed_formats_are_smaller():
+    soundfile = pytest.importorskip("soundfile")
+    samples = (np.sin(np.arange(16000) / 5) * 3000).astype(np.int16)
+    wav = len(encode_upload(samples, 16000, "wav").getvalue())
+
+    flac = encode_upload(samples, 16000, "flac")
+    decoded, _ = soundfile.read(flac, dtype="int16")
+    assert flac.name == "audio.flac"
+    assert np.array_equal(decoded, samples)
+    assert len(flac.getvalue()) < wav
+
+    ogg = encode_upload(samples, 16000, "ogg")
+    assert ogg.name == "audio.ogg"
+    assert len(ogg.getvalue()) < wav
+
+
+def test_encode_upload_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        encode_upload(np.zeros(10, dtype=np.int16), 16000, "mp3")
+
+
+def test_encode_upload_from_buffer_pieces():
+    samples = (np.sin(np.arange(40000) / 5) * 3000).astype(np.int16)
+    buffer = CaptureBuffer(block_samples=16000)
+    buffer.append(samples)
+
+    pieces = buffer.pieces(1000, 39000)
+
+    assert len(pieces) == 3
+    assert (
+        encode_upload(pieces, 16000).getvalue()
+        == encode_upload(samples[1000:39000], 16000).getvalue()
+    )
@@ -0,0 +1,101 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
+from langgraph.graph import MessagesState, StateGraph
+
+from maltai_agent.checkpoint import (
+    MESSAGES_DELTA,
+    MESSAGES_ZLIB,
+    SQLiteDeltaSaver,
+    dump_messages,
+    load_messages,
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "checkpoints.db")
+
+
+def build(saver: SQLiteDeltaSaver):
+    """A turn is the user speaking and the agent answering."""
+    builder = StateGraph(MessagesState)
+    builder.add_node("listen", lambda state: {"messages": [HumanMessage(f"turn {len(state['messages']) // 2}")]})
+    builder.add_node("answer", lambda state: {"messages": [AIMessage(state["messages"][-1].content.upper())]})
+    builder.add_edge("__start__", "listen")
+    builder.add_edge("listen", "answer")
+    return builder.compile(checkpointer=saver)
+
+
+def message_rows(saver: SQLiteDeltaSaver) -> list[tuple[str, int]]:
+    return saver.conn.execute(
+        "SELECT type, depth FROM blobs WHERE channel = 'messages' ORDER BY version"
+    ).fetchall()
+
+
+CONFIG = {"configurable": {"thread_id": "t1"}}
+
+
+def test_thread_resumes_from_deltas_after_reopening(db_path):
+    with SQLiteDeltaSaver(db_path, snapshot_every=4) as saver:
+        graph = build(saver)
+        for _ in range(5):
+            state = graph.invoke({"messages": []}, CONFIG)
+        history = list(saver.list(CONFIG))
+
+    assert [m.content for m in state["messages"][-2:]] == ["turn 4", "TURN 4"]
+    with SQLiteDeltaSaver(db_path) as saver:
+        resumed = build(saver).get_state(CONFIG)
+        assert resumed.values["messages"] == state["messages"]
+        assert [t.config for t in saver.list(CONFIG)] == [t.config for t in history]
+        # Older checkpoints load through their own chain of deltas
+        oldest_with_messages = [t for t in saver.list(CONFIG) if t.checkpoint["channel_values"].get("messages")][-1]
+        assert len(oldest_with_messages.checkpoint["channel_values"]["messages"]) == 1
+        assert len(list(saver.list(CONFIG, limit=3))) == 3
+
+        rows = message_rows(saver)
+    types = [kind for kind, _ in rows]
+    assert types.count(MESSAGES_DELTA) > types.count(MESSAGES_ZLIB) > 1
+    # Never more than snapshot_every deltas after a snapshot
+    assert max(depth for _, depth in rows) == 4
+
+
+def test_removed_messages_write_a_snapshot(db_path):
+    with SQLiteDeltaSaver(db_path) as saver:
+        graph = build(saver)
+        state = graph.invoke({"messages": []}, CONFIG)
+        graph.update_state(CONFIG, {"messages": [RemoveMessage(id=state["messages"][0].id)]})
+        assert message_rows(saver)[-1] == (MESSAGES_ZLIB, 0)
+
+    with SQLiteDeltaSaver(db_path) as saver:
+        assert [m.content for m in build(saver).get_state(CONFIG).values["messages"]] == ["TURN 0"]
+
+
+@pytest.mark.asyncio
+async def test_writes_and_delete_thread(db_path):
+    saver = SQLiteDeltaSaver(db_path)
+    graph = build(saver)
+    await graph.ainvoke({"messages": []}, CONFIG)
+    config = (await saver.aget_tuple(CONFIG)).config
+    await saver.aput_writes(config, [("messages", [HumanMessage("pending")])], "task-1")
+    # A retried task does not overwrite its earlier writes
+    await saver.aput_writes(config, [("messages", [HumanMessage("retried")])], "task-1")
+
+    (write,) = (await saver.aget_tuple(config)).pending_writes
+    assert write[0] == "task-1" and write[2][0].content == "pending"
+
+    await saver.adelete_thread("t1")
+    assert await saver.aget_tuple(CONFIG) is None
+    assert [t async for t in saver.alist(CONFIG)] == []
+    saver.close()
+
+
+def test_messages_round_trip_compactly():
+    messages = [
+        HumanMessage("add milk", id="1"),
+        AIMessage("", id="2", tool_calls=[{"name": "todo", "args": {"item": "milk"}, "id": "c1"}]),
+        ToolMessage("done", tool_call_id="c1", id="3"),
+    ]
+    data = dump_messages(messages)
+
+    assert load_messages(data) == messages
+    assert b"additional_kwargs" not in data
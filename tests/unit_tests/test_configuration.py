@@ -1,5 +1,22 @@
-from memory_agent.configuration import Configuration
+from maltai_agent.configuration import Configuration
 
 
 def test_configuration_from_none() -> None:
     Configuration.from_runnable_config()
+
+
+def test_int_fields_are_read_from_the_environment(monkeypatch) -> None:
+    monkeypatch.setenv("PROMPT_TODOS", "3")
+    assert Configuration.from_runnable_config().prompt_todos == 3
+
+    monkeypatch.setenv("PROMPT_TODOS", "0")
+    assert Configuration.from_runnable_config().prompt_todos == 0
+
+
+def test_bool_fields_are_parsed_from_the_environment(monkeypatch) -> None:
+    monkeypatch.setenv("STREAM_SPEECH", "false")
+    monkeypatch.setenv("INCREMENTAL_TRANSCRIPTION", "yes")
+    config = Configuration.from_runnable_config({"configurable": {"stream_speech": True}})
+
+    assert config.stream_speech is False
+    assert config.incremental_transcription is True
@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+
+import numpy as np
+import pytest
+from langgraph.store.base import PutOp, SearchOp
+from langgraph.store.memory import InMemoryStore
+
+from maltai_agent.consolidation import consolidate_memories, note_changes
+from maltai_agent.sqlite_store import SQLiteVectorStore
+from maltai_agent.tools.memory_tool import upsert_memory
+
+DIMS = 64
+NAMESPACE = ("memories", "u1")
+
+
+def embed_words(texts: list[str]) -> list[list[float]]:
+    vectors = np.zeros((len(texts), DIMS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().split():
+            bucket = int.from_bytes(hashlib.sha256(word.encode()).digest()[:4], "little")
+            vectors[row, bucket % DIMS] += 1.0
+    return vectors.tolist()
+
+
+INDEX = {"dims": DIMS, "embed": embed_words, "fields": ["content"]}
+
+
+async def remember(store, key: str, content: str, context: str) -> None:
+    # As upsert_memory writes them
+    await store.abatch([PutOp(NAMESPACE, key, {"content": content, "context": context}), *note_changes("u1", [key])])
+    await asyncio.sleep(0.001)  # Distinct timestamps
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryStore(index=INDEX)
+    else:
+        with SQLiteVectorStore(str(tmp_path / "db"), index=INDEX) as sqlite_store:
+            yield sqlite_store
+
+
+@pytest.mark.asyncio
+async def test_duplicates_are_merged_under_the_oldest_key(store):
+    await remember(store, "a", "user likes green tea in the morning", "breakfast chat")
+    await remember(store, "b", "user likes green tea in the morning", "asked for tea")
+    await remember(store, "c", "user has a dog called rex", "talking about pets")
+    await remember(store, "d", "user really likes green tea in the morning", "tea again")
+
+    report = await consolidate_memories(store, "u1", threshold=0.9)
+
+    assert report.changed == 4
+    assert (report.clusters, report.removed) == (1, 2)
+    remaining = {item.key: item.value for item in await store.asearch(NAMESPACE, limit=10)}
+    assert set(remaining) == {"a", "c"}
+    assert remaining["a"]["content"] == "user really likes green tea in the morning"
+    assert remaining["a"]["context"] == "tea again; asked for tea; breakfast chat"
+
+
+@pytest.mark.asyncio
+async def test_later_runs_only_check_changed_memories(store):
+    await remember(store, "a", "user likes green tea in the morning", "first")
+    await remember(store, "c", "user has a dog called rex", "pets")
+    first = await consolidate_memories(store, "u1")
+    assert (first.changed, first.removed) == (2, 0)
+
+    again = await consolidate_memories(store, "u1")
+    assert again.changed == 0
+
+    await remember(store, "e", "user has a dog called rex", "pets again")
+    third = await consolidate_memories(store, "u1")
+    assert (third.changed, third.removed) == (1, 1)
+    assert {item.key for item in await store.asearch(NAMESPACE, limit=10)} == {"a", "c"}
+
+
+@pytest.mark.asyncio
+async def test_later_runs_do_not_list_every_memory(store, monkeypatch):
+    await remember(store, "a", "user likes green tea in the morning", "first")
+    await remember(store, "c", "user has a dog called rex", "pets")
+    await consolidate_memories(store, "u1")
+    listings = []
+    abatch = type(store).abatch
+
+    async def recording_abatch(self, ops):
+        ops = list(ops)
+        listings.extend(op.namespace_prefix for op in ops if isinstance(op, SearchOp) and op.query is None)
+        return await abatch(self, ops)
+
+    monkeypatch.setattr(type(store), "abatch", recording_abatch)
+    await remember(store, "e", "user has a dog called rex", "pets again")
+    report = await consolidate_memories(store, "u1")
+
+    assert (report.changed, report.removed) == (1, 1)
+    assert NAMESPACE not in listings
+
+
+@pytest.mark.asyncio
+async def test_memories_rewritten_during_a_run_are_not_merged(store, monkeypatch):
+    from maltai_agent import consolidation
+
+    await remember(store, "a", "user has a dog called rex", "pets")
+    await remember(store, "b", "user has a dog called rex", "pets again")
+    get_all = consolidation._get_all
+
+    async def rewrite_then_get(store_, namespace, keys, page):
+        if namespace == NAMESPACE and keys:
+            # The user corrects the memory between the search and the merge
+            await remember(store, "b", "user has a cat called tom", "correction")
+        return await get_all(store_, namespace, keys, page)
+
+    monkeypatch.setattr(consolidation, "_get_all", rewrite_then_get)
+    report = await consolidate_memories(store, "u1")
+
+    assert report.removed == 0
+    remaining = {item.key: item.value["content"] for item in await store.asearch(NAMESPACE, limit=10)}
+    assert remaining == {"a": "user has a dog called rex", "b": "user has a cat called tom"}
+    # Still noted as changed, so the next run checks the correction
+    assert [item.key for item in await store.asearch(("memory_changes", "u1"))] == ["b"]
+
+
+@pytest.mark.asyncio
+async def test_nothing_is_merged_without_a_semantic_index():
+    store = InMemoryStore()
+    await remember(store, "a", "same", "x")
+    await remember(store, "b", "same", "y")
+
+    report = await consolidate_memories(store, "u1")
+
+    assert report.removed == 0
+    assert len(await store.asearch(NAMESPACE)) == 2
+
+
+def test_memories_are_written_from_several_event_loops(tmp_path):
+    config = {"configurable": {"user_id": "u1"}}
+
+    async def write(prefix: str) -> None:
+        # Concurrent writes wait for the namespace lock
+        await asyncio.gather(
+            *(upsert_memory(f"{prefix} fact {i}", "chat", config=config, store=store) for i in range(5))
+        )
+
+    with SQLiteVectorStore(str(tmp_path / "db"), index=INDEX) as store:
+        for prefix in ("first", "second"):
+            asyncio.run(write(prefix))
+
+        assert len(store.search(NAMESPACE, limit=20)) == 10
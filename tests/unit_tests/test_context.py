@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+from langgraph.store.base import SearchOp
+from langgraph.store.memory import InMemoryStore
+
+from maltai_agent.context import load_context
+
+
+class SlowStore(InMemoryStore):
+    """In-memory store that simulates a per-read network latency.
+
+    Reads of the todo namespaces take ``todo_latency``, every other read
+    ``latency``, so the time of a turn shows which reads overlapped.
+    """
+
+    def __init__(self, latency: float, todo_latency: float) -> None:
+        super().__init__()
+        self.latency = latency
+        self.todo_latency = todo_latency
+        self.round_trips = 0
+
+    def _latency(self, op) -> float:
+        namespace = op.namespace_prefix if isinstance(op, SearchOp) else op.namespace
+        return self.todo_latency if namespace[0] in ("todos", "todo_index") else self.latency
+
+    async def abatch(self, ops):
+        ops = list(ops)
+        self.round_trips += 1
+        # Each read is served concurrently by the "server", as a remote store would.
+        await asyncio.gather(*(asyncio.sleep(self._latency(op)) for op in ops))
+        return self.batch(ops)
+
+
+@pytest.mark.asyncio
+async def test_load_context_reads_every_namespace():
+    store = InMemoryStore()
+    await store.aput(("memories", "u1"), "m1", {"content": "likes tea"})
+    await store.aput(("profile", "u1"), "profile", {"name": "Ana"})
+    await store.aput(("todos", "u1"), "t1", {"task": "buy milk"})
+    await store.aput(("instructions", "u1"), "todo", {"instruction": "be brief"})
+    await store.aput(("memories", "u2"), "m2", {"content": "other user"})
+
+    context = await load_context(store, "u1", query="tea")
+
+    assert [m.key for m in context.memories] == ["m1"]
+    assert context.format_profile() == {"name": "Ana"}
+    # Todos written before they were indexed are indexed on first read
+    assert context.format_todos() == "- [t1]: {'task': 'buy milk'}"
+    assert context.format_instructions() == {"instruction": "be brief"}
+    assert "<memories>" in context.format_memories()
+
+
+@pytest.mark.asyncio
+async def test_load_context_empty_store():
+    context = await load_context(InMemoryStore(), "nobody", query="")
+
+    assert context.format_memories() == ""
+    assert context.format_profile() == ""
+    assert context.format_todos() == ""
+    assert context.format_instructions() == ""
+
+
+@pytest.mark.asyncio
+async def test_load_context_latency_tracks_slowest_read():
+    latency, todo_latency = 0.1, 0.3
+    store = SlowStore(latency, todo_latency)
+    # The first read creates the user's todo indexes
+    await load_context(store, "u1", query="hello")
+    store.round_trips = 0
+
+    start = time.perf_counter()
+    await load_context(store, "u1", query="hello")
+    batched = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for namespace in ("memories", "profile", "todos", "instructions"):
+        await store.asearch((namespace, "u1"), query="", limit=10)
+    sequential = time.perf_counter() - start
+
+    # One batch, and the todo index read concurrently with it
+    assert store.round_trips == 2 + 4
+    # Bounded by the slow todo read alone, not by the todo read plus the batch
+    assert todo_latency <= batched < todo_latency + latency / 2
+    assert sequential >= 3 * latency + todo_latency
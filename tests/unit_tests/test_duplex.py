@@ -0,0 +1,172 @@
+import sys
+import threading
+import time
+from typing import Any
+
+import pytest
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.store.memory import InMemoryStore
+
+from maltai_agent import tracing
+from maltai_agent.audio import AudioProcessor
+from maltai_agent.duplex import DuplexSession
+from maltai_agent.models import ModelRegistry
+from maltai_agent.vad import iter_blocks
+
+from .synthetic_audio import SAMPLE_RATE, synthesize_script
+
+SPEEDUP = 4
+"""Simulated audio is delivered this many times faster than real time."""
+
+
+def live_blocks(script, block_size: int = 1024):
+    """Deliver blocks of a synthetic recording at a steady pace, like a microphone."""
+    for block in iter_blocks(synthesize_script(script), block_size):
+        time.sleep(len(block) / SAMPLE_RATE / SPEEDUP)
+        yield block
+
+
+class FakeTranscriber:
+    def __init__(self) -> None:
+        self.seconds: list[float] = []
+
+    def transcribe(self, audio, sample_rate: int) -> str:
+        self.seconds.append(sum(len(piece) for piece in audio) / sample_rate)
+        return f"utterance {len(self.seconds)}"
+
+
+class FakePlayer:
+    """Play for a fixed time, unless stopped, and record what happened."""
+
+    def __init__(self, duration: float, stop_delay: float = 0.0) -> None:
+        self.duration = duration
+        # Time a stopped playback takes to return, like a device draining its buffer
+        self.stop_delay = stop_delay
+        self.played: list[tuple[bytes, bool]] = []
+        self._stop = threading.Event()
+
+    def play(self, audio: bytes) -> None:
+        stopped = self._stop.wait(self.duration)
+        if stopped:
+            time.sleep(self.stop_delay)
+        self.played.append((audio, stopped))
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def resume(self) -> None:
+        self._stop.clear()
+
+
+def processor() -> AudioProcessor:
+    audio = AudioProcessor(transcriber=FakeTranscriber())
+    audio.synthesize = lambda text, tts_backend="elevenlabs": text.encode()
+    return audio
+
+
+# The user speaks, waits for the reply and talks again while it is playing
+SCRIPT = [
+    ("silence", 0.4), ("speech", 0.8), ("silence", 2.0),
+    ("speech", 0.8), ("silence", 1.2),
+]
+
+
+def test_barge_in_stops_reply_and_drops_queue():
+    # The reply keeps playing for a while after it was stopped, but is interrupted once
+    player = FakePlayer(duration=3.0, stop_delay=0.3)
+    session = DuplexSession(processor(), live_blocks(SCRIPT), player)
+
+    with session:
+        assert session.record_audio().content == "utterance 1"
+        session.speak_response("Here is a long answer.")
+        session.speak_response("And **more** of it.")
+        start = time.perf_counter()
+        second = session.record_audio()
+        elapsed = time.perf_counter() - start
+
+    assert second.content == "utterance 2"
+    # The next turn was transcribed long before the reply would have ended
+    assert elapsed < player.duration
+    assert player.played == [(b"Here is a long answer.", True)]
+    assert session.interrupted == ["Here is a long answer.", "And more of it."]
+    assert session.barge_ins == 1
+    # The interrupting utterance is transcribed whole, with pre-roll and post-roll
+    assert session.processor.transcriber.seconds[1] == pytest.approx(0.8 + 0.2 + 0.15, abs=0.1)
+
+
+def test_barge_in_before_playback_starts_is_not_lost(monkeypatch):
+    player = FakePlayer(duration=1.0)
+    session = DuplexSession(processor(), live_blocks([("silence", 2.0)]), player)
+    span = tracing.span
+
+    def barge_in_first(name: str, **attrs):
+        # The sentence is marked as playing, but the player has not started yet
+        if not player.played and not session.barge_ins:
+            session.barge_in()
+        return span(name, **attrs)
+
+    monkeypatch.setattr(tracing, "span", barge_in_first)
+    with session:
+        session.speak_response("Interrupted before it starts.")
+        assert session.wait_until_quiet(timeout=5)
+        session.speak_response("The next reply.")
+        assert session.wait_until_quiet(timeout=5)
+
+    assert player.played == [(b"Interrupted before it starts.", True), (b"The next reply.", False)]
+    assert session.interrupted == ["Interrupted before it starts."]
+
+
+def test_next_turn_is_captured_while_reply_plays():
+    player = FakePlayer(duration=1.5)
+    session = DuplexSession(processor(), live_blocks(SCRIPT), player, barge_in=False)
+
+    with session:
+        session.record_audio()
+        session.speak_response("Here is a long answer.")
+        second = session.record_audio()
+        still_speaking = session.speaking
+        assert session.wait_until_quiet(timeout=5)
+
+    assert second.content == "utterance 2"
+    assert still_speaking
+    assert player.played == [(b"Here is a long answer.", False)]
+    assert session.barge_ins == 0
+
+
+def test_ended_input_returns_empty_turns():
+    session = DuplexSession(processor(), live_blocks([("silence", 0.5)]), FakePlayer(0.1))
+    with session:
+        assert session.record_audio().content == ""
+        assert session.record_audio().content == ""
+        assert session.closed
+
+
+class FakeModel(GenericFakeChatModel):
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self
+
+
+@pytest.mark.asyncio
+async def test_graph_turns_do_not_wait_for_playback(monkeypatch):
+    import maltai_agent  # noqa: F401
+
+    graph_module = sys.modules["maltai_agent.graph"]
+    replies = iter([AIMessage(content="Sure, here is a long answer."), AIMessage(content="Okay.")])
+    monkeypatch.setattr(graph_module, "models", ModelRegistry(lambda model, provider: FakeModel(messages=replies)))
+    graph = graph_module.builder.compile(store=InMemoryStore())
+    player = FakePlayer(duration=3.0)
+    session = DuplexSession(processor(), live_blocks(SCRIPT), player)
+    config = {"configurable": {"user_id": "u1", "audio_processor": session}}
+
+    with session:
+        first = await graph.ainvoke({"messages": []}, config)
+        # The turn ended while its reply is still playing
+        assert session.speaking
+        second = await graph.ainvoke({"messages": first["messages"]}, config)
+
+    assert [m.content for m in second["messages"]] == [
+        "utterance 1", "Sure, here is a long answer.", "utterance 2", "Okay."
+    ]
+    assert session.barge_ins == 1
+    assert player.played[0] == (b"Sure, here is a long answer.", True)
@@ -0,0 +1,148 @@
+import hashlib
+import threading
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+from langgraph.store.memory import InMemoryStore
+
+from maltai_agent.embeddings import CachedEmbeddings
+
+DIMS = 8
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic fake embedder that records every text it embeds."""
+
+    model = "fake-embedding"
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def _vector(self, text: str) -> list[float]:
+        digest = hashlib.sha256(text.encode()).digest()
+        return (np.frombuffer(digest[:DIMS], dtype=np.uint8) / 255.0).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    @property
+    def embedded(self) -> int:
+        return sum(len(call) for call in self.calls)
+
+
+def test_repeated_texts_are_embedded_once():
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner)
+
+    first = cache.embed_documents(["a", "b", "a"])
+    second = cache.embed_documents(["b", "c"])
+    query = cache.embed_query("a")
+
+    assert inner.calls == [["a", "b"], ["c"]]
+    assert first[0] == first[2] == query
+    assert np.allclose(second[0], inner._vector("b"))
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_keys_include_the_model():
+    inner = CountingEmbeddings()
+    small = CachedEmbeddings(inner, model="small")
+    large = CachedEmbeddings(inner, model="large")
+    assert small.key("hello") != large.key("hello")
+
+
+def test_least_recently_used_entries_are_evicted():
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, max_entries=2)
+    cache.embed_documents(["a", "b"])
+    cache.embed_query("a")  # "b" is now the least recently used
+    cache.embed_query("c")
+    cache.embed_documents(["a", "b"])
+
+    assert cache.stats()["entries"] == 2
+    assert inner.calls == [["a", "b"], ["c"], ["b"]]
+
+
+def test_cache_persists_to_disk(tmp_path):
+    path = str(tmp_path / "embeddings.bin")
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, path=path, save_every=1000)
+    vectors = cache.embed_documents(["one", "two"])
+    cache.save()
+
+    reloaded = CachedEmbeddings(inner, path=path)
+    assert reloaded.stats()["entries"] == 2
+    assert np.allclose(reloaded.embed_documents(["one", "two"]), vectors)
+    assert inner.embedded == 2
+    assert reloaded.hits == 2
+
+
+def test_saves_write_separate_temporary_files(tmp_path):
+    path = tmp_path / "embeddings.bin"
+    # Another process is halfway through writing the classic temporary file
+    other = tmp_path / "embeddings.bin.tmp"
+    other.write_bytes(b"partial")
+    cache = CachedEmbeddings(CountingEmbeddings(), path=str(path))
+    cache.embed_documents(["one", "two"])
+
+    threads = [threading.Thread(target=cache.save) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert other.read_bytes() == b"partial"
+    assert CachedEmbeddings(CountingEmbeddings(), path=str(path)).stats()["entries"] == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["embeddings.bin", "embeddings.bin.tmp"]
+
+
+@pytest.mark.asyncio
+async def test_async_saves_run_off_the_event_loop(tmp_path, monkeypatch):
+    path = tmp_path / "embeddings.bin"
+    cache = CachedEmbeddings(CountingEmbeddings(), path=str(path), save_every=2)
+    save = cache.save
+    saved_on = []
+
+    def record_save() -> None:
+        saved_on.append(threading.current_thread())
+        save()
+
+    monkeypatch.setattr(cache, "save", record_save)
+    await cache.aembed_documents(["one"])
+    assert saved_on == []
+    await cache.aembed_documents(["two", "three"])
+
+    assert len(saved_on) == 1 and saved_on[0] is not threading.current_thread()
+    assert CachedEmbeddings(CountingEmbeddings(), path=str(path)).stats()["entries"] == 3
+
+
+def test_truncated_cache_file_keeps_complete_records(tmp_path):
+    path = tmp_path / "embeddings.bin"
+    cache = CachedEmbeddings(CountingEmbeddings(), path=str(path))
+    cache.embed_documents(["one", "two"])
+    cache.save()
+    path.write_bytes(path.read_bytes()[:-3])
+
+    reloaded = CachedEmbeddings(CountingEmbeddings(), path=str(path))
+    assert reloaded.stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_store_searches_reuse_cached_query_embeddings():
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner)
+    store = InMemoryStore(index={"dims": DIMS, "embed": cache})
+    namespace = ("memories", "user-1")
+
+    await store.aput(namespace, "m1", {"content": "Likes green tea"})
+    await store.aput(namespace, "m1", {"content": "Likes green tea"})
+    for _ in range(3):
+        await store.asearch(namespace, query="what do I like to drink?", limit=5)
+
+    assert inner.embedded == 2
+    assert cache.hits == 3
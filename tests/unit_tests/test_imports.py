@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+IMPORT_BUDGET_S = 2.5
+"""Cumulative ``-X importtime`` budget for ``import maltai_agent``; it took 3.8 s when clients were created eagerly."""
+
+LAZY_MODULES = ("openai", "elevenlabs", "sounddevice", "scipy", "numpy", "dotenv", "langchain_openai")
+
+
+def import_in_subprocess(code: str) -> subprocess.CompletedProcess:
+    # No API keys: importing must not create clients or reach the network
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if key not in ("OPENAI_API_KEY", "ELEVENLABS_API_KEY")
+    }
+    env["PYTHONPATH"] = os.pathsep.join(sys.path)
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+
+def cumulative_import_s(report: str, module: str) -> float:
+    for line in report.splitlines():
+        if line.startswith("import time:") and line.rsplit("|", 1)[-1].strip() == module:
+            return int(line.split("|")[1]) / 1e6
+    raise AssertionError(f"{module} not in the import report")
+
+
+def test_import_loads_no_clients_or_audio_modules():
+    result = import_in_subprocess(
+        f"import sys, maltai_agent; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_import_time_budget():
+    # Best of three, to tolerate a noisy machine
+    times = [cumulative_import_s(import_in_subprocess("import maltai_agent").stderr, "maltai_agent") for _ in range(3)]
+    assert min(times) < IMPORT_BUDGET_S, f"import maltai_agent took {min(times):.2f}s"
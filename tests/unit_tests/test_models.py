@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+import pytest
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel
+
+from maltai_agent.models import ModelRegistry, tool_name
+
+
+class AddTodo(BaseModel):
+    """Add a todo."""
+
+    task: str
+
+
+def upsert_memory(content: str) -> str:
+    """Save a memory."""
+    return content
+
+
+class ToolFakeModel(GenericFakeChatModel):
+    """Fake chat model that records the tools bound to it."""
+
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self.bind(tools=[tool_name(tool) for tool in tools], **kwargs)
+
+
+class CountingFactory:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.calls: list[tuple[str, Optional[str]]] = []
+        self.delay = delay
+
+    def __call__(self, model: str, provider: Optional[str]) -> ToolFakeModel:
+        self.calls.append((model, provider))
+        time.sleep(self.delay)
+        return ToolFakeModel(messages=iter([AIMessage(content="hi")] * 100))
+
+
+def test_models_are_created_once_per_provider_and_model():
+    factory = CountingFactory()
+    registry = ModelRegistry(factory)
+
+    first = registry.model("openai/gpt-4o-mini")
+    assert registry.model("openai/gpt-4o-mini") is first
+    assert registry.model("anthropic/claude") is not first
+    assert factory.calls == [("gpt-4o-mini", "openai"), ("claude", "anthropic")]
+
+
+def test_toolsets_share_their_model():
+    factory = CountingFactory()
+    registry = ModelRegistry(factory)
+
+    bound = registry.get("openai/gpt-4o-mini", [upsert_memory, AddTodo])
+    assert registry.get("openai/gpt-4o-mini", [upsert_memory, AddTodo]) is bound
+    assert bound.kwargs["tools"] == ["upsert_memory", "AddTodo"]
+
+    other = registry.get("openai/gpt-4o-mini", [AddTodo])
+    assert other is not bound
+    assert other.bound is bound.bound
+    assert registry.get("openai/gpt-4o-mini") is registry.model("openai/gpt-4o-mini")
+    assert len(factory.calls) == 1
+
+
+def test_concurrent_threads_get_one_instance():
+    factory = CountingFactory(delay=0.01)
+    registry = ModelRegistry(factory)
+
+    barrier = threading.Barrier(8)
+
+    def get():
+        barrier.wait()
+        return registry.get("openai/gpt-4o-mini", [AddTodo])
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: get(), range(8)))
+
+    assert len({id(result) for result in results}) == 1
+    assert len(factory.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_turns_share_the_bound_model():
+    factory = CountingFactory()
+    registry = ModelRegistry(factory)
+
+    async def turn() -> str:
+        model = registry.get("openai/gpt-4o-mini", [upsert_memory])
+        await asyncio.sleep(0)
+        return (await model.ainvoke("hello")).content
+
+    assert await asyncio.gather(*(turn() for _ in range(20))) == ["hi"] * 20
+    assert len(factory.calls) == 1
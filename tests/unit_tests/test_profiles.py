@@ -0,0 +1,162 @@
+import asyncio
+import gc
+
+import pytest
+from langgraph.store.base import PutOp
+from langgraph.store.memory import InMemoryStore
+
+from maltai_agent.profiles import ProfileChange, ProfileStore, apply_changes
+from maltai_agent.tools.dispatch import dispatch_tool_calls
+
+
+class SlowStore(InMemoryStore):
+    """In-memory store with latency that counts the batches containing writes."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+
+    async def abatch(self, ops):
+        ops = list(ops)
+        await asyncio.sleep(0.005)
+        self.writes += any(isinstance(op, PutOp) for op in ops)
+        return self.batch(ops)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_updates_are_not_lost():
+    store = SlowStore()
+    profiles = ProfileStore(store, "u1")
+    interests = [f"topic {i}" for i in range(40)]
+
+    await asyncio.gather(
+        profiles.update([ProfileChange("name", "Ana")]),
+        profiles.update([ProfileChange("location", "Lisbon")]),
+        profiles.update([ProfileChange("preferences", {"units": "metric"}, "update")]),
+        profiles.update([ProfileChange("preferences", {"tone": "brief"}, "update")]),
+        *(profiles.update([ProfileChange("interests", [interest], "add")]) for interest in interests),
+    )
+
+    profile = await profiles.get()
+    assert profile.name == "Ana" and profile.location == "Lisbon"
+    assert profile.preferences == {"units": "metric", "tone": "brief"}
+    assert sorted(profile.interests) == sorted(interests)
+    # Every update started together is written at once
+    assert store.writes == 1
+
+
+@pytest.mark.asyncio
+async def test_updates_arriving_during_a_write_are_coalesced():
+    store = SlowStore()
+    profiles = ProfileStore(store, "u1")
+
+    async def later(i: int) -> None:
+        await asyncio.sleep(0.002 * i)
+        await profiles.update([ProfileChange("interests", [f"topic {i}"], "add")])
+
+    await asyncio.gather(*(later(i) for i in range(20)))
+
+    assert len((await profiles.get()).interests) == 20
+    assert store.writes < 20
+
+
+@pytest.mark.asyncio
+async def test_invalid_update_fails_alone():
+    profiles = ProfileStore(InMemoryStore(), "u1")
+
+    results = await asyncio.gather(
+        profiles.update([ProfileChange("name", "Ana")]),
+        profiles.update([ProfileChange("age", 30)]),
+        profiles.update([ProfileChange("name", "Ana"), ProfileChange("interests", ["x"], "update")]),
+        return_exceptions=True,
+    )
+
+    assert results[0].name == "Ana"
+    assert isinstance(results[1], ValueError) and isinstance(results[2], ValueError)
+    assert (await profiles.get()).interests == []
+
+
+class FailingStore(InMemoryStore):
+    async def abatch(self, ops):
+        ops = list(ops)
+        await asyncio.sleep(0)
+        if any(isinstance(op, PutOp) for op in ops):
+            raise OSError("disk full")
+        return self.batch(ops)
+
+
+@pytest.mark.asyncio
+async def test_failed_write_fails_every_coalesced_update():
+    loop = asyncio.get_running_loop()
+    unretrieved = []
+    loop.set_exception_handler(lambda loop, context: unretrieved.append(context))
+    profiles = ProfileStore(FailingStore(), "u1")
+
+    results = await asyncio.gather(
+        *(profiles.update([ProfileChange("interests", [f"topic {i}"], "add")]) for i in range(3)),
+        return_exceptions=True,
+    )
+    assert [type(result) for result in results] == [OSError] * 3
+    del results
+    # Unretrieved exceptions are reported when their futures are collected
+    for _ in range(3):
+        await asyncio.sleep(0)
+        gc.collect()
+    loop.set_exception_handler(None)
+
+    assert unretrieved == []
+
+
+@pytest.mark.asyncio
+async def test_cancelled_write_leaves_the_others_to_write():
+    profiles = ProfileStore(SlowStore(), "u1")
+    first = asyncio.create_task(profiles.update([ProfileChange("name", "Ana")]))
+    second = asyncio.create_task(profiles.update([ProfileChange("location", "Lisbon")]))
+    await asyncio.sleep(0.002)
+    first.cancel()
+
+    profile = await second
+    assert first.cancelled()
+    assert profile.location == "Lisbon" and profile.name is None
+
+
+def test_list_and_dict_operations():
+    profile = apply_changes(
+        {"interests": ["chess"], "preferences": {"units": "metric", "tone": "brief"}},
+        [
+            ProfileChange("interests", ["go", "chess", "go"], "add"),
+            ProfileChange("interests", "chess", "remove"),
+            ProfileChange("preferences", {"tone": "playful", "language": "pt"}, "update"),
+            ProfileChange("preferences", ["units"], "remove"),
+        ],
+    )
+
+    assert profile["interests"] == ["go"]
+    assert profile["preferences"] == {"tone": "playful", "language": "pt"}
+    with pytest.raises(ValueError):
+        apply_changes({}, [ProfileChange("interests", 3)])
+
+
+@pytest.mark.asyncio
+async def test_profile_tool_calls_of_one_message_all_apply():
+    store = InMemoryStore()
+    config = {"configurable": {"user_id": "u1"}}
+
+    results = await dispatch_tool_calls(
+        [
+            {"name": "UpdateProfile", "args": {"name": "Ana"}, "id": "c1"},
+            {"name": "UpdateProfile", "args": {"add_interests": ["jazz"]}, "id": "c2"},
+            {"name": "UpdateProfile", "args": {"preferences": {"units": "metric"}}, "id": "c3"},
+        ],
+        config=config,
+        store=store,
+    )
+
+    assert [result.content for result in results] == [
+        "Updated profile: name",
+        "Updated profile: interests",
+        "Updated profile: preferences",
+    ]
+    profile = (await store.aget(("profile", "u1"), "profile")).value
+    assert profile["name"] == "Ana" and profile["interests"] == ["jazz"]
+    assert profile["preferences"] == {"units": "metric"}
@@ -0,0 +1,122 @@
+from datetime import datetime
+
+import pytest
+from langgraph.store.memory import InMemoryStore
+
+from maltai_agent import prompts
+from maltai_agent.prompt_layout import PromptRenderer, VersionedStore
+from maltai_agent.todos import ToDo, TodoList
+
+
+class CountingStore(InMemoryStore):
+    """In-memory store that records the namespaces of every search."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.searched: list[str] = []
+
+    async def abatch(self, ops):
+        ops = list(ops)
+        self.searched += [op.namespace_prefix[0] for op in ops if hasattr(op, "namespace_prefix")]
+        return self.batch(ops)
+
+
+async def seed(store) -> None:
+    await store.aput(("instructions", "u1"), "instructions", {"instruction": "be brief"})
+    await store.aput(("profile", "u1"), "profile", {"name": "Ana"})
+    await store.aput(("todos", "u1"), "t1", {"task": "buy milk"})
+    await store.aput(("memories", "u1"), "m1", {"content": "likes tea"})
+
+
+@pytest.mark.asyncio
+async def test_versioned_store_counts_writes_per_namespace():
+    store = VersionedStore(InMemoryStore())
+    await store.aput(("todos", "u1"), "t1", {"task": "a"})
+    await store.aput(("todos", "u1"), "t2", {"task": "b"})
+    await store.adelete(("profile", "u1"), "profile")
+    await store.aget(("memories", "u1"), "m1")
+
+    assert store.version(("todos", "u1")) == 2
+    assert store.version(("profile", "u1")) == 1
+    assert store.version(("memories", "u1")) == 0
+    assert [item.key for item in await store.asearch(("todos", "u1"))] == ["t1", "t2"]
+
+
+@pytest.mark.asyncio
+async def test_sections_are_cached_until_their_namespace_changes():
+    inner = CountingStore()
+    store = VersionedStore(inner)
+    await seed(store)
+    renderer = PromptRenderer()
+    now = datetime(2024, 5, 1, 12, 30, 15)
+
+    first, metrics = await renderer.render(store, prompts.SYSTEM_PROMPT, "u1", query="tea", now=now)
+    assert (metrics.cache_hits, metrics.cache_lookups) == (0, 3)
+    assert "be brief" in first and "Ana" in first and "buy milk" in first
+    assert first.rstrip().endswith("Current Time: 2024-05-01T12:30")
+
+    inner.searched.clear()
+    second, metrics = await renderer.render(store, prompts.SYSTEM_PROMPT, "u1", query="tea", now=now)
+    assert second == first
+    assert metrics.cache_hit_rate == 1.0
+    assert metrics.prefix_stability == 1.0
+    # Only the query-dependent memories are read again
+    assert inner.searched == ["memories"]
+
+    await TodoList(store, "u1").add(ToDo(task="call mom"))
+    third, metrics = await renderer.render(store, prompts.SYSTEM_PROMPT, "u1", query="tea", now=now)
+    assert "call mom" in third
+    assert (metrics.cache_hits, metrics.cache_lookups) == (2, 3)
+    # Instructions and profile come before the todos, so they stay in the stable prefix
+    assert third[: metrics.stable_prefix_chars] == first[: metrics.stable_prefix_chars]
+    assert "Ana" in third[: metrics.stable_prefix_chars]
+    assert "call mom" not in third[: metrics.stable_prefix_chars]
+
+
+@pytest.mark.asyncio
+async def test_time_only_changes_the_end_of_the_prompt():
+    store = VersionedStore(InMemoryStore())
+    await seed(store)
+    renderer = PromptRenderer()
+
+    first, _ = await renderer.render(
+        store, prompts.SYSTEM_PROMPT, "u1", query="tea", summary="talked about tea", now=datetime(2024, 5, 1, 12, 30)
+    )
+    second, metrics = await renderer.render(
+        store, prompts.SYSTEM_PROMPT, "u1", query="tea", summary="talked about tea", now=datetime(2024, 5, 1, 12, 31)
+    )
+
+    assert first != second
+    assert second.index("Current Time:") < metrics.stable_prefix_chars
+    assert "talked about tea" in second[: metrics.stable_prefix_chars]
+    assert metrics.prefix_stability > 0.9
+
+
+@pytest.mark.asyncio
+async def test_plain_store_is_not_cached():
+    store = InMemoryStore()
+    await seed(store)
+    renderer = PromptRenderer()
+
+    await renderer.render(store, prompts.SYSTEM_PROMPT, "u1", query="tea")
+    await store.aput(("profile", "u1"), "profile", {"name": "Bea"})
+    prompt, metrics = await renderer.render(store, prompts.SYSTEM_PROMPT, "u1", query="tea")
+
+    assert metrics.cache_lookups == 0
+    assert "Bea" in prompt
+
+
+@pytest.mark.asyncio
+async def test_versioned_store_creates_store_on_first_use():
+    created = []
+
+    def factory():
+        created.append(InMemoryStore())
+        return created[-1]
+
+    store = VersionedStore(factory)
+    assert not created
+    await store.aput(("todos", "u1"), "t1", {"task": "a"})
+    assert len(created) == 1
+    assert store.store is created[0]
+    assert (await store.aget(("todos", "u1"), "t1")).value == {"task": "a"}
@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+import pytest
+
+from maltai_agent.speech import speak_stream, split_sentences
+
+RESPONSE = (
+    "Sure, I added that to your list. "
+    "You now have three open todos, the first one is due tomorrow. "
+    "Anything else I can help with?"
+)
+
+
+async def fake_llm(text: str, delay: float):
+    """Yield the response word by word, like a streaming chat model."""
+    for word in text.split(" "):
+        await asyncio.sleep(delay)
+        yield word + " "
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+async def tokens_from(*parts: str):
+    for part in parts:
+        yield part
+
+
+@pytest.mark.asyncio
+async def test_split_sentences_on_punctuation():
+    chunks = await collect(split_sentences(fake_llm(RESPONSE, 0)))
+    assert chunks == [
+        "Sure, I added that to your list.",
+        "You now have three open todos, the first one is due tomorrow.",
+        "Anything else I can help with?",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_split_sentences_keeps_abbreviations_and_cleans_markdown():
+    chunks = await collect(
+        split_sentences(tokens_from("Dr. ", "Smith is **here**. ", "Bye"))
+    )
+    assert chunks == ["Dr. Smith is here.", "Bye"]
+
+
+@pytest.mark.asyncio
+async def test_split_sentences_breaks_long_sentences_at_clauses():
+    text = "one, two, three, four, five, six, seven, eight"
+    chunks = await collect(split_sentences(tokens_from(text), max_chars=20))
+    assert all(len(chunk) <= 20 for chunk in chunks)
+    assert " ".join(chunks) == text
+
+
+@pytest.mark.asyncio
+async def test_speak_stream_starts_before_generation_finishes():
+    token_delay, tts_delay = 0.01, 0.05
+    played: list[tuple[float, bytes]] = []
+
+    async def synthesize(text: str) -> bytes:
+        await asyncio.sleep(tts_delay)
+        return text.encode()
+
+    async def play(audio: bytes) -> None:
+        played.append((time.perf_counter(), audio))
+        await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    spoken = await speak_stream(
+        split_sentences(fake_llm(RESPONSE, token_delay)), synthesize, play
+    )
+
+    generation = token_delay * len(RESPONSE.split(" "))
+    first_sentence = token_delay * len("Sure, I added that to your list.".split(" "))
+    first_audio = played[0][0] - start
+
+    assert [audio.decode() for _, audio in played] == spoken
+    assert len(spoken) == 3
+    assert first_audio < generation
+    assert first_audio < first_sentence + tts_delay + 0.05
+
+
+@pytest.mark.asyncio
+async def test_speak_stream_propagates_source_errors():
+    async def broken():
+        yield "Hello there. "
+        raise RuntimeError("stream failed")
+
+    async def synthesize(text: str) -> bytes:
+        return text.encode()
+
+    async def play(audio: bytes) -> None:
+        return None
+
+    with pytest.raises(RuntimeError):
+        await speak_stream(split_sentences(broken()), synthesize, play)
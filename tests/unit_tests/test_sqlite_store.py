@@ -0,0 +1,173 @@
+import hashlib
+from datetime import datetime
+
+import numpy as np
+import pytest
+from langgraph.store.memory import InMemoryStore
+
+from maltai_agent.context import load_context
+from maltai_agent.sqlite_store import SQLiteVectorStore
+
+DIMS = 32
+
+
+def embed_words(texts: list[str]) -> list[list[float]]:
+    """Bag-of-words embedding: texts sharing words point the same way."""
+    vectors = np.zeros((len(texts), DIMS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().replace('"', " ").split():
+            bucket = int.from_bytes(hashlib.sha256(word.encode()).digest()[:4], "little")
+            vectors[row, bucket % DIMS] += 1.0
+    return vectors.tolist()
+
+
+INDEX = {"dims": DIMS, "embed": embed_words, "fields": ["content"]}
+MEMORIES = {
+    "m1": "likes green tea in the morning",
+    "m2": "works as a nurse on night shifts",
+    "m3": "has a dog called Rex",
+    "m4": "drinks coffee with oat milk",
+}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "store.db")
+
+
+def test_put_get_delete_and_reopen(db_path):
+    with SQLiteVectorStore(db_path) as store:
+        store.put(("profile", "u1"), "profile", {"name": "Ana", "tags": ["a", "b"]})
+        store.put(("todos", "u1"), "t1", {"task": "call mum", "deadline": datetime(2025, 1, 2)})
+        store.put(("todos", "u1"), "t2", {"task": "gone"})
+        store.delete(("todos", "u1"), "t2")
+        created = store.get(("profile", "u1"), "profile").created_at
+        store.put(("profile", "u1"), "profile", {"name": "Ana Maria"})
+
+    with SQLiteVectorStore(db_path) as store:
+        profile = store.get(("profile", "u1"), "profile")
+        assert profile.value == {"name": "Ana Maria"}
+        assert profile.created_at == created
+        assert profile.updated_at >= created
+        assert store.get(("todos", "u1"), "t1").value["deadline"] == "2025-01-02T00:00:00"
+        assert store.get(("todos", "u1"), "t2") is None
+        assert store.get(("nobody",), "x") is None
+
+
+def test_search_filters_and_pagination(db_path):
+    with SQLiteVectorStore(db_path) as store:
+        for i in range(5):
+            status = "done" if i % 2 else "not started"
+            store.put(("todos", "u1"), f"t{i}", {"task": f"task {i}", "status": status, "n": i})
+        store.put(("todos", "u2"), "other", {"task": "other", "status": "done", "n": 9})
+
+        done = store.search(("todos", "u1"), filter={"status": "done"})
+        assert sorted(item.key for item in done) == ["t1", "t3"]
+        assert [i.key for i in store.search(("todos", "u1"), filter={"n": {"$gte": 3}})] == [
+            "t4",
+            "t3",
+        ]
+        assert len(store.search(("todos",), limit=10)) == 6
+        first, second = store.search(("todos", "u1"), limit=2), store.search(
+            ("todos", "u1"), limit=2, offset=2
+        )
+        assert not {i.key for i in first} & {i.key for i in second}
+
+
+def test_list_namespaces(db_path):
+    with SQLiteVectorStore(db_path) as store:
+        store.put(("memories", "u1"), "a", {"x": 1})
+        store.put(("memories", "u2"), "a", {"x": 1})
+        store.put(("todos", "u1"), "a", {"x": 1})
+
+        assert store.list_namespaces(prefix=("memories",)) == [("memories", "u1"), ("memories", "u2")]
+        assert store.list_namespaces(suffix=("u1",)) == [("memories", "u1"), ("todos", "u1")]
+        assert store.list_namespaces(max_depth=1) == [("memories",), ("todos",)]
+
+
+def test_semantic_search_matches_in_memory_store(db_path):
+    expected_store = InMemoryStore(index=INDEX)
+    with SQLiteVectorStore(db_path, index=INDEX, initial_capacity=2) as store:
+        for target in (store, expected_store):
+            for key, content in MEMORIES.items():
+                target.put(("memories", "u1"), key, {"content": content})
+            target.put(("memories", "u2"), "other", {"content": "likes green tea too"})
+            target.put(("memories", "u1"), "unindexed", {"content": "tea"}, index=False)
+
+        for query in ("green tea", "a dog", "coffee with milk"):
+            results = store.search(("memories", "u1"), query=query, limit=3)
+            expected = expected_store.search(("memories", "u1"), query=query, limit=3)
+            assert [r.key for r in results] == [r.key for r in expected]
+            assert [r.score for r in results] == pytest.approx([r.score for r in expected])
+
+        # Items without a vector fill up the remaining slots without a score
+        everything = store.search(("memories", "u1"), query="tea", limit=10)
+        assert everything[-1].key == "unindexed" and everything[-1].score is None
+
+
+def test_semantic_pages_include_unindexed_items_once(db_path):
+    with SQLiteVectorStore(db_path, index=INDEX) as store:
+        for key, content in MEMORIES.items():
+            store.put(("memories", "u1"), key, {"content": content})
+        for i in range(3):
+            store.put(("memories", "u1"), f"plain{i}", {"content": "tea"}, index=False)
+
+        pages = [
+            store.search(("memories", "u1"), query="green tea", limit=3, offset=offset)
+            for offset in (0, 3, 6)
+        ]
+
+    keys = [item.key for page in pages for item in page]
+    assert sorted(keys) == sorted([*MEMORIES, "plain0", "plain1", "plain2"])
+    assert [item.score is None for page in pages for item in page] == [False] * 4 + [True] * 3
+
+
+def test_vectors_persist_and_rows_are_reused(db_path):
+    with SQLiteVectorStore(db_path, index=INDEX) as store:
+        for key, content in MEMORIES.items():
+            store.put(("memories", "u1"), key, {"content": content})
+        store.put(("memories", "u1"), "m3", {"content": "has a cat called Tom"})
+        store.delete(("memories", "u1"), "m2")
+        store.put(("memories", "u1"), "m5", {"content": "plays the violin"})
+        rows_used = int((store._row_item >= 0).sum())
+
+    with SQLiteVectorStore(db_path, index=INDEX) as store:
+        assert int((store._row_item >= 0).sum()) == rows_used == 4
+        assert store.search(("memories", "u1"), query="cat", limit=1)[0].key == "m3"
+        assert store.search(("memories", "u1"), query="violin", limit=1)[0].key == "m5"
+
+
+def test_failed_write_returns_its_vector_rows(db_path):
+    with SQLiteVectorStore(db_path, index=INDEX) as store:
+        store.put(("memories", "u1"), "m1", {"content": MEMORIES["m1"]})
+        free = sorted(store._free)
+        store.conn.execute(
+            "CREATE TEMP TRIGGER fail BEFORE INSERT ON vectors BEGIN SELECT RAISE(ABORT, 'disk full'); END"
+        )
+        with pytest.raises(Exception, match="disk full"):
+            store.put(("memories", "u1"), "m2", {"content": MEMORIES["m2"]})
+
+        assert sorted(store._free) == free
+        assert store.get(("memories", "u1"), "m2") is None
+
+
+def test_dimension_mismatch_is_rejected(db_path):
+    SQLiteVectorStore(db_path, index=INDEX).close()
+    with pytest.raises(ValueError):
+        SQLiteVectorStore(db_path, index={**INDEX, "dims": DIMS * 2})
+
+
+@pytest.mark.asyncio
+async def test_async_api_serves_turn_context(db_path):
+    with SQLiteVectorStore(db_path, index=INDEX) as store:
+        for key, content in MEMORIES.items():
+            await store.aput(("memories", "u1"), key, {"content": content})
+        await store.aput(("profile", "u1"), "profile", {"name": "Ana"})
+        await store.aput(("todos", "u1"), "t1", {"task": "buy milk"})
+
+        context = await load_context(store, "u1", query="green tea", memory_limit=2)
+
+        assert context.memories[0].key == "m1"
+        assert len(context.memories) == 2
+        assert context.format_profile() == {"name": "Ana"}
+        assert (await store.aget(("todos", "u1"), "t1")).value == {"task": "buy milk"}
@@ -0,0 +1,179 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from maltai_agent import stt
+from maltai_agent.audio import AudioProcessor
+from maltai_agent.stt import (
+    IncrementalTranscriber,
+    LocalWhisperTranscriber,
+    WhisperAPITranscriber,
+    load_local_model,
+    stitch_transcripts,
+)
+from maltai_agent.vad import Endpointer, EnergyVAD, VADConfig, iter_blocks
+
+from .synthetic_audio import SAMPLE_RATE, synthesize_script
+
+# Three phrases separated by pauses that are longer than the cut threshold
+# but shorter than the endpointing hangover. Each burst of speech is a "word"
+# whose name encodes its duration.
+SCRIPT = [
+    ("silence", 0.5),
+    ("speech", 0.3), ("silence", 0.12), ("speech", 0.5),
+    ("silence", 0.45),
+    ("speech", 0.4), ("silence", 0.12), ("speech", 0.3),
+    ("silence", 0.45),
+    ("speech", 0.5), ("silence", 0.12), ("speech", 0.6),
+    ("silence", 1.5),
+]
+EXPECTED = "w3 w5 w4 w3 w5 w6"
+BLOCK_SECONDS = 1024 / SAMPLE_RATE
+
+
+class FakeTranscriber:
+    """Names each burst of speech after its duration, with simulated latency.
+
+    Latency grows with the amount of audio, like a real STT service.
+    """
+
+    def __init__(self, base: float = 0.02, per_second: float = 0.06):
+        self.base = base
+        self.per_second = per_second
+        self.calls: list[float] = []
+        self.lock = threading.Lock()
+
+    def transcribe(self, audio, sample_rate: int) -> str:
+        samples = audio if isinstance(audio, np.ndarray) else np.concatenate(audio)
+        seconds = len(samples) / sample_rate
+        with self.lock:
+            self.calls.append(seconds)
+        time.sleep(self.base + self.per_second * seconds)
+
+        speech = EnergyVAD(sample_rate=sample_rate).classify(samples).astype(np.int8)
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], speech, [0]))))
+        durations = (edges[1::2] - edges[::2]) * 0.02
+        return " ".join(f"w{round(d * 10)}" for d in durations if d >= 0.1)
+
+
+def capture(samples, feed, speedup: float):
+    """Feed blocks at ``speedup`` times real time; return when speech ended."""
+    for block in iter_blocks(samples):
+        time.sleep(BLOCK_SECONDS / speedup)
+        if feed(block):
+            return
+    raise AssertionError("utterance never ended")
+
+
+def test_stitch_transcripts_drops_repeated_words():
+    assert stitch_transcripts(["turn on the", "The lights please"]) == "turn on the lights please"
+    assert stitch_transcripts(["hello there", "hello there friend"]) == "hello there friend"
+    assert stitch_transcripts(["one two", "three"]) == "one two three"
+    assert stitch_transcripts([]) == ""
+
+
+def test_incremental_transcript_matches_whole_utterance():
+    samples = synthesize_script(SCRIPT)
+    transcriber = FakeTranscriber(base=0, per_second=0)
+    incremental = IncrementalTranscriber(
+        transcriber, vad_config=VADConfig(hangover_ms=700), min_window_s=0.5
+    )
+    for block in iter_blocks(samples):
+        if incremental.feed(block):
+            break
+
+    assert incremental.finish() == EXPECTED
+    assert len(transcriber.calls) == 3
+
+
+def test_transcript_ready_soon_after_speech_ends():
+    speedup = 4.0
+    samples = synthesize_script(SCRIPT)
+    config = VADConfig(hangover_ms=700)
+
+    # Baseline: transcribe the whole utterance once the endpointer fires
+    transcriber = FakeTranscriber()
+    endpointer = Endpointer(config)
+    capture(samples, endpointer.feed, speedup)
+    start = time.perf_counter()
+    batch_text = transcriber.transcribe(endpointer.utterance_pieces(), SAMPLE_RATE)
+    batch_latency = time.perf_counter() - start
+
+    transcriber = FakeTranscriber()
+    incremental = IncrementalTranscriber(transcriber, vad_config=config, min_window_s=0.5)
+    capture(samples, incremental.feed, speedup)
+    start = time.perf_counter()
+    incremental_text = incremental.finish()
+    incremental_latency = time.perf_counter() - start
+
+    assert batch_text == incremental_text == EXPECTED
+    assert incremental.windows_sent == 3
+    assert incremental_latency < 0.6 * batch_latency
+
+
+class FakeWhisperModel:
+    def __init__(self) -> None:
+        self.calls: list[tuple[np.ndarray, dict]] = []
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append((audio, kwargs))
+        return iter([SimpleNamespace(text=" Call mom"), SimpleNamespace(text=" at noon. ")]), None
+
+
+def test_local_transcriber_takes_int16_pieces(monkeypatch):
+    model = FakeWhisperModel()
+    monkeypatch.setattr(stt, "load_local_model", lambda *args: model)
+    transcriber = LocalWhisperTranscriber("base.en")
+    pieces = [np.array([0, 16384], dtype=np.int16), np.array([-32768], dtype=np.int16)]
+
+    assert transcriber.transcribe(pieces, 16000) == "Call mom at noon."
+    (audio, kwargs), = model.calls
+    assert audio.dtype == np.float32
+    assert audio.tolist() == [0.0, 0.5, -1.0]
+    assert kwargs["language"] == "en" and kwargs["beam_size"] == 1
+
+    # Other rates are resampled to the model's 16 kHz
+    transcriber.transcribe(np.zeros(48000, dtype=np.int16), 48000)
+    assert len(model.calls[-1][0]) == 16000
+
+
+def test_stt_backend_selection(monkeypatch):
+    processor = AudioProcessor()
+    monkeypatch.setattr("maltai_agent.audio.get_openai_client", lambda: None)
+    monkeypatch.setattr("maltai_agent.audio.get_async_openai_client", lambda: None)
+
+    assert isinstance(processor.get_transcriber(), WhisperAPITranscriber)
+    local = processor.get_transcriber(stt_backend="local:small.en")
+    assert isinstance(local, LocalWhisperTranscriber) and local.model == "small.en"
+    assert processor.get_transcriber(stt_backend="local").model == "base.en"
+    with pytest.raises(ValueError):
+        processor.get_transcriber(stt_backend="cloud")
+
+
+def test_local_backend_needs_faster_whisper(monkeypatch):
+    monkeypatch.setitem(sys.modules, "faster_whisper", None)
+    monkeypatch.setattr(stt, "_local_models", {})
+    with pytest.raises(ImportError, match="pip install faster-whisper"):
+        load_local_model("tiny.en")
+
+
+def test_concurrent_first_calls_load_the_model_once(monkeypatch):
+    loaded = []
+
+    def whisper_model(model, **kwargs):
+        time.sleep(0.05)
+        loaded.append(model)
+        return SimpleNamespace(model=model)
+
+    monkeypatch.setitem(sys.modules, "faster_whisper", SimpleNamespace(WhisperModel=whisper_model))
+    monkeypatch.setattr(stt, "_local_models", {})
+    with ThreadPoolExecutor(4) as pool:
+        engines = list(pool.map(lambda _: load_local_model("tiny.en"), range(4)))
+
+    assert loaded == ["tiny.en"]
+    assert all(engine is engines[0] for engine in engines)
@@ -0,0 +1,164 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from langgraph.store.base import PutOp
+from langgraph.store.memory import InMemoryStore
+
+from maltai_agent.sqlite_store import SQLiteVectorStore
+from maltai_agent.todos import ToDo, TodoList, deadline_key
+from maltai_agent.tools.dispatch import dispatch_tool_calls
+
+DAY = datetime(2025, 3, 1, 9, 0)
+
+
+class WriteCountingStore(InMemoryStore):
+    """In-memory store that counts the batches containing writes."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+
+    async def abatch(self, ops):
+        ops = list(ops)
+        self.writes += any(isinstance(op, PutOp) for op in ops)
+        return self.batch(ops)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryStore()
+    else:
+        with SQLiteVectorStore(str(tmp_path / "store.db")) as sqlite_store:
+            yield sqlite_store
+
+
+async def seed(todos: TodoList) -> dict[str, str]:
+    keys = await todos.add_many(
+        [
+            ToDo(task="no deadline"),
+            ToDo(task="in three days", deadline=DAY + timedelta(days=3)),
+            ToDo(task="tomorrow", deadline=DAY + timedelta(days=1)),
+            ToDo(task="also no deadline"),
+            ToDo(task="next week", deadline=DAY + timedelta(days=7)),
+        ]
+    )
+    return dict(zip(["none", "3d", "1d", "none2", "7d"], keys))
+
+
+@pytest.mark.asyncio
+async def test_pages_are_ordered_by_deadline(store):
+    todos = TodoList(store, "u1")
+    await seed(todos)
+
+    tasks, cursor = [], None
+    while True:
+        page = await todos.list(limit=2, cursor=cursor)
+        assert page.total == 5
+        tasks += [item.value["task"] for item in page.items]
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+
+    # Todos without a deadline come last, in the order they were added
+    assert tasks == ["tomorrow", "in three days", "next week", "no deadline", "also no deadline"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_status_change_updates_indexes_in_one_write():
+    store = WriteCountingStore()
+    todos = TodoList(store, "u1")
+    keys = await seed(todos)
+    store.writes = 0
+
+    found = await todos.set_status([keys["1d"], keys["none"], "todo_missing"], "done")
+
+    assert store.writes == 1
+    assert sorted(found) == sorted([keys["1d"], keys["none"]])
+    done = await todos.list("done")
+    assert [item.value["task"] for item in done.items] == ["tomorrow", "no deadline"]
+    assert all(item.value["status"] == "done" for item in done.items)
+    open_todos = await todos.top_open(10)
+    assert [item.value["task"] for item in open_todos] == ["in three days", "next week", "also no deadline"]
+
+    await todos.set_status([keys["3d"]], "in progress")
+    # Open todos of both statuses are merged by deadline
+    assert [item.value["task"] for item in await todos.top_open(2)] == ["in three days", "next week"]
+    assert (await todos.list("in progress")).total == 1
+
+
+@pytest.mark.asyncio
+async def test_due_before_and_status_filters(store):
+    todos = TodoList(store, "u1")
+    keys = await seed(todos)
+    await todos.set_status([keys["3d"]], "done")
+
+    due = await todos.list(["not started", "in progress"], due_before=DAY + timedelta(days=5))
+    assert [item.value["task"] for item in due.items] == ["tomorrow"]
+    assert due.total == 1 and due.next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_adds_are_all_indexed():
+    todos = TodoList(InMemoryStore(), "u1")
+
+    keys = await asyncio.gather(*(todos.add(ToDo(task=f"task {i}")) for i in range(50)))
+
+    assert len(set(keys)) == 50
+    page = await todos.list(limit=100)
+    assert sorted(item.key for item in page.items) == sorted(keys)
+
+
+@pytest.mark.asyncio
+async def test_todos_written_without_index_are_indexed_on_first_read():
+    store = InMemoryStore()
+    await store.aput(("todos", "u1"), "old", {"task": "legacy", "deadline": DAY})
+    todos = TodoList(store, "u1")
+    await todos.add(ToDo(task="new"))
+
+    assert [item.key for item in await todos.top_open(5)][0] == "old"
+
+
+@pytest.mark.asyncio
+async def test_status_indexes_are_not_embedded():
+    embedded = []
+
+    def embed(texts: list[str]) -> list[list[float]]:
+        embedded.extend(texts)
+        return [[1.0, 0.0] for _ in texts]
+
+    todos = TodoList(InMemoryStore(index={"dims": 2, "embed": embed}), "u1")
+    keys = await todos.add_many([ToDo(task="buy milk"), ToDo(task="call mom")])
+    await todos.set_status(keys[:1], "done")
+
+    assert embedded and not any("entries" in text for text in embedded)
+
+
+def test_deadline_key_orders_timezones_and_missing_deadlines():
+    aware = datetime(2025, 3, 1, 10, 0, tzinfo=timezone(timedelta(hours=2)))
+    assert deadline_key(aware) == deadline_key(datetime(2025, 3, 1, 8, 0))
+    assert deadline_key(aware.isoformat()) == deadline_key(aware)
+    assert deadline_key(None) > deadline_key(datetime(9999, 1, 1))
+
+
+@pytest.mark.asyncio
+async def test_tools_complete_and_list_todos():
+    store = InMemoryStore()
+    config = {"configurable": {"user_id": "u1"}}
+    keys = await seed(TodoList(store, "u1"))
+
+    (update,) = await dispatch_tool_calls(
+        [{"name": "UpdateTodos", "args": {"todo_ids": [keys["1d"], "nope"], "status": "done"}, "id": "c1"}],
+        config=config,
+        store=store,
+    )
+    (listing,) = await dispatch_tool_calls(
+        [{"name": "ListTodos", "args": {"status": "not started"}, "id": "c2"}],
+        config=config,
+        store=store,
+    )
+
+    assert update.content == "Marked 1 todos as done; not found: nope"
+    assert listing.content.splitlines()[0].startswith(f"[{keys['3d']}]: ")
+    assert "4 of 4 todos" in listing.content
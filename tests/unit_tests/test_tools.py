@@ -0,0 +1,156 @@
+import asyncio
+import sys
+import time
+from typing import Any
+
+import pytest
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+from langgraph.store.memory import InMemoryStore
+
+from maltai_agent.models import ModelRegistry, tool_name
+from maltai_agent.tools.dispatch import TOOLS, dispatch_tool_calls
+
+CONFIG = {"configurable": {"user_id": "u1"}}
+
+
+def call(name: str, args: dict, id: str) -> dict:
+    return {"name": name, "args": args, "id": id, "type": "tool_call"}
+
+
+MIXED_CALLS = [
+    call("AddTodo", {"task": "buy milk"}, "c1"),
+    call("upsert_memory", {"content": "likes tea", "context": "chat"}, "c2"),
+    call("UpdateProfile", {"name": "Ana"}, "c3"),
+    call("UpdateInstructions", {"instruction": "be brief", "category": "style"}, "c4"),
+    call("AddTodo", {"task": "call mom"}, "c5"),
+]
+
+
+@pytest.mark.asyncio
+async def test_dispatch_runs_every_call_of_mixed_types():
+    store = InMemoryStore()
+
+    results = await dispatch_tool_calls(MIXED_CALLS, config=CONFIG, store=store)
+
+    assert [r.tool_call_id for r in results] == ["c1", "c2", "c3", "c4", "c5"]
+    assert all(r.status == "success" for r in results)
+    todos = await store.asearch(("todos", "u1"))
+    assert sorted(t.value["task"] for t in todos) == ["buy milk", "call mom"]
+    assert (await store.asearch(("memories", "u1")))[0].value["content"] == "likes tea"
+    assert (await store.aget(("profile", "u1"), "profile")).value["name"] == "Ana"
+    assert (await store.aget(("instructions", "u1"), "style")).value == {"instruction": "be brief"}
+
+
+@pytest.mark.asyncio
+async def test_failures_are_reported_per_call():
+    async def broken(name: str) -> str:
+        raise RuntimeError("store is down")
+
+    tools = {**TOOLS, "UpdateProfile": StructuredTool.from_function(coroutine=broken, name="UpdateProfile", description="Fails")}
+    calls = [
+        call("UpdateProfile", {"name": "Ana"}, "c1"),
+        call("Unknown", {}, "c2"),
+        call("AddTodo", {"task": "buy milk"}, "c3"),
+    ]
+
+    results = await dispatch_tool_calls(calls, config=CONFIG, store=InMemoryStore(), tools=tools)
+
+    assert [r.status for r in results] == ["error", "error", "success"]
+    assert "store is down" in results[0].content
+    assert "unknown tool" in results[1].content
+
+
+@pytest.mark.asyncio
+async def test_arguments_are_validated_against_the_tool_schema():
+    store = InMemoryStore()
+    calls = [
+        call("UpdateTodos", {"todo_ids": "todo_1", "status": "done"}, "c1"),
+        call("UpdateTodos", {"todo_ids": ["todo_1"], "status": "completed"}, "c2"),
+        call("AddTodo", {"name": "buy milk"}, "c3"),
+        call("AddTodo", {"task": "buy milk", "deadline": "2030-01-31T09:00:00"}, "c4"),
+    ]
+
+    results = await dispatch_tool_calls(calls, config=CONFIG, store=store)
+
+    assert [r.status for r in results] == ["error", "error", "error", "success"]
+    assert "invalid arguments for UpdateTodos: todo_ids: Input should be a valid list" in results[0].content
+    assert "status: Input should be" in results[1].content
+    assert "task: Field required" in results[2].content
+    # Arguments are coerced to the annotated types
+    (todo,) = await store.asearch(("todos", "u1"))
+    assert todo.value["deadline"].year == 2030
+
+
+@pytest.mark.asyncio
+async def test_calls_run_concurrently():
+    async def slow() -> str:
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    tools = {name: StructuredTool.from_function(coroutine=slow, name=name, description=name) for name in "AB"}
+    calls = [call("A" if i % 2 else "B", {}, f"c{i}") for i in range(6)]
+
+    start = time.perf_counter()
+    results = await dispatch_tool_calls(calls, config=CONFIG, store=InMemoryStore(), tools=tools)
+    elapsed = time.perf_counter() - start
+
+    assert [r.content for r in results] == ["ok"] * 6
+    assert elapsed < 0.25
+
+
+class ToolFakeModel(GenericFakeChatModel):
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self.bind(tools=[tool_name(tool) for tool in tools], **kwargs)
+
+
+class FakeAudio:
+    def __init__(self) -> None:
+        self.spoken: list[str] = []
+        self.spoken_message_ids: set[str] = set()
+
+    async def arecord_audio(self, *args: Any) -> HumanMessage:
+        return HumanMessage(content="remind me to buy milk, I like tea")
+
+    async def aspeak_response(self, text: str, *args: Any) -> None:
+        self.spoken.append(text)
+
+
+@pytest.mark.parametrize(
+    "followup, env",
+    # The environment overrides the config, so TOOL_FOLLOWUP=0 turns it off
+    [(False, None), (True, None), (True, "0")],
+)
+@pytest.mark.asyncio
+async def test_graph_handles_multi_tool_turn(monkeypatch, followup, env):
+    import maltai_agent  # noqa: F401
+
+    if env is not None:
+        monkeypatch.setenv("TOOL_FOLLOWUP", env)
+
+    graph_module = sys.modules["maltai_agent.graph"]
+    replies = iter(
+        [
+            AIMessage(content="", tool_calls=MIXED_CALLS[:2]),
+            AIMessage(content="Done, I added the todo and noted that you like tea."),
+        ]
+    )
+    monkeypatch.setattr(graph_module, "models", ModelRegistry(lambda model, provider: ToolFakeModel(messages=replies)))
+    audio = FakeAudio()
+    monkeypatch.setattr(graph_module, "get_audio_processor", lambda: audio)
+    store = InMemoryStore()
+    graph = graph_module.builder.compile(store=store)
+
+    result = await graph.ainvoke(
+        {"messages": []}, {"configurable": {"user_id": "u1", "tool_followup": followup}}
+    )
+
+    tool_messages = [m for m in result["messages"] if isinstance(m, ToolMessage)]
+    assert [m.tool_call_id for m in tool_messages] == ["c1", "c2"]
+    assert len(await store.asearch(("todos", "u1"))) == 1
+    assert len(await store.asearch(("memories", "u1"))) == 1
+    if followup and env is None:
+        assert audio.spoken == ["Done, I added the todo and noted that you like tea."]
+    else:
+        assert audio.spoken == ["Added todo: buy milk " + tool_messages[1].content]
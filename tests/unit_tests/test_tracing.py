@@ -0,0 +1,133 @@
+import asyncio
+import json
+import sys
+from typing import Any
+
+import numpy as np
+import pytest
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.store.memory import InMemoryStore
+
+from maltai_agent import audio, tracing
+from maltai_agent.audio import AudioProcessor
+from maltai_agent.models import ModelRegistry
+from maltai_agent.prompt_layout import VersionedStore
+from maltai_agent.tracing import NO_SPAN, JSONLSink, Tracer
+
+
+def test_spans_are_timed_annotated_and_bounded():
+    tracer = Tracer(capacity=3, enabled=True)
+
+    with tracer.span("outer", bytes_up=10) as outer:
+        with tracer.span("inner") as inner:
+            tracing.annotate(tokens_in=5)
+        tracing.annotate(bytes_up=2, voice="adam")
+    with pytest.raises(ValueError):
+        with tracer.span("outer"):
+            raise ValueError
+    for _ in range(2):
+        with tracer.span("other"):
+            pass
+
+    assert outer.attrs == {"bytes_up": 12, "voice": "adam"}
+    assert inner.attrs == {"tokens_in": 5}
+    assert outer.duration_s >= inner.duration_s > 0
+    # The ring buffer keeps the three most recent spans
+    assert [span.name for span in tracer.spans()] == ["outer", "other", "other"]
+    assert tracer.spans()[0].error == "ValueError"
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+
+    assert tracer.span("stage") is NO_SPAN
+    with tracer.span("stage") as span:
+        span.add(bytes_up=1)
+        tracing.annotate(bytes_up=1)
+    assert tracer.spans() == []
+    assert "maltai_span_seconds_count" not in tracer.prometheus_text()
+
+
+def test_prometheus_text_and_jsonl_sink(tmp_path):
+    tracer = Tracer(enabled=True, buckets=(0.1, 1.0))
+    sink = JSONLSink(str(tmp_path / "traces" / "spans.jsonl"))
+    tracer.sinks.append(sink)
+
+    with tracer.span("audio.play", queue_wait_s=0.25, bytes=100):
+        pass
+    with tracer.span("audio.play", queue_wait_s=0.5, bytes=50):
+        pass
+    sink.close()
+
+    text = tracer.prometheus_text()
+    assert '# TYPE maltai_span_seconds histogram' in text
+    assert 'maltai_span_seconds_bucket{span="audio.play",le="0.1"} 2' in text
+    assert 'maltai_span_seconds_bucket{span="audio.play",le="+Inf"} 2' in text
+    assert 'maltai_span_seconds_count{span="audio.play"} 2' in text
+    assert 'maltai_queue_wait_seconds_total{span="audio.play"} 0.75' in text
+    assert 'maltai_bytes_total{span="audio.play"} 150' in text
+    lines = [json.loads(line) for line in (tmp_path / "traces" / "spans.jsonl").read_text().splitlines()]
+    assert [line["queue_wait_s"] for line in lines] == [0.25, 0.5]
+
+
+class FakeModel(GenericFakeChatModel):
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self
+
+
+class FakeTranscriber:
+    def transcribe(self, audio_data, sample_rate: int) -> str:
+        return "remind me to call mom"
+
+
+class FakeProcessor(AudioProcessor):
+    def _capture(self, endpointing: str) -> list:
+        return [np.zeros(16000, dtype=np.int16)]
+
+    async def _aconvert(self, text: str) -> bytes:
+        data = text.encode()
+        tracing.annotate(bytes_down=len(data))
+        return data
+
+
+@pytest.mark.asyncio
+async def test_graph_nodes_and_audio_stages_are_traced(monkeypatch):
+    import maltai_agent  # noqa: F401
+
+    graph_module = sys.modules["maltai_agent.graph"]
+    tracer = Tracer(enabled=True)
+    monkeypatch.setattr(tracing, "tracer", tracer)
+    monkeypatch.setattr(audio, "play", lambda data: None)
+    replies = iter([AIMessage(content="I will remind you.")])
+    monkeypatch.setattr(graph_module, "models", ModelRegistry(lambda model, provider: FakeModel(messages=replies)))
+    graph = graph_module.builder.compile(store=VersionedStore(InMemoryStore()))
+    config = {"configurable": {"user_id": "u1", "audio_processor": FakeProcessor(transcriber=FakeTranscriber())}}
+
+    await graph.ainvoke({"messages": []}, config)
+
+    names = {span.name for span in tracer.spans()}
+    assert {
+        "graph.audio_input", "graph.process_input", "graph.audio_output", "graph.summarize_history",
+        "audio.transcribe", "audio.synthesize", "audio.play", "store.batch",
+    } <= names
+    (model_call,) = tracer.spans("graph.process_input")
+    assert model_call.attrs["tokens_in"] > 0 and model_call.attrs["tokens_out"] > 0
+    assert tracer.spans("audio.transcribe")[0].attrs["audio_s"] == 1.0
+    assert tracer.spans("audio.synthesize")[0].attrs["bytes_down"] == len(b"I will remind you.")
+
+
+@pytest.mark.asyncio
+async def test_traced_keeps_async_nodes_concurrent(monkeypatch):
+    tracer = Tracer(enabled=True)
+    monkeypatch.setattr(tracing, "tracer", tracer)
+
+    @tracing.traced("node")
+    async def node(i: int) -> int:
+        await asyncio.sleep(0.01)
+        tracing.annotate(items=i)
+        return i
+
+    assert await asyncio.gather(*(node(i) for i in range(5))) == [0, 1, 2, 3, 4]
+    # Each call annotated its own span, although they overlapped
+    assert sorted(span.attrs["items"] for span in tracer.spans("node")) == [0, 1, 2, 3, 4]
@@ -0,0 +1,180 @@
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from maltai_agent import audio, tts
+from maltai_agent.audio import AudioProcessor, PCMOutput
+from maltai_agent.tts import load_local_voice, parse_backend, pcm_sample_rate
+from maltai_agent.tts_cache import SpeechCache
+
+
+class FakeStream:
+    on_write = None
+
+    def __init__(self, samplerate: int, **kwargs) -> None:
+        self.samplerate = samplerate
+        self.active = False
+        self.closed = False
+        self.written = bytearray()
+
+    def start(self) -> None:
+        self.active = True
+
+    def stop(self) -> None:
+        self.active = False
+
+    abort = stop
+
+    def write(self, data) -> None:
+        assert len(data) % 2 == 0
+        self.written += data
+        if self.on_write:
+            self.on_write()
+
+    def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def streams(monkeypatch) -> list[FakeStream]:
+    opened: list[FakeStream] = []
+
+    def open_stream(**kwargs) -> FakeStream:
+        opened.append(FakeStream(**kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(audio, "get_sounddevice", lambda: SimpleNamespace(RawOutputStream=open_stream))
+    return opened
+
+
+def test_pcm_output_keeps_one_stream_open(streams, monkeypatch):
+    output = PCMOutput(22050, block_frames=2)
+
+    # A sample split between two chunks is written whole
+    output.write(b"\x01\x02\x03")
+    output.write(b"\x04\x05\x06\x07\x08\x09")
+    # Stopped after the first block: the rest is dropped, and so are later writes
+    monkeypatch.setattr(FakeStream, "on_write", output.stop)
+    output.write(b"\x00" * 16, 16000)
+    monkeypatch.setattr(FakeStream, "on_write", None)
+    output.write(b"\x02\x02", 16000)
+    output.resume()
+    output.write(b"\x01\x01", 16000)
+    output.close()
+
+    assert [stream.samplerate for stream in streams] == [22050, 16000]
+    assert bytes(streams[0].written) == b"\x01\x02\x03\x04\x05\x06\x07\x08"
+    assert bytes(streams[1].written) == b"\x00" * 4 + b"\x01\x01"
+    assert streams[0].closed and streams[1].closed
+
+
+class FakeVoice:
+    config = SimpleNamespace(sample_rate=22050)
+
+    def __init__(self) -> None:
+        self.texts: list[str] = []
+
+    def synthesize_stream_raw(self, text: str):
+        self.texts.append(text)
+        for sentence in text.split(". "):
+            yield sentence.encode()[: len(sentence) // 2 * 2]
+
+
+@pytest.mark.asyncio
+async def test_local_voice_plays_on_pcm_stream_and_is_cached(streams, tmp_path, monkeypatch):
+    voice = FakeVoice()
+    monkeypatch.setattr(tts, "load_local_voice", lambda path: voice)
+    monkeypatch.setattr(audio, "play", lambda data: pytest.fail("PCM must not go through a player"))
+    processor = AudioProcessor(speech_cache=SpeechCache(str(tmp_path)))
+
+    await processor.aspeak_response("**Sure.** It is done", "local")
+    await processor.aspeak_response("Sure. It is done", "local:en_US-lessac-medium.onnx")
+    processor.close()
+
+    assert voice.texts == ["Sure. It is done"]
+    (stream,) = streams
+    assert bytes(stream.written) == b"SureIt is done" * 2
+    assert processor.speech_cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_holds_for_the_rest_of_a_streamed_reply(streams, monkeypatch):
+    monkeypatch.setattr(tts, "load_local_voice", lambda path: FakeVoice())
+    processor = AudioProcessor()
+
+    async def tokens(*parts: str):
+        for part in parts:
+            yield part
+
+    # Stopped while the first sentence plays
+    monkeypatch.setattr(FakeStream, "on_write", processor.pcm_output.stop)
+    await processor.speak_stream(tokens("First one. ", "Second one. ", "Third one."), "local")
+    monkeypatch.setattr(FakeStream, "on_write", None)
+    await processor.aspeak_response("Next reply", "local")
+    processor.close()
+
+    (stream,) = streams
+    written = bytes(stream.written)
+    assert written.startswith(b"First") and b"Third" not in written
+    assert written.endswith(b"Next reply")
+
+
+def test_prewarm_uses_the_local_voice(streams, tmp_path, monkeypatch):
+    voice = FakeVoice()
+    monkeypatch.setattr(tts, "load_local_voice", lambda path: voice)
+    monkeypatch.setattr(AudioProcessor, "_convert", lambda self, text: pytest.fail("ElevenLabs must not be called"))
+    processor = AudioProcessor(speech_cache=SpeechCache(str(tmp_path)))
+
+    assert processor.prewarm(["Okay."], "local") == 1
+    assert processor.prewarm(["Okay."], "local") == 0
+    processor.speak_response("Okay.", "local")
+    processor.close()
+
+    assert voice.texts == ["Okay."]
+    assert processor.speech_cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_files_are_read_and_written_on_audio_threads(tmp_path, monkeypatch):
+    processor = AudioProcessor(speech_cache=SpeechCache(str(tmp_path)))
+    cache = processor.speech_cache
+    threads = []
+
+    def on_thread(method):
+        def record(*args):
+            threads.append(threading.current_thread().name)
+            return method(*args)
+
+        return record
+
+    async def convert(text: str) -> bytes:
+        return text.encode()
+
+    monkeypatch.setattr(processor, "_aconvert", convert)
+    monkeypatch.setattr(cache, "get", on_thread(cache.get))
+    monkeypatch.setattr(cache, "put", on_thread(cache.put))
+    assert await processor.asynthesize("Hello.") == b"Hello."
+    assert bytes(await processor.asynthesize("Hello.")) == b"Hello."
+    assert await processor.aprewarm(["Hello.", "Bye."]) == 1
+    processor.close()
+
+    assert len(threads) == 4
+    assert all(name.startswith("audio") for name in threads)
+
+
+def test_backend_specs():
+    assert parse_backend("elevenlabs") == ("elevenlabs", None)
+    assert parse_backend("local:voices/amy.onnx") == ("local", "voices/amy.onnx")
+    with pytest.raises(ValueError):
+        parse_backend("cloud")
+    assert pcm_sample_rate("pcm_22050") == 22050
+    assert pcm_sample_rate("mp3_22050_32") is None
+
+
+def test_local_backend_needs_piper(monkeypatch):
+    monkeypatch.setitem(sys.modules, "piper.voice", None)
+    load_local_voice.cache_clear()
+    with pytest.raises(ImportError, match="pip install piper-tts"):
+        load_local_voice("voice.onnx")
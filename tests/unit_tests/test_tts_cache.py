@@ -0,0 +1,103 @@
+import mmap
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from maltai_agent import audio
+from maltai_agent.tts_cache import SpeechCache
+
+VOICE = {"voice_id": "v1", "model_id": "m1", "output_format": "mp3_22050_32"}
+
+
+def test_key_normalizes_text_and_covers_voice(tmp_path):
+    cache_key = SpeechCache(str(tmp_path)).key
+    base = cache_key("Added todo:  **buy milk**\n", **VOICE)
+    assert base == cache_key("Added todo: buy milk", **VOICE)
+    assert base != cache_key("Added todo: buy bread", **VOICE)
+    assert base != cache_key("Added todo: buy milk", **{**VOICE, "voice_id": "v2"})
+    assert base != cache_key("Added todo: buy milk", **{**VOICE, "output_format": "pcm_16000"})
+    assert base != cache_key("Added todo: buy milk", **VOICE, voice_settings={"stability": 0.5})
+
+
+def test_hit_is_memory_mapped_and_counted(tmp_path):
+    cache = SpeechCache(str(tmp_path))
+    key = cache.key("Done.", **VOICE)
+    calls = []
+
+    def synthesize():
+        calls.append(1)
+        return b"mp3 frames"
+
+    assert cache.get_or_synthesize(key, synthesize) == b"mp3 frames"
+    audio_data = cache.get_or_synthesize(key, synthesize)
+
+    assert isinstance(audio_data, mmap.mmap)
+    assert audio_data[:] == b"mp3 frames"
+    assert len(calls) == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1, "bytes": 10}
+
+
+def test_least_recently_played_entries_are_evicted(tmp_path):
+    cache = SpeechCache(str(tmp_path), max_bytes=250)
+    for name in "abc":
+        cache.put(name * 64, name.encode() * 100)
+    assert "a" * 64 not in cache
+    assert cache.size == 200
+
+    cache.get("b" * 64)
+    cache.put("d" * 64, b"d" * 100)
+
+    assert "c" * 64 not in cache and "b" * 64 in cache
+    assert not os.path.exists(cache.path("c" * 64))
+
+
+def test_entries_and_recency_survive_restarts(tmp_path):
+    cache = SpeechCache(str(tmp_path))
+    for i, name in enumerate("abc"):
+        cache.put(name * 64, b"x" * 100)
+        os.utime(cache.path(name * 64), ns=(i, i))
+
+    reopened = SpeechCache(str(tmp_path), max_bytes=250)
+
+    assert "a" * 64 not in reopened
+    assert reopened.get("b" * 64)[:] == b"x" * 100
+
+
+class FakeTextToSpeech:
+    def __init__(self):
+        self.texts = []
+
+    def convert(self, *, text, **kwargs):
+        self.texts.append(text)
+        return iter([b"audio:", text.encode()])
+
+
+@pytest.fixture
+def fake_tts(monkeypatch):
+    tts = FakeTextToSpeech()
+    monkeypatch.setattr(audio, "get_elevenlabs_client", lambda: SimpleNamespace(text_to_speech=tts))
+    return tts
+
+
+def test_prewarmed_phrases_play_without_synthesis(tmp_path, monkeypatch, fake_tts):
+    played = []
+    monkeypatch.setattr(audio, "play", lambda data: played.append(bytes(data)))
+    processor = audio.AudioProcessor(speech_cache=SpeechCache(str(tmp_path)))
+
+    assert processor.prewarm(["Okay.", "Anything else?"]) == 2
+    assert processor.prewarm(["Okay."]) == 0
+    processor.speak_response("**Okay.**")
+    processor.speak_response("Something new.")
+
+    assert fake_tts.texts == ["Okay.", "Anything else?", "Something new."]
+    assert played == [b"audio:Okay.", b"audio:Something new."]
+    assert processor.speech_cache.hits == 1
+
+
+def test_without_cache_every_response_is_synthesized(fake_tts):
+    processor = audio.AudioProcessor()
+    processor.synthesize("Okay.")
+    processor.synthesize("Okay.")
+    assert fake_tts.texts == ["Okay.", "Okay."]
+    assert processor.prewarm(["Okay."]) == 0
@@ -0,0 +1,120 @@
+import numpy as np
+from scipy.io import wavfile
+
+from maltai_agent.vad import (
+    Endpointer,
+    EnergyVAD,
+    VADConfig,
+    endpoint,
+    iter_blocks,
+    speech_bounds,
+    trim_silence,
+)
+
+SCRIPT = [
+    ("silence", 0.6),
+    ("speech", 1.0),
+    ("silence", 0.3),  # a pause shorter than the hangover
+    ("speech", 0.6),
+    ("silence", 2.0),
+]
+
+
+def read(path):
+    sample_rate, samples = wavfile.read(path)
+    return sample_rate, samples
+
+
+def test_energy_vad_flags_speech_frames(wav_fixture):
+    sample_rate, samples = read(wav_fixture([("silence", 0.5), ("speech", 0.5)]))
+    mask = EnergyVAD(sample_rate=sample_rate).classify(samples)
+
+    assert not mask[:20].any()
+    assert mask[-20:].all()
+
+
+def test_broadband_hiss_does_not_trigger(wav_fixture):
+    sample_rate, samples = read(wav_fixture([("hiss", 2.0)]))
+
+    assert EnergyVAD(sample_rate=sample_rate).classify(samples).mean() < 0.1
+    assert endpoint(iter_blocks(samples), sample_rate=sample_rate).size == 0
+
+
+def test_endpointer_stops_after_hangover(wav_fixture):
+    config = VADConfig(hangover_ms=500, pre_roll_ms=200, post_roll_ms=100)
+    sample_rate, samples = read(wav_fixture(SCRIPT))
+    endpointer = Endpointer(config, sample_rate)
+
+    consumed = 0
+    for block in iter_blocks(samples):
+        consumed += len(block)
+        if endpointer.feed(block):
+            break
+
+    speech_end = 2.5  # seconds
+    assert endpointer.done
+    # Capture stops shortly after speech ends, well before the file does.
+    assert consumed / sample_rate < speech_end + 0.5 + 0.2
+    # The short pause did not end the utterance.
+    utterance = endpointer.utterance()
+    expected = (speech_end - 0.6) + 0.2 + 0.1
+    assert abs(len(utterance) / sample_rate - expected) < 0.1
+
+
+def test_endpointer_trims_leading_silence(wav_fixture):
+    sample_rate, samples = read(wav_fixture(SCRIPT))
+    endpointer = Endpointer(VADConfig(pre_roll_ms=0), sample_rate)
+    for block in iter_blocks(samples):
+        if endpointer.feed(block):
+            break
+
+    start = endpointer.speech_start * endpointer.vad.frame_length
+    utterance = endpointer.utterance()
+    assert abs(start / sample_rate - 0.6) < 0.05
+    assert np.array_equal(utterance, samples[start : start + len(utterance)])
+
+
+def test_endpointer_times_out_without_speech(wav_fixture):
+    sample_rate, samples = read(wav_fixture([("silence", 3.0)]))
+    endpointer = Endpointer(VADConfig(start_timeout_s=1.0), sample_rate)
+
+    consumed = 0
+    for block in iter_blocks(samples):
+        consumed += len(block)
+        if endpointer.feed(block):
+            break
+
+    assert endpointer.done
+    assert not endpointer.triggered
+    assert consumed / sample_rate < 1.1
+    assert endpointer.utterance().size == 0
+
+
+def test_endpointer_caps_utterance_length(wav_fixture):
+    sample_rate, samples = read(wav_fixture([("speech", 3.0)]))
+    utterance = endpoint(
+        iter_blocks(samples), VADConfig(max_utterance_s=1.0), sample_rate
+    )
+    assert len(utterance) / sample_rate <= 1.2
+
+
+def test_trim_silence_keeps_inner_pauses(wav_fixture):
+    sample_rate, samples = read(wav_fixture(SCRIPT))
+    trimmed = trim_silence(
+        samples, VADConfig(pre_roll_ms=0, post_roll_ms=0), sample_rate
+    )
+    assert abs(len(trimmed) / sample_rate - 1.9) < 0.1
+
+
+def test_trim_silence_without_speech_is_empty(wav_fixture):
+    sample_rate, samples = read(wav_fixture([("silence", 1.0)]))
+    assert trim_silence(samples, sample_rate=sample_rate).size == 0
+
+
+def test_speech_bounds_over_pieces_matches_whole_recording(wav_fixture):
+    sample_rate, samples = read(wav_fixture(SCRIPT))
+    pieces = list(iter_blocks(samples, 16000))
+
+    start, end = speech_bounds(pieces, sample_rate=sample_rate)
+
+    assert np.array_equal(samples[start:end], trim_silence(samples, sample_rate=sample_rate))
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+from maltai_agent.vad import iter_blocks
+from maltai_agent.wakeword import FeatureExtractor, WakeWordDetector, subsequence_dtw
+
+from .synthetic_audio import SAMPLE_RATE, room_noise, synthesize_word, to_int16
+
+WAKE_WORD = [500, 1600, 900]
+
+
+@pytest.fixture
+def detector():
+    recordings = [
+        to_int16(synthesize_word(WAKE_WORD, stretch, pitch) + room_noise(0.54 * stretch, seed))
+        for seed, (stretch, pitch) in enumerate([(1.0, 120), (0.9, 130), (1.1, 110)])
+    ]
+    return WakeWordDetector.enroll(recordings)
+
+
+def replay(detector, samples):
+    return [d for block in iter_blocks(samples) if (d := detector.feed(block))]
+
+
+def test_features_shape():
+    features = FeatureExtractor(SAMPLE_RATE)
+    mfcc = features.mfcc(np.zeros(SAMPLE_RATE, dtype=np.int16))
+    assert mfcc.shape == (features.n_frames(SAMPLE_RATE), 12)
+    assert features.log_mel(np.zeros(100, dtype=np.int16)).shape == (0, 40)
+
+
+def test_subsequence_dtw_finds_template_inside_window():
+    rng = np.random.default_rng(0)
+    template = rng.normal(size=(20, 12))
+    window = np.concatenate((rng.normal(size=(30, 12)), template, rng.normal(size=(10, 12))))
+    costs = subsequence_dtw(template, window)
+    assert costs.argmin() == 49
+    assert costs.min() < 1e-5
+
+
+def test_detects_wake_word_near_its_end(detector):
+    word = synthesize_word(WAKE_WORD, stretch=1.05, pitch=125, amplitude=3000)
+    samples = to_int16(room_noise(1.0, 10), word, room_noise(1.0, 11))
+
+    detections = replay(detector, samples)
+
+    word_end = (SAMPLE_RATE + len(word)) / SAMPLE_RATE
+    assert len(detections) == 1
+    latency = detections[0].sample_index / SAMPLE_RATE - word_end
+    assert -0.1 < latency < 0.25
+
+
+def test_detects_faster_louder_wake_word(detector):
+    samples = to_int16(
+        room_noise(1.0, 12),
+        synthesize_word(WAKE_WORD, stretch=0.85, pitch=140, amplitude=8000),
+        room_noise(1.0, 13),
+    )
+    assert len(replay(detector, samples)) == 1
+
+
+@pytest.mark.parametrize("formants", [[900, 500, 1600], [1600, 900, 500], [700, 700, 700]])
+def test_ignores_other_words(detector, formants):
+    samples = to_int16(room_noise(1.0, 14), synthesize_word(formants), room_noise(1.0, 15))
+    assert replay(detector, samples) == []
+
+
+def test_silence_skips_feature_matching(detector):
+    assert replay(detector, to_int16(room_noise(5.0, 16))) == []
+    assert detector.checks == 0
+
+
+def test_from_wav_files(tmp_path):
+    path = tmp_path / "wake.wav"
+    wavfile.write(path, SAMPLE_RATE, to_int16(synthesize_word(WAKE_WORD)))
+    detector = WakeWordDetector.from_wav_files([str(path)])
+    assert len(detector.templates) == 1
+
+    wavfile.write(path, 8000, to_int16(synthesize_word(WAKE_WORD)))
+    with pytest.raises(ValueError):
+        WakeWordDetector.from_wav_files([str(path)])